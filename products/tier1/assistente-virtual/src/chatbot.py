@@ -14,7 +14,7 @@ import uvicorn
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from shared.config.settings import settings
-from shared.config.database import get_db
+from shared.config.database import get_db, get_pool_status
 from shared.database.models import Chat, User
 from shared.utils.logger import setup_logger
 from shared.middleware.security import add_security_middleware, configure_cors_seguro
@@ -83,7 +83,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "database_pool": get_pool_status()}
 
 
 @app.websocket("/ws/{user_id}")
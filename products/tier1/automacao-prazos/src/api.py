@@ -14,7 +14,7 @@ from sqlalchemy.orm import Session
 # Adiciona o diretório pai ao path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
-from shared.config.database import get_db
+from shared.config.database import get_db, get_pool_status
 from shared.config.settings import settings
 from shared.database.models import Prazo, Notificacao
 from shared.utils.logger import setup_logger
@@ -77,7 +77,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now()}
+    return {"status": "healthy", "timestamp": datetime.now(), "database_pool": get_pool_status()}
 
 
 @app.post("/prazos/", response_model=PrazoResponse)
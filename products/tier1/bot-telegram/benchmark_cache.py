@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do CacheService
+Mede get/set por segundo com 100 mil entradas, incluindo evicção por memória
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Adicionar ao path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from services.cache_service import CacheService
+
+N_ENTRADAS = 100_000
+
+
+def _registro(i: int) -> dict:
+    """Registro no formato de uma consulta de processo"""
+    return {
+        'numero': f"{i:07d}-00.2024.8.13.0702",
+        'classe': 'Procedimento Comum Cível',
+        'partes': [{'nome': f'Parte {i}', 'polo': 'ativo'}, {'nome': 'Réu', 'polo': 'passivo'}],
+        'movimentacoes': [f'Movimento {j}' for j in range(5)],
+    }
+
+
+def _medir(descricao: str, n: int, func):
+    inicio = time.perf_counter()
+    func()
+    duracao = time.perf_counter() - inicio
+    print(f"  {descricao:<40} {n / duracao:>12,.0f} ops/s  ({duracao * 1000:.1f} ms)")
+
+
+def main():
+    print("=" * 60)
+    print(f"⏱️  BENCHMARK DO CACHE ({N_ENTRADAS:,} entradas)")
+    print("=" * 60)
+
+    cache = CacheService(start_cleanup_thread=False)
+    # 100 mil registros passam de MAX_MEMORY_MB: sem folga, a inserção já evictaria
+    # e as leituras "hit" mediriam misses. A evicção é medida à parte, no final.
+    cache._max_bytes = 4 * 1024 * 1024 * 1024
+    registros = [_registro(i) for i in range(N_ENTRADAS)]
+    chaves = [f"processo:{i}" for i in range(N_ENTRADAS)]
+
+    def inserir():
+        for chave, valor in zip(chaves, registros):
+            cache.set(chave, valor, cache_type='processo')
+
+    def ler_hits():
+        for chave in chaves:
+            cache.get(chave)
+
+    def ler_misses():
+        for i in range(N_ENTRADAS):
+            cache.get(f"inexistente:{i}")
+
+    def sobrescrever():
+        for chave, valor in zip(chaves, registros):
+            cache.set(chave, valor, cache_type='processo')
+
+    _medir("set (inserção)", N_ENTRADAS, inserir)
+    entradas = cache.get_stats()['entries']
+    assert entradas == N_ENTRADAS, f"{N_ENTRADAS - entradas} entradas evictadas na inserção"
+    _medir("get (hit)", N_ENTRADAS, ler_hits)
+    _medir("get (miss)", N_ENTRADAS, ler_misses)
+    _medir("set (sobrescrita)", N_ENTRADAS, sobrescrever)
+
+    # Forçar evicção: limite abaixo do tamanho atual
+    cache._max_bytes = cache._total_size_bytes // 2
+
+    def inserir_com_eviccao():
+        for i, valor in enumerate(registros):
+            cache.set(f"novo:{i}", valor, cache_type='magistrado')
+
+    _medir("set (com evicção LRU)", N_ENTRADAS, inserir_com_eviccao)
+
+    stats = cache.get_stats()
+    print(f"\n📊 Entradas: {stats['entries']:,} | Memória: {stats['memory_mb']} MB | "
+          f"Evicções: {stats['evictions']:,} | Hit rate: {stats['hit_rate_percent']}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ from shared.utils.logger import bot_telegram_logger as logger
 from handlers.commands import register_command_handlers
 from handlers.messages import handle_message
 from services.database_service import db_service
+from services.async_executor import run_blocking, shutdown_executor
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -33,7 +34,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         username = update.effective_user.username or "Unknown"
         full_name = update.effective_user.full_name or "User"
         
-        user = db_service.get_or_create_user(user_id, username, full_name)
+        user = await run_blocking(db_service.get_or_create_user, user_id, username, full_name)
         if user:
             logger.info(f"Usuário {user_id} iniciou o bot")
         else:
@@ -71,6 +72,14 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     await handle_message(update, context)
 
 
+async def on_shutdown(application: Application):
+    """Libera cliente HTTP assíncrono e executor ao desligar o bot"""
+    from services.cnj_service import cnj_service
+    
+    await cnj_service.close()
+    shutdown_executor(wait=False)
+
+
 def create_application() -> Application:
     """Cria e configura a aplicação do Telegram"""
     
@@ -79,7 +88,12 @@ def create_application() -> Application:
         sys.exit(1)
     
     # Criar aplicação
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     # Registrar command handlers
     application.add_handler(CommandHandler("start", start))
@@ -20,6 +20,7 @@ from shared.utils.logger import bot_telegram_logger as logger
 # Importar serviço de IA
 from services.ia_service import ai_service
 from services.database_service import db_service
+from services.async_executor import run_blocking
 
 
 # Importar handlers completos com indicadores UX
@@ -37,7 +38,7 @@ async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Criar/buscar usuário
     try:
         user = update.effective_user
-        db_service.get_or_create_user(user.id, user.username or "User", user.full_name or "User")
+        await run_blocking(db_service.get_or_create_user, user.id, user.username or "User", user.full_name or "User")
     except:
         pass
     
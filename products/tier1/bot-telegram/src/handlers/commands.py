@@ -9,6 +9,7 @@ from datetime import datetime
 
 from shared.utils.logger import bot_telegram_logger as logger
 from handlers.messages import safe_reply_text
+from services.async_executor import run_blocking
 
 
 async def safe_send_typing(chat):
@@ -31,21 +32,17 @@ async def cmd_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         from services.auth_service import auth_service
         from utils.message_formatter import message_formatter
-        from shared.config.database import get_db
-        from shared.database.models import User
         
         user_id = update.effective_user.id
-        is_auth = auth_service.is_authenticated(user_id)
+        is_auth = await run_blocking(auth_service.is_authenticated, user_id)
         
-        # Buscar último acesso se autenticado
+        # Buscar último acesso se autenticado (estado já em cache após is_authenticated)
         ultimo_acesso = None
         if is_auth:
             try:
-                db = next(get_db())
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = await run_blocking(auth_service.get_auth_state, user_id)
                 if user and user.ultimo_login:
                     ultimo_acesso = user.ultimo_login.strftime("%d/%m/%Y %H:%M")
-                db.close()
             except:
                 pass
         
@@ -67,7 +64,7 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     from services.auth_service import auth_service
     
     user_id = update.effective_user.id
-    is_auth = auth_service.is_authenticated(user_id)
+    is_auth = await run_blocking(auth_service.is_authenticated, user_id)
     
     help_text = f"""
 📚 **Comandos Disponíveis:**
@@ -152,26 +149,22 @@ async def cmd_prazos(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         from services.prazos_service import prazos_service
         from services.database_service import db_service
-        from shared.config.database import get_db
-        from shared.database.models import User
+        from services.auth_service import auth_service
         
         user_id = update.effective_user.id
         
         try:
-            # Buscar usuário
-            db = next(get_db())
-            user = db.query(User).filter(User.telegram_id == user_id).first()
-            db.close()
+            # Buscar usuário (id e estado de autenticação numa única consulta)
+            user = await run_blocking(auth_service.get_auth_state, user_id)
             
             if user:
                 # Buscar prazos reais do banco
-                prazos = db_service.get_user_prazos(user.id)
+                prazos = await run_blocking(db_service.get_user_prazos, user.id)
                 
                 # Sincronizar com Kermartin se autenticado
                 try:
-                    from services.auth_service import auth_service
-                    if auth_service.is_authenticated(user_id):
-                        prazos_kermartin = prazos_service.sincronizar_prazos_kermartin(user.id, user_id)
+                    if await run_blocking(auth_service.is_authenticated, user_id):
+                        prazos_kermartin = await run_blocking(prazos_service.sincronizar_prazos_kermartin, user.id, user_id)
                         # Adicionar prazos do Kermartin ao resultado
                         # (por enquanto apenas mostrar, pode ser melhorado para salvar no banco)
                         if prazos_kermartin:
@@ -224,7 +217,7 @@ async def cmd_alerta(update: Update, context: ContextTypes.DEFAULT_TYPE):
         from services.alertas_service import alertas_service
         from services.database_service import db_service
         
-        user = db_service.get_or_create_user(
+        user = await run_blocking(db_service.get_or_create_user,
             update.effective_user.id,
             update.effective_user.username or "User",
             update.effective_user.full_name or "User"
@@ -232,7 +225,7 @@ async def cmd_alerta(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         prefs = None
         if user:
-            prefs = alertas_service.get_user_alert_preferences(user.id)
+            prefs = await run_blocking(alertas_service.get_user_alert_preferences, user.id)
         
         # Montar mensagem com status atual
         if prefs:
@@ -288,7 +281,7 @@ async def cmd_processo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     from services.auth_service import auth_service
     
     user_id = update.effective_user.id
-    is_auth = auth_service.is_authenticated(user_id)
+    is_auth = await run_blocking(auth_service.is_authenticated, user_id)
     
     # Marcar que está aguardando número do processo
     context.user_data['aguardando_processo'] = True
@@ -326,19 +319,16 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         from services.auth_service import auth_service
         from utils.message_formatter import message_formatter
-        from shared.config.database import get_db
-        from shared.database.models import User
         
         user_id = update.effective_user.id
-        is_auth = auth_service.is_authenticated(user_id)
+        is_auth = await run_blocking(auth_service.is_authenticated, user_id)
         
         ultimo_login = None
         sessao_expira = None
         
         if is_auth:
             try:
-                db = next(get_db())
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = await run_blocking(auth_service.get_auth_state, user_id)
                 if user:
                     if user.ultimo_login:
                         ultimo_login = user.ultimo_login.strftime("%d/%m/%Y %H:%M")
@@ -347,7 +337,6 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         from datetime import timedelta
                         expira = user.ultimo_login + timedelta(hours=24)
                         sessao_expira = expira.strftime("%d/%m/%Y %H:%M")
-                db.close()
             except Exception as e:
                 logger.warning(f"Erro ao buscar dados do usuário: {e}")
         
@@ -370,11 +359,11 @@ async def cmd_magistrado(update: Update, context: ContextTypes.DEFAULT_TYPE):
     from services.auth_service import auth_service
     
     user_id = update.effective_user.id
-    is_auth = auth_service.is_authenticated(user_id, check_timeout=True)
+    is_auth = await run_blocking(auth_service.is_authenticated, user_id, check_timeout=True)
     
     if not is_auth:
         # Verificar se foi timeout ou apenas não autenticado
-        if auth_service.is_authenticated(user_id, check_timeout=False):
+        if await run_blocking(auth_service.is_authenticated, user_id, check_timeout=False):
             # Sessão expirada
             await update.message.reply_text(
                 "⏰ **Sessão Expirada**\n\n"
@@ -418,11 +407,11 @@ async def cmd_promotor(update: Update, context: ContextTypes.DEFAULT_TYPE):
     from services.auth_service import auth_service
     
     user_id = update.effective_user.id
-    is_auth = auth_service.is_authenticated(user_id, check_timeout=True)
+    is_auth = await run_blocking(auth_service.is_authenticated, user_id, check_timeout=True)
     
     if not is_auth:
         # Verificar se foi timeout ou apenas não autenticado
-        if auth_service.is_authenticated(user_id, check_timeout=False):
+        if await run_blocking(auth_service.is_authenticated, user_id, check_timeout=False):
             await update.message.reply_text(
                 "⏰ **Sessão Expirada**\n\n"
                 "Sua sessão expirou após 24 horas de inatividade.\n\n"
@@ -464,11 +453,11 @@ async def cmd_comarca(update: Update, context: ContextTypes.DEFAULT_TYPE):
     from services.auth_service import auth_service
     
     user_id = update.effective_user.id
-    is_auth = auth_service.is_authenticated(user_id, check_timeout=True)
+    is_auth = await run_blocking(auth_service.is_authenticated, user_id, check_timeout=True)
     
     if not is_auth:
         # Verificar se foi timeout ou apenas não autenticado
-        if auth_service.is_authenticated(user_id, check_timeout=False):
+        if await run_blocking(auth_service.is_authenticated, user_id, check_timeout=False):
             await update.message.reply_text(
                 "⏰ **Sessão Expirada**\n\n"
                 "Sua sessão expirou após 24 horas de inatividade.\n\n"
@@ -553,10 +542,10 @@ async def cmd_estatisticas(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
         
         # Buscar estatísticas do Kermartin
-        stats = kermartin_service.get_estatisticas_gerais()
+        stats = await run_blocking(kermartin_service.get_estatisticas_gerais)
         
         # Buscar estatísticas de uso do bot
-        historico = db_service.get_historico_consultas(user_id, limit=1000)
+        historico = await run_blocking(db_service.get_historico_consultas, user_id, limit=1000)
         total_consultas = len(historico)
         
         tipos_consulta = {}
@@ -623,6 +612,8 @@ async def cmd_cache_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         from services.cache_service import cache_service
+        from services.single_flight import get_single_flight_stats
+        from shared.config.database import get_pool_status
         
         stats = cache_service.get_stats()
         memory_info = cache_service.get_memory_info()
@@ -640,6 +631,26 @@ async def cmd_cache_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • Cache usado: {stats['memory_mb']} MB / {stats['max_memory_mb']} MB
 • Uso: {stats['memory_usage_percent']}%"""
         
+        # Consultas agrupadas (single-flight): hits no cache, buscas reais e chamadas coalescidas
+        consultas = get_single_flight_stats()
+        if consultas:
+            stats_text += "\n\n**Consultas:**"
+            for nome, c in consultas.items():
+                stats_text += (
+                    f"\n• {nome.capitalize()}: {c['hits']} hits, {c['misses']} misses, "
+                    f"{c['coalesced']} coalescidas ({c['saved_percent']}% sem ir à fonte)"
+                )
+        
+        # Pool de conexões do banco
+        pool = get_pool_status()['sync']
+        if pool['mode'] == 'queue':
+            stats_text += f"""
+
+**Banco (pool):**
+• Conexões em uso: {pool['checked_out']} / {pool['size']} (+{max(pool['overflow'], 0)} overflow)
+• Espera média: {pool['wait_avg_ms']} ms (máx. {pool['wait_max_ms']} ms)
+• Timeouts: {pool['timeouts']}"""
+
         if memory_info.get('psutil_available'):
             stats_text += f"""
 
@@ -683,12 +694,12 @@ async def cmd_historico(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         if limpar:
             # Limpar histórico
-            sucesso, mensagem = db_service.limpar_historico(user_id, tipo)
+            sucesso, mensagem = await run_blocking(db_service.limpar_historico, user_id, tipo)
             await update.message.reply_text(mensagem, parse_mode=ParseMode.MARKDOWN)
             return
         
         # Buscar histórico
-        historico = db_service.get_historico_consultas(user_id, tipo, limit=10)
+        historico = await run_blocking(db_service.get_historico_consultas, user_id, tipo, limit=10)
         
         if not historico:
             tipo_texto = f" de '{tipo}'" if tipo else ""
@@ -766,8 +777,9 @@ async def cmd_perfil(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Buscar dados do usuário
     try:
-        db_user = db_service.get_or_create_user(user_id, user.username or "User", user.full_name or "User")
-        auth_status = "✅ Autenticado" if auth_service.is_authenticated(user_id) else "❌ Não autenticado"
+        db_user = await run_blocking(db_service.get_or_create_user, user_id, user.username or "User", user.full_name or "User")
+        is_auth = await run_blocking(auth_service.is_authenticated, user_id)
+        auth_status = "✅ Autenticado" if is_auth else "❌ Não autenticado"
         
         email = "Não cadastrado"
         if db_user and hasattr(db_user, 'email'):
@@ -781,7 +793,7 @@ async def cmd_perfil(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"🔒 Status: {auth_status}\n\n"
         )
         
-        if auth_service.is_authenticated(user_id):
+        if is_auth:
             perfil_text += "✅ Você tem acesso ao Kermartin\n\n"
         
         perfil_text += (
@@ -843,7 +855,7 @@ async def cmd_recuperar_senha(update: Update, context: ContextTypes.DEFAULT_TYPE
     if len(args) == 1:
         # Gerar código para o email informado
         email = args[0]
-        sucesso, mensagem, codigo = auth_service.gerar_codigo_recuperacao(email)
+        sucesso, mensagem, codigo = await run_blocking(auth_service.gerar_codigo_recuperacao, email)
         await update.message.reply_text(mensagem, parse_mode=ParseMode.MARKDOWN)
         return
     
@@ -852,7 +864,7 @@ async def cmd_recuperar_senha(update: Update, context: ContextTypes.DEFAULT_TYPE
         codigo = args[0]
         nova_senha = ' '.join(args[1:])
         
-        sucesso, mensagem = auth_service.recuperar_senha(codigo, nova_senha)
+        sucesso, mensagem = await run_blocking(auth_service.recuperar_senha, codigo, nova_senha)
         await update.message.reply_text(mensagem, parse_mode=ParseMode.MARKDOWN)
         return
 
@@ -881,7 +893,7 @@ async def cmd_trocar_senha(update: Update, context: ContextTypes.DEFAULT_TYPE):
     senha_atual = args[0]
     nova_senha = ' '.join(args[1:])
     
-    sucesso, mensagem = auth_service.trocar_senha(user_id, senha_atual, nova_senha)
+    sucesso, mensagem = await run_blocking(auth_service.trocar_senha, user_id, senha_atual, nova_senha)
     await update.message.reply_text(mensagem, parse_mode=ParseMode.MARKDOWN)
 
 
@@ -896,7 +908,7 @@ async def cmd_comparar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     
     # Verificar autenticação
-    if not auth_service.is_authenticated(user_id):
+    if not await run_blocking(auth_service.is_authenticated, user_id):
         await update.message.reply_text(
             auth_service.require_auth_message(),
             parse_mode=ParseMode.MARKDOWN
@@ -923,7 +935,7 @@ async def cmd_comparar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         if tipo == 'magistrado':
-            comparacao = kermartin_service.comparar_magistrados(nome1, nome2)
+            comparacao = await run_blocking(kermartin_service.comparar_magistrados, nome1, nome2)
             
             if not comparacao:
                 await update.message.reply_text(
@@ -989,7 +1001,7 @@ async def cmd_padroes(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     
     # Verificar autenticação
-    if not auth_service.is_authenticated(user_id):
+    if not await run_blocking(auth_service.is_authenticated, user_id):
         await update.message.reply_text(
             auth_service.require_auth_message(),
             parse_mode=ParseMode.MARKDOWN
@@ -1017,7 +1029,7 @@ async def cmd_padroes(update: Update, context: ContextTypes.DEFAULT_TYPE):
     valor = ' '.join(args[1:]).strip('"\'')
     
     try:
-        padroes = kermartin_service.analisar_padroes(tipo, valor)
+        padroes = await run_blocking(kermartin_service.analisar_padroes, tipo, valor)
         
         if not padroes:
             await update.message.reply_text(
@@ -1076,7 +1088,7 @@ async def cmd_logout(update: Update, context: ContextTypes.DEFAULT_TYPE):
     from services.auth_service import auth_service
     
     user_id = update.effective_user.id
-    sucesso, mensagem = auth_service.logout(user_id)
+    sucesso, mensagem = await run_blocking(auth_service.logout, user_id)
     
     await update.message.reply_text(mensagem, parse_mode=ParseMode.MARKDOWN)
 
@@ -1108,7 +1120,7 @@ async def cmd_cadastrar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     password = args[1]
     
     # Cadastrar
-    sucesso, mensagem = auth_service.register_user_email(user_id, email, password)
+    sucesso, mensagem = await run_blocking(auth_service.register_user_email, user_id, email, password)
     
     await update.message.reply_text(mensagem, parse_mode=ParseMode.MARKDOWN)
 
@@ -1126,7 +1138,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         from services.database_service import db_service
         
         # Buscar ou criar usuário (não crítico)
-        user = db_service.get_or_create_user(
+        user = await run_blocking(db_service.get_or_create_user,
             user_id,
             update.effective_user.username or "User",
             update.effective_user.full_name or "User"
@@ -1151,7 +1163,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Salvar preferência no banco (se disponível)
             sucesso = False
             if user:
-                sucesso = alertas_service.update_alert_channel(user.id, canal_preferido)
+                sucesso = await run_blocking(alertas_service.update_alert_channel, user.id, canal_preferido)
             else:
                 logger.warning("Banco não disponível - configuração não salva")
             
@@ -1181,7 +1193,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 # Salvar intervalo no banco (se disponível)
                 sucesso = False
                 if user:
-                    sucesso = alertas_service.update_alert_interval(user.id, dias)
+                    sucesso = await run_blocking(alertas_service.update_alert_interval, user.id, dias)
                 else:
                     logger.warning("Banco não disponível - intervalo não salvo")
                 
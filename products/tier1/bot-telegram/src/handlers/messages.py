@@ -16,6 +16,7 @@ from shared.utils.logger import bot_telegram_logger as logger
 from shared.utils.text_sanitizer import sanitize_text
 from services.ia_service import ai_service
 from services.database_service import db_service
+from services.async_executor import run_blocking
 
 
 def split_message(text: str, max_length: int = 3900) -> list:
@@ -189,7 +190,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Verificar se é email válido
         if '@' in user_message:
-            sucesso, mensagem = auth_service.processar_email_login(user_id, user_message)
+            sucesso, mensagem = await run_blocking(auth_service.processar_email_login, user_id, user_message)
             await safe_reply_text(update, mensagem, use_markdown=True)
             
             if sucesso:
@@ -210,7 +211,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if context.user_data.get('aguardando_senha_login', False):
         from services.auth_service import auth_service
         
-        sucesso, mensagem = auth_service.completar_login(user_id, user_message)
+        sucesso, mensagem = await run_blocking(auth_service.completar_login, user_id, user_message)
         await safe_reply_text(update, mensagem, use_markdown=True)
         
         context.user_data['aguardando_senha_login'] = False
@@ -221,7 +222,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         from services.auth_service import auth_service
         
         if '@' in user_message:
-            sucesso, mensagem, codigo = auth_service.gerar_codigo_recuperacao(user_message)
+            sucesso, mensagem, codigo = await run_blocking(auth_service.gerar_codigo_recuperacao, user_message)
             await safe_reply_text(update, mensagem, use_markdown=True)
         else:
             await safe_reply_text(
@@ -255,7 +256,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             status_msg = await update.message.reply_text("🔍 *Consultando processo...*", parse_mode="Markdown")
             
             # Consultar processo (com fallback automático)
-            dados = cnj_service.consultar_processo(user_message, telegram_id=update.effective_user.id)
+            dados = await cnj_service.consultar_processo_async(user_message, telegram_id=update.effective_user.id)
             
             # Se retornou erro mas não é None, pode ter sido encontrado em outra fonte
             if dados and not dados.get('erro'):
@@ -320,10 +321,10 @@ Não foi possível acessar a API do CNJ no momento.
             
             # Verificar autenticação antes de buscar no Kermartin (com timeout)
             user_id = update.effective_user.id
-            is_auth = auth_service.is_authenticated(user_id, check_timeout=True)
+            is_auth = await run_blocking(auth_service.is_authenticated, user_id, check_timeout=True)
             
             if not is_auth:
-                if auth_service.is_authenticated(user_id, check_timeout=False):
+                if await run_blocking(auth_service.is_authenticated, user_id, check_timeout=False):
                     await safe_reply_text(
                         update,
                         "⏰ **Sessão Expirada**\n\n"
@@ -348,7 +349,7 @@ Não foi possível acessar a API do CNJ no momento.
             status_msg = await update.message.reply_text("🔍 *Buscando magistrado...*", parse_mode="Markdown")
             
             # Buscar magistrado
-            magistrado = kermartin_service.buscar_magistrado(user_message)
+            magistrado = await kermartin_service.buscar_magistrado_async(user_message)
             
             if magistrado:
                 # Formatar resposta usando MessageFormatter
@@ -361,7 +362,7 @@ Não foi possível acessar a API do CNJ no momento.
                 vara = dados.get('vara') or magistrado.get('vara', 'N/A')
                 
                 # Buscar estatísticas completas usando o novo método
-                stats = kermartin_service.get_estatisticas_magistrado(user_message)
+                stats = await run_blocking(kermartin_service.get_estatisticas_magistrado, user_message)
                 
                 # Usar header profissional
                 resposta = message_formatter.header("PERFIL DO MAGISTRADO", message_formatter.EMOJIS['magistrado'])
@@ -497,7 +498,7 @@ Não foi possível acessar a API do CNJ no momento.
                 resposta += message_formatter.footer("💡 Dados fornecidos pela base Kermartin")
             else:
                 # Listar magistrados disponíveis
-                magistrados = kermartin_service.listar_magistrados_disponiveis()
+                magistrados = await run_blocking(kermartin_service.listar_magistrados_disponiveis)
                 if magistrados:
                     resposta = f"""⚠️ **Magistrado não encontrado**
 
@@ -545,10 +546,10 @@ A base de conhecimento ainda não possui dados deste magistrado.
             
             # Verificar autenticação antes de buscar no Kermartin (com timeout)
             user_id = update.effective_user.id
-            is_auth = auth_service.is_authenticated(user_id, check_timeout=True)
+            is_auth = await run_blocking(auth_service.is_authenticated, user_id, check_timeout=True)
             
             if not is_auth:
-                if auth_service.is_authenticated(user_id, check_timeout=False):
+                if await run_blocking(auth_service.is_authenticated, user_id, check_timeout=False):
                     await safe_reply_text(
                         update,
                         "⏰ **Sessão Expirada**\n\n"
@@ -573,7 +574,7 @@ A base de conhecimento ainda não possui dados deste magistrado.
             status_msg = await update.message.reply_text("🔍 *Buscando promotor...*", parse_mode="Markdown")
             
             # Buscar promotor
-            promotor = kermartin_service.buscar_promotor(user_message)
+            promotor = await kermartin_service.buscar_promotor_async(user_message)
             
             if promotor:
                 # Formatar resposta usando MessageFormatter
@@ -657,10 +658,10 @@ A base de conhecimento ainda não possui dados deste promotor.
             
             # Verificar autenticação antes de buscar no Kermartin (com timeout)
             user_id = update.effective_user.id
-            is_auth = auth_service.is_authenticated(user_id, check_timeout=True)
+            is_auth = await run_blocking(auth_service.is_authenticated, user_id, check_timeout=True)
             
             if not is_auth:
-                if auth_service.is_authenticated(user_id, check_timeout=False):
+                if await run_blocking(auth_service.is_authenticated, user_id, check_timeout=False):
                     await safe_reply_text(
                         update,
                         "⏰ **Sessão Expirada**\n\n"
@@ -732,7 +733,7 @@ A base de conhecimento ainda não possui dados deste promotor.
             status_msg = await update.message.reply_text("🔍 *Buscando processos da comarca...*", parse_mode="Markdown")
             
             # Buscar processos por comarca com filtros
-            processos = kermartin_service.buscar_processos_por_comarca(comarca, filtros)
+            processos = await run_blocking(kermartin_service.buscar_processos_por_comarca, comarca, filtros)
             
             if processos:
                 # Formatar resposta usando MessageFormatter
@@ -790,9 +791,9 @@ A base de conhecimento ainda não possui dados deste promotor.
                 
                 # Salvar no histórico
                 try:
-                    user = db_service.get_or_create_user(user_id, update.effective_user.username or "User", update.effective_user.full_name or "User")
+                    user = await run_blocking(db_service.get_or_create_user, user_id, update.effective_user.username or "User", update.effective_user.full_name or "User")
                     if user:
-                        db_service.save_chat(
+                        await run_blocking(db_service.save_chat,
                             user_id=user.id,
                             message=f"/comarca {user_message}",
                             response=f"Encontrados {len(processos)} processos em {comarca}",
@@ -850,9 +851,9 @@ Não encontrei processos para a comarca: **{comarca}**
             
             # Salvar no histórico
             try:
-                user = db_service.get_or_create_user(user_id, update.effective_user.username or "User", update.effective_user.full_name or "User")
+                user = await run_blocking(db_service.get_or_create_user, user_id, update.effective_user.username or "User", update.effective_user.full_name or "User")
                 if user:
-                    db_service.save_chat(
+                    await run_blocking(db_service.save_chat,
                         user_id=user.id,
                         message=f"/buscar {user_message}",
                         response=resposta[:200] + '...' if len(resposta) > 200 else resposta,
@@ -878,7 +879,7 @@ Não encontrei processos para a comarca: **{comarca}**
     
     # Criar/buscar usuário no banco
     try:
-        user = db_service.get_or_create_user(user_id, username, full_name)
+        user = await run_blocking(db_service.get_or_create_user, user_id, username, full_name)
     except Exception as e:
         logger.error(f"Erro ao buscar/criar usuário: {e}")
         user = None
@@ -933,7 +934,7 @@ Não encontrei processos para a comarca: **{comarca}**
         # Salvar conversa no banco (com tratamento de erro específico para escape)
         if user:
             try:
-                db_service.save_chat(
+                await run_blocking(db_service.save_chat,
                     user_id=user.id,
                     message=user_message,
                     response=response,
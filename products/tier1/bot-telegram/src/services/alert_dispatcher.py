@@ -0,0 +1,167 @@
+"""
+Envio em lote de alertas respeitando os limites do Telegram
+Limite global (~30 mensagens/s por bot) e por chat (~1 mensagem/s), com
+pausa geral quando o Telegram responde RetryAfter (flood control)
+"""
+
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from shared.utils.logger import bot_telegram_logger as logger
+
+
+# Mensagens por segundo para todo o bot (Telegram: ~30/s)
+GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+# Intervalo mínimo entre mensagens para o mesmo chat (Telegram: ~1/s)
+CHAT_INTERVAL = float(os.getenv("TELEGRAM_CHAT_INTERVAL", "1.0"))
+# Chats atendidos em paralelo
+CONCURRENCY = int(os.getenv("ALERTAS_CONCORRENCIA", "20"))
+# Novas tentativas após RetryAfter
+MAX_RETRIES = 2
+
+
+class TokenBucket:
+    """Limitador de taxa assíncrono (token bucket) com pausa global"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Aguarda até haver um token disponível"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Suspende todas as aquisições (RetryAfter do Telegram)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+
+class AlertaPendente:
+    """Mensagem a enviar e seu resultado"""
+
+    __slots__ = ('chat_id', 'texto', 'dados', 'enviado', 'erro')
+
+    def __init__(self, chat_id: int, texto: str, dados: Optional[Dict[str, Any]] = None):
+        self.chat_id = chat_id
+        self.texto = texto
+        # Dados do chamador (ids do prazo/usuário) para registrar o resultado
+        self.dados = dados or {}
+        self.enviado = False
+        self.erro: Optional[str] = None
+
+
+class AlertDispatcher:
+    """
+    Fila concorrente de envio
+
+    As mensagens são agrupadas por chat; cada worker atende um chat por vez
+    (respeitando o intervalo por chat) e todos compartilham o limite global.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[int, str], Awaitable[Any]],
+        global_rate: float = GLOBAL_RATE,
+        chat_interval: float = CHAT_INTERVAL,
+        concurrency: int = CONCURRENCY
+    ):
+        """
+        Args:
+            send: Corrotina que envia um texto para um chat (ex.: bot.send_message)
+            global_rate: Mensagens por segundo no total
+            chat_interval: Segundos entre mensagens para o mesmo chat
+            concurrency: Número de workers
+        """
+        self.send = send
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.concurrency = concurrency
+
+    async def dispatch(self, alertas: List[AlertaPendente]) -> Dict[str, Any]:
+        """
+        Envia os alertas e marca enviado/erro em cada um
+
+        Returns:
+            Métricas do envio (enviados, falhas, flood_waits, duracao_s, mensagens_por_segundo)
+        """
+        inicio = time.perf_counter()
+        metricas = {'chats': 0, 'enviados': 0, 'falhas': 0, 'flood_waits': 0}
+
+        por_chat: Dict[int, List[AlertaPendente]] = {}
+        for alerta in alertas:
+            por_chat.setdefault(alerta.chat_id, []).append(alerta)
+        metricas['chats'] = len(por_chat)
+
+        if por_chat:
+            bucket = TokenBucket(self.global_rate)
+            fila: asyncio.Queue = asyncio.Queue()
+            for mensagens in por_chat.values():
+                fila.put_nowait(mensagens)
+
+            workers = min(self.concurrency, len(por_chat))
+            await asyncio.gather(*(self._worker(fila, bucket, metricas) for _ in range(workers)))
+
+        duracao = time.perf_counter() - inicio
+        metricas['duracao_s'] = round(duracao, 3)
+        metricas['mensagens_por_segundo'] = round(metricas['enviados'] / duracao, 2) if duracao > 0 else 0
+        return metricas
+
+    async def _worker(self, fila: asyncio.Queue, bucket: TokenBucket, metricas: Dict[str, Any]):
+        while True:
+            try:
+                mensagens = fila.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            ultimo_envio = None
+            for alerta in mensagens:
+                if ultimo_envio is not None:
+                    espera = ultimo_envio + self.chat_interval - time.monotonic()
+                    if espera > 0:
+                        await asyncio.sleep(espera)
+                await self._enviar(alerta, bucket, metricas)
+                ultimo_envio = time.monotonic()
+
+    async def _enviar(self, alerta: AlertaPendente, bucket: TokenBucket, metricas: Dict[str, Any]):
+        for tentativa in range(MAX_RETRIES + 1):
+            await bucket.acquire()
+            try:
+                await self.send(alerta.chat_id, alerta.texto)
+                alerta.enviado = True
+                metricas['enviados'] += 1
+                return
+            except Exception as e:
+                # telegram.error.RetryAfter (flood control) traz retry_after em segundos
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after is not None and tentativa < MAX_RETRIES:
+                    segundos = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+                    logger.warning(f"Flood control do Telegram: pausando envios por {segundos}s")
+                    metricas['flood_waits'] += 1
+                    bucket.pause(segundos)
+                    continue
+                alerta.erro = str(e)
+                metricas['falhas'] += 1
+                logger.error(f"Erro ao enviar alerta para {alerta.chat_id}: {e}")
+                return
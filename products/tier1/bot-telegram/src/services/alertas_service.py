@@ -4,7 +4,7 @@ Serviço para gerenciar alertas e preferências do usuário
 
 import sys
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import datetime
 
 # Adiciona o diretório pai ao path
@@ -0,0 +1,54 @@
+"""
+Executor limitado para trabalho bloqueante dos handlers
+Leitura de arquivos do Kermartin e consultas SQLAlchemy/SQLite rodam fora do
+event loop, para que uma consulta lenta não trave as conversas dos outros usuários
+"""
+
+import os
+import sys
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from shared.utils.logger import bot_telegram_logger as logger
+
+
+# Número máximo de threads para trabalho bloqueante (disco + banco)
+MAX_WORKERS = int(os.getenv("BOT_BLOCKING_WORKERS", "16"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Retorna o executor compartilhado (criado sob demanda)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="bot-blocking")
+        logger.info(f"✅ Executor de tarefas bloqueantes iniciado ({MAX_WORKERS} threads)")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Executa função síncrona no executor limitado e aguarda o resultado
+
+    Exemplo:
+        user = await run_blocking(db_service.get_or_create_user, user_id, username, nome)
+    """
+    loop = asyncio.get_running_loop()
+    if kwargs:
+        func = functools.partial(func, *args, **kwargs)
+        args = ()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+def shutdown_executor(wait: bool = True):
+    """Encerra o executor (chamado no desligamento do bot)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
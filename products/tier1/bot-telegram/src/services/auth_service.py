@@ -16,6 +16,7 @@ from sqlalchemy.orm import Session
 from shared.config.database import get_db
 from shared.database.models import User
 from shared.utils.logger import bot_telegram_logger as logger
+from services.auth_state import AuthState, auth_state_cache
 
 
 class AuthService:
@@ -32,10 +33,12 @@ class AuthService:
         """Gera hash da senha usando SHA256"""
         return hashlib.sha256(password.encode()).hexdigest()
     
-    def _check_session_timeout(self, user: User) -> bool:
+    def _check_session_timeout(self, user) -> bool:
         """
         Verifica se a sessão expirou (24h de inatividade)
         
+        Aceita User ou AuthState (usa apenas ultimo_login).
+        
         Returns:
             True se sessão expirada, False caso contrário
         """
@@ -177,6 +180,7 @@ class AuthService:
             user.ultimo_login = datetime.utcnow()
             db.commit()
             db.refresh(user)
+            auth_state_cache.set(AuthState.from_user(user))
             
             logger.info(f"Usuário {telegram_id} ({email}) fez login")
             return True, "✅ Login realizado com sucesso! Você agora tem acesso ao Kermartin."
@@ -208,6 +212,7 @@ class AuthService:
             
             user.autenticado = False
             db.commit()
+            auth_state_cache.set(AuthState.from_user(user))
             
             logger.info(f"Usuário {telegram_id} fez logout")
             return True, "✅ Logout realizado com sucesso."
@@ -219,43 +224,78 @@ class AuthService:
         finally:
             db.close()
     
-    def is_authenticated(self, telegram_id: int, check_timeout: bool = True) -> bool:
+    def get_auth_state(self, telegram_id: int) -> Optional[AuthState]:
         """
-        Verifica se usuário está autenticado e se sessão não expirou
+        Retorna o estado de autenticação (id do usuário, autenticado, último login)
+        
+        Usa o cache de curta duração; no máximo uma consulta ao banco.
         
-        Args:
-            telegram_id: ID do Telegram do usuário
-            check_timeout: Se deve verificar timeout de sessão
-            
         Returns:
-            True se autenticado e sessão válida, False caso contrário
+            AuthState ou None se usuário não existe (ou banco indisponível)
         """
+        estado = auth_state_cache.get(telegram_id)
+        if estado is not None:
+            return estado
+        
         db: Session = next(get_db())
         
         try:
             user = db.query(User).filter(User.telegram_id == telegram_id).first()
             
             if not user:
-                return False
+                return None
             
-            if not user.autenticado:
-                return False
+            estado = AuthState.from_user(user)
+            auth_state_cache.set(estado)
+            return estado
             
-            # Verificar timeout de sessão
-            if check_timeout and self._check_session_timeout(user):
+        except Exception as e:
+            logger.error(f"Erro ao buscar estado de autenticação: {e}")
+            return None
+        finally:
+            db.close()
+    
+    def _expirar_sessao(self, telegram_id: int):
+        """Marca a sessão como expirada no banco e no cache"""
+        db: Session = next(get_db())
+        
+        try:
+            user = db.query(User).filter(User.telegram_id == telegram_id).first()
+            if user:
                 user.autenticado = False
                 db.commit()
-                logger.info(f"Sessão expirada para usuário {telegram_id}")
-                return False
-            
-            return True
-            
+                auth_state_cache.set(AuthState.from_user(user))
+            logger.info(f"Sessão expirada para usuário {telegram_id}")
         except Exception as e:
-            logger.error(f"Erro ao verificar autenticação: {e}")
-            return False
+            logger.error(f"Erro ao expirar sessão: {e}")
+            db.rollback()
+            auth_state_cache.invalidate(telegram_id)
         finally:
             db.close()
     
+    def is_authenticated(self, telegram_id: int, check_timeout: bool = True) -> bool:
+        """
+        Verifica se usuário está autenticado e se sessão não expirou
+        
+        Args:
+            telegram_id: ID do Telegram do usuário
+            check_timeout: Se deve verificar timeout de sessão
+            
+        Returns:
+            True se autenticado e sessão válida, False caso contrário
+        """
+        estado = self.get_auth_state(telegram_id)
+        
+        if not estado or not estado.autenticado:
+            return False
+        
+        # Verificar timeout de sessão (escreve no banco só quando expira)
+        if check_timeout and self._check_session_timeout(estado):
+            self._expirar_sessao(telegram_id)
+            return False
+        
+        return True
+    
     def gerar_codigo_recuperacao(self, email: str) -> tuple[bool, str, str]:
         """
         Gera código de recuperação de senha
@@ -329,6 +369,7 @@ class AuthService:
             user.senha_hash = self._hash_password(nova_senha)
             user.autenticado = False  # Forçar novo login
             db.commit()
+            auth_state_cache.invalidate(telegram_id)
             
             logger.info(f"Senha recuperada para usuário {telegram_id}")
             return True, (
@@ -370,6 +411,7 @@ class AuthService:
             # Atualizar senha
             user.senha_hash = self._hash_password(nova_senha)
             db.commit()
+            auth_state_cache.invalidate(telegram_id)
             
             logger.info(f"Senha trocada para usuário {telegram_id}")
             return True, "✅ Senha alterada com sucesso!"
@@ -428,6 +470,7 @@ class AuthService:
             user.senha_hash = self._hash_password(password)
             user.autenticado = False  # Precisa fazer login após cadastro
             db.commit()
+            auth_state_cache.invalidate(telegram_id)
             
             logger.info(f"Email registrado para usuário {telegram_id}: {email}")
             return True, (
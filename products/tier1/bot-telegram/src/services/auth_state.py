@@ -0,0 +1,96 @@
+"""
+Cache de curta duração do estado de autenticação por telegram_id
+Os handlers consultam autenticação e usuário várias vezes por update; com o
+cache, a identidade é resolvida com no máximo uma ida ao banco
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from shared.utils.logger import bot_telegram_logger as logger
+
+
+# Validade das entradas (segundos). Curta: outros processos (API, bot com IA)
+# também alteram o login, e só as escritas deste processo atualizam o cache.
+AUTH_STATE_TTL = float(os.getenv("AUTH_STATE_TTL", "30"))
+
+
+class AuthState:
+    """Estado de autenticação de um usuário (cópia desacoplada da sessão do banco)"""
+
+    __slots__ = ('telegram_id', 'user_id', 'autenticado', 'ultimo_login', 'carregado_em')
+
+    def __init__(self, telegram_id: int, user_id: int, autenticado: bool, ultimo_login: Optional[datetime]):
+        self.telegram_id = telegram_id
+        self.user_id = user_id
+        self.autenticado = bool(autenticado)
+        self.ultimo_login = ultimo_login
+        self.carregado_em = time.monotonic()
+
+    @classmethod
+    def from_user(cls, user) -> 'AuthState':
+        """Cria o estado a partir de um User (chamar com a sessão ainda aberta)"""
+        return cls(user.telegram_id, user.id, user.autenticado, user.ultimo_login)
+
+    @property
+    def id(self) -> int:
+        """Alias para user_id (compatível com código que usa user.id)"""
+        return self.user_id
+
+
+class AuthStateCache:
+    """
+    Cache write-through do estado de autenticação
+
+    - get: devolve o estado se ainda válido
+    - set: chamado após cada leitura ou escrita do usuário no banco
+    - invalidate: chamado quando o estado muda sem uma cópia pronta
+      (troca/recuperação de senha, cadastro)
+    """
+
+    def __init__(self, ttl_seconds: float = AUTH_STATE_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._estados: Dict[int, AuthState] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> Optional[AuthState]:
+        estado = self._estados.get(telegram_id)
+        if estado is None or time.monotonic() - estado.carregado_em > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return estado
+
+    def set(self, estado: AuthState):
+        with self._lock:
+            self._estados[estado.telegram_id] = estado
+            # Descartar entradas vencidas de vez em quando (mantém o dict pequeno)
+            if len(self._estados) > 1024:
+                limite = time.monotonic() - self.ttl_seconds
+                for telegram_id in [t for t, e in self._estados.items() if e.carregado_em < limite]:
+                    del self._estados[telegram_id]
+
+    def invalidate(self, telegram_id: int):
+        with self._lock:
+            if self._estados.pop(telegram_id, None) is not None:
+                logger.debug(f"Estado de autenticação invalidado: {telegram_id}")
+
+    def clear(self):
+        with self._lock:
+            self._estados.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'entries': len(self._estados), 'hits': self.hits, 'misses': self.misses}
+
+
+# Instância global
+auth_state_cache = AuthStateCache()
@@ -6,7 +6,7 @@ Gerencia cache de consultas de processos, magistrados, etc.
 import sys
 from pathlib import Path
 from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from collections import OrderedDict
 import threading
 import time
 
@@ -15,205 +15,268 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from shared.utils.logger import bot_telegram_logger as logger
 
 
+def estimate_size(value: Any) -> int:
+    """
+    Estima tamanho em bytes de um valor, incluindo objetos aninhados
+
+    sys.getsizeof sozinho só mede o container (um dict com listas grandes
+    aparece com poucas centenas de bytes). Percorre dicts, listas, tuplas e
+    sets; containers compartilhados contam uma vez.
+    """
+    getsizeof = sys.getsizeof
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        cls = type(obj)
+        if cls is dict:
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            size += getsizeof(obj)
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif cls in (list, tuple, set, frozenset):
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            size += getsizeof(obj)
+            stack.extend(obj)
+        else:
+            # Escalares (str, int, ...) não são rastreados: repetições contam de novo
+            size += getsizeof(obj)
+    return size
+
+
 class CacheEntry:
     """Entrada de cache com TTL (Time To Live)"""
-    
-    def __init__(self, value: Any, ttl_seconds: int = 3600):
+
+    __slots__ = ('value', 'created_at', 'expires_at', 'ttl_seconds', 'size', 'access_count', 'referenced')
+
+    def __init__(self, value: Any, ttl_seconds: int = 3600, now: Optional[float] = None):
         """
         Args:
             value: Valor a ser armazenado
             ttl_seconds: Tempo de vida em segundos (padrão: 1 hora)
+            now: Instante atual (time.monotonic), para evitar nova leitura do relógio
         """
+        if now is None:
+            now = time.monotonic()
         self.value = value
-        self.created_at = datetime.now()
+        self.created_at = now
+        self.expires_at = now + ttl_seconds
         self.ttl_seconds = ttl_seconds
+        # Calculado uma única vez na inserção
+        self.size = estimate_size(value)
         self.access_count = 0
-        self.last_accessed = datetime.now()
-    
-    def is_expired(self) -> bool:
+        # Bit de referência do LRU de segunda chance (marcado na leitura, sem lock)
+        self.referenced = False
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
         """Verifica se a entrada expirou"""
-        age = (datetime.now() - self.created_at).total_seconds()
-        return age > self.ttl_seconds
-    
+        return (time.monotonic() if now is None else now) > self.expires_at
+
     def access(self) -> Any:
         """Acessa a entrada e atualiza estatísticas"""
         self.access_count += 1
-        self.last_accessed = datetime.now()
+        self.referenced = True
         return self.value
-    
+
     def get_age_seconds(self) -> float:
         """Retorna idade da entrada em segundos"""
-        return (datetime.now() - self.created_at).total_seconds()
-    
+        return time.monotonic() - self.created_at
+
     def get_size_estimate(self) -> int:
-        """Estima tamanho em bytes (aproximado)"""
-        import sys
-        return sys.getsizeof(self.value)
+        """Tamanho estimado em bytes (calculado na inserção)"""
+        return self.size
 
 
 class CacheService:
     """
     Serviço de cache em memória com TTL e limite de tamanho
-    
+
     Características:
-    - Cache thread-safe
-    - TTL configurável por tipo de dado
-    - Limite máximo de memória
+    - Leitura sem lock (consulta a dict); escrita e remoção com lock
+    - Evicção LRU O(1) (segunda chance sobre OrderedDict)
+    - TTL configurável por tipo de dado, com um bucket ordenado por TTL
+      (a limpeza só percorre as entradas já expiradas)
+    - Limite máximo de memória com tamanho profundo estimado na inserção
     - Estatísticas de uso
-    - Limpeza automática de entradas expiradas
     """
-    
+
     # TTL padrão por tipo de dado (em segundos)
     DEFAULT_TTL = {
         'processo': 3600,      # 1 hora - processos não mudam muito
         'magistrado': 86400,    # 24 horas - perfis são estáveis
+        'promotor': 86400,      # 24 horas - perfis são estáveis
         'jurisprudencia': 1800, # 30 minutos - pode ter atualizações
         'default': 3600         # 1 hora padrão
     }
-    
+
     # Limite máximo de memória (em MB)
     MAX_MEMORY_MB = 100
-    
-    def __init__(self):
+
+    # Ao estourar o limite, evicta até esta fração (evicções em lote)
+    EVICTION_TARGET = 0.9
+
+    def __init__(self, start_cleanup_thread: bool = True):
         self._cache: Dict[str, CacheEntry] = {}
-        self._lock = threading.RLock()  # Thread-safe
-        self._stats = {
-            'hits': 0,
-            'misses': 0,
-            'evictions': 0,
-            'total_size_bytes': 0
-        }
-        
+        # Ordem de uso para evicção (mais antigo no início)
+        self._lru: 'OrderedDict[str, None]' = OrderedDict()
+        # TTL -> chaves na ordem de inserção (= ordem de expiração dentro do bucket)
+        self._ttl_buckets: Dict[float, 'OrderedDict[str, None]'] = {}
+        self._lock = threading.Lock()  # Apenas para escrita
+        self._max_bytes = self.MAX_MEMORY_MB * 1024 * 1024
+        self._total_size_bytes = 0
+        # Contadores sem lock: sob alta concorrência podem perder incrementos raros
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
         # Iniciar limpeza automática em background
-        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
-        self._cleanup_thread.start()
-        
+        if start_cleanup_thread:
+            self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
+            self._cleanup_thread.start()
+
         logger.info("✅ CacheService inicializado")
-    
+
     def get(self, key: str, cache_type: str = 'default') -> Optional[Any]:
         """
         Obtém valor do cache
-        
+
         Args:
             key: Chave do cache
-            cache_type: Tipo de cache (afeta TTL)
-            
+            cache_type: Tipo de cache (mantido por compatibilidade; o TTL é definido no set)
+
         Returns:
             Valor armazenado ou None se não encontrado/expirado
         """
-        with self._lock:
-            entry = self._cache.get(key)
-            
-            if entry is None:
-                self._stats['misses'] += 1
-                logger.debug(f"Cache MISS: {key}")
-                return None
-            
-            if entry.is_expired():
-                # Remover entrada expirada
-                del self._cache[key]
-                self._stats['misses'] += 1
-                self._stats['total_size_bytes'] -= entry.get_size_estimate()
-                logger.debug(f"Cache EXPIRED: {key}")
-                return None
-            
-            # Cache hit
-            self._stats['hits'] += 1
-            logger.debug(f"Cache HIT: {key} (acessado {entry.access_count} vezes)")
-            return entry.access()
-    
+        entry = self._cache.get(key)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        if time.monotonic() > entry.expires_at:
+            # Remover entrada expirada (caminho lento, com lock)
+            with self._lock:
+                if self._cache.get(key) is entry:
+                    self._remove(key)
+                    self._expirations += 1
+            self._misses += 1
+            return None
+
+        # Cache hit
+        self._hits += 1
+        entry.access_count += 1
+        entry.referenced = True
+        return entry.value
+
     def set(self, key: str, value: Any, cache_type: str = 'default', ttl_seconds: Optional[int] = None):
         """
         Armazena valor no cache
-        
+
         Args:
             key: Chave do cache
             value: Valor a armazenar
             cache_type: Tipo de cache (afeta TTL padrão)
             ttl_seconds: TTL específico (sobrescreve padrão do tipo)
         """
+        # Determinar TTL
+        if ttl_seconds is None:
+            ttl_seconds = self.DEFAULT_TTL.get(cache_type, self.DEFAULT_TTL['default'])
+
+        # Tamanho calculado fora do lock
+        entry = CacheEntry(value, ttl_seconds)
+
         with self._lock:
-            # Determinar TTL
-            if ttl_seconds is None:
-                ttl_seconds = self.DEFAULT_TTL.get(cache_type, self.DEFAULT_TTL['default'])
-            
-            # Verificar limite de memória antes de adicionar
-            current_size_mb = self._stats['total_size_bytes'] / (1024 * 1024)
-            
-            if current_size_mb >= self.MAX_MEMORY_MB:
-                # Tentar limpar cache expirado primeiro
-                self._cleanup_expired()
-                current_size_mb = self._stats['total_size_bytes'] / (1024 * 1024)
-                
-                # Se ainda estiver no limite, remover entradas menos usadas
-                if current_size_mb >= self.MAX_MEMORY_MB:
-                    self._evict_least_used()
-            
-            # Criar entrada
-            entry = CacheEntry(value, ttl_seconds)
-            
             # Remover entrada antiga se existir
             if key in self._cache:
-                old_entry = self._cache[key]
-                self._stats['total_size_bytes'] -= old_entry.get_size_estimate()
-            
-            # Adicionar nova entrada
+                self._remove(key)
+
             self._cache[key] = entry
-            self._stats['total_size_bytes'] += entry.get_size_estimate()
-            
-            logger.debug(f"Cache SET: {key} (TTL: {ttl_seconds}s, tipo: {cache_type})")
-    
+            self._lru[key] = None
+            bucket = self._ttl_buckets.get(ttl_seconds)
+            if bucket is None:
+                bucket = self._ttl_buckets[ttl_seconds] = OrderedDict()
+            bucket[key] = None
+            self._total_size_bytes += entry.size
+
+            # Respeitar limite de memória
+            if self._total_size_bytes > self._max_bytes:
+                self._cleanup_expired()
+                if self._total_size_bytes > self._max_bytes:
+                    self._evict_least_used()
+
     def delete(self, key: str):
         """Remove entrada do cache"""
         with self._lock:
             if key in self._cache:
-                entry = self._cache[key]
-                self._stats['total_size_bytes'] -= entry.get_size_estimate()
-                del self._cache[key]
-                logger.debug(f"Cache DELETE: {key}")
-    
+                self._remove(key)
+
     def clear(self):
         """Limpa todo o cache"""
         with self._lock:
             self._cache.clear()
-            self._stats['total_size_bytes'] = 0
+            self._lru.clear()
+            self._ttl_buckets.clear()
+            self._total_size_bytes = 0
             logger.info("Cache CLEARED")
-    
+
+    def _remove(self, key: str):
+        """Remove chave de todas as estruturas (chamar com lock)"""
+        entry = self._cache.pop(key)
+        self._lru.pop(key, None)
+        bucket = self._ttl_buckets.get(entry.ttl_seconds)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._ttl_buckets[entry.ttl_seconds]
+        self._total_size_bytes -= entry.size
+
     def _cleanup_expired(self):
-        """Remove entradas expiradas"""
-        expired_keys = []
-        
-        for key, entry in self._cache.items():
-            if entry.is_expired():
-                expired_keys.append(key)
-        
-        for key in expired_keys:
+        """Remove entradas expiradas (chamar com lock)"""
+        now = time.monotonic()
+        removed = 0
+
+        for ttl in list(self._ttl_buckets):
+            bucket = self._ttl_buckets[ttl]
+            # Mesmo TTL: a ordem de inserção é a ordem de expiração
+            while bucket:
+                key = next(iter(bucket))
+                if self._cache[key].expires_at >= now:
+                    break
+                self._remove(key)
+                removed += 1
+                if ttl not in self._ttl_buckets:
+                    break
+
+        if removed:
+            self._expirations += removed
+            logger.debug(f"Removidas {removed} entradas expiradas do cache")
+
+    def _evict_least_used(self):
+        """Remove entradas menos usadas até voltar abaixo do limite de memória (chamar com lock)"""
+        evicted = 0
+        target = self._max_bytes * self.EVICTION_TARGET
+
+        while self._lru and self._total_size_bytes > target:
+            key = next(iter(self._lru))
             entry = self._cache[key]
-            self._stats['total_size_bytes'] -= entry.get_size_estimate()
-            del self._cache[key]
-        
-        if expired_keys:
-            logger.debug(f"Removidas {len(expired_keys)} entradas expiradas do cache")
-    
-    def _evict_least_used(self, count: int = 10):
-        """Remove entradas menos usadas quando cache está cheio"""
-        if len(self._cache) == 0:
-            return
-        
-        # Ordenar por número de acessos e última vez acessado
-        entries = [(key, entry) for key, entry in self._cache.items()]
-        entries.sort(key=lambda x: (x[1].access_count, x[1].last_accessed))
-        
-        # Remover as menos usadas
-        to_remove = min(count, len(entries))
-        for i in range(to_remove):
-            key, entry = entries[i]
-            self._stats['total_size_bytes'] -= entry.get_size_estimate()
-            del self._cache[key]
-            self._stats['evictions'] += 1
-        
-        logger.info(f"Evictadas {to_remove} entradas do cache (memória cheia)")
-    
+            if entry.referenced:
+                # Segunda chance: usada desde a última passagem
+                entry.referenced = False
+                self._lru.move_to_end(key)
+                continue
+            self._remove(key)
+            evicted += 1
+
+        self._evictions += evicted
+        if evicted:
+            logger.info(f"Evictadas {evicted} entradas do cache (memória cheia)")
+
     def _cleanup_loop(self):
         """Loop de limpeza automática em background"""
         while True:
@@ -223,44 +286,47 @@ class CacheService:
                     self._cleanup_expired()
             except Exception as e:
                 logger.error(f"Erro no loop de limpeza do cache: {e}")
-    
+
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
-        with self._lock:
-            total_requests = self._stats['hits'] + self._stats['misses']
-            hit_rate = (self._stats['hits'] / total_requests * 100) if total_requests > 0 else 0
-            
-            return {
-                'entries': len(self._cache),
-                'hits': self._stats['hits'],
-                'misses': self._stats['misses'],
-                'hit_rate_percent': round(hit_rate, 2),
-                'evictions': self._stats['evictions'],
-                'memory_mb': round(self._stats['total_size_bytes'] / (1024 * 1024), 2),
-                'max_memory_mb': self.MAX_MEMORY_MB,
-                'memory_usage_percent': round((self._stats['total_size_bytes'] / (1024 * 1024)) / self.MAX_MEMORY_MB * 100, 2)
-            }
-    
+        hits = self._hits
+        misses = self._misses
+        total_requests = hits + misses
+        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
+        total_size_bytes = self._total_size_bytes
+
+        return {
+            'entries': len(self._cache),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate_percent': round(hit_rate, 2),
+            'evictions': self._evictions,
+            'expirations': self._expirations,
+            'memory_mb': round(total_size_bytes / (1024 * 1024), 2),
+            'max_memory_mb': self.MAX_MEMORY_MB,
+            'memory_usage_percent': round((total_size_bytes / (1024 * 1024)) / self.MAX_MEMORY_MB * 100, 2)
+        }
+
     def get_memory_info(self) -> Dict[str, Any]:
         """Retorna informações detalhadas de memória"""
         try:
             import psutil
             import os
-            
+
             process = psutil.Process(os.getpid())
             memory_info = process.memory_info()
-            
+
             return {
                 'rss_mb': round(memory_info.rss / (1024 * 1024), 2),  # Resident Set Size
                 'vms_mb': round(memory_info.vms / (1024 * 1024), 2),  # Virtual Memory Size
-                'cache_mb': round(self._stats['total_size_bytes'] / (1024 * 1024), 2),
+                'cache_mb': round(self._total_size_bytes / (1024 * 1024), 2),
                 'cache_entries': len(self._cache),
                 'psutil_available': True
             }
         except ImportError:
             # psutil não disponível - retornar informações básicas
             return {
-                'cache_mb': round(self._stats['total_size_bytes'] / (1024 * 1024), 2),
+                'cache_mb': round(self._total_size_bytes / (1024 * 1024), 2),
                 'cache_entries': len(self._cache),
                 'psutil_available': False,
                 'note': 'Instale psutil para informações detalhadas de memória'
@@ -269,4 +335,3 @@ class CacheService:
 
 # Instância global do cache
 cache_service = CacheService()
-
@@ -10,8 +10,10 @@ import re
 # Adiciona o diretório pai ao path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
+import httpx
 import requests
 from shared.utils.logger import bot_telegram_logger as logger
+from services.single_flight import get_single_flight
 
 
 class CNJService:
@@ -25,14 +27,21 @@ class CNJService:
     # Exemplo: 0001234-56.2024.8.26.0100
     PROCESSO_PATTERN = re.compile(r'^(\d{7})-(\d{2})\.(\d{4})\.(\d)\.(\d{2})\.(\d{4})$')
     
+    # Timeout das requisições à API (segundos)
+    TIMEOUT = 10
+    
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
             'Accept': 'application/json',
             'User-Agent': 'GenesysBot/1.0'
         })
+        # Cliente assíncrono criado no primeiro uso (precisa de event loop)
+        self._async_client: Optional[httpx.AsyncClient] = None
         # Cache será inicializado quando necessário (lazy loading)
         self._cache = None
+        # Consultas simultâneas ao mesmo número compartilham uma única busca
+        self._flight = get_single_flight('processo')
     
     def _get_cache(self):
         """Lazy loading do cache"""
@@ -90,6 +99,125 @@ class CNJService:
         
         return None
     
+    def _kermartin_liberado(self, telegram_id: Optional[int] = None) -> bool:
+        """
+        Verifica se o usuário pode ver dados do Kermartin (bloqueante: banco)
+        
+        Sem telegram_id a busca local é permitida; com telegram_id, exige autenticação.
+        """
+        if not telegram_id:
+            return True
+        try:
+            from services.auth_service import auth_service
+            if auth_service.is_authenticated(telegram_id):
+                return True
+            logger.info("Usuário não autenticado - Kermartin requer autenticação")
+        except Exception as e:
+            logger.warning(f"Erro ao verificar autenticação (Kermartin ignorado): {e}")
+        return False
+    
+    def _chave_consulta(self, numero_formatado: str, kermartin_liberado: bool) -> str:
+        """Chave do single-flight: só compartilham a busca usuários com o mesmo acesso ao Kermartin"""
+        return f"{numero_formatado}:{'kermartin' if kermartin_liberado else 'publico'}"
+    
+    def _buscar_no_kermartin(self, numero_formatado: str, kermartin_liberado: bool) -> Optional[Dict]:
+        """
+        Busca processo na base local do Kermartin (bloqueante: disco + banco)
+        
+        Returns:
+            Dict com dados do processo ou None (também se o usuário não tem acesso)
+        """
+        if not kermartin_liberado:
+            return None
+        try:
+            from services.kermartin_service import kermartin_service
+            
+            logger.info(f"🔍 Verificando Kermartin primeiro: {numero_formatado}")
+            processo_kermartin = kermartin_service.buscar_processo_por_numero(numero_formatado)
+            if processo_kermartin:
+                logger.info("✅ Processo encontrado no Kermartin (dados coletados)!")
+                processo_kermartin['fonte'] = 'Kermartin (Base Local)'
+                return processo_kermartin
+            
+            logger.info("Processo não encontrado no Kermartin")
+        except Exception as e:
+            logger.warning(f"Erro ao buscar no Kermartin (continuando): {e}")
+        return None
+    
+    def _fallback_kermartin(self, numero_processo: str, motivo: str) -> Optional[Dict]:
+        """Tenta o Kermartin quando a API CNJ falha (timeout, conexão, erro inesperado)"""
+        try:
+            from services.kermartin_service import kermartin_service
+            logger.info(f"🔍 {motivo} na API CNJ, tentando Kermartin...")
+            processo_kermartin = kermartin_service.buscar_processo_por_numero(numero_processo)
+            if processo_kermartin:
+                logger.info("✅ Processo encontrado no Kermartin!")
+                processo_kermartin['fonte'] = 'Kermartin (Base Local)'
+                return processo_kermartin
+        except Exception as e:
+            logger.error(f"Erro ao buscar no Kermartin após {motivo.lower()}: {e}")
+        return None
+    
+    def _url_processo(self, numero_formatado: str) -> str:
+        """Monta URL da API DataJud para o processo"""
+        # Extrair tribunal do número do processo
+        # Formato: NNNNNNN-DD.AAAA.J.TR.OOOO
+        # TR = código do tribunal (ex: 13 = TJMG, 02 = TJSP)
+        partes = numero_formatado.split('.')
+        if len(partes) >= 4:
+            codigo_tribunal = partes[3]  # TR está na posição 3
+            alias_tribunal = f"tj{codigo_tribunal}"
+        else:
+            alias_tribunal = "tj26"  # Default: TJMG
+        
+        # Formato: https://api-publica.datajud.cnj.jus.br/{alias}/processes/{numero}
+        return f"{self.BASE_URL}/{alias_tribunal}/processes/{numero_formatado}"
+    
+    def _tratar_resposta_api(self, numero_formatado: str, status_code: int, response) -> Dict:
+        """Converte resposta da API CNJ (requests ou httpx) em dados do processo ou erro"""
+        if status_code == 200:
+            dados = response.json()
+            logger.info(f"✅ Processo encontrado via API CNJ: {numero_formatado}")
+            dados['fonte'] = 'API CNJ (Consulta Pública)'
+            # Armazenar no cache (TTL menor para dados da API)
+            cache = self._get_cache()
+            if cache:
+                cache.set(f"processo:{numero_formatado}", dados, cache_type='processo', ttl_seconds=1800)  # 30 min
+            return dados
+        elif status_code == 404:
+            logger.info(f"Processo não encontrado na API CNJ: {numero_formatado}")
+            return {"erro": "Processo não encontrado na base local (Kermartin) nem na API CNJ"}
+        else:
+            logger.error(f"Erro ao consultar API CNJ. Status: {status_code}")
+            return {"erro": f"Erro na API CNJ (status {status_code})"}
+    
+    def _consultar_local(self, numero_processo: str) -> tuple[Optional[str], Optional[Dict]]:
+        """
+        Valida o número e verifica o cache
+        
+        Returns:
+            (número formatado, resultado pronto) - resultado é None se precisa consultar
+        """
+        numero_formatado = self.formatar_numero_processo(numero_processo)
+        if not numero_formatado:
+            logger.warning(f"Número de processo inválido: {numero_processo}")
+            return None, {"erro": "Número de processo inválido"}
+        
+        cache = self._get_cache()
+        if cache:
+            cached_result = cache.get(f"processo:{numero_formatado}", cache_type='processo')
+            if cached_result is not None:
+                logger.info(f"✅ Processo encontrado no cache: {numero_formatado}")
+                self._flight.record_hit()
+                return numero_formatado, cached_result
+        
+        return numero_formatado, None
+    
+    def _armazenar_kermartin(self, numero_formatado: str, processo_kermartin: Dict):
+        cache = self._get_cache()
+        if cache:
+            cache.set(f"processo:{numero_formatado}", processo_kermartin, cache_type='processo')
+    
     def consultar_processo(self, numero_processo: str, telegram_id: Optional[int] = None) -> Optional[Dict]:
         """
         Consulta processo verificando PRIMEIRO no Kermartin, depois na API CNJ como fallback
@@ -98,6 +226,9 @@ class CNJService:
         - Prioridade 1: Kermartin (dados já coletados)
         - Prioridade 2: API CNJ (consulta pública, não extração)
         
+        Chamadas simultâneas para o mesmo número fazem uma única busca.
+        Bloqueante: nos handlers do bot use consultar_processo_async.
+        
         Args:
             numero_processo: Número do processo no formato CNJ
             telegram_id: ID do usuário Telegram (opcional, para verificar autenticação)
@@ -105,136 +236,102 @@ class CNJService:
         Returns:
             Dict com dados do processo ou Dict com 'erro' se não encontrado
         """
+        # Validar, formatar e verificar cache PRIMEIRO
+        numero_formatado, resultado = self._consultar_local(numero_processo)
+        if resultado is not None:
+            return resultado
+        
+        liberado = self._kermartin_liberado(telegram_id)
+        return self._flight.do(
+            self._chave_consulta(numero_formatado, liberado),
+            self._consultar_fontes, numero_processo, numero_formatado, liberado
+        )
+    
+    def _consultar_fontes(self, numero_processo: str, numero_formatado: str, kermartin_liberado: bool) -> Dict:
+        """Busca no Kermartin e, se não encontrar, na API CNJ (síncrono)"""
         try:
-            # Validar e formatar número
-            numero_formatado = self.formatar_numero_processo(numero_processo)
-            if not numero_formatado:
-                logger.warning(f"Número de processo inválido: {numero_processo}")
-                return {"erro": "Número de processo inválido"}
-            
-            # Verificar cache PRIMEIRO
-            cache = self._get_cache()
-            if cache:
-                cache_key = f"processo:{numero_formatado}"
-                cached_result = cache.get(cache_key, cache_type='processo')
-                if cached_result is not None:
-                    logger.info(f"✅ Processo encontrado no cache: {numero_formatado}")
-                    return cached_result
-            
             # PRIORIDADE 1: Verificar Kermartin PRIMEIRO (dados já coletados)
-            try:
-                from services.kermartin_service import kermartin_service
-                from services.auth_service import auth_service
-                
-                # Verificar autenticação se necessário
-                if telegram_id:
-                    is_auth = auth_service.is_authenticated(telegram_id)
-                    if not is_auth:
-                        logger.info("Usuário não autenticado - Kermartin requer autenticação")
-                    else:
-                        logger.info(f"🔍 Verificando Kermartin primeiro: {numero_formatado}")
-                        processo_kermartin = kermartin_service.buscar_processo_por_numero(numero_formatado)
-                        if processo_kermartin:
-                            logger.info("✅ Processo encontrado no Kermartin (dados coletados)!")
-                            processo_kermartin['fonte'] = 'Kermartin (Base Local)'
-                            # Armazenar no cache
-                            if cache:
-                                cache.set(f"processo:{numero_formatado}", processo_kermartin, cache_type='processo')
-                            return processo_kermartin
-                        else:
-                            logger.info("Processo não encontrado no Kermartin")
-                else:
-                    # Sem telegram_id, tentar buscar mesmo assim (pode funcionar sem auth)
-                    logger.info(f"🔍 Verificando Kermartin (sem auth): {numero_formatado}")
-                    processo_kermartin = kermartin_service.buscar_processo_por_numero(numero_formatado)
-                    if processo_kermartin:
-                        logger.info("✅ Processo encontrado no Kermartin!")
-                        processo_kermartin['fonte'] = 'Kermartin (Base Local)'
-                        # Armazenar no cache
-                        if cache:
-                            cache.set(f"processo:{numero_formatado}", processo_kermartin, cache_type='processo')
-                        return processo_kermartin
-            except Exception as e:
-                logger.warning(f"Erro ao buscar no Kermartin (continuando): {e}")
+            processo_kermartin = self._buscar_no_kermartin(numero_formatado, kermartin_liberado)
+            if processo_kermartin:
+                self._armazenar_kermartin(numero_formatado, processo_kermartin)
+                return processo_kermartin
             
             # PRIORIDADE 2: Se não encontrou no Kermartin, consultar API CNJ (consulta pública)
             logger.info(f"🔍 Consultando API CNJ: {numero_formatado}")
-            
-            # Extrair tribunal do número do processo
-            # Formato: NNNNNNN-DD.AAAA.J.TR.OOOO
-            # TR = código do tribunal (ex: 13 = TJMG, 02 = TJSP)
-            partes = numero_formatado.split('.')
-            if len(partes) >= 4:
-                codigo_tribunal = partes[3]  # TR está na posição 3
-                alias_tribunal = f"tj{codigo_tribunal}"
-            else:
-                alias_tribunal = "tj26"  # Default: TJMG
-            
-            # Montar URL da API
-            # Formato: https://api-publica.datajud.cnj.jus.br/{alias}/processes/{numero}
-            url = f"{self.BASE_URL}/{alias_tribunal}/processes/{numero_formatado}"
-            
-            # Fazer requisição
-            response = self.session.get(url, timeout=10)
-            
-            # Verificar status
-            if response.status_code == 200:
-                dados = response.json()
-                logger.info(f"✅ Processo encontrado via API CNJ: {numero_formatado}")
-                dados['fonte'] = 'API CNJ (Consulta Pública)'
-                # Armazenar no cache (TTL menor para dados da API)
-                if cache:
-                    cache.set(f"processo:{numero_formatado}", dados, cache_type='processo', ttl_seconds=1800)  # 30 min
-                return dados
-            elif response.status_code == 404:
-                logger.info(f"Processo não encontrado na API CNJ: {numero_formatado}")
-                return {"erro": "Processo não encontrado na base local (Kermartin) nem na API CNJ"}
-            else:
-                logger.error(f"Erro ao consultar API CNJ. Status: {response.status_code}")
-                return {"erro": f"Erro na API CNJ (status {response.status_code})"}
+            response = self.session.get(self._url_processo(numero_formatado), timeout=self.TIMEOUT)
+            return self._tratar_resposta_api(numero_formatado, response.status_code, response)
                 
         except requests.exceptions.Timeout:
             logger.error(f"Timeout ao consultar processo: {numero_processo}")
             # Tentar Kermartin mesmo com timeout
-            try:
-                from services.kermartin_service import kermartin_service
-                logger.info("🔍 Timeout na API CNJ, tentando Kermartin...")
-                processo_kermartin = kermartin_service.buscar_processo_por_numero(numero_processo)
-                if processo_kermartin:
-                    logger.info("✅ Processo encontrado no Kermartin!")
-                    processo_kermartin['fonte'] = 'Kermartin (Base Local)'
-                    return processo_kermartin
-            except Exception as e2:
-                logger.error(f"Erro ao buscar no Kermartin após timeout: {e2}")
-            return {"erro": "Timeout na consulta. Tente novamente."}
+            return self._fallback_kermartin(numero_processo, "Timeout") or {"erro": "Timeout na consulta. Tente novamente."}
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro de conexão ao consultar processo: {e}")
-            # Tentar Kermartin mesmo com erro de conexão
-            try:
-                from services.kermartin_service import kermartin_service
-                logger.info("🔍 Erro de conexão com API CNJ, tentando Kermartin...")
-                processo_kermartin = kermartin_service.buscar_processo_por_numero(numero_processo)
-                if processo_kermartin:
-                    logger.info("✅ Processo encontrado no Kermartin!")
-                    processo_kermartin['fonte'] = 'Kermartin (Base Local)'
-                    return processo_kermartin
-            except Exception as e2:
-                logger.error(f"Erro ao buscar no Kermartin após erro de conexão: {e2}")
-            return {"erro": "Erro de conexão com a API"}
+            return self._fallback_kermartin(numero_processo, "Erro de conexão") or {"erro": "Erro de conexão com a API"}
         except Exception as e:
             logger.error(f"Erro inesperado ao consultar processo: {e}")
-            # Tentar Kermartin mesmo com erro inesperado
-            try:
-                from services.kermartin_service import kermartin_service
-                logger.info("🔍 Erro inesperado na API CNJ, tentando Kermartin...")
-                processo_kermartin = kermartin_service.buscar_processo_por_numero(numero_processo)
-                if processo_kermartin:
-                    logger.info("✅ Processo encontrado no Kermartin!")
-                    processo_kermartin['fonte'] = 'Kermartin (Base Local)'
-                    return processo_kermartin
-            except Exception as e2:
-                logger.error(f"Erro ao buscar no Kermartin após erro inesperado: {e2}")
-            return {"erro": "Erro inesperado"}
+            return self._fallback_kermartin(numero_processo, "Erro inesperado") or {"erro": "Erro inesperado"}
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Cliente HTTP assíncrono compartilhado (reaproveita conexões com o DataJud)"""
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                headers=dict(self.session.headers),
+                timeout=self.TIMEOUT
+            )
+        return self._async_client
+    
+    async def consultar_processo_async(self, numero_processo: str, telegram_id: Optional[int] = None) -> Optional[Dict]:
+        """
+        Versão não bloqueante de consultar_processo para os handlers do bot
+        
+        A chamada à API CNJ usa httpx.AsyncClient; a busca no Kermartin e a
+        verificação de autenticação rodam no executor limitado. Usuários que
+        consultam o mesmo número ao mesmo tempo aguardam a mesma busca.
+        """
+        numero_formatado, resultado = self._consultar_local(numero_processo)
+        if resultado is not None:
+            return resultado
+        
+        from services.async_executor import run_blocking
+        
+        liberado = await run_blocking(self._kermartin_liberado, telegram_id)
+        return await self._flight.do_async(
+            self._chave_consulta(numero_formatado, liberado),
+            self._consultar_fontes_async, numero_processo, numero_formatado, liberado
+        )
+    
+    async def _consultar_fontes_async(self, numero_processo: str, numero_formatado: str, kermartin_liberado: bool) -> Dict:
+        """Busca no Kermartin e, se não encontrar, na API CNJ (assíncrono)"""
+        from services.async_executor import run_blocking
+        
+        try:
+            # PRIORIDADE 1: Kermartin (disco + banco fora do event loop)
+            processo_kermartin = await run_blocking(self._buscar_no_kermartin, numero_formatado, kermartin_liberado)
+            if processo_kermartin:
+                self._armazenar_kermartin(numero_formatado, processo_kermartin)
+                return processo_kermartin
+            
+            # PRIORIDADE 2: API CNJ
+            logger.info(f"🔍 Consultando API CNJ (async): {numero_formatado}")
+            response = await self._get_async_client().get(self._url_processo(numero_formatado))
+            return self._tratar_resposta_api(numero_formatado, response.status_code, response)
+            
+        except httpx.TimeoutException:
+            logger.error(f"Timeout ao consultar processo: {numero_processo}")
+            return await run_blocking(self._fallback_kermartin, numero_processo, "Timeout") or {"erro": "Timeout na consulta. Tente novamente."}
+        except httpx.HTTPError as e:
+            logger.error(f"Erro de conexão ao consultar processo: {e}")
+            return await run_blocking(self._fallback_kermartin, numero_processo, "Erro de conexão") or {"erro": "Erro de conexão com a API"}
+        except Exception as e:
+            logger.error(f"Erro inesperado ao consultar processo: {e}")
+            return await run_blocking(self._fallback_kermartin, numero_processo, "Erro inesperado") or {"erro": "Erro inesperado"}
+    
+    async def close(self):
+        """Fecha o cliente HTTP assíncrono"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
     
     def buscar_movimentacoes(self, numero_processo: str) -> Optional[List[Dict]]:
         """
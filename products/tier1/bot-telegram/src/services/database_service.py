@@ -15,6 +15,7 @@ from sqlalchemy import desc
 from shared.config.database import get_db
 from shared.database.models import User, Chat, Prazo, Notificacao, ConsultaJurisprudencia
 from shared.utils.logger import bot_telegram_logger as logger
+from services.auth_state import AuthState, auth_state_cache
 
 
 class DatabaseService:
@@ -51,6 +52,8 @@ class DatabaseService:
                         db.commit()
                         db.refresh(user)
                 
+                # Aproveitar a leitura para o cache de autenticação
+                auth_state_cache.set(AuthState.from_user(user))
                 return user
                 
             except Exception as e:
@@ -81,13 +81,14 @@ class JurisprudenciaService:
             if filtros.get('tribunal') or filtros.get('assunto') or filtros.get('magistrado'):
                 try:
                     from services.kermartin_service import kermartin_service
+                    from services.async_executor import run_blocking
                     filtro_kermartin = {}
                     if filtros.get('tribunal'):
                         filtro_kermartin['tribunal'] = filtros['tribunal']
                     if filtros.get('assunto'):
                         filtro_kermartin['assunto'] = filtros['assunto']
                     
-                    processos_rag = kermartin_service.buscar_processos_rag(filtro_kermartin)
+                    processos_rag = await run_blocking(kermartin_service.buscar_processos_rag, filtro_kermartin)
                     processos_relevantes = processos_rag[:filtros.get('limite', 10)]
                 except Exception as e:
                     logger.warning(f"Erro ao buscar processos no Kermartin: {e}")
@@ -0,0 +1,566 @@
+"""
+Índice persistente da base de conhecimento do Kermartin
+
+Evita varrer e fazer json.load de todos os arquivos a cada consulta:
+- Nomes normalizados (nome, aliases e nome do arquivo) -> arquivo
+- Índice invertido por token para buscas parciais
+- Número CNJ (só dígitos) -> arquivo e posição do registro (julgados e processos)
+- Persistido em SQLite e carregado na inicialização
+- Atualização incremental por marca d'água (mtime + tamanho) de cada arquivo
+"""
+
+import sys
+import re
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Dict, List, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from shared.utils.logger import bot_telegram_logger as logger
+
+
+# Incrementar quando o esquema ou a forma de indexar mudar (força reconstrução)
+SCHEMA_VERSION = 2
+
+CATEGORIA_MAGISTRADO = 'magistrado'
+CATEGORIA_PROCESSO = 'processo'
+
+# Origem de um número CNJ indexado (julgados têm prioridade na busca)
+ORIGEM_JULGADO = 'julgado'
+ORIGEM_PROCESSO = 'processo'
+_PRIORIDADE_ORIGEM = {ORIGEM_JULGADO: 0, ORIGEM_PROCESSO: 1}
+
+_NAO_DIGITOS = re.compile(r'\D')
+
+
+@lru_cache(maxsize=4096)
+def normalizar_nome(nome: str) -> str:
+    """
+    Normaliza nome para comparação:
+    - Remove acentos
+    - Converte para minúsculas
+    - Remove espaços extras
+    """
+    nome = nome.lower().strip()
+    nome = unicodedata.normalize('NFD', nome)
+    return ''.join(char for char in nome if unicodedata.category(char) != 'Mn')
+
+
+def apenas_digitos(numero: str) -> str:
+    """Chave do índice de processos: número CNJ sem pontuação"""
+    return _NAO_DIGITOS.sub('', str(numero))
+
+
+def _numeros_do_arquivo(dados, categoria: str) -> List[Tuple[str, str, int]]:
+    """
+    Extrai os números CNJ de um arquivo
+
+    Returns:
+        Lista de (número só dígitos, origem, posição do registro no arquivo).
+        Posição -1 indica que o próprio arquivo é o registro.
+    """
+    numeros = []
+    if categoria == CATEGORIA_MAGISTRADO:
+        dados_internos = dados.get('dados', {}) if isinstance(dados.get('dados'), dict) else {}
+        julgados = dados_internos.get('julgados_consolidados', [])
+        if isinstance(julgados, list):
+            for posicao, julgado in enumerate(julgados):
+                if isinstance(julgado, dict):
+                    numeros.append((apenas_digitos(julgado.get('numero', '')), ORIGEM_JULGADO, posicao))
+    elif isinstance(dados, list):
+        for posicao, processo in enumerate(dados):
+            if isinstance(processo, dict):
+                numeros.append((apenas_digitos(processo.get('numero', '')), ORIGEM_PROCESSO, posicao))
+    elif isinstance(dados, dict):
+        numeros.append((apenas_digitos(dados.get('numero', '')), ORIGEM_PROCESSO, -1))
+    return [item for item in numeros if item[0]]
+
+
+def _nomes_do_magistrado(dados: Dict, stem: str) -> Tuple[str, List[str]]:
+    """
+    Extrai nome principal e todos os nomes indexáveis de um perfil
+
+    Returns:
+        (nome principal normalizado, lista de nomes normalizados)
+    """
+    dados_internos = dados.get('dados', {}) if isinstance(dados.get('dados'), dict) else {}
+    metadata = dados.get('metadata', {}) if isinstance(dados.get('metadata'), dict) else {}
+
+    campos = [
+        dados_internos.get('magistrado'),
+        metadata.get('nome_magistrado'),
+        dados.get('nome_publico'),
+        dados.get('nome'),
+    ]
+    for chave in ('aliases', 'nomes_alternativos'):
+        aliases = dados.get(chave) or dados_internos.get(chave) or []
+        if isinstance(aliases, list):
+            campos.extend(aliases)
+
+    # Nome do arquivo: como está e com separadores trocados por espaço
+    campos.append(stem)
+    campos.append(stem.replace('_', ' ').replace('-', ' '))
+
+    nomes = []
+    for campo in campos:
+        if campo:
+            nome_norm = normalizar_nome(str(campo))
+            if nome_norm and nome_norm not in nomes:
+                nomes.append(nome_norm)
+
+    principal = normalizar_nome(str(
+        dados_internos.get('magistrado') or metadata.get('nome_magistrado') or stem
+    ))
+    return principal, nomes
+
+
+class KermartinIndex:
+    """
+    Índice da base de conhecimento do Kermartin
+
+    As consultas são feitas em memória (dicionários); o SQLite guarda o
+    índice entre reinicializações para que só arquivos alterados sejam relidos.
+    """
+
+    # Intervalo mínimo entre verificações de arquivos alterados (segundos)
+    REFRESH_INTERVAL = 60
+
+    def __init__(self, kb_path: Path, index_path: Optional[Path] = None,
+                 processos_path: Optional[Path] = None):
+        """
+        Args:
+            kb_path: Diretório knowledge_base do Kermartin
+            index_path: Arquivo SQLite do índice (None = apenas em memória)
+            processos_path: Diretório de processos coletados (JSON), opcional
+        """
+        self.kb_path = kb_path
+        self.index_path = index_path
+        self.processos_path = processos_path
+        self._lock = threading.RLock()
+        self._ultima_verificacao = 0.0
+        self._carregado = False
+
+        # caminho -> (categoria, mtime_ns, tamanho)
+        self._arquivos: Dict[str, Tuple[str, int, int]] = {}
+        # caminho -> {'nome': ..., 'comarca': ..., 'principal': ..., 'nomes': [...]}
+        self._magistrados: Dict[str, Dict] = {}
+        # nome normalizado -> caminhos
+        self._por_nome: Dict[str, Set[str]] = {}
+        # token -> nomes normalizados
+        self._por_token: Dict[str, Set[str]] = {}
+        # número (só dígitos) -> [(caminho, origem, posição)]
+        self._processos: Dict[str, List[Tuple[str, str, int]]] = {}
+        # caminho -> números indexados a partir dele
+        self._numeros_por_arquivo: Dict[str, List[str]] = {}
+        # Números ordenados para busca por prefixo (reconstruído sob demanda)
+        self._numeros_ordenados: Optional[List[str]] = None
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _conectar(self) -> Optional[sqlite3.Connection]:
+        """Abre conexão com o SQLite do índice (None se persistência indisponível)"""
+        if self.index_path is None:
+            return None
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.index_path)
+            versao = conn.execute("PRAGMA user_version").fetchone()[0]
+            if versao != SCHEMA_VERSION:
+                conn.executescript("""
+                    DROP TABLE IF EXISTS arquivos;
+                    DROP TABLE IF EXISTS magistrados;
+                    DROP TABLE IF EXISTS nomes_magistrados;
+                    DROP TABLE IF EXISTS processos;
+                """)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS arquivos (
+                    caminho TEXT PRIMARY KEY,
+                    categoria TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    tamanho INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS magistrados (
+                    caminho TEXT PRIMARY KEY,
+                    nome TEXT,
+                    comarca TEXT,
+                    principal TEXT
+                );
+                CREATE TABLE IF NOT EXISTS nomes_magistrados (
+                    nome_norm TEXT NOT NULL,
+                    caminho TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_nomes_magistrados_nome
+                    ON nomes_magistrados (nome_norm);
+                CREATE INDEX IF NOT EXISTS idx_nomes_magistrados_caminho
+                    ON nomes_magistrados (caminho);
+                CREATE TABLE IF NOT EXISTS processos (
+                    numero TEXT NOT NULL,
+                    caminho TEXT NOT NULL,
+                    origem TEXT NOT NULL,
+                    posicao INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_processos_numero
+                    ON processos (numero);
+                CREATE INDEX IF NOT EXISTS idx_processos_caminho
+                    ON processos (caminho);
+            """)
+            return conn
+        except Exception as e:
+            logger.warning(f"Índice Kermartin sem persistência ({self.index_path}): {e}")
+            self.index_path = None
+            return None
+
+    def _carregar_do_disco(self):
+        """Carrega o índice persistido para memória"""
+        conn = self._conectar()
+        if conn is None:
+            return
+        try:
+            for caminho, categoria, mtime_ns, tamanho in conn.execute(
+                "SELECT caminho, categoria, mtime_ns, tamanho FROM arquivos"
+            ):
+                self._arquivos[caminho] = (categoria, mtime_ns, tamanho)
+
+            for caminho, nome, comarca, principal in conn.execute(
+                "SELECT caminho, nome, comarca, principal FROM magistrados"
+            ):
+                self._magistrados[caminho] = {
+                    'nome': nome, 'comarca': comarca, 'principal': principal, 'nomes': []
+                }
+
+            for nome_norm, caminho in conn.execute(
+                "SELECT nome_norm, caminho FROM nomes_magistrados"
+            ):
+                entrada = self._magistrados.get(caminho)
+                if entrada is not None:
+                    entrada['nomes'].append(nome_norm)
+                    self._indexar_nome(nome_norm, caminho)
+
+            for numero, caminho, origem, posicao in conn.execute(
+                "SELECT numero, caminho, origem, posicao FROM processos"
+            ):
+                self._indexar_numero(numero, caminho, origem, posicao)
+
+            logger.info(
+                f"Índice Kermartin carregado: {len(self._magistrados)} magistrados, "
+                f"{len(self._processos)} processos"
+            )
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Estruturas em memória
+    # ------------------------------------------------------------------
+
+    def _indexar_nome(self, nome_norm: str, caminho: str):
+        self._por_nome.setdefault(nome_norm, set()).add(caminho)
+        for token in nome_norm.split():
+            self._por_token.setdefault(token, set()).add(nome_norm)
+
+    def _desindexar_nome(self, nome_norm: str, caminho: str):
+        caminhos = self._por_nome.get(nome_norm)
+        if caminhos is None:
+            return
+        caminhos.discard(caminho)
+        if caminhos:
+            return
+        del self._por_nome[nome_norm]
+        for token in nome_norm.split():
+            nomes = self._por_token.get(token)
+            if nomes is not None:
+                nomes.discard(nome_norm)
+                if not nomes:
+                    del self._por_token[token]
+
+    def _indexar_numero(self, numero: str, caminho: str, origem: str, posicao: int):
+        self._processos.setdefault(numero, []).append((caminho, origem, posicao))
+        self._numeros_por_arquivo.setdefault(caminho, []).append(numero)
+        self._numeros_ordenados = None
+
+    def _remover_arquivo(self, caminho: str):
+        """Remove do índice em memória tudo o que veio do arquivo"""
+        entrada = self._magistrados.pop(caminho, None)
+        if entrada:
+            for nome_norm in entrada['nomes']:
+                self._desindexar_nome(nome_norm, caminho)
+
+        for numero in self._numeros_por_arquivo.pop(caminho, []):
+            referencias = [ref for ref in self._processos.get(numero, []) if ref[0] != caminho]
+            if referencias:
+                self._processos[numero] = referencias
+            else:
+                self._processos.pop(numero, None)
+            self._numeros_ordenados = None
+
+    def _adicionar_arquivo(self, caminho: str, arquivo: Path, categoria: str) -> Optional[Dict]:
+        """
+        Lê o arquivo uma única vez e o adiciona ao índice em memória
+
+        Returns:
+            Dict com 'magistrado' (entrada ou None) e 'numeros', ou None se ilegível
+        """
+        try:
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except Exception as e:
+            logger.warning(f"Erro ao indexar {arquivo}: {e}")
+            return None
+
+        entrada = None
+        if categoria == CATEGORIA_MAGISTRADO:
+            if not isinstance(dados, dict):
+                return None
+            principal, nomes = _nomes_do_magistrado(dados, arquivo.stem)
+            dados_internos = dados.get('dados', {}) if isinstance(dados.get('dados'), dict) else {}
+            metadata = dados.get('metadata', {}) if isinstance(dados.get('metadata'), dict) else {}
+            entrada = {
+                'nome': (dados_internos.get('magistrado') or metadata.get('nome_magistrado')
+                         or dados.get('nome_publico') or arquivo.stem),
+                'comarca': str(dados.get('comarca', '') or dados_internos.get('comarca', '')),
+                'principal': principal,
+                'nomes': nomes,
+            }
+            self._magistrados[caminho] = entrada
+            for nome_norm in nomes:
+                self._indexar_nome(nome_norm, caminho)
+
+        numeros = _numeros_do_arquivo(dados, categoria)
+        for numero, origem, posicao in numeros:
+            self._indexar_numero(numero, caminho, origem, posicao)
+
+        return {'magistrado': entrada, 'numeros': numeros}
+
+    # ------------------------------------------------------------------
+    # Atualização incremental
+    # ------------------------------------------------------------------
+
+    def carregar(self):
+        """Carrega o índice persistido e sincroniza com os arquivos atuais"""
+        with self._lock:
+            if not self._carregado:
+                self._carregar_do_disco()
+                self._carregado = True
+            self.atualizar(forcar=True)
+
+    def atualizar(self, forcar: bool = False) -> int:
+        """
+        Reindexa apenas arquivos novos, alterados (mtime/tamanho) ou removidos
+
+        Args:
+            forcar: Ignora o intervalo mínimo entre verificações
+
+        Returns:
+            Número de arquivos reindexados ou removidos
+        """
+        agora = time.monotonic()
+        if not forcar and agora - self._ultima_verificacao < self.REFRESH_INTERVAL:
+            return 0
+
+        with self._lock:
+            if not self._carregado:
+                self._carregar_do_disco()
+                self._carregado = True
+
+            self._ultima_verificacao = agora
+            diretorios = [(self.kb_path / "magistrados", CATEGORIA_MAGISTRADO)]
+            if self.processos_path is not None:
+                diretorios.append((self.processos_path, CATEGORIA_PROCESSO))
+
+            atuais: Dict[str, Tuple[Path, str, int, int]] = {}
+            for diretorio, categoria in diretorios:
+                if not diretorio.exists():
+                    continue
+                for arquivo in diretorio.glob("*.json"):
+                    try:
+                        st = arquivo.stat()
+                    except OSError:
+                        continue
+                    atuais[str(arquivo)] = (arquivo, categoria, st.st_mtime_ns, st.st_size)
+
+            removidos = [c for c in self._arquivos if c not in atuais]
+            alterados = [
+                c for c, (_, categoria, mtime_ns, tamanho) in atuais.items()
+                if self._arquivos.get(c) != (categoria, mtime_ns, tamanho)
+            ]
+            if not removidos and not alterados:
+                return 0
+
+            for caminho in removidos:
+                self._remover_arquivo(caminho)
+                self._arquivos.pop(caminho, None)
+
+            novas_entradas = {}
+            for caminho in alterados:
+                arquivo, categoria, mtime_ns, tamanho = atuais[caminho]
+                self._remover_arquivo(caminho)
+                self._arquivos[caminho] = (categoria, mtime_ns, tamanho)
+                novas_entradas[caminho] = self._adicionar_arquivo(caminho, arquivo, categoria)
+
+            self._persistir(removidos, novas_entradas)
+            logger.info(
+                f"Índice Kermartin atualizado: {len(alterados)} arquivo(s) reindexado(s), "
+                f"{len(removidos)} removido(s)"
+            )
+            return len(alterados) + len(removidos)
+
+    def _persistir(self, removidos: List[str], novas_entradas: Dict[str, Optional[Dict]]):
+        """Grava as alterações no SQLite em uma única transação"""
+        conn = self._conectar()
+        if conn is None:
+            return
+        try:
+            with conn:
+                for caminho in list(removidos) + list(novas_entradas):
+                    conn.execute("DELETE FROM arquivos WHERE caminho = ?", (caminho,))
+                    conn.execute("DELETE FROM magistrados WHERE caminho = ?", (caminho,))
+                    conn.execute("DELETE FROM nomes_magistrados WHERE caminho = ?", (caminho,))
+                    conn.execute("DELETE FROM processos WHERE caminho = ?", (caminho,))
+
+                for caminho, novos in novas_entradas.items():
+                    categoria, mtime_ns, tamanho = self._arquivos[caminho]
+                    conn.execute(
+                        "INSERT INTO arquivos (caminho, categoria, mtime_ns, tamanho) VALUES (?, ?, ?, ?)",
+                        (caminho, categoria, mtime_ns, tamanho)
+                    )
+                    if novos is None:
+                        continue
+                    conn.executemany(
+                        "INSERT INTO processos (numero, caminho, origem, posicao) VALUES (?, ?, ?, ?)",
+                        [(numero, caminho, origem, posicao) for numero, origem, posicao in novos['numeros']]
+                    )
+                    entrada = novos['magistrado']
+                    if entrada is None:
+                        continue
+                    conn.execute(
+                        "INSERT INTO magistrados (caminho, nome, comarca, principal) VALUES (?, ?, ?, ?)",
+                        (caminho, entrada['nome'], entrada['comarca'], entrada['principal'])
+                    )
+                    conn.executemany(
+                        "INSERT INTO nomes_magistrados (nome_norm, caminho) VALUES (?, ?)",
+                        [(nome_norm, caminho) for nome_norm in entrada['nomes']]
+                    )
+        except Exception as e:
+            logger.warning(f"Erro ao persistir índice Kermartin: {e}")
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def buscar_magistrado(self, nome: str) -> List[Path]:
+        """
+        Busca arquivos de magistrados cujo nome corresponde à busca
+
+        Mesma regra da varredura original (igualdade ou substring nos dois
+        sentidos), mas resolvida sobre o índice em memória.
+
+        Returns:
+            Caminhos ordenados: correspondências exatas do nome principal primeiro
+        """
+        self.atualizar()
+        nome_busca = normalizar_nome(nome)
+        if not nome_busca:
+            return []
+
+        with self._lock:
+            caminhos = set(self._por_nome.get(nome_busca, ()))
+
+            # Candidatos que compartilham ao menos um token com a busca
+            candidatos: Set[str] = set()
+            for token in nome_busca.split():
+                candidatos.update(self._por_token.get(token, ()))
+            for nome_norm in candidatos:
+                if nome_busca in nome_norm or nome_norm in nome_busca:
+                    caminhos.update(self._por_nome[nome_norm])
+
+            # Busca por trecho de palavra (ex.: "silv"): varre só os nomes em memória
+            if not caminhos:
+                for nome_norm, arquivos in self._por_nome.items():
+                    if nome_busca in nome_norm or nome_norm in nome_busca:
+                        caminhos.update(arquivos)
+
+            return [
+                Path(caminho) for caminho in sorted(
+                    caminhos,
+                    key=lambda c: (self._magistrados[c]['principal'] != nome_busca, c)
+                )
+            ]
+
+    def _ordenar_referencias(self, referencias) -> List[Tuple[Path, str, int]]:
+        return [
+            (Path(caminho), origem, posicao)
+            for caminho, origem, posicao in sorted(
+                referencias, key=lambda ref: (_PRIORIDADE_ORIGEM.get(ref[1], 9), ref[0], ref[2])
+            )
+        ]
+
+    def buscar_processo(self, numero: str) -> List[Tuple[Path, str, int]]:
+        """
+        Busca exata por número CNJ (com ou sem pontuação)
+
+        Returns:
+            Lista de (arquivo, origem, posição do registro); julgados primeiro
+        """
+        self.atualizar()
+        chave = apenas_digitos(numero)
+        if not chave:
+            return []
+        with self._lock:
+            return self._ordenar_referencias(self._processos.get(chave, []))
+
+    def buscar_processos_por_prefixo(self, prefixo: str, limite: int = 50) -> List[Tuple[str, Path, str, int]]:
+        """
+        Busca números CNJ que começam com o prefixo (ex.: "0001234" ou "000123456")
+
+        Returns:
+            Lista de (número só dígitos, arquivo, origem, posição), em ordem numérica
+        """
+        self.atualizar()
+        chave = apenas_digitos(prefixo)
+        if not chave:
+            return []
+        with self._lock:
+            if self._numeros_ordenados is None:
+                self._numeros_ordenados = sorted(self._processos)
+            numeros = self._numeros_ordenados
+
+            resultados = []
+            i = bisect_left(numeros, chave)
+            while i < len(numeros) and numeros[i].startswith(chave) and len(resultados) < limite:
+                numero = numeros[i]
+                for arquivo, origem, posicao in self._ordenar_referencias(self._processos[numero]):
+                    resultados.append((numero, arquivo, origem, posicao))
+                i += 1
+            return resultados[:limite]
+
+    def listar_magistrados(self) -> List[Dict]:
+        """Retorna nome e comarca de todos os magistrados indexados"""
+        self.atualizar()
+        with self._lock:
+            return [
+                {'nome': entrada['nome'], 'comarca': entrada['comarca']}
+                for _, entrada in sorted(self._magistrados.items())
+            ]
+
+    def get_stats(self) -> Dict:
+        """Estatísticas do índice"""
+        with self._lock:
+            return {
+                'arquivos': len(self._arquivos),
+                'magistrados': len(self._magistrados),
+                'nomes': len(self._por_nome),
+                'tokens': len(self._por_token),
+                'processos': len(self._processos),
+                'persistente': self.index_path is not None,
+            }
@@ -3,6 +3,7 @@ Serviço para acessar dados do Kermartin
 Permite consultar processos, magistrados e promotores já coletados
 """
 
+import os
 import sys
 import json
 import sqlite3
@@ -12,7 +13,11 @@ from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
+from shared.config.settings import settings
 from shared.utils.logger import bot_telegram_logger as logger
+from services.kermartin_index import KermartinIndex, normalizar_nome, ORIGEM_JULGADO
+from services.cache_service import cache_service
+from services.single_flight import get_single_flight
 
 # Caminho base do Kermartin
 KERMARTIN_BASE = Path("/home/clenio/Documentos/Meusagentes/kermartin")
@@ -20,6 +25,12 @@ KERMARTIN_DB = KERMARTIN_BASE / "db.sqlite3"
 KERMARTIN_KB = KERMARTIN_BASE / "knowledge_base"
 KERMARTIN_DATA = KERMARTIN_BASE / "data"
 
+# Índice persistente da base (no cache do bot, pois o diretório do Kermartin pode ser somente leitura)
+KERMARTIN_INDEX = Path(os.getenv(
+    "KERMARTIN_INDEX_PATH",
+    str(Path(settings.CACHE_DIR) / "kermartin_index.sqlite3")
+))
+
 
 class KermartinService:
     """Serviço para acessar dados coletados no Kermartin"""
@@ -30,10 +41,25 @@ class KermartinService:
         self.kb_path = KERMARTIN_KB
         self.data_path = KERMARTIN_DATA
         
+        self.indice = KermartinIndex(
+            self.kb_path,
+            KERMARTIN_INDEX,
+            processos_path=self.data_path / "triangulo_mineiro" / "processos"
+        )
+        
+        # Buscas simultâneas pelo mesmo nome compartilham uma única leitura
+        self._flight_magistrado = get_single_flight('magistrado')
+        self._flight_promotor = get_single_flight('promotor')
+        
         # Verificar se caminhos existem
         if not self.base_path.exists():
             logger.warning(f"Caminho do Kermartin não encontrado: {self.base_path}")
         else:
+            # Carregar índice na inicialização (só reindexa arquivos alterados)
+            try:
+                self.indice.carregar()
+            except Exception as e:
+                logger.warning(f"Erro ao carregar índice do Kermartin: {e}")
             logger.info(f"✅ Serviço Kermartin inicializado: {self.base_path}")
     
     def _normalizar_nome(self, nome: str) -> str:
@@ -43,56 +69,46 @@ class KermartinService:
         - Converte para minúsculas
         - Remove espaços extras
         """
-        import unicodedata
-        # Converter para minúsculas e remover espaços extras
-        nome = nome.lower().strip()
-        # Remover acentos
-        nome = unicodedata.normalize('NFD', nome)
-        nome = ''.join(char for char in nome if unicodedata.category(char) != 'Mn')
-        return nome
+        return normalizar_nome(nome)
     
-    def _buscar_nome_em_dados(self, nome_busca: str, dados: Dict) -> bool:
-        """
-        Busca nome normalizado em vários campos do magistrado
-        """
-        nome_busca_norm = self._normalizar_nome(nome_busca)
-        
-        # Campos possíveis onde o nome pode estar
-        campos_nome = [
-            dados.get('dados', {}).get('magistrado'),
-            dados.get('metadata', {}).get('nome_magistrado'),
-            dados.get('nome_publico'),
-            dados.get('nome'),
-        ]
-        
-        # Também verificar o nome do arquivo (já normalizado no loop)
-        arquivo_nome = dados.get('_arquivo_nome', '')
-        
-        for campo in campos_nome:
-            if campo:
-                campo_norm = self._normalizar_nome(str(campo))
-                # Busca exata ou parcial
-                if nome_busca_norm == campo_norm or nome_busca_norm in campo_norm or campo_norm in nome_busca_norm:
-                    return True
-        
-        # Verificar também no nome do arquivo
-        if arquivo_nome:
-            arquivo_norm = self._normalizar_nome(arquivo_nome)
-            if nome_busca_norm in arquivo_norm or arquivo_norm in nome_busca_norm:
-                return True
-        
-        return False
+    def _consultar_cache(self, flight, chave: str, cache_type: str) -> Optional[Dict]:
+        """Consulta o cache e registra o hit no contador da consulta"""
+        dados = cache_service.get(chave, cache_type=cache_type)
+        if dados is not None:
+            flight.record_hit()
+        return dados
     
     def buscar_magistrado(self, nome: str) -> Optional[Dict]:
         """
         Busca perfil de magistrado na base de conhecimento
         
+        Usa cache e agrupa buscas simultâneas pelo mesmo nome.
+        Bloqueante: nos handlers do bot use buscar_magistrado_async.
+        
         Args:
             nome: Nome do magistrado (pode ser parcial, case-insensitive)
             
         Returns:
             Dict com dados do magistrado ou None
         """
+        chave = f"magistrado:{self._normalizar_nome(nome)}"
+        dados = self._consultar_cache(self._flight_magistrado, chave, 'magistrado')
+        if dados is not None:
+            return dados
+        return self._flight_magistrado.do(chave, self._buscar_magistrado_no_indice, nome, chave)
+    
+    async def buscar_magistrado_async(self, nome: str) -> Optional[Dict]:
+        """Versão não bloqueante de buscar_magistrado (leitura no executor limitado)"""
+        from services.async_executor import run_blocking
+        
+        chave = f"magistrado:{self._normalizar_nome(nome)}"
+        dados = self._consultar_cache(self._flight_magistrado, chave, 'magistrado')
+        if dados is not None:
+            return dados
+        return await self._flight_magistrado.do_async(chave, run_blocking, self._buscar_magistrado_no_indice, nome, chave)
+    
+    def _buscar_magistrado_no_indice(self, nome: str, chave: str) -> Optional[Dict]:
+        """Busca o magistrado pelo índice e lê o perfil do disco"""
         try:
             magistrados_path = self.kb_path / "magistrados"
             
@@ -100,51 +116,23 @@ class KermartinService:
                 logger.warning("Diretório de magistrados não encontrado")
                 return None
             
-            # Normalizar nome de busca
-            nome_busca_norm = self._normalizar_nome(nome)
-            logger.info(f"Buscando magistrado: '{nome}' (normalizado: '{nome_busca_norm}')")
-            
-            # Lista para armazenar correspondências (pode ter múltiplas)
-            correspondencias = []
+            logger.info(f"Buscando magistrado: '{nome}' (normalizado: '{self._normalizar_nome(nome)}')")
             
-            for arquivo in magistrados_path.glob("*.json"):
+            # Índice já devolve a melhor correspondência primeiro
+            for arquivo in self.indice.buscar_magistrado(nome):
                 try:
                     with open(arquivo, 'r', encoding='utf-8') as f:
                         dados = json.load(f)
                     
-                    # Adicionar nome do arquivo aos dados para busca
                     dados['_arquivo_nome'] = arquivo.stem
+                    logger.info(f"✅ Magistrado encontrado: {arquivo.stem}")
+                    cache_service.set(chave, dados, cache_type='magistrado')
+                    return dados
                     
-                    # Verificar se nome corresponde
-                    if self._buscar_nome_em_dados(nome, dados):
-                        logger.info(f"✅ Magistrado encontrado: {arquivo.stem}")
-                        correspondencias.append((arquivo.stem, dados))
-                        
                 except Exception as e:
                     logger.warning(f"Erro ao ler {arquivo}: {e}")
                     continue
             
-            if correspondencias:
-                # Se múltiplas correspondências, retornar a primeira (mais completa)
-                # Ou a que tem o nome mais exato
-                melhor_match = correspondencias[0][1]
-                
-                # Se tiver mais de uma, tentar encontrar a melhor correspondência
-                if len(correspondencias) > 1:
-                    for nome_arquivo, dados_match in correspondencias:
-                        nome_magistrado = self._normalizar_nome(
-                            dados_match.get('dados', {}).get('magistrado') or 
-                            dados_match.get('metadata', {}).get('nome_magistrado') or 
-                            nome_arquivo
-                        )
-                        # Priorizar correspondências exatas
-                        if nome_busca_norm == nome_magistrado:
-                            melhor_match = dados_match
-                            logger.info(f"Melhor match encontrado: {nome_arquivo}")
-                            break
-                
-                return melhor_match
-            
             logger.info(f"Magistrado '{nome}' não encontrado na base")
             return None
             
@@ -155,7 +143,28 @@ class KermartinService:
     def buscar_promotor(self, nome: str) -> Optional[Dict]:
         """
         Busca perfil de promotor na base de conhecimento
+        
+        Usa cache e agrupa buscas simultâneas pelo mesmo nome.
+        Bloqueante: nos handlers do bot use buscar_promotor_async.
         """
+        chave = f"promotor:{nome.lower().strip()}"
+        dados = self._consultar_cache(self._flight_promotor, chave, 'promotor')
+        if dados is not None:
+            return dados
+        return self._flight_promotor.do(chave, self._buscar_promotor_em_arquivos, nome, chave)
+    
+    async def buscar_promotor_async(self, nome: str) -> Optional[Dict]:
+        """Versão não bloqueante de buscar_promotor (leitura no executor limitado)"""
+        from services.async_executor import run_blocking
+        
+        chave = f"promotor:{nome.lower().strip()}"
+        dados = self._consultar_cache(self._flight_promotor, chave, 'promotor')
+        if dados is not None:
+            return dados
+        return await self._flight_promotor.do_async(chave, run_blocking, self._buscar_promotor_em_arquivos, nome, chave)
+    
+    def _buscar_promotor_em_arquivos(self, nome: str, chave: str) -> Optional[Dict]:
+        """Percorre os perfis de promotores procurando o nome"""
         try:
             promotores_path = self.kb_path / "promotores"
             
@@ -174,6 +183,7 @@ class KermartinService:
                     
                     if nome_lower in nome_promotor or nome_lower in nome_arquivo:
                         logger.info(f"Promotor encontrado: {arquivo.stem}")
+                        cache_service.set(chave, dados, cache_type='promotor')
                         return dados
                         
                 except Exception as e:
@@ -342,61 +352,21 @@ class KermartinService:
             # Limpar número (remover pontos e hífens para busca)
             numero_limpo = numero_cnj.replace('-', '').replace('.', '').strip()
             
-            # 1. PRIORIDADE: Buscar em julgados de magistrados (melhor qualidade de dados)
-            magistrados_path = self.kb_path / "magistrados"
-            
-            if magistrados_path.exists():
-                logger.info(f"Buscando em julgados de magistrados (prioridade)...")
-                for arquivo in magistrados_path.glob("*.json"):
-                    try:
-                        with open(arquivo, 'r', encoding='utf-8') as f:
-                            dados = json.load(f)
-                        
-                        # Procurar nos julgados
-                        julgados = dados.get('dados', {}).get('julgados_consolidados', [])
-                        
-                        for julgado in julgados:
-                            numero_julgado = str(julgado.get('numero', '')).strip()
-                            numero_julgado_limpo = numero_julgado.replace('-', '').replace('.', '').strip()
-                            
-                            # Comparar de múltiplas formas
-                            if (numero_cnj == numero_julgado or 
-                                numero_limpo == numero_julgado_limpo or
-                                numero_limpo in numero_julgado_limpo):
-                                
-                                logger.info(f"✅ Processo encontrado em julgado do magistrado: {arquivo.stem}")
-                                processo_formatado = self._formatar_julgado_como_processo(julgado, dados)
-                                return processo_formatado
-                                
-                    except Exception as e:
-                        logger.debug(f"Erro ao ler {arquivo}: {e}")
-                        continue
-            
-            # 2. Buscar em arquivos JSON de dados coletados
-            triangulo_path = self.data_path / "triangulo_mineiro" / "processos"
-            
-            if triangulo_path.exists():
-                for arquivo in triangulo_path.glob("*.json"):
-                    try:
-                        with open(arquivo, 'r', encoding='utf-8') as f:
-                            dados = json.load(f)
-                        
-                        # Se for lista
-                        if isinstance(dados, list):
-                            for proc in dados:
-                                numero_proc = str(proc.get('numero', '')).replace('-', '').replace('.', '')
-                                if numero_limpo in numero_proc:
-                                    logger.info(f"Processo encontrado em JSON: {numero_cnj}")
-                                    return proc
-                        # Se for dict único
-                        elif isinstance(dados, dict):
-                            numero_proc = str(dados.get('numero', '')).replace('-', '').replace('.', '')
-                            if numero_limpo in numero_proc:
-                                logger.info(f"Processo encontrado em JSON: {numero_cnj}")
-                                return dados
-                                
-                    except Exception as e:
-                        continue
+            # 1 e 2. Índice por número CNJ: julgados de magistrados (prioridade) e
+            # processos coletados em data/triangulo_mineiro/processos
+            referencias = self.indice.buscar_processo(numero_limpo)
+            if not referencias:
+                # Número incompleto: usar correspondências por prefixo
+                referencias = [
+                    (arquivo, origem, posicao)
+                    for _, arquivo, origem, posicao in self.indice.buscar_processos_por_prefixo(numero_limpo, limite=10)
+                ]
+            
+            for arquivo, origem, posicao in referencias:
+                processo = self._carregar_registro(arquivo, origem, posicao)
+                if processo:
+                    logger.info(f"✅ Processo encontrado no índice ({origem}): {arquivo.stem}")
+                    return processo
             
             # 3. FALLBACK: Tentar buscar na base RAG (pode ter dados parciais)
             processos_rag = self.buscar_processos_rag({'numero': numero_cnj})
@@ -419,6 +389,56 @@ class KermartinService:
             logger.error(f"Erro ao buscar processo por número: {e}")
             return None
     
+    def _carregar_registro(self, arquivo: Path, origem: str, posicao: int) -> Optional[Dict]:
+        """
+        Lê o registro apontado pelo índice de processos
+        
+        Args:
+            arquivo: Arquivo JSON de origem
+            origem: 'julgado' (perfil de magistrado) ou 'processo'
+            posicao: Posição do registro na lista (-1 = o próprio arquivo)
+            
+        Returns:
+            Dict com dados do processo ou None
+        """
+        try:
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            
+            if origem == ORIGEM_JULGADO:
+                julgado = dados.get('dados', {}).get('julgados_consolidados', [])[posicao]
+                return self._formatar_julgado_como_processo(julgado, dados)
+            
+            return dados if posicao < 0 else dados[posicao]
+            
+        except Exception as e:
+            # Arquivo alterado depois da indexação: próxima atualização corrige
+            logger.debug(f"Erro ao ler registro {posicao} de {arquivo}: {e}")
+            return None
+    
+    def buscar_processos_por_prefixo(self, prefixo: str, limite: int = 20) -> List[Dict]:
+        """
+        Busca processos cujo número CNJ começa com o prefixo informado
+        
+        Args:
+            prefixo: Início do número CNJ (com ou sem pontuação)
+            limite: Número máximo de processos
+            
+        Returns:
+            Lista de processos encontrados
+        """
+        try:
+            processos = []
+            for _, arquivo, origem, posicao in self.indice.buscar_processos_por_prefixo(prefixo, limite):
+                processo = self._carregar_registro(arquivo, origem, posicao)
+                if processo:
+                    processos.append(processo)
+            return processos
+            
+        except Exception as e:
+            logger.error(f"Erro ao buscar processos por prefixo: {e}")
+            return []
+    
     def _formatar_processo_rag(self, processo_rag: Dict) -> Dict:
         """Formata processo da base RAG para formato padrão, extraindo dados do content"""
         try:
@@ -503,34 +523,21 @@ class KermartinService:
         """
         try:
             magistrados = []
-            magistrados_path = self.kb_path / "magistrados"
+            nomes_vistos = set()
             
-            if not magistrados_path.exists():
-                return []
-            
-            for arquivo in magistrados_path.glob("*.json"):
-                try:
-                    with open(arquivo, 'r', encoding='utf-8') as f:
-                        dados = json.load(f)
-                    
-                    nome = dados.get('dados', {}).get('magistrado') or dados.get('metadata', {}).get('nome_magistrado') or dados.get('nome_publico') or arquivo.stem
-                    
-                    # Filtrar por comarca se especificado
-                    if comarca:
-                        comarca_magistrado = str(dados.get('comarca', '') or dados.get('dados', {}).get('comarca', '')).lower()
-                        if comarca.lower() not in comarca_magistrado:
-                            continue
-                    
-                    # Adicionar nome normalizado para evitar duplicatas
-                    if nome:
-                        nome_normalizado = self._normalizar_nome(nome)
-                        # Verificar se já existe (comparando normalizados)
-                        existe = any(self._normalizar_nome(existente) == nome_normalizado for existente in magistrados)
-                        if not existe:
-                            magistrados.append(nome)
-                    
-                except:
+            for entrada in self.indice.listar_magistrados():
+                nome = entrada['nome']
+                
+                # Filtrar por comarca se especificado
+                if comarca and comarca.lower() not in (entrada['comarca'] or '').lower():
                     continue
+                
+                # Comparar normalizados para evitar duplicatas
+                if nome:
+                    nome_normalizado = self._normalizar_nome(nome)
+                    if nome_normalizado not in nomes_vistos:
+                        nomes_vistos.add(nome_normalizado)
+                        magistrados.append(nome)
             
             return sorted(set(magistrados))
             
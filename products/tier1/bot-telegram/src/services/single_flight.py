@@ -0,0 +1,142 @@
+"""
+Coalescência de consultas idênticas (single-flight)
+Quando vários usuários consultam o mesmo processo ao mesmo tempo, só a
+primeira chamada vai à fonte (Kermartin/DataJud); as demais aguardam e
+recebem o mesmo resultado
+"""
+
+import sys
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from shared.utils.logger import bot_telegram_logger as logger
+
+
+class _Chamada:
+    """Chamada em andamento compartilhada entre threads"""
+
+    __slots__ = ('evento', 'resultado', 'erro')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução
+
+    Contadores:
+    - hits: respondidas pelo cache antes de chegar aqui (registradas pelo serviço)
+    - misses: execuções reais (a chamada líder de cada grupo)
+    - coalesced: chamadas que aguardaram a execução de outra
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._lock = threading.Lock()
+        self._chamadas: Dict[str, _Chamada] = {}
+        self._tarefas: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def record_hit(self):
+        """Registra consulta respondida pelo cache"""
+        self.hits += 1
+
+    def do(self, key: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa func uma única vez por chave entre threads concorrentes
+
+        Usado pelos métodos síncronos (chamados via run_blocking).
+        Exceções da chamada líder são repassadas a todas as que aguardavam.
+        """
+        with self._lock:
+            chamada = self._chamadas.get(key)
+            lider = chamada is None
+            if lider:
+                chamada = self._chamadas[key] = _Chamada()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not lider:
+            logger.debug(f"Single-flight {self.nome}: aguardando consulta em andamento ({key})")
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = func(*args, **kwargs)
+            return chamada.resultado
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._chamadas[key]
+            chamada.evento.set()
+
+    async def do_async(self, key: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Versão assíncrona de do: as chamadas aguardam a mesma tarefa no event loop
+
+        A tarefa é protegida com shield, então o cancelamento de um handler
+        não cancela a consulta dos outros usuários.
+        """
+        tarefa = self._tarefas.get(key)
+        if tarefa is not None:
+            self.coalesced += 1
+            logger.debug(f"Single-flight {self.nome}: aguardando consulta em andamento ({key})")
+            return await asyncio.shield(tarefa)
+
+        self.misses += 1
+        tarefa = asyncio.ensure_future(func(*args, **kwargs))
+        self._tarefas[key] = tarefa
+
+        def _finalizar(t: asyncio.Future):
+            if self._tarefas.get(key) is t:
+                del self._tarefas[key]
+
+        tarefa.add_done_callback(_finalizar)
+        return await asyncio.shield(tarefa)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores da consulta"""
+        hits = self.hits
+        total = hits + self.misses + self.coalesced
+        return {
+            'hits': hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._chamadas) + len(self._tarefas),
+            # Chamadas que não foram à fonte (cache + coalescidas)
+            'saved_percent': round((hits + self.coalesced) / total * 100, 2) if total > 0 else 0
+        }
+
+
+_grupos: Dict[str, SingleFlight] = {}
+_grupos_lock = threading.Lock()
+
+
+def get_single_flight(nome: str) -> SingleFlight:
+    """Retorna o grupo de coalescência de um tipo de consulta (criado sob demanda)"""
+    grupo = _grupos.get(nome)
+    if grupo is None:
+        with _grupos_lock:
+            grupo = _grupos.get(nome)
+            if grupo is None:
+                grupo = _grupos[nome] = SingleFlight(nome)
+    return grupo
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Contadores de todos os tipos de consulta, por nome"""
+    return {nome: grupo.get_stats() for nome, grupo in sorted(_grupos.items())}
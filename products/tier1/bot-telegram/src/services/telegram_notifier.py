@@ -3,8 +3,9 @@ Serviço para enviar notificações via Telegram
 """
 
 import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 # Adiciona o diretório pai ao path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
@@ -13,6 +14,7 @@ from datetime import datetime, date
 from shared.config.settings import settings
 from shared.utils.logger import bot_telegram_logger as logger
 from services.alertas_service import alertas_service
+from services.alert_dispatcher import AlertDispatcher, AlertaPendente
 
 try:
     from telegram import Bot
@@ -28,6 +30,41 @@ class TelegramNotifier:
     def __init__(self):
         self.bot_token = settings.TELEGRAM_BOT_TOKEN
         self.bot = Bot(token=self.bot_token) if self.bot_token and Bot else None
+        # Métricas da última execução de verificar_e_enviar_alertas
+        self.ultimas_metricas: Optional[Dict[str, Any]] = None
+    
+    @staticmethod
+    def _formatar_alerta(prazo: dict, dias_restantes: int) -> str:
+        """Monta a mensagem de alerta de um prazo"""
+        # Determinar emoji e prioridade
+        if dias_restantes == 0:
+            emoji = "🔴"
+            urgência = "URGENTE - VENCE HOJE!"
+        elif dias_restantes == 1:
+            emoji = "🟠"
+            urgência = "MUITO URGENTE - Vence amanhã!"
+        elif dias_restantes <= 3:
+            emoji = "🟡"
+            urgência = f"ATENÇÃO - Vence em {dias_restantes} dias"
+        else:
+            emoji = "🟢"
+            urgência = f"Vence em {dias_restantes} dias"
+        
+        return f"""🔔 *ALERTA DE PRAZO PROCESSUAL*
+
+{emoji} *{urgência}*
+
+📋 *Tipo:* {prazo.get('tipo', 'N/A')}
+📄 *Processo:* {prazo.get('processo', 'N/A')}
+🏛️ *Tribunal:* {prazo.get('tribunal', 'N/A')}
+📅 *Data de Vencimento:* {prazo.get('data_vencimento', 'N/A')}
+
+💡 *Lembrete:* Não esqueça de cumprir o prazo!
+📊 Use /prazos para ver todos os prazos pendentes."""
+    
+    async def _enviar_mensagem(self, chat_id: int, texto: str):
+        """Envia texto em Markdown (usado pelo dispatcher)"""
+        await self.bot.send_message(chat_id=chat_id, text=texto, parse_mode=ParseMode.MARKDOWN)
     
     async def enviar_alerta_prazo(self, user_telegram_id: int, prazo: dict, dias_restantes: int) -> bool:
         """
@@ -46,39 +83,9 @@ class TelegramNotifier:
             return False
         
         try:
-            # Determinar emoji e prioridade
-            if dias_restantes == 0:
-                emoji = "🔴"
-                urgência = "URGENTE - VENCE HOJE!"
-            elif dias_restantes == 1:
-                emoji = "🟠"
-                urgência = "MUITO URGENTE - Vence amanhã!"
-            elif dias_restantes <= 3:
-                emoji = "🟡"
-                urgência = f"ATENÇÃO - Vence em {dias_restantes} dias"
-            else:
-                emoji = "🟢"
-                urgência = f"Vence em {dias_restantes} dias"
-            
-            # Formatar mensagem
-            mensagem = f"""🔔 *ALERTA DE PRAZO PROCESSUAL*
-
-{emoji} *{urgência}*
-
-📋 *Tipo:* {prazo.get('tipo', 'N/A')}
-📄 *Processo:* {prazo.get('processo', 'N/A')}
-🏛️ *Tribunal:* {prazo.get('tribunal', 'N/A')}
-📅 *Data de Vencimento:* {prazo.get('data_vencimento', 'N/A')}
-
-💡 *Lembrete:* Não esqueça de cumprir o prazo!
-📊 Use /prazos para ver todos os prazos pendentes."""
-            
-            # Enviar mensagem
-            await self.bot.send_message(
-                chat_id=user_telegram_id,
-                text=mensagem,
-                parse_mode=ParseMode.MARKDOWN
-            )
+            # Formatar e enviar mensagem
+            mensagem = self._formatar_alerta(prazo, dias_restantes)
+            await self._enviar_mensagem(user_telegram_id, mensagem)
             
             # Registrar no histórico
             user = alertas_service.get_user_by_telegram_id(user_telegram_id)
@@ -113,84 +120,149 @@ class TelegramNotifier:
             
             return False
     
-    async def verificar_e_enviar_alertas(self):
+    def _carregar_alertas(self, db, hoje: date) -> list:
+        """Prazos a notificar hoje (prazos + usuários numa única consulta)"""
+        from shared.database.models import Prazo, User
+        from sqlalchemy import func, or_
+        from datetime import timedelta
+        
+        hoje_inicio = datetime.combine(hoje, datetime.min.time())
+        
+        # Maior intervalo configurado limita a janela de vencimentos na consulta
+        intervalo_maximo = db.query(func.max(User.alerta_intervalo_dias)).scalar() or 3
+        
+        # Prazos pendentes dos usuários com alerta ativo pelo Telegram, ainda não notificados hoje
+        linhas = db.query(
+            Prazo.id,
+            Prazo.tipo,
+            Prazo.processo,
+            Prazo.tribunal,
+            Prazo.data_vencimento,
+            User.id.label('user_id'),
+            User.telegram_id,
+            User.alerta_intervalo_dias
+        ).join(User, Prazo.user_id == User.id).filter(
+            User.telegram_id.isnot(None),
+            User.alerta_ativo == True,
+            or_(User.alerta_canal.is_(None), User.alerta_canal.in_(("telegram", "ambos"))),
+            Prazo.status == "pendente",
+            Prazo.data_vencimento >= hoje,
+            Prazo.data_vencimento <= hoje + timedelta(days=max(intervalo_maximo, 3)),
+            or_(Prazo.ultima_notificacao.is_(None), Prazo.ultima_notificacao < hoje_inicio)
+        ).all()
+        
+        alertas = []
+        for linha in linhas:
+            dias_restantes = (linha.data_vencimento - hoje).days
+            # Intervalo de cada usuário
+            if dias_restantes > (linha.alerta_intervalo_dias or 3):
+                continue
+            
+            prazo_dict = {
+                "id": linha.id,
+                "tipo": linha.tipo,
+                "processo": linha.processo,
+                "tribunal": linha.tribunal,
+                "data_vencimento": linha.data_vencimento.strftime("%d/%m/%Y")
+            }
+            alertas.append(AlertaPendente(
+                linha.telegram_id,
+                self._formatar_alerta(prazo_dict, dias_restantes),
+                {'prazo_id': linha.id, 'user_id': linha.user_id, 'dias_restantes': dias_restantes}
+            ))
+        return alertas
+    
+    @staticmethod
+    def _gravar_resultado(db, alertas: list):
+        """Um UPDATE para os prazos notificados e um INSERT em lote no histórico"""
+        from shared.database.models import Prazo, Notificacao
+        from sqlalchemy import case, func
+        
+        enviados = [a for a in alertas if a.enviado]
+        if enviados:
+            urgentes = [a.dados['prazo_id'] for a in enviados if a.dados['dias_restantes'] <= 1]
+            db.query(Prazo).filter(
+                Prazo.id.in_([a.dados['prazo_id'] for a in enviados])
+            ).update({
+                Prazo.ultima_notificacao: datetime.now(),
+                Prazo.alertas_enviados: func.coalesce(Prazo.alertas_enviados, 0) + case(
+                    (Prazo.id.in_(urgentes), 1), else_=0
+                )
+            }, synchronize_session=False)
+        
+        if alertas:
+            db.bulk_insert_mappings(Notificacao, [
+                {
+                    'user_id': a.dados['user_id'],
+                    'prazo_id': a.dados['prazo_id'],
+                    'canal': "telegram",
+                    'mensagem': a.texto if a.enviado else f"Erro ao enviar: {a.erro}",
+                    'status': "enviada" if a.enviado else "falhou"
+                }
+                for a in alertas
+            ])
+    
+    async def verificar_e_enviar_alertas(self) -> Optional[Dict[str, Any]]:
         """
         Verifica prazos próximos e envia alertas conforme preferências
         Função a ser chamada pelo scheduler
+        
+        Todos os prazos a notificar vêm de uma única consulta (prazos + usuários);
+        o envio passa pelo AlertDispatcher (limites global e por chat do Telegram)
+        e o resultado é gravado em lote numa única transação. A sessão da consulta
+        é fechada antes do envio, que pode levar minutos, e a gravação usa outra:
+        nenhuma conexão fica presa ao pool durante o envio.
+        
+        Returns:
+            Métricas da execução ou None se o bot não está configurado
         """
         from shared.config.database import get_db
-        from shared.database.models import Prazo, User
-        from datetime import timedelta
         
         if not self.bot:
-            return
+            return None
         
-        db = next(get_db())
+        inicio = time.perf_counter()
         
         try:
-            hoje = date.today()
-            
-            # Buscar todos os usuários com alertas ativos
-            usuarios_ativos = db.query(User).filter(
-                User.telegram_id.isnot(None),
-                User.alerta_ativo == True
-            ).all()
+            db = next(get_db())
+            try:
+                alertas = self._carregar_alertas(db, date.today())
+            finally:
+                db.close()
+            consulta_ms = (time.perf_counter() - inicio) * 1000
             
-            logger.info(f"Verificando alertas para {len(usuarios_ativos)} usuários...")
+            logger.info(f"Enviando {len(alertas)} alertas de prazo...")
+            dispatcher = AlertDispatcher(self._enviar_mensagem)
+            metricas = await dispatcher.dispatch(alertas)
             
-            for user in usuarios_ativos:
-                if not user.telegram_id:
-                    continue
-                
-                intervalo_dias = user.alerta_intervalo_dias or 3
-                data_limite = hoje + timedelta(days=intervalo_dias)
-                
-                # Buscar prazos do usuário que vencem no intervalo
-                prazos = db.query(Prazo).filter(
-                    Prazo.user_id == user.id,
-                    Prazo.status == "pendente",
-                    Prazo.data_vencimento <= data_limite,
-                    Prazo.data_vencimento >= hoje
-                ).all()
-                
-                for prazo in prazos:
-                    dias_restantes = (prazo.data_vencimento - hoje).days
-                    
-                    # Verificar se já foi notificado hoje
-                    hoje_inicio = datetime.combine(hoje, datetime.min.time())
-                    if prazo.ultima_notificacao and prazo.ultima_notificacao >= hoje_inicio:
-                        continue  # Já notificado hoje
-                    
-                    # Verificar canal preferido
-                    canal = user.alerta_canal or "telegram"
-                    
-                    if canal == "telegram" or canal == "ambos":
-                        prazo_dict = {
-                            "id": prazo.id,
-                            "tipo": prazo.tipo,
-                            "processo": prazo.processo,
-                            "tribunal": prazo.tribunal,
-                            "data_vencimento": prazo.data_vencimento.strftime("%d/%m/%Y")
-                        }
-                        
-                        await self.enviar_alerta_prazo(
-                            user.telegram_id,
-                            prazo_dict,
-                            dias_restantes
-                        )
-                        
-                        # Atualizar prazo
-                        prazo.ultima_notificacao = datetime.now()
-                        if dias_restantes <= 1:
-                            prazo.alertas_enviados += 1
-                
+            db = next(get_db())
+            try:
+                self._gravar_resultado(db, alertas)
                 db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            
+            metricas.update({
+                'prazos': len(alertas),
+                'usuarios': len({a.dados['user_id'] for a in alertas}),
+                'consulta_ms': round(consulta_ms, 2),
+                'total_s': round(time.perf_counter() - inicio, 3)
+            })
+            self.ultimas_metricas = metricas
+            logger.info(
+                f"Alertas: {metricas['enviados']}/{metricas['prazos']} enviados para "
+                f"{metricas['usuarios']} usuários em {metricas['total_s']}s "
+                f"({metricas['mensagens_por_segundo']} msg/s, {metricas['falhas']} falhas, "
+                f"{metricas['flood_waits']} pausas por flood control)"
+            )
+            return metricas
             
         except Exception as e:
             logger.error(f"Erro ao verificar e enviar alertas: {e}")
-            db.rollback()
-        finally:
-            db.close()
+            return None
 
 
 # Instância global
@@ -2,20 +2,116 @@
 Configuração do banco de dados PostgreSQL
 """
 
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
-from typing import Generator
+from sqlalchemy.pool import NullPool, QueuePool, AsyncAdaptedQueuePool, StaticPool
+from typing import Any, AsyncGenerator, Dict, Generator
 
 from .settings import settings
 
+
+class PoolMetrics:
+    """
+    Métricas de obtenção de conexões do pool
+
+    Conexões em uso e overflow vêm do próprio pool; aqui ficam o total de
+    checkouts, o tempo de espera (inclui pre-ping e abertura de conexão nova)
+    e os timeouts, acumulados desde a criação do engine (engine.dispose()
+    troca o pool, mas as métricas passam para o novo).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+
+    def registrar(self, espera: float, timeout: bool = False):
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total_seconds += espera
+            if espera > self.wait_max_seconds:
+                self.wait_max_seconds = espera
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tentativas = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total_seconds / tentativas * 1000, 2) if tentativas else 0,
+                'wait_max_ms': round(self.wait_max_seconds * 1000, 2),
+            }
+
+
+class _MeteredPoolMixin:
+    """Mede o tempo de cada checkout do pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super().connect()
+        except exc.TimeoutError:
+            self.metrics.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.metrics.registrar(time.perf_counter() - inicio)
+        return conexao
+
+    def recreate(self):
+        # engine.dispose() substitui o pool por uma cópia: manter as métricas
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    """QueuePool com métricas de espera"""
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """Pool do engine assíncrono com métricas de espera"""
+
+
+def _pool_kwargs(url: str, pool_class) -> Dict[str, Any]:
+    """Argumentos de pool para create_engine conforme as configurações"""
+    if settings.DB_POOL_MODE == "null":
+        return {'poolclass': NullPool}
+
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        # SQLite em memória: uma única conexão compartilhada
+        return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+
+    kwargs = {
+        'poolclass': pool_class,
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+    if url.startswith("sqlite"):
+        # Conexões do pool circulam entre threads (executor do bot, FastAPI)
+        kwargs['connect_args'] = {'check_same_thread': False}
+    return kwargs
+
+
 # Criar engine
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=NullPool,
     echo=False,
-    future=True
+    future=True,
+    **_pool_kwargs(settings.DATABASE_URL, MeteredQueuePool)
 )
 
 # Session factory
@@ -29,6 +125,10 @@ SessionLocal = sessionmaker(
 # Base class
 Base = declarative_base()
 
+# Engine assíncrono (criado sob demanda: o driver async é opcional)
+_async_engine = None
+_AsyncSessionLocal = None
+
 
 def get_db() -> Generator:
     """
@@ -41,6 +141,91 @@ def get_db() -> Generator:
         db.close()
 
 
+def get_async_database_url() -> str:
+    """URL do engine assíncrono (DATABASE_ASYNC_URL ou derivada de DATABASE_URL)"""
+    if settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+    url = settings.DATABASE_URL
+    if url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url[len("postgresql+psycopg2://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+def get_async_engine():
+    """
+    Retorna o engine assíncrono compartilhado
+
+    Requer o driver assíncrono instalado (asyncpg para PostgreSQL,
+    aiosqlite para SQLite).
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        url = get_async_database_url()
+        _async_engine = create_async_engine(url, echo=False, **_pool_kwargs(url, MeteredAsyncQueuePool))
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def get_async_db() -> AsyncGenerator:
+    """
+    Dependency injection para obter sessão assíncrona do banco de dados
+    """
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+def _status_do_pool(pool) -> Dict[str, Any]:
+    if isinstance(pool, QueuePool):
+        status = {
+            'mode': 'queue',
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            # Conexões abertas além de pool_size (negativo enquanto o pool não encheu)
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+        }
+        metrics = getattr(pool, 'metrics', None)
+        if metrics is not None:
+            status.update(metrics.get_stats())
+        return status
+    return {'mode': 'null' if isinstance(pool, NullPool) else type(pool).__name__}
+
+
+def get_pool_status() -> Dict[str, Any]:
+    """
+    Retorna estado dos pools de conexão (síncrono e, se criado, assíncrono)
+
+    Chaves: mode, size, checked_out, checked_in, overflow, max_overflow,
+    checkouts, timeouts, wait_avg_ms, wait_max_ms. As métricas do pool
+    assíncrono recomeçam depois de dispose_async_engine (engine novo).
+    """
+    status = {'sync': _status_do_pool(engine.pool)}
+    if _async_engine is not None:
+        status['async'] = _status_do_pool(_async_engine.pool)
+    return status
+
+
+async def dispose_async_engine():
+    """Fecha as conexões do engine assíncrono (desligamento da aplicação)"""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
+
+
 def init_db():
     """
     Inicializa o banco de dados (cria todas as tabelas)
@@ -53,4 +238,3 @@ def drop_db():
     Remove todas as tabelas do banco de dados
     """
     Base.metadata.drop_all(bind=engine)
-
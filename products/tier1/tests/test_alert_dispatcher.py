@@ -0,0 +1,86 @@
+"""
+Testes para o envio em lote de alertas
+"""
+
+import asyncio
+import time
+
+from services.alert_dispatcher import AlertDispatcher, AlertaPendente
+
+
+class FloodControl(Exception):
+    """Simula telegram.error.RetryAfter"""
+    retry_after = 0.05
+
+
+def test_intervalo_por_chat_e_flood_control():
+    """Testa espaçamento por chat, nova tentativa após RetryAfter e falhas"""
+    envios = []
+    falhou_uma_vez = []
+
+    async def send(chat_id, texto):
+        if chat_id == 2 and not falhou_uma_vez:
+            falhou_uma_vez.append(True)
+            raise FloodControl("Flood control exceeded")
+        if chat_id == 3:
+            raise RuntimeError("Forbidden: bot was blocked by the user")
+        envios.append((chat_id, time.monotonic()))
+
+    alertas = [AlertaPendente(1, "a"), AlertaPendente(1, "b"), AlertaPendente(2, "c"), AlertaPendente(3, "d")]
+    dispatcher = AlertDispatcher(send, global_rate=100, chat_interval=0.05, concurrency=4)
+    metricas = asyncio.run(dispatcher.dispatch(alertas))
+
+    assert [a.enviado for a in alertas] == [True, True, True, False]
+    assert "blocked" in alertas[3].erro
+    assert metricas['enviados'] == 3 and metricas['falhas'] == 1 and metricas['flood_waits'] == 1
+
+    tempos_chat_1 = [t for chat, t in envios if chat == 1]
+    assert tempos_chat_1[1] - tempos_chat_1[0] >= 0.045
+
+
+def test_notificador_nao_segura_conexao_durante_envio(tmp_path, monkeypatch):
+    """Testa que a consulta e a gravação usam sessões próprias e nenhuma fica aberta no envio"""
+    from datetime import date, timedelta
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from shared.config import database
+    from shared.database.models import Base, Notificacao, Prazo, User
+    from services.telegram_notifier import TelegramNotifier
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'alertas.db'}")
+    Base.metadata.create_all(engine)
+    Sessao = sessionmaker(bind=engine)
+    with Sessao() as db:
+        db.add(User(id=1, telegram_id=10, name="Ana", alerta_canal="telegram", alerta_intervalo_dias=3))
+        db.add_all([
+            Prazo(id=1, user_id=1, tipo="recurso", data_vencimento=date.today() + timedelta(days=1)),
+            Prazo(id=2, user_id=1, tipo="contestacao", data_vencimento=date.today() + timedelta(days=10)),
+        ])
+        db.commit()
+
+    def get_db():
+        db = Sessao()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(database, "get_db", get_db)
+    conexoes_no_envio = []
+
+    async def enviar(chat_id, texto):
+        conexoes_no_envio.append(engine.pool.checkedout())
+
+    notifier = TelegramNotifier()
+    notifier.bot = object()
+    monkeypatch.setattr(notifier, "_enviar_mensagem", enviar)
+    metricas = asyncio.run(notifier.verificar_e_enviar_alertas())
+
+    assert conexoes_no_envio == [0]
+    assert metricas['enviados'] == 1 and metricas['prazos'] == 1
+    assert engine.pool.checkedout() == 0
+    with Sessao() as db:
+        prazo = db.get(Prazo, 1)
+        assert prazo.ultima_notificacao is not None and prazo.alertas_enviados == 1
+        assert db.get(Prazo, 2).ultima_notificacao is None
+        assert [n.status for n in db.query(Notificacao)] == ["enviada"]
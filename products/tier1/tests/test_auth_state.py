@@ -0,0 +1,33 @@
+"""
+Testes para o cache do estado de autenticação
+"""
+
+import time
+from datetime import datetime
+
+from services.auth_state import AuthState, AuthStateCache
+
+
+def test_write_through_e_invalidacao():
+    """Testa que set substitui o estado e invalidate força nova consulta"""
+    cache = AuthStateCache(ttl_seconds=60)
+    assert cache.get(1) is None
+
+    cache.set(AuthState(1, 10, False, None))
+    assert cache.get(1).autenticado is False
+
+    cache.set(AuthState(1, 10, True, datetime.utcnow()))
+    estado = cache.get(1)
+    assert estado.autenticado is True and estado.id == 10
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    assert cache.get_stats()['hits'] == 2
+
+
+def test_expiracao():
+    """Testa que entradas vencidas não são devolvidas"""
+    cache = AuthStateCache(ttl_seconds=0.01)
+    cache.set(AuthState(2, 20, True, None))
+    time.sleep(0.02)
+    assert cache.get(2) is None
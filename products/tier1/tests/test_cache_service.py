@@ -0,0 +1,140 @@
+"""
+Testes do cache em memória (TTL por tipo, evicção LRU e contabilidade de memória)
+"""
+
+import pytest
+from services import cache_service as cache_module
+from services.cache_service import CacheService, estimate_size
+
+
+class RelogioFake:
+    """Substitui o módulo time do cache_service (monotonic controlado pelo teste)"""
+
+    def __init__(self):
+        self.agora = 1000.0
+
+    def monotonic(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = RelogioFake()
+    monkeypatch.setattr(cache_module, 'time', relogio)
+    return relogio
+
+
+@pytest.fixture
+def cache():
+    return CacheService(start_cleanup_thread=False)
+
+
+def test_ttl_por_tipo(cache, relogio):
+    """Testa expiração conforme o TTL do tipo e o TTL explícito"""
+    cache.set('processo:1', {'numero': '1'}, cache_type='processo')
+    cache.set('juris:1', ['súmula'], cache_type='jurisprudencia')
+    cache.set('curto', 'valor', ttl_seconds=10)
+
+    relogio.agora += 11
+    assert cache.get('curto') is None
+    assert cache.get('juris:1') == ['súmula']
+
+    relogio.agora += CacheService.DEFAULT_TTL['jurisprudencia']
+    assert cache.get('juris:1') is None
+    assert cache.get('processo:1') == {'numero': '1'}
+
+    relogio.agora += CacheService.DEFAULT_TTL['processo']
+    assert cache.get('processo:1') is None
+
+    stats = cache.get_stats()
+    assert stats['entries'] == 0 and stats['expirations'] == 3
+    assert cache._total_size_bytes == 0 and cache._ttl_buckets == {}
+
+
+def test_limpeza_remove_so_expiradas(cache, relogio):
+    """Testa a limpeza pelos buckets de TTL sem tocar nas entradas válidas"""
+    for i in range(3):
+        cache.set(f'curto:{i}', i, ttl_seconds=60)
+        cache.set(f'longo:{i}', i, ttl_seconds=600)
+
+    relogio.agora += 61
+    cache.set('curto:novo', 'x', ttl_seconds=60)
+    with cache._lock:
+        cache._cleanup_expired()
+
+    assert sorted(cache._cache) == ['curto:novo', 'longo:0', 'longo:1', 'longo:2']
+    assert cache.get_stats()['expirations'] == 3
+
+
+def test_eviccao_segunda_chance(cache):
+    """Testa evicção da entrada mais antiga não lida; a lida desde a inserção sobrevive"""
+    valor = 'x' * 1000
+    tamanho = estimate_size(valor)
+    cache._max_bytes = tamanho * 4 + tamanho // 2
+
+    for chave in 'abcd':
+        cache.set(chave, valor)
+    assert cache.get('a') == valor
+
+    cache.set('e', valor)
+
+    assert list(cache._lru) == ['c', 'd', 'e', 'a']
+    assert cache.get('b') is None
+    assert cache.get_stats()['evictions'] == 1
+    assert cache._total_size_bytes <= cache._max_bytes * CacheService.EVICTION_TARGET
+
+    # Bit de referência de 'a' já zerado: a próxima evicção segue a ordem (sai 'c')
+    cache.set('f', valor)
+    assert list(cache._lru) == ['d', 'e', 'a', 'f']
+
+
+def test_tamanho_na_sobrescrita_e_remocao(cache):
+    """Testa o total de bytes ao sobrescrever e remover entradas"""
+    pequeno = {'numero': '1'}
+    grande = {'numero': '1', 'movimentacoes': [f'Movimento {i}' for i in range(50)]}
+
+    cache.set('processo:1', pequeno, cache_type='processo')
+    assert cache._total_size_bytes == estimate_size(pequeno)
+
+    cache.set('processo:1', grande, cache_type='processo')
+    cache.set('processo:2', pequeno, cache_type='processo')
+    assert cache._total_size_bytes == estimate_size(grande) + estimate_size(pequeno)
+    assert len(cache._ttl_buckets[CacheService.DEFAULT_TTL['processo']]) == 2
+
+    cache.delete('processo:1')
+    cache.delete('inexistente')
+    assert cache._total_size_bytes == estimate_size(pequeno)
+
+    cache.clear()
+    assert cache._total_size_bytes == 0 and cache.get_stats()['entries'] == 0
+
+
+def test_estimate_size_inclui_aninhados():
+    """Testa que listas dentro do dict entram no tamanho (sys.getsizeof não as mede)"""
+    movimentacoes = [f'Movimento {i}' for i in range(100)]
+
+    assert estimate_size({'movimentacoes': movimentacoes}) > estimate_size(movimentacoes) > 100 * 50
+
+    compartilhada = ['x' * 500]
+    assert estimate_size([compartilhada, compartilhada]) < 2 * estimate_size(compartilhada)
+
+
+def test_chaves_das_estatisticas(cache):
+    """Testa as chaves usadas pelo /cache_stats e pelos scripts de diagnóstico"""
+    cache.set('processo:1', {'numero': '1'}, cache_type='processo')
+    cache.get('processo:1')
+    cache.get('processo:2')
+
+    stats = cache.get_stats()
+    assert {'entries', 'hits', 'misses', 'hit_rate_percent', 'evictions', 'expirations',
+            'memory_mb', 'max_memory_mb', 'memory_usage_percent'} <= set(stats)
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['hit_rate_percent'] == 50.0
+    assert stats['max_memory_mb'] == CacheService.MAX_MEMORY_MB
+
+    memory_info = cache.get_memory_info()
+    assert {'cache_mb', 'cache_entries', 'psutil_available'} <= set(memory_info)
+    assert memory_info['cache_entries'] == 1
+    if memory_info['psutil_available']:
+        assert {'rss_mb', 'vms_mb'} <= set(memory_info)
+    else:
+        assert 'note' in memory_info
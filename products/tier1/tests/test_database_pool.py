@@ -0,0 +1,113 @@
+"""
+Testes do pool de conexões com métricas (shared.config.database)
+"""
+
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from shared.config import database
+from shared.config.database import MeteredQueuePool, get_pool_status
+
+
+@pytest.fixture
+def engine_medido(tmp_path):
+    """Engine SQLite em arquivo com pool de uma conexão e timeout curto"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MeteredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+        connect_args={'check_same_thread': False}
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_checkouts_espera_e_timeout(engine_medido):
+    """Testa contagem de checkouts, espera por conexão ocupada e timeout"""
+    with engine_medido.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(exc.TimeoutError):
+            engine_medido.connect()
+
+    ocupada = engine_medido.connect()
+    threading.Timer(0.1, ocupada.close).start()
+    with engine_medido.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    stats = engine_medido.pool.metrics.get_stats()
+    assert stats['checkouts'] == 3 and stats['timeouts'] == 1
+    assert stats['wait_max_ms'] >= 190
+    assert 0 < stats['wait_avg_ms'] < stats['wait_max_ms']
+    assert engine_medido.pool.checkedout() == 0
+
+
+def test_metricas_sobrevivem_ao_dispose(engine_medido):
+    """Testa que engine.dispose() troca o pool sem zerar as métricas"""
+    with engine_medido.connect():
+        pass
+    metricas = engine_medido.pool.metrics
+
+    engine_medido.dispose()
+    with engine_medido.connect():
+        pass
+
+    assert engine_medido.pool.metrics is metricas
+    assert metricas.get_stats()['checkouts'] == 2
+
+
+def test_formato_do_get_pool_status(engine_medido, monkeypatch):
+    """Testa as chaves usadas pelos health checks e pelo /status do bot"""
+    monkeypatch.setattr(database, 'engine', engine_medido)
+    monkeypatch.setattr(database, '_async_engine', None)
+    with engine_medido.connect():
+        status = get_pool_status()
+
+    assert set(status) == {'sync'}
+    assert status['sync'] == {
+        'mode': 'queue', 'size': 1, 'checked_out': 1, 'checked_in': 0, 'overflow': 0,
+        'max_overflow': 0, 'checkouts': 1, 'timeouts': 0,
+        'wait_avg_ms': status['sync']['wait_avg_ms'], 'wait_max_ms': status['sync']['wait_max_ms'],
+    }
+
+
+def test_url_assincrona_derivada(monkeypatch):
+    """Testa a troca de driver ao derivar a URL do engine assíncrono"""
+    monkeypatch.setattr(database.settings, 'DATABASE_ASYNC_URL', '')
+    for sincrona, assincrona in [
+        ("postgresql://u:s@db:5432/genesys", "postgresql+asyncpg://u:s@db:5432/genesys"),
+        ("postgresql+psycopg2://u:s@db/genesys", "postgresql+asyncpg://u:s@db/genesys"),
+        ("sqlite:///genesys.db", "sqlite+aiosqlite:///genesys.db"),
+    ]:
+        monkeypatch.setattr(database.settings, 'DATABASE_URL', sincrona)
+        assert database.get_async_database_url() == assincrona
+
+    monkeypatch.setattr(database.settings, 'DATABASE_ASYNC_URL', "postgresql+asyncpg://outro/db")
+    assert database.get_async_database_url() == "postgresql+asyncpg://outro/db"
+
+
+def test_engine_assincrono(tmp_path, monkeypatch):
+    """Testa criação do engine assíncrono com pool medido e seu status"""
+    pytest.importorskip("aiosqlite")
+    monkeypatch.setattr(database.settings, 'DATABASE_ASYNC_URL', f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    monkeypatch.setattr(database, '_async_engine', None)
+    monkeypatch.setattr(database, '_AsyncSessionLocal', None)
+
+    async def consultar():
+        engine = database.get_async_engine()
+        assert database.get_async_engine() is engine
+        async for db in database.get_async_db():
+            assert (await db.execute(text("SELECT 1"))).scalar() == 1
+        status = get_pool_status()['async']
+        await database.dispose_async_engine()
+        return engine, status
+
+    engine, status = asyncio.run(consultar())
+
+    assert isinstance(engine.pool, database.MeteredAsyncQueuePool)
+    assert status['mode'] == 'queue' and status['checkouts'] == 1
+    assert database._async_engine is None
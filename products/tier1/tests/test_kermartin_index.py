@@ -0,0 +1,84 @@
+"""
+Testes para o índice da base de conhecimento do Kermartin
+"""
+
+import json
+import os
+
+import pytest
+from services.kermartin_index import KermartinIndex
+
+
+def _salvar(caminho, dados):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def kb(tmp_path):
+    """Base de conhecimento mínima com dois magistrados"""
+    magistrados = tmp_path / "kb" / "magistrados"
+    magistrados.mkdir(parents=True)
+    _salvar(magistrados / "joao_da_silva.json", {'dados': {'magistrado': 'João da Silva'}})
+    _salvar(magistrados / "maria.json", {'nome_publico': 'Maria Souza Silva'})
+    return tmp_path / "kb"
+
+
+def test_busca_exata_vem_primeiro(kb, tmp_path):
+    """Testa busca exata, parcial e sem acentos"""
+    indice = KermartinIndex(kb, tmp_path / "indice.sqlite3")
+    indice.carregar()
+
+    assert [p.stem for p in indice.buscar_magistrado("JOAO DA SILVA")] == ["joao_da_silva"]
+    assert [p.stem for p in indice.buscar_magistrado("souz")] == ["maria"]
+    assert len(indice.buscar_magistrado("silva")) == 2
+    assert indice.buscar_magistrado("inexistente") == []
+
+
+def test_atualizacao_incremental(kb, tmp_path):
+    """Testa que o índice persistido só reindexa arquivos alterados"""
+    indice = KermartinIndex(kb, tmp_path / "indice.sqlite3")
+    indice.carregar()
+
+    recarregado = KermartinIndex(kb, tmp_path / "indice.sqlite3")
+    recarregado.carregar()
+    assert recarregado.get_stats()['magistrados'] == 2
+    assert recarregado.atualizar(forcar=True) == 0
+
+    os.remove(kb / "magistrados" / "maria.json")
+    _salvar(kb / "magistrados" / "joao_da_silva.json", {'dados': {'magistrado': 'João da Silva Neto'}})
+
+    assert recarregado.atualizar(forcar=True) == 2
+    assert [p.stem for p in recarregado.buscar_magistrado("neto")] == ["joao_da_silva"]
+    assert recarregado.buscar_magistrado("maria") == []
+
+
+def test_busca_por_numero_cnj(kb, tmp_path):
+    """Testa busca exata e por prefixo nos julgados e processos coletados"""
+    _salvar(kb / "magistrados" / "joao_da_silva.json", {
+        'dados': {
+            'magistrado': 'João da Silva',
+            'julgados_consolidados': [{'numero': '0001234-56.2024.8.13.0702'}],
+        }
+    })
+    processos = tmp_path / "processos"
+    processos.mkdir()
+    _salvar(processos / "lote.json", [
+        {'numero': '0001234-56.2024.8.13.0702'},
+        {'numero': '0001299-00.2023.8.13.0701'},
+    ])
+
+    indice = KermartinIndex(kb, tmp_path / "indice.sqlite3", processos_path=processos)
+    indice.carregar()
+
+    referencias = indice.buscar_processo("00012345620248130702")
+    assert [(p.stem, origem, posicao) for p, origem, posicao in referencias] == [
+        ("joao_da_silva", "julgado", 0),
+        ("lote", "processo", 0),
+    ]
+    assert indice.buscar_processo("0001234-56.2024.8.13.9999") == []
+
+    prefixo = indice.buscar_processos_por_prefixo("00012")
+    assert [numero for numero, _, _, _ in prefixo] == [
+        "00012345620248130702", "00012345620248130702", "00012990020238130701"
+    ]
@@ -0,0 +1,116 @@
+"""
+Testes para a coalescência de consultas (single-flight)
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from services.single_flight import SingleFlight
+
+
+def test_threads_compartilham_execucao():
+    """Testa que threads com a mesma chave fazem uma única chamada"""
+    flight = SingleFlight('teste')
+    chamadas = []
+
+    def buscar(numero):
+        chamadas.append(numero)
+        time.sleep(0.05)
+        return {'numero': numero}
+
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(flight.do('123', buscar, '123')))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert chamadas == ['123']
+    assert len(resultados) == 8 and all(r is resultados[0] for r in resultados)
+    stats = flight.get_stats()
+    assert stats['misses'] == 1 and stats['coalesced'] == 7 and stats['in_flight'] == 0
+
+
+def test_erro_repassado_e_chave_liberada():
+    """Testa que a exceção chega a todos e a próxima chamada executa de novo"""
+    flight = SingleFlight('teste')
+
+    def falhar():
+        raise ValueError("fonte indisponível")
+
+    with pytest.raises(ValueError):
+        flight.do('x', falhar)
+    assert flight.do('x', lambda: 42) == 42
+    assert flight.get_stats()['misses'] == 2
+
+
+def test_async_compartilha_tarefa():
+    """Testa coalescência no event loop, inclusive com cancelamento de um chamador"""
+    flight = SingleFlight('teste')
+    chamadas = []
+
+    async def buscar(numero):
+        chamadas.append(numero)
+        await asyncio.sleep(0.05)
+        return numero * 2
+
+    async def cenario():
+        tarefas = [asyncio.ensure_future(flight.do_async('k', buscar, 21)) for _ in range(5)]
+        await asyncio.sleep(0)
+        tarefas[0].cancel()
+        resultados = await asyncio.gather(*tarefas[1:])
+        return resultados
+
+    assert asyncio.run(cenario()) == [42, 42, 42, 42]
+    assert chamadas == [21]
+    assert flight.get_stats()['coalesced'] == 4
+
+
+def test_consulta_nao_compartilha_kermartin_com_nao_autenticado(monkeypatch):
+    """Testa que um usuário sem autenticação não recebe o resultado do Kermartin de outro"""
+    from services.auth_service import auth_service
+    from services.cnj_service import CNJService
+    from services.kermartin_service import kermartin_service
+
+    class CacheVazio:
+        def get(self, *args, **kwargs):
+            return None
+
+        def set(self, *args, **kwargs):
+            pass
+
+    class Resposta:
+        status_code = 404
+
+    def buscar_kermartin(numero):
+        time.sleep(0.05)
+        return {'numero': numero, 'partes': ['sigilo']}
+
+    def buscar_api(url, timeout):
+        time.sleep(0.05)
+        return Resposta()
+
+    monkeypatch.setattr(auth_service, 'is_authenticated', lambda telegram_id: telegram_id == 1)
+    monkeypatch.setattr(kermartin_service, 'buscar_processo_por_numero', buscar_kermartin)
+    service = CNJService()
+    service._cache = CacheVazio()
+    monkeypatch.setattr(service.session, 'get', buscar_api)
+
+    resultados = {}
+    threads = [
+        threading.Thread(target=lambda t=telegram_id: resultados.__setitem__(
+            t, service.consultar_processo('0001234-56.2024.8.13.0702', telegram_id=t)))
+        for telegram_id in (1, 2, 1)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert resultados[1]['fonte'] == 'Kermartin (Base Local)'
+    assert 'erro' in resultados[2] and 'partes' not in resultados[2]
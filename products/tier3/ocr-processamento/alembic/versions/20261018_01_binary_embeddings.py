@@ -0,0 +1,127 @@
+"""Embeddings binários em document_index
+
+Revision ID: 20261018_01
+Revises: 
+Create Date: 2026-10-18 09:00:00
+
+Substitui a coluna JSON document_index.embeddings por embedding (binário)
++ embedding_dtype/embedding_dim/embedding_scale, convertendo os vetores
+existentes em lotes. Bancos criados por init_db com o modelo novo já têm
+as colunas e são ignorados.
+"""
+import json
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.services.embedding_codec import decode_embedding, encode_embedding
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_01'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+
+def _columns():
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("document_index")}
+
+
+def upgrade() -> None:
+    columns = _columns()
+    if "embedding" in columns:
+        return
+
+    with op.batch_alter_table("document_index") as batch:
+        batch.add_column(sa.Column("embedding", sa.LargeBinary(), nullable=True))
+        batch.add_column(sa.Column("embedding_dtype", sa.String(length=10), nullable=True))
+        batch.add_column(sa.Column("embedding_dim", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("embedding_scale", sa.Float(), nullable=True))
+
+    if "embeddings" not in columns:
+        return
+
+    # Converter os vetores JSON existentes (formato de EMBEDDING_STORAGE_DTYPE)
+    dtype = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")
+    conn = op.get_bind()
+    table = sa.table(
+        "document_index",
+        sa.column("id", sa.Integer),
+        sa.column("embeddings", sa.Text),
+        sa.column("embedding", sa.LargeBinary),
+        sa.column("embedding_dtype", sa.String),
+        sa.column("embedding_dim", sa.Integer),
+        sa.column("embedding_scale", sa.Float),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, table.c.embeddings)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row_id, raw in rows:
+            vector = json.loads(raw) if isinstance(raw, str) else raw
+            if vector:
+                data, scale = encode_embedding(vector, dtype)
+                updates.append({
+                    "row_id": row_id, "data": data, "dtype": dtype,
+                    "dim": len(vector), "scale": scale
+                })
+        if updates:
+            conn.execute(
+                table.update().where(table.c.id == sa.bindparam("row_id")).values(
+                    embedding=sa.bindparam("data"),
+                    embedding_dtype=sa.bindparam("dtype"),
+                    embedding_dim=sa.bindparam("dim"),
+                    embedding_scale=sa.bindparam("scale"),
+                ),
+                updates
+            )
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table("document_index") as batch:
+        batch.drop_column("embeddings")
+
+
+def downgrade() -> None:
+    columns = _columns()
+    if "embedding" not in columns:
+        return
+
+    with op.batch_alter_table("document_index") as batch:
+        batch.add_column(sa.Column("embeddings", sa.JSON(), nullable=True))
+
+    conn = op.get_bind()
+    table = sa.table(
+        "document_index",
+        sa.column("id", sa.Integer),
+        sa.column("embeddings", sa.JSON),
+        sa.column("embedding", sa.LargeBinary),
+        sa.column("embedding_dtype", sa.String),
+        sa.column("embedding_scale", sa.Float),
+    )
+    rows = conn.execute(
+        sa.select(table.c.id, table.c.embedding, table.c.embedding_dtype, table.c.embedding_scale)
+        .where(table.c.embedding.isnot(None))
+    ).fetchall()
+    for row_id, data, dtype, scale in rows:
+        conn.execute(
+            table.update().where(table.c.id == row_id).values(
+                embeddings=decode_embedding(data, dtype or "float32", scale).astype(float).tolist()
+            )
+        )
+
+    with op.batch_alter_table("document_index") as batch:
+        batch.drop_column("embedding_scale")
+        batch.drop_column("embedding_dim")
+        batch.drop_column("embedding_dtype")
+        batch.drop_column("embedding")
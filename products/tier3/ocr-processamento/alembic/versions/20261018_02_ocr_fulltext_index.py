@@ -0,0 +1,42 @@
+"""Índice de texto completo em ocr_results
+
+Revision ID: 20261018_02
+Revises: 20261018_01
+Create Date: 2026-10-18 10:00:00
+
+PostgreSQL: coluna gerada text_search (tsvector, português) + índice GIN.
+SQLite: tabela FTS5 ocr_results_fts com triggers de sincronização,
+populada com os textos existentes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.services import fulltext
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_02'
+down_revision = '20261018_01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for statement in fulltext.POSTGRES_DDL:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        for statement in fulltext.SQLITE_DDL:
+            op.execute(statement)
+        op.execute(fulltext.SQLITE_REBUILD)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for statement in fulltext.POSTGRES_DROP:
+            op.execute(statement)
+    elif dialect == "sqlite":
+        for statement in fulltext.SQLITE_DROP:
+            op.execute(statement)
@@ -0,0 +1,47 @@
+"""Modelo de embedding em document_index
+
+Revision ID: 20261018_03
+Revises: 20261018_02
+Create Date: 2026-10-18 11:00:00
+
+Adiciona document_index.embedding_model. Os vetores existentes foram
+gerados com EMBEDDING_MODEL (um vetor por documento, texto truncado);
+continuam válidos até a reindexação, que grava um vetor por trecho.
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_03'
+down_revision = '20261018_02'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("document_index")}
+
+
+def upgrade() -> None:
+    if "embedding_model" in _columns():
+        return
+
+    with op.batch_alter_table("document_index") as batch:
+        batch.add_column(sa.Column("embedding_model", sa.String(100), nullable=True))
+
+    model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-large")
+    op.get_bind().execute(
+        sa.text("UPDATE document_index SET embedding_model = :model WHERE embedding IS NOT NULL"),
+        {"model": model}
+    )
+
+
+def downgrade() -> None:
+    if "embedding_model" not in _columns():
+        return
+
+    with op.batch_alter_table("document_index") as batch:
+        batch.drop_column("embedding_model")
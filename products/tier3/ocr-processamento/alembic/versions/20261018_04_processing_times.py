@@ -0,0 +1,39 @@
+"""Tempos do pipeline em documents
+
+Revision ID: 20261018_04
+Revises: 20261018_03
+Create Date: 2026-10-18 12:00:00
+
+Adiciona documents.processing_times (JSON com a duração de cada etapa
+do processamento: OCR, extração, classificação, análise, indexação e
+gravação).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_04'
+down_revision = '20261018_03'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("documents")}
+
+
+def upgrade() -> None:
+    if "processing_times" in _columns():
+        return
+
+    with op.batch_alter_table("documents") as batch:
+        batch.add_column(sa.Column("processing_times", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    if "processing_times" not in _columns():
+        return
+
+    with op.batch_alter_table("documents") as batch:
+        batch.drop_column("processing_times")
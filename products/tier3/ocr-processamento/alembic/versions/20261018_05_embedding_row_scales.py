@@ -0,0 +1,100 @@
+"""Escala int8 por trecho em document_index
+
+Revision ID: 20261018_05
+Revises: 20261018_04
+Create Date: 2026-10-18 13:00:00
+
+Adiciona document_index.embedding_scales (float32 de cada linha da matriz
+de trechos) e requantiza os embeddings int8 gravados com a escala única
+de embedding_scale, que passa a valer só para linhas não convertidas.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.services.embedding_codec import decode_matrix, encode_embedding, encode_matrix
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_05'
+down_revision = '20261018_04'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+
+def _columns():
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("document_index")}
+
+
+def _table():
+    return sa.table(
+        "document_index",
+        sa.column("id", sa.Integer),
+        sa.column("embedding", sa.LargeBinary),
+        sa.column("embedding_dtype", sa.String),
+        sa.column("embedding_dim", sa.Integer),
+        sa.column("embedding_scale", sa.Float),
+        sa.column("embedding_scales", sa.LargeBinary),
+    )
+
+
+def _convert(convert_row):
+    """Regrava em lotes os embeddings int8 (convert_row devolve os novos valores)"""
+    conn = op.get_bind()
+    table = _table()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, table.c.embedding, table.c.embedding_dim,
+                      table.c.embedding_scale, table.c.embedding_scales)
+            .where(table.c.id > last_id, table.c.embedding_dtype == "int8", table.c.embedding.isnot(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        updates = [
+            dict(convert_row(decode_matrix(data, "int8", dim, scale, scales)), row_id=row_id)
+            for row_id, data, dim, scale, scales in rows
+        ]
+        conn.execute(
+            table.update().where(table.c.id == sa.bindparam("row_id")).values(
+                embedding=sa.bindparam("data"),
+                embedding_scale=sa.bindparam("scale"),
+                embedding_scales=sa.bindparam("scales"),
+            ),
+            updates
+        )
+        last_id = rows[-1][0]
+
+
+def _per_row(matrix):
+    data, scales = encode_matrix(matrix, "int8")
+    return {"data": data, "scale": None, "scales": scales}
+
+
+def _single(matrix):
+    data, scale = encode_embedding(matrix, "int8")
+    return {"data": data, "scale": scale, "scales": None}
+
+
+def upgrade() -> None:
+    if "embedding_scales" in _columns():
+        return
+
+    with op.batch_alter_table("document_index") as batch:
+        batch.add_column(sa.Column("embedding_scales", sa.LargeBinary(), nullable=True))
+
+    _convert(_per_row)
+
+
+def downgrade() -> None:
+    if "embedding_scales" not in _columns():
+        return
+
+    # Volta para uma escala por matriz antes de remover a coluna
+    _convert(_single)
+
+    with op.batch_alter_table("document_index") as batch:
+        batch.drop_column("embedding_scales")
@@ -0,0 +1,163 @@
+"""
+Benchmark da extração de dados: laços por padrão (implementação anterior)
+x motor com expressão combinada (ExtractionEngine)
+
+Uso:
+    python benchmark_extraction.py                    # corpus sintético de 500 páginas
+    python benchmark_extraction.py --pages 2000
+    python benchmark_extraction.py --file texto.txt   # texto OCR real (páginas separadas por \\f)
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from dateutil import parser as date_parser
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services.extraction_engine import ExtractionEngine
+
+
+PARAGRAFOS = [
+    "Processo nº {processo}. Autor: {nome} Requerido: {empresa}",
+    "O requerente, inscrito no CPF {cpf}, vem propor a presente ação em face de {empresa}, CNPJ {cnpj}.",
+    "Fica a parte intimada para, no prazo de {dias} dias, manifestar-se sobre os documentos juntados.",
+    "Valor da causa: R$ {valor}. Condeno o réu ao pagamento de {valor} reais a título de danos morais.",
+    "Audiência designada para {data}, com vencimento em {data} do prazo para contestação.",
+    "São Paulo, {dia} de {mes} de {ano}. Prazo até {data} para recolhimento das custas.",
+    "Considerando os fatos narrados na inicial e a documentação acostada aos autos, "
+    "não há elementos suficientes para a concessão da tutela de urgência pleiteada.",
+    "Cite-se a parte ré para responder em {dias} dias para apresentar defesa, sob pena de revelia.",
+]
+NOMES = ["Maria Silva", "Joao Pereira", "Ana Costa", "Carlos Souza", "Paulo Lima"]
+EMPRESAS = ["Banco Central SA", "Construtora Alfa Ltda", "Telefonia Brasil SA"]
+MESES = ["janeiro", "março", "maio", "agosto", "novembro"]
+
+
+def gerar_corpus(paginas: int, seed: int = 42) -> str:
+    """Texto sintético de peças processuais com ~40 linhas por página"""
+    rng = random.Random(seed)
+    texto_paginas = []
+    for _ in range(paginas):
+        linhas = []
+        for _ in range(40):
+            linhas.append(rng.choice(PARAGRAFOS).format(
+                processo=f"{rng.randrange(10**7):07d}-{rng.randrange(100):02d}.2023.8.26.{rng.randrange(10**4):04d}",
+                nome=rng.choice(NOMES),
+                empresa=rng.choice(EMPRESAS),
+                cpf=f"{rng.randrange(1000):03d}.{rng.randrange(1000):03d}.{rng.randrange(1000):03d}-{rng.randrange(100):02d}",
+                cnpj=f"{rng.randrange(100):02d}.{rng.randrange(1000):03d}.{rng.randrange(1000):03d}/0001-{rng.randrange(100):02d}",
+                dias=rng.choice([5, 10, 15, 30]),
+                valor=f"{rng.randrange(100, 99999)},{rng.randrange(100):02d}",
+                data=f"{rng.randrange(1, 29):02d}/{rng.randrange(1, 13):02d}/2024",
+                dia=rng.randrange(1, 29),
+                mes=rng.choice(MESES),
+                ano=2024,
+            ))
+        texto_paginas.append("\n".join(linhas))
+    return "\f".join(texto_paginas)
+
+
+def extrair_por_padrao(texto: str) -> dict:
+    """Implementação anterior do DataExtractor: um re.finditer por padrão"""
+    def papel(trecho):
+        trecho = trecho.lower()
+        for nome in ("autor", "réu", "requerente", "requerido"):
+            if nome in trecho:
+                return nome
+        return "outro"
+
+    prazos = []
+    for padrao in [r'prazo\s+de\s+(\d+)\s+dias', r'(\d+)\s+dias\s+para',
+                   r'vencimento\s+em\s+(\d{2}/\d{2}/\d{4})', r'prazo\s+até\s+(\d{2}/\d{2}/\d{4})']:
+        for m in re.finditer(padrao, texto, re.IGNORECASE):
+            prazos.append({"text": m.group(0), "value": m.group(1), "position": m.start()})
+
+    valores = []
+    for padrao in [r'R\$\s*\d+[.,]\d{2}', r'\d+[.,]\d{2}\s*reais', r'valor\s*:\s*R\$\s*\d+[.,]\d{2}']:
+        for m in re.finditer(padrao, texto, re.IGNORECASE):
+            numero = re.search(r'\d+[.,]\d{2}', m.group(0))
+            if numero:
+                valores.append({"text": m.group(0), "value": float(numero.group(0).replace(',', '.')),
+                                "currency": "BRL", "position": m.start()})
+
+    partes = []
+    for padrao in [r'autor[ae]?s?[:\s]+([A-Z][A-Za-z\s]+)', r'réu[us]?[:\s]+([A-Z][A-Za-z\s]+)',
+                   r'requerente[:\s]+([A-Z][A-Za-z\s]+)', r'requerido[:\s]+([A-Z][A-Za-z\s]+)']:
+        for m in re.finditer(padrao, texto, re.IGNORECASE):
+            partes.append({"role": papel(m.group(0)), "name": m.group(1).strip(), "position": m.start()})
+
+    processo = None
+    for m in re.finditer(r'\d{7}-?\d{2}\.?\d{4}\.?\d{1}\.?\d{2}\.?\d{4}', texto):
+        processo = m.group(0)
+        break
+
+    datas = []
+    for padrao in [r'\d{2}/\d{2}/\d{4}', r'\d{2}-\d{2}-\d{4}', r'\d{4}-\d{2}-\d{2}', r'\d{1,2}\s+de\s+\w+\s+de\s+\d{4}']:
+        for m in re.finditer(padrao, texto):
+            try:
+                datas.append({"text": m.group(0), "parsed": date_parser.parse(m.group(0), dayfirst=True).isoformat(),
+                              "position": m.start()})
+            except Exception:
+                pass
+
+    return {
+        "prazos": prazos,
+        "valores": valores,
+        "partes": partes,
+        "processo": processo,
+        "cpfs": list(set(re.findall(r'\d{3}\.?\d{3}\.?\d{3}-?\d{2}', texto))),
+        "cnpjs": list(set(re.findall(r'\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}', texto))),
+        "datas": datas,
+    }
+
+
+def medir(funcao, paginas, repeticoes):
+    """Melhor tempo (s) de extrair todas as páginas, uma por vez"""
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = [funcao(pagina) for pagina in paginas]
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def contar(resultados):
+    campos = ("prazos", "valores", "partes", "cpfs", "cnpjs", "datas")
+    return {campo: sum(len(r[campo]) for r in resultados) for campo in campos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--file", help="Texto OCR (páginas separadas por form feed)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        texto = Path(args.file).read_text(encoding="utf-8")
+    else:
+        texto = gerar_corpus(args.pages)
+    paginas = texto.split("\f")
+
+    engine = ExtractionEngine()
+    tempo_antigo, antigo = medir(extrair_por_padrao, paginas, args.repeat)
+    tempo_novo, novo = medir(engine.scan, paginas, args.repeat)
+
+    print(f"Páginas: {len(paginas)} | caracteres: {len(texto):,}")
+    print(f"{'implementação':<22} {'tempo (s)':>10} {'páginas/s':>10}")
+    print(f"{'laços por padrão':<22} {tempo_antigo:>10.3f} {len(paginas) / tempo_antigo:>10.0f}")
+    print(f"{'expressão combinada':<22} {tempo_novo:>10.3f} {len(paginas) / tempo_novo:>10.0f}")
+    print(f"Aceleração: {tempo_antigo / tempo_novo:.1f}x")
+    print(f"Campos (antes): {contar(antigo)}")
+    print(f"Campos (agora): {contar(novo)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
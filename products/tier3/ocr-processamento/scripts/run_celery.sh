@@ -12,6 +12,6 @@ fi
 celery -A src.celery_app worker \
     --loglevel=info \
     --concurrency=4 \
-    --queues=documents,extraction,analysis,batch \
+    --queues=documents,documents_bulk,extraction,analysis,batch \
     --hostname=worker@%h
 
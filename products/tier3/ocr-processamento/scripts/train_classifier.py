@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Script para treinar o classificador de documentos (CLASSIFIER_MODE=model)
+Lê as classificações já gravadas (DocumentClassification + texto OCR),
+treina TF-IDF + regressão logística para categoria e urgência e grava o
+artefato em CLASSIFIER_MODEL_PATH
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import Config
+from src.database import SessionLocal
+from src.models.document import DocumentClassification, OCRResult
+from src.services.classifier import Classifier
+from src.services.text_classifier import TARGETS, TextClassifierModel
+
+
+def load_examples(min_confidence: float):
+    """Texto OCR e rótulos da classificação mais recente de cada documento"""
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            DocumentClassification.document_id,
+            DocumentClassification.category,
+            DocumentClassification.urgency,
+            OCRResult.text
+        ).join(
+            OCRResult, OCRResult.document_id == DocumentClassification.document_id
+        ).filter(
+            DocumentClassification.confidence >= min_confidence,
+            OCRResult.text.isnot(None)
+        ).order_by(DocumentClassification.classified_at).all()
+    finally:
+        db.close()
+
+    examples = {}
+    for document_id, category, urgency, text in rows:
+        examples[document_id] = (text, {"category": category, "urgency": urgency or "média"})
+    return list(examples.values())
+
+
+def train(examples, args):
+    texts = [text for text, _ in examples]
+    labels = {target: [example[target] for _, example in examples] for target in TARGETS}
+    # Palavras-chave do modo por palavras-chave como atributos extras
+    return TextClassifierModel.train(
+        texts, labels, Classifier().keywords,
+        max_features=args.max_features, min_df=args.min_df, epochs=args.epochs
+    )
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=Config.CLASSIFIER_MODEL_PATH)
+    parser.add_argument("--min-confidence", type=float, default=0.0,
+                        help="Ignora classificações com confiança menor")
+    parser.add_argument("--max-features", type=int, default=5000)
+    parser.add_argument("--min-df", type=int, default=2)
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="Fração reservada para avaliação (0 desativa)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧠 Treinando classificador de documentos")
+    print("=" * 60)
+
+    examples = load_examples(args.min_confidence)
+    print(f"📊 Documentos classificados: {len(examples)}")
+    if len(examples) < 2:
+        print("❌ Poucos documentos para treinar")
+        return 1
+
+    # Avaliação em documentos fora do treino
+    if args.holdout > 0:
+        shuffled = examples[:]
+        random.Random(42).shuffle(shuffled)
+        split = max(1, int(len(shuffled) * args.holdout))
+        test, train_set = shuffled[:split], shuffled[split:]
+        model = train(train_set, args)
+
+        start = time.perf_counter()
+        predictions = model.predict([text for text, _ in test])
+        elapsed = time.perf_counter() - start
+        for target in model.heads:
+            correct = sum(p[target] == expected[target] for p, (_, expected) in zip(predictions, test))
+            print(f"🎯 {target}: acurácia {correct / len(test):.1%} ({len(test)} documentos de teste)")
+        print(f"⚡ {len(test) / elapsed * 60:,.0f} documentos/minuto")
+
+    start = time.perf_counter()
+    model = train(examples, args)
+    model.save(args.output)
+    print(f"✅ Modelo gravado em {args.output} ({len(model.vocabulary)} termos, "
+          f"alvos: {', '.join(model.heads) or 'nenhum'}) em {time.perf_counter() - start:.1f}s")
+    print("   Ative com CLASSIFIER_MODE=model")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
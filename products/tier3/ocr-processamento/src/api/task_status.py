@@ -5,8 +5,37 @@ Endpoint para verificar status de tasks Celery
 from fastapi import APIRouter, HTTPException
 from celery.result import AsyncResult
 from src.celery_app import celery_app
+from src.services.batch_progress import BatchProgress
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
+batch_progress = BatchProgress()
+
+
+@router.get("/batch/{batch_id}")
+async def get_batch_progress(batch_id: str):
+    """
+    Progresso agregado de um lote (POST /api/documents/batch)
+    
+    Endpoint: GET /api/tasks/batch/{batch_id}
+    Retorna documentos concluídos/falhos, percentual, páginas por segundo,
+    documentos por segundo e ETA em segundos
+    """
+    try:
+        progress = batch_progress.get(batch_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if progress is None:
+        # Lote ainda não registrado pelo worker (ou expirado)
+        task_result = AsyncResult(batch_id, app=celery_app)
+        if task_result.state == "PENDING":
+            return {"success": True, "batch_id": batch_id, "status": "queued"}
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    
+    return {
+        "success": True,
+        **progress
+    }
 
 
 @router.get("/{task_id}")
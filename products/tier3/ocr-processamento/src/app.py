@@ -105,12 +105,23 @@ async def upload_document(
                 detail="Formato de arquivo não suportado ou arquivo muito grande"
             )
         
-        # Upload e validação
-        document_data = await document_uploader.upload_file(file)
+        # Upload em streaming (hash durante a gravação) e deduplicação
+        document_data = await document_uploader.upload_file(file, db)
         
         # Salvar no banco de dados
         document = document_uploader.create_document(document_data, db)
         
+        # Mesmo conteúdo já enviado e processado (ou em processamento)
+        if document_data.get("duplicate") and document.status in ("processing", "processed"):
+            return {
+                "success": True,
+                "document_id": document.id,
+                "filename": document.filename,
+                "status": document.status,
+                "duplicate": True,
+                "message": "Documento já enviado anteriormente."
+            }
+        
         # Processar em background usando Celery
         if Config.ENABLE_BATCH_PROCESSING:
             # Usar Celery task
@@ -135,6 +146,8 @@ async def upload_document(
             "message": "Documento enviado com sucesso. Processamento em andamento."
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -362,24 +375,28 @@ async def get_stats(db: Session = Depends(get_db)):
 @app.post("/api/documents/batch")
 async def batch_process(
     document_ids: List[int],
+    chunk_size: Optional[int] = None,
     background_tasks: BackgroundTasks = None,
     db: Session = Depends(get_db)
 ):
     """
     Processar lote de documentos
     
-    Endpoint: POST /api/documents/batch
+    Endpoint: POST /api/documents/batch?chunk_size=10
     Body: {"document_ids": [1, 2, 3]}
+    Progresso agregado: GET /api/tasks/batch/{batch_id}
     """
     try:
         if Config.ENABLE_BATCH_PROCESSING:
-            # Usar Celery para processamento em lote
-            task = batch_process_task.delay(document_ids)
+            # Usar Celery para processamento em lote (group/chord em blocos)
+            task = batch_process_task.delay(document_ids, chunk_size)
             return {
                 "success": True,
                 "message": f"Processamento em lote iniciado para {len(document_ids)} documentos",
                 "document_ids": document_ids,
                 "task_id": task.id,
+                "batch_id": task.id,
+                "progress_url": f"/api/tasks/batch/{task.id}",
                 "total": len(document_ids)
             }
         elif background_tasks:
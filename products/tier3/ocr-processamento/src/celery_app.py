@@ -27,13 +27,24 @@ celery_app.conf.update(
     worker_max_tasks_per_child=50,
     task_acks_late=True,
     task_reject_on_worker_lost=True,
+    # Redis: prioridade por mensagem (0 = maior) e filas consumidas na ordem
+    # do --queues (documents antes de documents_bulk)
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
 )
 
-# Nomes das tasks
+# Rotas pelos nomes registrados das tasks; uploads avulsos (documents) passam
+# à frente dos blocos de lote (documents_bulk)
 celery_app.conf.task_routes = {
-    "src.tasks.process_document_task": {"queue": "documents"},
-    "src.tasks.extract_data_task": {"queue": "extraction"},
-    "src.tasks.analyze_document_task": {"queue": "analysis"},
-    "src.tasks.batch_process_task": {"queue": "batch"},
+    "process_document_task": {"queue": "documents", "priority": Config.CELERY_PRIORITY_INTERACTIVE},
+    "extract_data_task": {"queue": "extraction", "priority": Config.CELERY_PRIORITY_INTERACTIVE},
+    "analyze_document_task": {"queue": "analysis", "priority": Config.CELERY_PRIORITY_INTERACTIVE},
+    "index_document_task": {"queue": "documents", "priority": Config.CELERY_PRIORITY_INTERACTIVE},
+    "batch_process_task": {"queue": "batch"},
+    "process_document_chunk_task": {"queue": "documents_bulk", "priority": Config.CELERY_PRIORITY_BULK},
+    "finalize_batch_task": {"queue": "batch"},
 }
 
@@ -29,6 +29,11 @@ class Config:
     # Celery
     CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/1")
     CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/2")
+    # Prioridade por fila (Redis: 0 = maior); uploads avulsos passam à frente dos lotes
+    CELERY_PRIORITY_INTERACTIVE = int(os.getenv("CELERY_PRIORITY_INTERACTIVE", 0))
+    CELERY_PRIORITY_BULK = int(os.getenv("CELERY_PRIORITY_BULK", 6))
+    BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", 10))  # Documentos por task do lote
+    BATCH_PROGRESS_TTL = int(os.getenv("BATCH_PROGRESS_TTL", 7 * 24 * 3600))  # Segundos
     
     # App Configuration
     APP_NAME = "Genesys OCR & Processamento"
@@ -39,6 +44,7 @@ class Config:
     # File Storage
     UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 50 * 1024 * 1024))  # 50MB
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # Bytes lidos por vez no upload
     ALLOWED_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".tiff", ".tif"}
     
     # OCR Configuration
@@ -46,6 +52,12 @@ class Config:
     OCR_LANGUAGES = os.getenv("OCR_LANGUAGES", "por+eng").split("+")
     ENABLE_TESSERACT = os.getenv("ENABLE_TESSERACT", "True").lower() == "true"
     ENABLE_GOOGLE_VISION = os.getenv("ENABLE_GOOGLE_VISION", "True").lower() == "true"
+    OCR_DPI = int(os.getenv("OCR_DPI", 200))
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 2))  # Páginas processadas em paralelo
+    OCR_PAGE_CHUNK_SIZE = int(os.getenv("OCR_PAGE_CHUNK_SIZE", 2))  # Páginas rasterizadas por tarefa
+    OCR_EXECUTOR = os.getenv("OCR_EXECUTOR", "process").lower()  # process ou thread
+    OCR_TESSERACT_CONFIG = os.getenv("OCR_TESSERACT_CONFIG", "")  # Ex.: "--psm 6"
+    OCR_PAGE_CACHE_DIR = os.getenv("OCR_PAGE_CACHE_DIR", "./cache/ocr_pages")  # Vazio desativa
     
     # AI Analysis
     ENABLE_AI_ANALYSIS = True
@@ -54,10 +66,30 @@ class Config:
     
     # Classification
     ENABLE_AUTO_CLASSIFICATION = True
+    CLASSIFIER_MODE = os.getenv("CLASSIFIER_MODE", "keywords").lower()  # keywords ou model (artefato treinado)
+    CLASSIFIER_MODEL_PATH = os.getenv("CLASSIFIER_MODEL_PATH", "./models/classifier.npz")  # scripts/train_classifier.py
     
     # Search Engine
     ENABLE_SEMANTIC_SEARCH = True
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-large")
+    EMBEDDING_CHUNK_SIZE = int(os.getenv("EMBEDDING_CHUNK_SIZE", 2000))  # Caracteres por trecho
+    EMBEDDING_CHUNK_OVERLAP = int(os.getenv("EMBEDDING_CHUNK_OVERLAP", 200))
+    EMBEDDING_MAX_CHUNKS = int(os.getenv("EMBEDDING_MAX_CHUNKS", 500))  # Trechos por documento
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))  # Textos por requisição
+    EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", 4))  # Requisições simultâneas
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./cache/embeddings.sqlite3")  # Vazio desativa
+    EMBEDDING_LOCAL_DIM = int(os.getenv("EMBEDDING_LOCAL_DIM", 512))  # Modelo local (sem OPENAI_API_KEY)
+    SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid").lower()  # hybrid, semantic ou keyword
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))  # Candidatos por lista antes da fusão
+    HYBRID_KEYWORD_WEIGHT = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "0.4"))  # Peso da busca de texto completo
+    HYBRID_KEYWORD_WEIGHT_CNJ = float(os.getenv("HYBRID_KEYWORD_WEIGHT_CNJ", "0.8"))  # Idem, query com nº de processo
+    EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")  # float32, float16 ou int8
+    VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "./cache/vector_index")
+    VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "flat").lower()  # flat ou hnsw (requer hnswlib)
+    VECTOR_INDEX_HNSW_MIN_DOCS = int(os.getenv("VECTOR_INDEX_HNSW_MIN_DOCS", 50000))  # Abaixo disso, busca exata
+    VECTOR_INDEX_HNSW_EF = int(os.getenv("VECTOR_INDEX_HNSW_EF", 100))
+    VECTOR_INDEX_COMPACT_RATIO = float(os.getenv("VECTOR_INDEX_COMPACT_RATIO", 0.5))  # Fração de linhas vagas que dispara a compactação
+    VECTOR_INDEX_SYNC_SECONDS = float(os.getenv("VECTOR_INDEX_SYNC_SECONDS", 30))  # Conferência com o banco
     
     # Features
     ENABLE_BATCH_PROCESSING = True
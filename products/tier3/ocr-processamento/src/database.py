@@ -3,7 +3,7 @@ Configuração do banco de dados PostgreSQL
 """
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, Session, declarative_base
 from sqlalchemy.pool import NullPool
 from typing import Generator
 
@@ -25,6 +25,9 @@ SessionLocal = sessionmaker(
     future=True
 )
 
+# Base dos modelos (src.models.document e alembic/env.py importam daqui)
+Base = declarative_base()
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -2,12 +2,18 @@
 Modelos de dados SQLAlchemy para documentos
 """
 
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, JSON, ForeignKey, Boolean, LargeBinary, DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Optional
+
+import numpy as np
 
 # Importar Base do database para usar a mesma instância
 from src.database import Base
+from src.config import Config
+from src.services.embedding_codec import decode_matrix, encode_matrix
+from src.services import fulltext
 
 
 class Document(Base):
@@ -24,6 +30,7 @@ class Document(Base):
     status = Column(String(50), default="uploaded")  # uploaded, processing, processed, failed
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     processed_at = Column(DateTime, nullable=True)
+    processing_times = Column(JSON, nullable=True)  # Duração de cada etapa do pipeline (segundos)
     
     # Relationships
     ocr_results = relationship("OCRResult", back_populates="document", cascade="all, delete-orphan")
@@ -50,6 +57,13 @@ class OCRResult(Base):
     document = relationship("Document", back_populates="ocr_results")
 
 
+# Índice de texto completo do OCR (tsvector + GIN no PostgreSQL, FTS5 no SQLite)
+for _statement in fulltext.POSTGRES_DDL:
+    event.listen(OCRResult.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in fulltext.SQLITE_DDL:
+    event.listen(OCRResult.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+
 class ExtractedData(Base):
     """Dados extraídos do documento"""
     __tablename__ = "extracted_data"
@@ -59,7 +73,7 @@ class ExtractedData(Base):
     field = Column(String(100), nullable=False)  # prazo, valor, parte, processo, etc
     value = Column(Text, nullable=False)
     confidence = Column(Float, nullable=False)
-    metadata = Column(JSON, nullable=True)  # Informações adicionais
+    metadata_json = Column("metadata", JSON, nullable=True)  # Informações adicionais
     extracted_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
@@ -107,10 +121,41 @@ class DocumentIndex(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"), unique=True, nullable=False)
-    embeddings = Column(JSON, nullable=True)  # Vetor de embeddings
-    metadata = Column(JSON, nullable=True)  # Metadados para busca
+    embedding = Column(LargeBinary, nullable=True)  # Embeddings dos trechos (matriz binária)
+    embedding_dtype = Column(String(10), nullable=True)  # float32, float16, int8
+    embedding_dim = Column(Integer, nullable=True)
+    embedding_scale = Column(Float, nullable=True)  # Escala int8 única (gravações antigas)
+    embedding_scales = Column(LargeBinary, nullable=True)  # Escalas int8 por trecho (float32)
+    embedding_model = Column(String(100), nullable=True)  # Modelo que gerou os embeddings
+    metadata_json = Column("metadata", JSON, nullable=True)  # Metadados para busca
     indexed_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
     document = relationship("Document", back_populates="index")
+    
+    def set_vectors(self, vectors, model: Optional[str] = None, dtype: Optional[str] = None):
+        """
+        Armazena os embeddings (vetor ou matriz trechos x dimensão) no formato
+        configurado (EMBEDDING_STORAGE_DTYPE); no int8 com uma escala por trecho
+        """
+        if vectors is None or len(vectors) == 0:
+            self.embedding = self.embedding_dtype = self.embedding_dim = None
+            self.embedding_scale = self.embedding_scales = self.embedding_model = None
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        dtype = dtype or Config.EMBEDDING_STORAGE_DTYPE
+        self.embedding, self.embedding_scales = encode_matrix(matrix, dtype)
+        self.embedding_scale = None
+        self.embedding_dtype = dtype
+        self.embedding_dim = matrix.shape[1]
+        self.embedding_model = model
+    
+    def get_vectors(self) -> Optional[np.ndarray]:
+        """Embeddings como matriz float32 (trechos x dimensão); None se não há"""
+        if self.embedding is None:
+            return None
+        return decode_matrix(self.embedding, self.embedding_dtype or "float32", self.embedding_dim,
+                             self.embedding_scale, self.embedding_scales)
 
@@ -3,6 +3,7 @@ Microserviço 4: AI Analyzer
 Responsável por análise inteligente com GPT-4
 """
 
+import asyncio
 from typing import Dict, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -63,7 +64,17 @@ class AIAnalyzer:
         analysis_dict = await self.analyze_text(ocr_result.text)
         
         # Salvar no banco
-        analysis = AnalysisResult(
+        analysis = self.build_analysis(document_id, analysis_dict)
+        
+        db.add(analysis)
+        db.commit()
+        db.refresh(analysis)
+        
+        return analysis
+    
+    def build_analysis(self, document_id: int, analysis_dict: Dict) -> AnalysisResult:
+        """Cria o AnalysisResult (sem salvar) a partir de analyze_text"""
+        return AnalysisResult(
             document_id=document_id,
             summary=analysis_dict.get("summary", ""),
             key_points=analysis_dict.get("key_points", []),
@@ -72,12 +83,6 @@ class AIAnalyzer:
             sentiment=analysis_dict.get("sentiment", "neutral"),
             confidence=analysis_dict.get("confidence", 0.0)
         )
-        
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
-        
-        return analysis
     
     async def analyze_text(self, text: str) -> Dict:
         """
@@ -95,7 +100,9 @@ class AIAnalyzer:
         try:
             prompt = self._build_analysis_prompt(text)
             
-            response = self.openai_client.chat.completions.create(
+            # Cliente síncrono: rodar fora do event loop (outras etapas seguem em paralelo)
+            response = await asyncio.to_thread(
+                self.openai_client.chat.completions.create,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "Você é um assistente jurídico especializado em análise de documentos processuais."},
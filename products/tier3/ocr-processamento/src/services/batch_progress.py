@@ -0,0 +1,159 @@
+"""
+Progresso agregado de lotes de processamento
+Cada documento concluído incrementa contadores em um hash Redis do lote
+(atômico entre workers); o resumo calcula páginas/s, documentos/s e ETA
+"""
+
+import time
+from typing import Dict, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from src.config import Config
+
+
+KEY_PREFIX = "ocr:batch:"
+
+
+def summarize(state: Dict, now: Optional[float] = None) -> Dict:
+    """
+    Resumo do progresso a partir dos contadores do lote
+    
+    Args:
+        state: Campos do hash (total, completed, failed, pages, started_at, finished_at)
+        now: Instante atual (epoch); padrão time.time()
+        
+    Returns:
+        Dict com contagens, percentual, páginas/s, documentos/s e ETA (segundos)
+    """
+    now = time.time() if now is None else now
+    total = int(state.get("total", 0))
+    completed = int(state.get("completed", 0))
+    failed = int(state.get("failed", 0))
+    pages = int(float(state.get("pages", 0)))
+    started_at = float(state.get("started_at", now))
+    finished_at = float(state["finished_at"]) if state.get("finished_at") else None
+    
+    done = completed + failed
+    remaining = max(total - done, 0)
+    elapsed = max((finished_at or now) - started_at, 0.0)
+    
+    pages_per_second = pages / elapsed if elapsed > 0 else 0.0
+    documents_per_second = done / elapsed if elapsed > 0 else 0.0
+    if not remaining:
+        eta_seconds = 0.0
+    elif documents_per_second > 0:
+        eta_seconds = remaining / documents_per_second
+    else:
+        eta_seconds = None  # Nenhum documento concluído ainda
+    
+    if finished_at or not remaining:
+        status = "finished"
+    elif done:
+        status = "processing"
+    else:
+        status = "queued"
+    
+    return {
+        "status": status,
+        "total": total,
+        "completed": completed,
+        "failed": failed,
+        "remaining": remaining,
+        "progress": round(100.0 * done / total, 1) if total else 100.0,
+        "pages": pages,
+        "pages_per_second": round(pages_per_second, 2),
+        "documents_per_second": round(documents_per_second, 3),
+        "elapsed_seconds": round(elapsed, 1),
+        "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None,
+        "chunks": int(state.get("chunks", 0)),
+        "chunk_size": int(state.get("chunk_size", 0))
+    }
+
+
+class BatchProgress:
+    """Contadores de progresso dos lotes no Redis (compartilhados por API e workers)"""
+    
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url or Config.REDIS_URL
+        self.ttl = Config.BATCH_PROGRESS_TTL
+        self._client = None
+    
+    def _get_client(self):
+        if not REDIS_AVAILABLE:
+            return None
+        if self._client is None:
+            self._client = redis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_connect_timeout=5
+            )
+        return self._client
+    
+    def start(self, batch_id: str, total: int, chunks: int, chunk_size: int):
+        """Registra um lote novo"""
+        client = self._get_client()
+        if client is None:
+            return
+        key = KEY_PREFIX + batch_id
+        try:
+            with client.pipeline() as pipe:
+                pipe.delete(key)
+                pipe.hset(key, mapping={
+                    "total": total,
+                    "completed": 0,
+                    "failed": 0,
+                    "pages": 0,
+                    "chunks": chunks,
+                    "chunk_size": chunk_size,
+                    "started_at": time.time()
+                })
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+        except redis.RedisError as e:
+            print(f"Erro ao registrar lote {batch_id}: {e}")
+    
+    def record(self, batch_id: str, success: bool, pages: int = 0):
+        """Contabiliza um documento concluído (com sucesso ou não)"""
+        client = self._get_client()
+        if client is None:
+            return
+        key = KEY_PREFIX + batch_id
+        try:
+            with client.pipeline() as pipe:
+                pipe.hincrby(key, "completed" if success else "failed", 1)
+                if pages:
+                    pipe.hincrby(key, "pages", pages)
+                pipe.execute()
+        except redis.RedisError as e:
+            # Progresso é informativo: não interrompe o processamento
+            print(f"Erro ao atualizar progresso do lote {batch_id}: {e}")
+    
+    def finish(self, batch_id: str):
+        """Marca o fim do lote (congela a taxa e o tempo decorrido)"""
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            client.hset(KEY_PREFIX + batch_id, "finished_at", time.time())
+        except redis.RedisError as e:
+            print(f"Erro ao finalizar lote {batch_id}: {e}")
+    
+    def get(self, batch_id: str) -> Optional[Dict]:
+        """
+        Progresso agregado do lote
+        
+        Returns:
+            Resumo (ver summarize) ou None se o lote não existe
+        """
+        client = self._get_client()
+        if client is None:
+            return None
+        state = client.hgetall(KEY_PREFIX + batch_id)
+        if not state:
+            return None
+        return {"batch_id": batch_id, **summarize(state)}
@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 from src.config import Config
 from src.models.document import Document, DocumentClassification, OCRResult
 from src.services.document_uploader import DocumentUploader
+from src.services.text_classifier import load_model
 
 
 class Classifier:
@@ -69,6 +70,16 @@ class Classifier:
             "média": ["manifestar", "responder", "prazo de"],
             "baixa": ["informação", "consulta", "solicitação"]
         }
+        
+        # Todas as palavras-chave (atributos extras do modelo treinado)
+        self.keywords = [
+            k for patterns in self.categories.values() for k in patterns["keywords"] + patterns["keywords_negative"]
+        ] + [k for keywords in self.urgency_keywords.values() for k in keywords]
+        
+        # Modelo treinado (CLASSIFIER_MODE=model); sem artefato, usa palavras-chave
+        self.model = None
+        if Config.CLASSIFIER_MODE == "model":
+            self.model = load_model(Config.CLASSIFIER_MODEL_PATH)
     
     async def classify(self, document_id: int, db: Session) -> DocumentClassification:
         """
@@ -101,7 +112,17 @@ class Classifier:
         classification_dict = await self.classify_text(ocr_result.text)
         
         # Salvar no banco
-        classification = DocumentClassification(
+        classification = self.build_classification(document_id, classification_dict)
+        
+        db.add(classification)
+        db.commit()
+        db.refresh(classification)
+        
+        return classification
+    
+    def build_classification(self, document_id: int, classification_dict: Dict) -> DocumentClassification:
+        """Cria a DocumentClassification (sem salvar) a partir de classify_text"""
+        return DocumentClassification(
             document_id=document_id,
             category=classification_dict["category"],
             confidence=classification_dict["category_confidence"],
@@ -109,12 +130,6 @@ class Classifier:
             urgency_confidence=classification_dict["urgency_confidence"],
             tags=classification_dict["tags"]
         )
-        
-        db.add(classification)
-        db.commit()
-        db.refresh(classification)
-        
-        return classification
     
     async def classify_text(self, text: str) -> Dict:
         """
@@ -126,8 +141,49 @@ class Classifier:
         Returns:
             Dict com classificação
         """
-        text_lower = text.lower()
+        return self.classify_batch([text])[0]
+    
+    def classify_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Classifica vários textos de uma vez
         
+        Com modelo treinado, os textos são vetorizados juntos e cada alvo
+        (categoria, urgência) sai de um produto de matrizes; alvos que o
+        modelo não conhece usam as palavras-chave.
+        
+        Args:
+            texts: Textos para classificar
+            
+        Returns:
+            Lista de dicts com classificação (mesma ordem de texts)
+        """
+        predictions = self.model.predict(texts) if self.model is not None else [{} for _ in texts]
+        
+        results = []
+        for text, prediction in zip(texts, predictions):
+            text_lower = text.lower()
+            result = dict(prediction)
+            if "category" not in result or "urgency" not in result:
+                keyword_result = self._classify_keywords(text_lower)
+                for key, value in keyword_result.items():
+                    result.setdefault(key, value)
+            
+            # Extrair tags
+            result["tags"] = self._extract_tags(text_lower, result["category"])
+            results.append(result)
+        
+        return results
+    
+    def _classify_keywords(self, text_lower: str) -> Dict:
+        """
+        Classificação por palavras-chave (presença de cada palavra)
+        
+        Args:
+            text_lower: Texto em minúsculas
+            
+        Returns:
+            Dict com categoria, urgência e confianças
+        """
         # Classificar categoria
         category_scores = {}
         for category, patterns in self.categories.items():
@@ -170,15 +226,11 @@ class Classifier:
             best_urgency = "média"
             urgency_confidence = 0.5
         
-        # Extrair tags
-        tags = self._extract_tags(text_lower, best_category)
-        
         return {
             "category": best_category,
             "category_confidence": confidence,
             "urgency": best_urgency,
-            "urgency_confidence": urgency_confidence,
-            "tags": tags
+            "urgency_confidence": urgency_confidence
         }
     
     def _extract_tags(self, text: str, category: str) -> List[str]:
@@ -3,15 +3,14 @@ Microserviço 3: Data Extractor
 Responsável por extrair dados estruturados do texto OCR
 """
 
-import re
 from typing import Dict, List, Optional
 from datetime import datetime
-from dateutil import parser as date_parser
 from sqlalchemy.orm import Session
 
 from src.config import Config
 from src.models.document import Document, ExtractedData, OCRResult
 from src.services.document_uploader import DocumentUploader
+from src.services.extraction_engine import ExtractionEngine
 
 
 class DataExtractor:
@@ -19,23 +18,8 @@ class DataExtractor:
     
     def __init__(self):
         self.document_uploader = DocumentUploader()
-        # Padrões regex para extração
-        self.date_patterns = [
-            r'\d{2}/\d{2}/\d{4}',
-            r'\d{2}-\d{2}-\d{4}',
-            r'\d{4}-\d{2}-\d{2}',
-            r'\d{1,2}\s+de\s+\w+\s+de\s+\d{4}'
-        ]
-        
-        self.money_patterns = [
-            r'R\$\s*\d+[.,]\d{2}',
-            r'\d+[.,]\d{2}\s*reais',
-            r'valor\s*:\s*R\$\s*\d+[.,]\d{2}'
-        ]
-        
-        self.cpf_pattern = r'\d{3}\.?\d{3}\.?\d{3}-?\d{2}'
-        self.cnpj_pattern = r'\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}'
-        self.process_number_pattern = r'\d{7}-?\d{2}\.?\d{4}\.?\d{1}\.?\d{2}\.?\d{4}'
+        # Padrões compilados uma vez em uma única expressão (ver extraction_engine)
+        self.engine = ExtractionEngine()
     
     async def extract(self, document_id: int, db: Session) -> List[ExtractedData]:
         """
@@ -65,6 +49,28 @@ class DataExtractor:
         extracted_dict = await self.extract_from_text(ocr_result.text)
         
         # Salvar no banco
+        extracted_items = self.build_items(document_id, extracted_dict)
+        db.add_all(extracted_items)
+        
+        db.commit()
+        
+        # Refresh all items
+        for item in extracted_items:
+            db.refresh(item)
+        
+        return extracted_items
+    
+    def build_items(self, document_id: int, extracted_dict: Dict) -> List[ExtractedData]:
+        """
+        Cria os ExtractedData (sem salvar) a partir do resultado de extract_from_text
+        
+        Args:
+            document_id: ID do documento
+            extracted_dict: Dados extraídos do texto
+            
+        Returns:
+            Lista de ExtractedData
+        """
         extracted_items = []
         
         # Salvar prazos
@@ -74,9 +80,8 @@ class DataExtractor:
                 field="prazo",
                 value=prazo.get("text", ""),
                 confidence=0.85,
-                metadata={"value": prazo.get("value"), "position": prazo.get("position")}
+                metadata_json={"value": prazo.get("value"), "position": prazo.get("position")}
             )
-            db.add(item)
             extracted_items.append(item)
         
         # Salvar valores
@@ -86,9 +91,8 @@ class DataExtractor:
                 field="valor",
                 value=str(valor.get("value", "")),
                 confidence=valor.get("confidence", 0.85),
-                metadata={"currency": valor.get("currency"), "position": valor.get("position")}
+                metadata_json={"currency": valor.get("currency"), "position": valor.get("position")}
             )
-            db.add(item)
             extracted_items.append(item)
         
         # Salvar partes
@@ -98,9 +102,8 @@ class DataExtractor:
                 field="parte",
                 value=parte.get("name", ""),
                 confidence=0.85,
-                metadata={"role": parte.get("role"), "position": parte.get("position")}
+                metadata_json={"role": parte.get("role"), "position": parte.get("position")}
             )
-            db.add(item)
             extracted_items.append(item)
         
         # Salvar processo
@@ -111,7 +114,6 @@ class DataExtractor:
                 value=extracted_dict["processo"],
                 confidence=0.90
             )
-            db.add(item)
             extracted_items.append(item)
         
         # Salvar CPFs
@@ -122,7 +124,6 @@ class DataExtractor:
                 value=cpf,
                 confidence=0.95
             )
-            db.add(item)
             extracted_items.append(item)
         
         # Salvar CNPJs
@@ -133,7 +134,6 @@ class DataExtractor:
                 value=cnpj,
                 confidence=0.95
             )
-            db.add(item)
             extracted_items.append(item)
         
         # Salvar datas
@@ -143,17 +143,10 @@ class DataExtractor:
                 field="data",
                 value=data.get("parsed", data.get("text", "")),
                 confidence=0.90,
-                metadata={"text": data.get("text"), "position": data.get("position")}
+                metadata_json={"text": data.get("text"), "position": data.get("position")}
             )
-            db.add(item)
             extracted_items.append(item)
         
-        db.commit()
-        
-        # Refresh all items
-        for item in extracted_items:
-            db.refresh(item)
-        
         return extracted_items
     
     async def extract_from_text(self, text: str) -> Dict:
@@ -166,16 +159,9 @@ class DataExtractor:
         Returns:
             Dict com dados extraídos
         """
-        extracted = {
-            "prazos": self.extract_prazos(text),
-            "valores": self.extract_valores(text),
-            "partes": self.extract_partes(text),
-            "processo": self.extract_processo(text),
-            "cpfs": self.extract_cpfs(text),
-            "cnpjs": self.extract_cnpjs(text),
-            "datas": self.extract_datas(text),
-            "confidence": 0.85
-        }
+        # Uma passada pelo texto para todos os campos
+        extracted = self.engine.scan(text)
+        extracted["confidence"] = 0.85
         
         return extracted
     
@@ -189,26 +175,7 @@ class DataExtractor:
         Returns:
             Lista de prazos encontrados
         """
-        prazos = []
-        
-        # Padrões de prazo
-        prazo_patterns = [
-            r'prazo\s+de\s+(\d+)\s+dias',
-            r'(\d+)\s+dias\s+para',
-            r'vencimento\s+em\s+(\d{2}/\d{2}/\d{4})',
-            r'prazo\s+até\s+(\d{2}/\d{2}/\d{4})'
-        ]
-        
-        for pattern in prazo_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                prazos.append({
-                    "text": match.group(0),
-                    "value": match.group(1) if match.groups() else None,
-                    "position": match.start()
-                })
-        
-        return prazos
+        return self.engine.scan(text, "prazos")["prazos"]
     
     def extract_valores(self, text: str) -> List[Dict]:
         """
@@ -220,24 +187,7 @@ class DataExtractor:
         Returns:
             Lista de valores encontrados
         """
-        valores = []
-        
-        for pattern in self.money_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                value_text = match.group(0)
-                # Extrair número
-                number_match = re.search(r'\d+[.,]\d{2}', value_text)
-                if number_match:
-                    value = float(number_match.group(0).replace(',', '.'))
-                    valores.append({
-                        "text": value_text,
-                        "value": value,
-                        "currency": "BRL",
-                        "position": match.start()
-                    })
-        
-        return valores
+        return self.engine.scan(text, "valores")["valores"]
     
     def extract_partes(self, text: str) -> List[Dict]:
         """
@@ -249,26 +199,7 @@ class DataExtractor:
         Returns:
             Lista de partes encontradas
         """
-        partes = []
-        
-        # Padrões de partes
-        parte_patterns = [
-            r'autor[ae]?s?[:\s]+([A-Z][A-Za-z\s]+)',
-            r'réu[us]?[:\s]+([A-Z][A-Za-z\s]+)',
-            r'requerente[:\s]+([A-Z][A-Za-z\s]+)',
-            r'requerido[:\s]+([A-Z][A-Za-z\s]+)'
-        ]
-        
-        for pattern in parte_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                partes.append({
-                    "role": self._identify_role(match.group(0)),
-                    "name": match.group(1).strip(),
-                    "position": match.start()
-                })
-        
-        return partes
+        return self.engine.scan(text, "partes")["partes"]
     
     def extract_processo(self, text: str) -> Optional[str]:
         """
@@ -280,10 +211,7 @@ class DataExtractor:
         Returns:
             Número do processo ou None
         """
-        matches = re.finditer(self.process_number_pattern, text)
-        for match in matches:
-            return match.group(0)
-        return None
+        return self.engine.scan(text, "processo")["processo"]
     
     def extract_cpfs(self, text: str) -> List[str]:
         """
@@ -293,10 +221,9 @@ class DataExtractor:
             text: Texto para análise
             
         Returns:
-            Lista de CPFs encontrados
+            Lista de CPFs encontrados (sem duplicatas)
         """
-        matches = re.findall(self.cpf_pattern, text)
-        return list(set(matches))  # Remove duplicatas
+        return self.engine.scan(text, "cpfs")["cpfs"]
     
     def extract_cnpjs(self, text: str) -> List[str]:
         """
@@ -306,10 +233,9 @@ class DataExtractor:
             text: Texto para análise
             
         Returns:
-            Lista de CNPJs encontrados
+            Lista de CNPJs encontrados (sem duplicatas)
         """
-        matches = re.findall(self.cnpj_pattern, text)
-        return list(set(matches))  # Remove duplicatas
+        return self.engine.scan(text, "cnpjs")["cnpjs"]
     
     def extract_datas(self, text: str) -> List[Dict]:
         """
@@ -321,35 +247,4 @@ class DataExtractor:
         Returns:
             Lista de datas encontradas
         """
-        datas = []
-        
-        for pattern in self.date_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                date_str = match.group(0)
-                try:
-                    # Tentar parsear data
-                    parsed_date = date_parser.parse(date_str, dayfirst=True)
-                    datas.append({
-                        "text": date_str,
-                        "parsed": parsed_date.isoformat(),
-                        "position": match.start()
-                    })
-                except:
-                    pass
-        
-        return datas
-    
-    def _identify_role(self, text: str) -> str:
-        """Identifica o papel da parte"""
-        text_lower = text.lower()
-        if 'autor' in text_lower:
-            return 'autor'
-        elif 'réu' in text_lower:
-            return 'réu'
-        elif 'requerente' in text_lower:
-            return 'requerente'
-        elif 'requerido' in text_lower:
-            return 'requerido'
-        return 'outro'
-
+        return self.engine.scan(text, "datas")["datas"]
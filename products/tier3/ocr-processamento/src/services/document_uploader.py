@@ -5,6 +5,7 @@ Responsável por receber, validar e armazenar documentos
 
 import os
 import hashlib
+import tempfile
 import aiofiles
 from pathlib import Path
 from typing import Optional, List, Dict
@@ -24,6 +25,7 @@ class DocumentUploader:
         self.upload_dir = Path(Config.UPLOAD_DIR)
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         self.max_size = Config.MAX_FILE_SIZE
+        self.chunk_size = Config.UPLOAD_CHUNK_SIZE
         self.allowed_extensions = Config.ALLOWED_EXTENSIONS
     
     def validate_file(self, file: UploadFile) -> bool:
@@ -41,21 +43,29 @@ class DocumentUploader:
         if file_ext not in self.allowed_extensions:
             return False
         
-        # Verificar tamanho (se disponível)
-        if hasattr(file, 'size') and file.size > self.max_size:
+        # Verificar tamanho (se disponível; o limite também vale durante a leitura)
+        size = getattr(file, 'size', None)
+        if size is not None and size > self.max_size:
             return False
         
         return True
     
-    async def upload_file(self, file: UploadFile) -> Dict:
+    async def upload_file(self, file: UploadFile, db: Optional[Session] = None) -> Dict:
         """
-        Faz upload do arquivo
+        Faz upload do arquivo em streaming
+        
+        Lê blocos de UPLOAD_CHUNK_SIZE, atualizando o SHA-256 enquanto grava
+        em um arquivo temporário; o arquivo só ganha o nome final (rename
+        atômico) depois de completo. Memória por upload limitada ao bloco.
         
         Args:
             file: Arquivo para upload
+            db: Sessão do banco (opcional); com ela, conteúdo já enviado
+                não é armazenado de novo
             
         Returns:
-            Dict com informações do documento
+            Dict com informações do documento ("duplicate": True e
+            "document_id" quando o conteúdo já existe)
         """
         if not self.validate_file(file):
             raise HTTPException(
@@ -63,28 +73,67 @@ class DocumentUploader:
                 detail="Arquivo inválido"
             )
         
-        # Gerar hash do arquivo
-        content = await file.read()
-        file_hash = hashlib.sha256(content).hexdigest()
-        
-        # Criar nome único
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         file_ext = Path(file.filename).suffix
-        unique_filename = f"{timestamp}_{file_hash[:8]}{file_ext}"
-        file_path = self.upload_dir / unique_filename
-        
-        # Salvar arquivo
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
-        
-        # Virus scanning (se habilitado)
-        if Config.ENABLE_VIRUS_SCAN:
-            if not await self.scan_virus(file_path):
-                file_path.unlink()  # Remove arquivo infectado
-                raise HTTPException(
-                    status_code=400,
-                    detail="Arquivo infectado detectado"
-                )
+        hasher = hashlib.sha256()
+        file_size = 0
+        
+        # Temporário no mesmo diretório: o rename final é atômico
+        fd, tmp_name = tempfile.mkstemp(dir=self.upload_dir, prefix=".upload_", suffix=file_ext)
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                while True:
+                    chunk = await file.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    if file_size > self.max_size:
+                        raise HTTPException(
+                            status_code=413,
+                            detail="Arquivo muito grande"
+                        )
+                    hasher.update(chunk)
+                    await f.write(chunk)
+            
+            file_hash = hasher.hexdigest()
+            
+            # Conteúdo já armazenado: descartar a cópia
+            if db is not None:
+                existing = db.query(Document).filter(Document.file_hash == file_hash).first()
+                if existing:
+                    tmp_path.unlink()
+                    return {
+                        "document_id": existing.id,
+                        "duplicate": True,
+                        "filename": existing.filename,
+                        "stored_filename": existing.stored_filename,
+                        "file_path": existing.file_path,
+                        "file_hash": existing.file_hash,
+                        "file_size": existing.file_size,
+                        "file_type": existing.file_type,
+                        "status": existing.status
+                    }
+            
+            # Virus scanning (se habilitado), antes de publicar o arquivo
+            if Config.ENABLE_VIRUS_SCAN:
+                if not await self.scan_virus(tmp_path):
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Arquivo infectado detectado"
+                    )
+            
+            # Criar nome único e publicar
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            unique_filename = f"{timestamp}_{file_hash[:8]}{file_ext}"
+            file_path = self.upload_dir / unique_filename
+            os.replace(tmp_path, file_path)
+        
+        except BaseException:
+            # Upload incompleto, grande demais ou infectado: nada fica no disco
+            tmp_path.unlink(missing_ok=True)
+            raise
         
         # Criar registro do documento no banco
         # Nota: Este método agora precisa receber db: Session como parâmetro
@@ -94,7 +143,7 @@ class DocumentUploader:
             "stored_filename": unique_filename,
             "file_path": str(file_path),
             "file_hash": file_hash,
-            "file_size": len(content),
+            "file_size": file_size,
             "file_type": file_ext.replace('.', ''),
             "status": "uploaded"
         }
@@ -148,6 +197,7 @@ class DocumentUploader:
             return existing
         
         # Criar novo documento
+        document_data = {k: v for k, v in document_data.items() if k not in ("document_id", "duplicate")}
         document = Document(**document_data)
         db.add(document)
         db.commit()
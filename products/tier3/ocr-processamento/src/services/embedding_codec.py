@@ -0,0 +1,98 @@
+"""
+Codificação binária de embeddings
+float32, float16 ou int8 com escala por vetor (numa matriz de trechos, uma
+escala float32 por linha); a leitura usa np.frombuffer
+sobre os bytes do banco, sem parsear JSON nem criar floats Python
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+
+def encode_embedding(vector, dtype: str = "float32") -> Tuple[bytes, Optional[float]]:
+    """
+    Codifica um embedding
+
+    Args:
+        vector: Lista ou array de floats
+        dtype: float32, float16 ou int8
+
+    Returns:
+        (bytes, escala) — escala só para int8 (None nos demais)
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Tipo de armazenamento de embedding inválido: {dtype}")
+
+    vec = np.asarray(vector, dtype=np.float32).ravel()
+    if dtype != "int8":
+        return vec.astype(DTYPES[dtype]).tobytes(), None
+
+    # Quantização simétrica: maior valor absoluto vira ±127
+    max_abs = float(np.abs(vec).max()) if vec.size else 0.0
+    scale = max_abs / 127.0 if max_abs > 0 else 1.0
+    quantized = np.clip(np.rint(vec / scale), -127, 127).astype(np.int8)
+    return quantized.tobytes(), scale
+
+
+def decode_embedding(data: bytes, dtype: str = "float32", scale: Optional[float] = None) -> np.ndarray:
+    """
+    Decodifica um embedding
+
+    float32 é devolvido sem cópia (somente leitura); float16 e int8 são
+    convertidos para float32.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Tipo de armazenamento de embedding inválido: {dtype}")
+
+    raw = np.frombuffer(data, dtype=DTYPES[dtype])
+    if dtype == "float32":
+        return raw
+    if dtype == "int8":
+        return raw.astype(np.float32) * np.float32(scale if scale is not None else 1.0)
+    return raw.astype(np.float32)
+
+
+def encode_matrix(vectors, dtype: str = "float32") -> Tuple[bytes, Optional[bytes]]:
+    """
+    Codifica uma matriz de embeddings (trechos x dimensão)
+
+    Returns:
+        (bytes, escalas) — no int8, escalas float32 de cada linha em bytes
+        (um trecho com valores altos não reduz a precisão dos outros)
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Tipo de armazenamento de embedding inválido: {dtype}")
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if dtype != "int8":
+        return matrix.astype(DTYPES[dtype]).tobytes(), None
+
+    max_abs = np.abs(matrix).max(axis=1) if matrix.size else np.zeros(len(matrix), dtype=np.float32)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    quantized = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized.tobytes(), scales.tobytes()
+
+
+def decode_matrix(data: bytes, dtype: str = "float32", dim: Optional[int] = None,
+                  scale: Optional[float] = None, scales: Optional[bytes] = None) -> np.ndarray:
+    """
+    Decodifica uma matriz de embeddings (trechos x dimensão) em float32
+
+    No int8 usa as escalas por linha; sem elas (gravação antiga), a escala
+    única vale para a matriz inteira.
+    """
+    flat = decode_embedding(data, dtype, None if scales is not None else scale)
+    matrix = flat.reshape(-1, dim or flat.shape[0])
+    if dtype == "int8" and scales is not None:
+        matrix = matrix * np.frombuffer(scales, dtype=np.float32)[:, None]
+    return matrix
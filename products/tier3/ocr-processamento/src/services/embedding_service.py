@@ -0,0 +1,252 @@
+"""
+Serviço de embeddings
+Divide textos longos em trechos sobrepostos, envia em lotes para a API
+(cliente assíncrono, concorrência limitada) e guarda cada trecho em um cache
+persistente chaveado pelo hash do conteúdo; sem chave da OpenAI, usa um
+modelo local (hashing vectorizer)
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from openai import AsyncOpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+from src.config import Config
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def chunk_text(text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
+    """
+    Divide o texto em trechos de até chunk_size caracteres com sobreposição
+
+    Os cortes caem em espaços em branco quando possível, para não partir palavras.
+    """
+    chunk_size = chunk_size or Config.EMBEDDING_CHUNK_SIZE
+    overlap = Config.EMBEDDING_CHUNK_OVERLAP if overlap is None else overlap
+    overlap = min(overlap, chunk_size // 2)
+
+    text = (text or "").strip()
+    if len(text) <= chunk_size:
+        return [text] if text else []
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + chunk_size)
+        if end < len(text):
+            # Recuar até o último espaço da segunda metade do trecho
+            space = text.rfind(" ", start + chunk_size // 2, end)
+            if space > start:
+                end = space
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class EmbeddingCache:
+    """
+    Cache persistente de embeddings (SQLite; um vetor float32 por chave)
+
+    Compartilhado entre processos (API e workers); caminho vazio desativa.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = Config.EMBEDDING_CACHE_PATH
+        self.enabled = bool(path)
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, data BLOB NOT NULL)"
+            )
+        return self._conn
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not self.enabled or not keys:
+            return {}
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connection()
+                # Limite de parâmetros do SQLite
+                for i in range(0, len(keys), 500):
+                    batch = list(keys[i:i + 500])
+                    placeholders = ",".join("?" * len(batch))
+                    for key, data in conn.execute(
+                        f"SELECT key, data FROM embeddings WHERE key IN ({placeholders})", batch
+                    ):
+                        found[key] = np.frombuffer(data, dtype=np.float32)
+        except sqlite3.Error as e:
+            print(f"Erro ao ler cache de embeddings: {e}")
+        return found
+
+    def set_many(self, items: Dict[str, np.ndarray]):
+        if not self.enabled or not items:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, data) VALUES (?, ?)",
+                        [(key, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items.items()]
+                    )
+        except sqlite3.Error as e:
+            # Cache é otimização: falha de escrita não interrompe a indexação
+            print(f"Erro ao gravar cache de embeddings: {e}")
+
+
+class HashingEmbedder:
+    """
+    Modelo local para ambientes sem chave de API
+
+    Hashing vectorizer com sinal sobre palavras e pares de palavras
+    (sem acento, minúsculas), peso 1 + log(tf) e norma 1. Determinístico
+    entre processos (blake2b, não o hash() do Python).
+    """
+
+    def __init__(self, dimension: int = None):
+        self.dimension = dimension or Config.EMBEDDING_LOCAL_DIM
+        self.model_name = f"hashing-{self.dimension}"
+
+    def _features(self, text: str) -> Counter:
+        text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+        words = WORD_PATTERN.findall(text)
+        features = Counter(words)
+        features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        return features
+
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        vectors = []
+        for text in texts:
+            vec = np.zeros(self.dimension, dtype=np.float32)
+            for feature, tf in self._features(text).items():
+                h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                sign = 1.0 if h >> 63 else -1.0
+                vec[h % self.dimension] += sign * (1.0 + math.log(tf))
+            norm = np.linalg.norm(vec)
+            vectors.append(vec / norm if norm > 0 else vec)
+        return vectors
+
+
+class EmbeddingService:
+    """Gera embeddings de consultas e documentos (trechos) com lote e cache"""
+
+    def __init__(self):
+        self.batch_size = Config.EMBEDDING_BATCH_SIZE
+        self.concurrency = Config.EMBEDDING_CONCURRENCY
+        self.cache = EmbeddingCache()
+        self.stats = {"requests": 0, "embedded": 0, "cache_hits": 0}
+
+        if OPENAI_AVAILABLE and Config.OPENAI_API_KEY:
+            self.model_name = Config.EMBEDDING_MODEL
+            self.local = None
+        else:
+            self.local = HashingEmbedder()
+            self.model_name = self.local.model_name
+
+        # Cliente assíncrono por event loop (o pool HTTP fica preso ao loop)
+        self._client = None
+        self._client_loop = None
+
+    @property
+    def is_local(self) -> bool:
+        return self.local is not None
+
+    def _cache_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()
+
+    def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+            self._client_loop = loop
+        return self._client
+
+    async def _embed_batch(self, texts: List[str], semaphore: asyncio.Semaphore) -> List[np.ndarray]:
+        async with semaphore:
+            self.stats["requests"] += 1
+            response = await self._get_client().embeddings.create(model=self.model_name, input=texts)
+        # A API devolve na ordem de index
+        data = sorted(response.data, key=lambda item: item.index)
+        return [np.asarray(item.embedding, dtype=np.float32) for item in data]
+
+    async def embed_texts(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embeddings de vários textos (na mesma ordem)
+
+        Textos repetidos e já em cache não são reenviados; os demais vão em
+        lotes de EMBEDDING_BATCH_SIZE, no máximo EMBEDDING_CONCURRENCY por vez.
+        """
+        keys = [self._cache_key(text) for text in texts]
+        vectors = self.cache.get_many(list(dict.fromkeys(keys)))
+        self.stats["cache_hits"] += sum(1 for key in keys if key in vectors)
+
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in pending:
+                pending[key] = text
+
+        if pending:
+            pending_keys = list(pending)
+            pending_texts = [pending[key] for key in pending_keys]
+
+            if self.is_local:
+                computed = self.local.embed(pending_texts)
+            else:
+                semaphore = asyncio.Semaphore(self.concurrency)
+                batches = await asyncio.gather(*(
+                    self._embed_batch(pending_texts[i:i + self.batch_size], semaphore)
+                    for i in range(0, len(pending_texts), self.batch_size)
+                ))
+                computed = [vec for batch in batches for vec in batch]
+
+            new_vectors = dict(zip(pending_keys, computed))
+            self.cache.set_many(new_vectors)
+            vectors.update(new_vectors)
+            self.stats["embedded"] += len(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    async def embed_query(self, text: str) -> np.ndarray:
+        """Embedding de uma consulta"""
+        return (await self.embed_texts([text]))[0]
+
+    async def embed_document(self, text: str) -> np.ndarray:
+        """
+        Embeddings dos trechos de um documento
+
+        Returns:
+            Matriz (trechos x dimensão); vazia se o texto é vazio
+        """
+        chunks = chunk_text(text)[:Config.EMBEDDING_MAX_CHUNKS]
+        if not chunks:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(await self.embed_texts(chunks))
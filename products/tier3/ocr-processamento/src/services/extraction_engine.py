@@ -0,0 +1,192 @@
+"""
+Motor de extração do DataExtractor
+Todos os padrões são compilados uma vez em uma única alternação com grupos
+nomeados; o texto é percorrido uma vez e cada casamento vai para o
+tratador do seu campo (prazo, valor, parte, processo, CPF, CNPJ, data)
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+
+# Papéis das partes; o nome de uma parte termina antes do papel seguinte
+ROLES = {
+    "autor": r'autor[ae]?s?',
+    "reu": r'réu[us]?',
+    "requerente": r'requerente',
+    "requerido": r'requerido',
+}
+ROLE_NAMES = {"autor": "autor", "reu": "réu", "requerente": "requerente", "requerido": "requerido"}
+_NEXT_ROLE = r'(?!(?:autor|réu|requerente|requerido)\b)'
+
+MONTHS = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+# (campo, grupo, padrão) em ordem de prioridade: no mesmo ponto do texto
+# vence o primeiro (identificadores mais específicos antes dos genéricos).
+# Subgrupo "<grupo>_v" = valor do casamento, quando houver.
+PATTERNS: List[Tuple[str, str, str]] = [
+    ("processo", "processo", r'\d{7}-?\d{2}\.?\d{4}\.?\d{1}\.?\d{2}\.?\d{4}'),
+    ("cnpjs", "cnpj", r'\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}'),
+    ("cpfs", "cpf", r'\d{3}\.?\d{3}\.?\d{3}-?\d{2}'),
+    ("prazos", "prazo_dias", r'prazo\b[^\d.;\n]{0,40}?\bde\s+(?P<prazo_dias_v>\d+)\s+dias'),
+    ("prazos", "dias_para", r'(?P<dias_para_v>\d+)\s+dias\s+para'),
+    ("prazos", "vencimento", r'vencimento\s+em\s+(?P<vencimento_v>\d{2}/\d{2}/\d{4})'),
+    ("prazos", "prazo_ate", r'prazo\s+até\s+(?P<prazo_ate_v>\d{2}/\d{2}/\d{4})'),
+    ("valores", "valor_rotulo", r'valor\s*:\s*R\$\s*\d+[.,]\d{2}'),
+    ("valores", "valor_rs", r'R\$\s*\d+[.,]\d{2}'),
+    ("valores", "valor_reais", r'\d+[.,]\d{2}\s*reais'),
+    ("datas", "data", r'\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4}|\d{4}-\d{2}-\d{2}|\d{1,2}\s+de\s+\w+\s+de\s+\d{4}'),
+] + [
+    ("partes", role, rf'{word}[:\s]+(?P<{role}_v>[A-Z](?:{_NEXT_ROLE}[A-Za-z\s])*)')
+    for role, word in ROLES.items()
+]
+
+# Caracteres com que algum padrão pode começar. A alternação com grupos
+# nomeados não tem prefixo que o re consiga usar para pular posições; este
+# lookahead descarta as demais posições antes de tentar cada alternativa
+FIRST_CHARS = r'\dRrVvPpAa'
+
+FIELDS = ("prazos", "valores", "partes", "processo", "cpfs", "cnpjs", "datas")
+
+NUMBER_PATTERN = re.compile(r'\d+[.,]\d{2}')
+NUMERIC_DATE_PATTERN = re.compile(r'(\d{2})[/-](\d{2})[/-](\d{4})|(\d{4})-(\d{2})-(\d{2})')
+WRITTEN_DATE_PATTERN = re.compile(r'(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})', re.IGNORECASE)
+
+
+def _compile(patterns: Iterable[Tuple[str, str, str]]) -> re.Pattern:
+    alternation = "|".join(f"(?P<{group}>{pattern})" for _, group, pattern in patterns)
+    return re.compile(f"(?=[{FIRST_CHARS}])(?:{alternation})", re.IGNORECASE)
+
+
+def parse_date(text: str) -> Optional[datetime]:
+    """
+    Converte uma data encontrada no texto (dia primeiro)
+
+    Formatos numéricos e por extenso em português sem passar pelo
+    dateutil; outros formatos caem no dateutil.
+    """
+    match = NUMERIC_DATE_PATTERN.fullmatch(text)
+    if match:
+        if match.group(1):
+            day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+            if month > 12 and day <= 12:
+                # Mesma tolerância do dateutil com dayfirst (mês/dia invertidos)
+                day, month = month, day
+        else:
+            year, month, day = int(match.group(4)), int(match.group(5)), int(match.group(6))
+        try:
+            return datetime(year, month, day)
+        except ValueError:
+            return None
+
+    match = WRITTEN_DATE_PATTERN.fullmatch(text)
+    if match and match.group(2).lower() in MONTHS:
+        try:
+            return datetime(int(match.group(3)), MONTHS[match.group(2).lower()], int(match.group(1)))
+        except ValueError:
+            return None
+
+    try:
+        return date_parser.parse(text, dayfirst=True)
+    except (ValueError, OverflowError):
+        return None
+
+
+class ExtractionEngine:
+    """Varredura única do texto com todos os padrões de extração"""
+
+    def __init__(self):
+        self.field_of = {group: field for field, group, _ in PATTERNS}
+        self.pattern = _compile(PATTERNS)
+        # Padrões de um campo só (métodos extract_* individuais)
+        self.field_patterns = {
+            field: _compile(p for p in PATTERNS if p[0] == field)
+            for field in FIELDS
+        }
+
+    def scan(self, text: str, field: Optional[str] = None) -> Dict:
+        """
+        Extrai todos os campos (ou apenas um) em uma passada pelo texto
+
+        Args:
+            text: Texto para análise
+            field: Campo único a extrair (padrão: todos)
+
+        Returns:
+            Dict campo -> resultados (processo: primeiro número encontrado)
+        """
+        results = {
+            "prazos": [],
+            "valores": [],
+            "partes": [],
+            "processo": None,
+            "cpfs": {},
+            "cnpjs": {},
+            "datas": [],
+        }
+        pattern = self.pattern if field is None else self.field_patterns[field]
+        for match in pattern.finditer(text):
+            group = match.lastgroup
+            getattr(self, "_handle_" + self.field_of[group])(match, group, results)
+
+        # CPFs e CNPJs sem repetição, na ordem em que aparecem
+        results["cpfs"] = list(results["cpfs"])
+        results["cnpjs"] = list(results["cnpjs"])
+        return results
+
+    def _handle_processo(self, match, group, results):
+        if results["processo"] is None:
+            results["processo"] = match.group(0)
+
+    def _handle_cnpjs(self, match, group, results):
+        results["cnpjs"][match.group(0)] = None
+
+    def _handle_cpfs(self, match, group, results):
+        results["cpfs"][match.group(0)] = None
+
+    def _handle_prazos(self, match, group, results):
+        value = match.group(group + "_v")
+        results["prazos"].append({
+            "text": match.group(0),
+            "value": value,
+            "position": match.start()
+        })
+        if group in ("vencimento", "prazo_ate"):
+            # A data do prazo também é uma data do documento
+            self._add_date(value, match.start(group + "_v"), results)
+
+    def _handle_valores(self, match, group, results):
+        value_text = match.group(0)
+        number_match = NUMBER_PATTERN.search(value_text)
+        if number_match:
+            results["valores"].append({
+                "text": value_text,
+                "value": float(number_match.group(0).replace(',', '.')),
+                "currency": "BRL",
+                "position": match.start()
+            })
+
+    def _handle_datas(self, match, group, results):
+        self._add_date(match.group(0), match.start(), results)
+
+    def _handle_partes(self, match, group, results):
+        results["partes"].append({
+            "role": ROLE_NAMES[group],
+            "name": match.group(group + "_v").strip(),
+            "position": match.start()
+        })
+
+    def _add_date(self, date_str: str, position: int, results: Dict):
+        parsed_date = parse_date(date_str)
+        if parsed_date:
+            results["datas"].append({
+                "text": date_str,
+                "parsed": parsed_date.isoformat(),
+                "position": position
+            })
@@ -0,0 +1,172 @@
+"""
+Índice de texto completo sobre o texto do OCR
+PostgreSQL: coluna tsvector gerada (português, com stemming) + índice GIN,
+ranking por ts_rank_cd e snippets por ts_headline. SQLite: tabela FTS5
+sincronizada por triggers, ranking BM25 e snippet() do próprio FTS5.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+FTS_CONFIG = "portuguese"
+SNIPPET_WORDS = 16
+
+# DDL (usado pelo modelo em create_all e pela migration)
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE ocr_results ADD COLUMN IF NOT EXISTS text_search tsvector
+    GENERATED ALWAYS AS (to_tsvector('{FTS_CONFIG}', coalesce(text, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_ocr_results_text_search ON ocr_results USING GIN (text_search)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS ix_ocr_results_text_search",
+    "ALTER TABLE ocr_results DROP COLUMN IF EXISTS text_search",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS ocr_results_fts USING fts5(
+        text, content='ocr_results', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ocr_results_fts_ai AFTER INSERT ON ocr_results BEGIN
+        INSERT INTO ocr_results_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ocr_results_fts_ad AFTER DELETE ON ocr_results BEGIN
+        INSERT INTO ocr_results_fts(ocr_results_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ocr_results_fts_au AFTER UPDATE OF text ON ocr_results BEGIN
+        INSERT INTO ocr_results_fts(ocr_results_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO ocr_results_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+
+SQLITE_REBUILD = "INSERT INTO ocr_results_fts(ocr_results_fts) VALUES ('rebuild')"
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS ocr_results_fts_au",
+    "DROP TRIGGER IF EXISTS ocr_results_fts_ad",
+    "DROP TRIGGER IF EXISTS ocr_results_fts_ai",
+    "DROP TABLE IF EXISTS ocr_results_fts",
+]
+
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+
+# Número de processo (CNJ): buscado como frase, não como números soltos
+CNJ_PATTERN = re.compile(r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}')
+
+_TERM_PATTERN = re.compile(rf"{CNJ_PATTERN.pattern}|\w+")
+
+
+def tokenize_query(query: str) -> List[str]:
+    """
+    Termos da busca: números CNJ inteiros e palavras (sem pontuação, que
+    quebraria a sintaxe de tsquery/FTS5)
+    """
+    words = []
+    for word in _TERM_PATTERN.findall(query.lower()):
+        if word not in words:
+            words.append(word)
+    return words
+
+
+def _postgres_sql(functions: List[str]) -> str:
+    queries = [f"{function}('{FTS_CONFIG}', :kw{i})" for i, function in enumerate(functions)]
+    flags = ", ".join(f"(o.text_search @@ {query})::int AS m{i}" for i, query in enumerate(queries))
+    matched = " + ".join(f"m{i}" for i in range(len(functions)))
+    # ts_headline é caro: roda só nas linhas já limitadas
+    return f"""
+        WITH q AS (SELECT {" || ".join(queries)} AS query),
+        top AS (
+            SELECT * FROM (
+                SELECT o.id, o.document_id, ts_rank_cd(o.text_search, q.query, 32) AS rank, {flags}
+                FROM ocr_results o, q
+                WHERE o.text_search @@ q.query
+            ) candidates
+            ORDER BY ({matched}) DESC, rank DESC
+            LIMIT :limit
+        )
+        SELECT top.*, ts_headline(
+            '{FTS_CONFIG}', o.text, q.query,
+            'MaxFragments=1, MaxWords={SNIPPET_WORDS + 4}, MinWords={SNIPPET_WORDS // 2}, StartSel="", StopSel=""'
+        ) AS snippet
+        FROM top JOIN ocr_results o ON o.id = top.id, q
+        ORDER BY ({matched}) DESC, top.rank DESC
+    """
+
+
+def _sqlite_sql(n_words: int) -> str:
+    flags = ", ".join(
+        f"(o.id IN (SELECT rowid FROM ocr_results_fts WHERE ocr_results_fts MATCH :kw{i})) AS m{i}"
+        for i in range(n_words)
+    )
+    matched = " + ".join(f"m{i}" for i in range(n_words))
+    return f"""
+        SELECT * FROM (
+            SELECT o.id, o.document_id, -bm25(ocr_results_fts) AS rank,
+                   snippet(ocr_results_fts, 0, '', '', '', {SNIPPET_WORDS}) AS snippet, {flags}
+            FROM ocr_results_fts JOIN ocr_results o ON o.id = ocr_results_fts.rowid
+            WHERE ocr_results_fts MATCH :tsquery
+        )
+        ORDER BY ({matched}) DESC, rank DESC
+        LIMIT :limit
+    """
+
+
+def search(db: Session, words: List[str], limit: int) -> Optional[List[Dict]]:
+    """
+    Busca no índice de texto completo
+
+    Cada palavra casa por prefixo (e, no PostgreSQL, pelo radical); um
+    número CNJ casa só com as suas partes em sequência (frase). Os
+    resultados vêm ordenados por número de palavras encontradas e depois
+    pelo ranking do banco.
+
+    Returns:
+        Linhas com id, document_id, rank, snippet e matched (palavras
+        encontradas), ou None se o banco não tem índice de texto completo
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in SUPPORTED_DIALECTS or not words:
+        return None
+
+    if dialect == "postgresql":
+        # phraseto_tsquery usa o mesmo parser do tsvector e junta as partes com <->
+        terms = [word if CNJ_PATTERN.fullmatch(word) else f"{word}:*" for word in words]
+        functions = ["phraseto_tsquery" if CNJ_PATTERN.fullmatch(word) else "to_tsquery" for word in words]
+        sql = _postgres_sql(functions)
+        params = {"limit": limit}
+    else:
+        terms = [
+            '"' + " ".join(re.findall(r"\w+", word)) + '"' if CNJ_PATTERN.fullmatch(word) else f'"{word}"*'
+            for word in words
+        ]
+        sql = _sqlite_sql(len(words))
+        params = {"tsquery": " OR ".join(terms), "limit": limit}
+
+    params.update({f"kw{i}": term for i, term in enumerate(terms)})
+
+    rows = db.execute(text(sql), params).mappings().all()
+    return [
+        {
+            "id": row["id"],
+            "document_id": row["document_id"],
+            "rank": float(row["rank"] or 0),
+            "snippet": (row["snippet"] or "").strip(),
+            "matched": [word for i, word in enumerate(words) if row[f"m{i}"]],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,73 @@
+"""
+Cache de páginas do OCR endereçado por conteúdo
+Chave = hash da imagem da página + método + idiomas + configuração, então
+reprocessar ou repetir um documento pula páginas já reconhecidas
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from src.config import Config
+
+
+def image_digest(image: Image.Image) -> str:
+    """SHA-256 dos pixels da imagem (independe do arquivo/formato de origem)"""
+    h = hashlib.sha256()
+    h.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def cache_key(digest: str, method: str, languages: List[str], config: str = "") -> str:
+    """Chave do cache para uma página"""
+    base = f"{digest}|{method}|{'+'.join(languages)}|{config}"
+    return hashlib.sha256(base.encode()).hexdigest()
+
+
+class PageCache:
+    """
+    Cache em disco (um JSON por página)
+
+    Compartilhado entre os processos do pool e entre execuções; gravação
+    atômica (arquivo temporário + rename), então leitores nunca veem JSON parcial.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = Config.OCR_PAGE_CACHE_DIR
+        # Diretório vazio desativa o cache
+        self.enabled = bool(cache_dir)
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, key: str) -> Path:
+        # Subdiretório pelos 2 primeiros caracteres evita diretórios enormes
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, result: Dict):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Cache é otimização: falha de escrita não interrompe o OCR
+            print(f"Erro ao gravar cache de OCR: {e}")
@@ -6,9 +6,13 @@ Responsável por extração de texto usando Tesseract e Google Vision
 import pytesseract
 from PIL import Image
 import pdf2image
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from pathlib import Path
+import asyncio
 import io
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from sqlalchemy.orm import Session
 
 try:
@@ -20,6 +24,230 @@ except ImportError:
 from src.config import Config
 from src.models.document import Document, OCRResult
 from src.services.document_uploader import DocumentUploader
+from src.services.ocr_cache import PageCache, cache_key, image_digest
+
+
+# ---------------------------------------------------------------------------
+# Funções executadas nos workers do pool (nível de módulo para serem picklable)
+# ---------------------------------------------------------------------------
+
+_worker_vision_client = None
+
+
+def _init_worker():
+    """Inicializa processo do pool: um núcleo por página, sem threads extras do Tesseract"""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _text_from_tesseract_data(data: Dict) -> str:
+    """
+    Reconstrói o texto a partir da saída de image_to_data
+    
+    Palavras da mesma linha separadas por espaço, linhas por quebra de linha
+    e parágrafos/blocos por linha em branco (como image_to_string).
+    """
+    paragraphs: List[str] = []
+    lines: List[str] = []
+    words: List[str] = []
+    current_line = current_par = None
+    
+    for i, word in enumerate(data['text']):
+        if data['level'][i] != 5:  # 5 = palavra
+            continue
+        word = (word or "").strip()
+        if not word:
+            continue
+        par = (data['page_num'][i], data['block_num'][i], data['par_num'][i])
+        line = par + (data['line_num'][i],)
+        if line != current_line:
+            if words:
+                lines.append(" ".join(words))
+                words = []
+            if par != current_par and lines:
+                paragraphs.append("\n".join(lines))
+                lines = []
+            current_line, current_par = line, par
+        words.append(word)
+    
+    if words:
+        lines.append(" ".join(words))
+    if lines:
+        paragraphs.append("\n".join(lines))
+    return "\n\n".join(paragraphs)
+
+
+def _tesseract_ocr(
+    image: Image.Image,
+    languages: List[str],
+    config: Optional[str] = None,
+    digest: Optional[str] = None
+) -> Dict:
+    """
+    Executa Tesseract sobre uma imagem já carregada (uma única passada)
+    
+    Texto e confiança vêm da mesma chamada a image_to_data. O resultado fica
+    no cache de páginas, chaveado pelo hash da imagem + idiomas + config.
+    """
+    if config is None:
+        config = Config.OCR_TESSERACT_CONFIG
+    
+    cache = PageCache()
+    key = cache_key(digest or image_digest(image), "tesseract", languages, config) if cache.enabled else None
+    if key:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
+    # Configurar idiomas
+    lang = "+".join(languages)
+    
+    # Obter dados detalhados (palavras + confiança)
+    data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    
+    # Calcular confiança média (-1 = elemento sem texto)
+    confidences = [float(conf) for conf in data['conf'] if float(conf) >= 0]
+    avg_confidence = sum(confidences) / len(confidences) / 100.0 if confidences else 0.0
+    
+    result = {
+        "text": _text_from_tesseract_data(data),
+        "confidence": avg_confidence,
+        "language": languages[0],
+        "method": "tesseract"
+    }
+    if key:
+        cache.set(key, result)
+    return result
+
+
+def _google_vision_ocr(client, content: bytes) -> Dict:
+    """Executa Google Vision sobre o conteúdo (bytes) de uma imagem"""
+    image = vision.Image(content=content)
+    
+    # Detectar texto
+    response = client.text_detection(image=image)
+    texts = response.text_annotations
+    
+    if texts:
+        # Primeiro texto é o texto completo
+        full_text = texts[0].description
+        
+        # Calcular confiança média dos detections
+        if len(texts) > 1:
+            # Usar bounding boxes para estimar confiança
+            # Google Vision não retorna confiança diretamente
+            confidence = 0.95  # Google Vision geralmente tem alta confiança
+        else:
+            confidence = 0.90
+        
+        return {
+            "text": full_text,
+            "confidence": confidence,
+            "language": "por",
+            "method": "google_vision"
+        }
+    
+    return {
+        "text": "",
+        "confidence": 0.0,
+        "language": "por",
+        "method": "google_vision"
+    }
+
+
+def _ocr_pdf_pages(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    languages: List[str],
+    dpi: int,
+    use_google_vision: bool,
+    confidence_threshold: float,
+    use_tesseract: bool = True
+) -> List[Dict]:
+    """
+    Rasteriza um intervalo de páginas do PDF e aplica OCR (roda no pool)
+    
+    As imagens ficam em memória: nada é gravado em caminho fixo, então
+    workers concorrentes não se sobrescrevem.
+    """
+    global _worker_vision_client
+    
+    images = pdf2image.convert_from_path(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page)
+    cache = PageCache()
+    pages = []
+    
+    for offset, image in enumerate(images):
+        result = None
+        digest = image_digest(image) if cache.enabled else None
+        
+        # Tentar Google Vision primeiro (mais preciso)
+        if use_google_vision:
+            try:
+                key = cache_key(digest, "google_vision", ["por"]) if digest else None
+                result = cache.get(key) if key else None
+                if result is None:
+                    if _worker_vision_client is None:
+                        _worker_vision_client = vision.ImageAnnotatorClient()
+                    buffer = io.BytesIO()
+                    image.save(buffer, format="PNG")
+                    result = _google_vision_ocr(_worker_vision_client, buffer.getvalue())
+                    if key:
+                        cache.set(key, result)
+                if result["confidence"] < confidence_threshold:
+                    result = None
+            except Exception as e:
+                print(f"Erro no Google Vision: {e}")
+                result = None
+        
+        # Fallback para Tesseract
+        if result is None:
+            if not use_tesseract:
+                raise Exception("Nenhum método de OCR disponível")
+            result = _tesseract_ocr(image, languages, digest=digest)
+        
+        image.close()
+        pages.append({
+            "page": first_page + offset,
+            "text": result["text"],
+            "confidence": result["confidence"],
+            "method": result["method"]
+        })
+    
+    return pages
+
+
+def _count_pdf_pages(pdf_path: str) -> int:
+    return int(pdf2image.pdfinfo_from_path(pdf_path)["Pages"])
+
+
+_ocr_executor: Optional[Executor] = None
+
+
+def get_ocr_executor() -> Executor:
+    """
+    Pool compartilhado para OCR de páginas (criado sob demanda)
+    
+    Processos por padrão; threads quando OCR_EXECUTOR=thread ou quando o
+    processo atual é daemon (workers prefork do Celery não podem ter filhos).
+    Em threads o paralelismo continua real: pdftoppm e tesseract são
+    processos externos.
+    """
+    global _ocr_executor
+    if _ocr_executor is None:
+        workers = max(1, Config.OCR_WORKERS)
+        if Config.OCR_EXECUTOR == "thread" or multiprocessing.current_process().daemon:
+            _ocr_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-page")
+        else:
+            _ocr_executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    return _ocr_executor
+
+
+def shutdown_ocr_executor(wait: bool = True):
+    """Encerra o pool de OCR"""
+    global _ocr_executor
+    if _ocr_executor is not None:
+        _ocr_executor.shutdown(wait=wait)
+        _ocr_executor = None
 
 
 class OCREngine:
@@ -68,7 +296,17 @@ class OCREngine:
         ocr_result_dict = await self.process_file(document.file_path)
         
         # Salvar no banco
-        ocr_result = OCRResult(
+        ocr_result = self.build_result(document_id, ocr_result_dict)
+        
+        db.add(ocr_result)
+        db.commit()
+        db.refresh(ocr_result)
+        
+        return ocr_result
+    
+    def build_result(self, document_id: int, ocr_result_dict: Dict) -> OCRResult:
+        """Cria o OCRResult (sem salvar) a partir do resultado de process_file"""
+        return OCRResult(
             document_id=document_id,
             text=ocr_result_dict["text"],
             confidence=ocr_result_dict["confidence"],
@@ -76,12 +314,6 @@ class OCREngine:
             method=ocr_result_dict.get("method", "tesseract"),
             pages=ocr_result_dict.get("pages")
         )
-        
-        db.add(ocr_result)
-        db.commit()
-        db.refresh(ocr_result)
-        
-        return ocr_result
     
     async def process_file(self, file_path: str) -> Dict:
         """
@@ -125,6 +357,66 @@ class OCREngine:
         
         raise Exception("Nenhum método de OCR disponível")
     
+    async def iter_pdf_pages(self, pdf_path: str) -> AsyncIterator[Dict]:
+        """
+        Processa PDF em modo streaming, entregando cada página quando fica pronta
+        
+        As páginas são rasterizadas em blocos de OCR_PAGE_CHUNK_SIZE
+        (first_page/last_page) dentro do pool, com no máximo OCR_WORKERS blocos
+        em andamento: a memória fica constante mesmo para autos com centenas
+        de páginas. A ordem de entrega é a de conclusão (use "page").
+        
+        Args:
+            pdf_path: Caminho do PDF
+            
+        Yields:
+            Dict com page, text, confidence e method
+        """
+        if not self.use_google_vision and not self.use_tesseract:
+            raise Exception("Nenhum método de OCR disponível")
+        
+        loop = asyncio.get_running_loop()
+        executor = get_ocr_executor()
+        
+        total_pages = await loop.run_in_executor(None, _count_pdf_pages, pdf_path)
+        chunk_size = max(1, Config.OCR_PAGE_CHUNK_SIZE)
+        chunks = iter([
+            (first, min(first + chunk_size - 1, total_pages))
+            for first in range(1, total_pages + 1, chunk_size)
+        ])
+        
+        def submit_next(pending: set) -> None:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.add(loop.run_in_executor(
+                    executor,
+                    _ocr_pdf_pages,
+                    pdf_path,
+                    chunk[0],
+                    chunk[1],
+                    self.languages,
+                    Config.OCR_DPI,
+                    self.use_google_vision,
+                    self.confidence_threshold,
+                    self.use_tesseract
+                ))
+        
+        pending: set = set()
+        for _ in range(max(1, Config.OCR_WORKERS)):
+            submit_next(pending)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    submit_next(pending)
+                    for page in future.result():
+                        yield page
+        finally:
+            # Consumidor desistiu ou houve erro: não iniciar blocos pendentes
+            for future in pending:
+                future.cancel()
+    
     async def process_pdf(self, pdf_path: str) -> Dict:
         """
         Processa PDF convertendo para imagens
@@ -136,37 +428,20 @@ class OCREngine:
             Dict com texto extraído de todas as páginas
         """
         try:
-            # Converter PDF para imagens
-            images = pdf2image.convert_from_path(pdf_path)
-            
-            all_text = []
-            pages = []
-            
-            for i, image in enumerate(images):
-                # Salvar imagem temporária
-                temp_path = f"/tmp/page_{i}.png"
-                image.save(temp_path)
-                
-                # Processar imagem
-                page_result = await self.process_image(temp_path)
-                
-                all_text.append(page_result["text"])
-                pages.append({
-                    "page": i + 1,
-                    "text": page_result["text"],
-                    "confidence": page_result["confidence"]
-                })
+            pages = [page async for page in self.iter_pdf_pages(pdf_path)]
+            pages.sort(key=lambda p: p["page"])
             
             # Combinar resultados
-            full_text = "\n\n".join(all_text)
+            full_text = "\n\n".join(p["text"] for p in pages)
             avg_confidence = sum(p["confidence"] for p in pages) / len(pages) if pages else 0.0
+            methods = {p.pop("method") for p in pages}
             
             return {
                 "text": full_text,
                 "confidence": avg_confidence,
                 "language": "por",
                 "pages": pages,
-                "method": "tesseract"
+                "method": "google_vision" if methods == {"google_vision"} else "tesseract"
             }
         
         except Exception as e:
@@ -184,26 +459,7 @@ class OCREngine:
         """
         try:
             image = Image.open(image_path)
-            
-            # Configurar idiomas
-            lang = "+".join(self.languages)
-            
-            # Extrair texto
-            text = pytesseract.image_to_string(image, lang=lang)
-            
-            # Obter dados detalhados
-            data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
-            
-            # Calcular confiança média
-            confidences = [int(conf) for conf in data['conf'] if conf != '-1']
-            avg_confidence = sum(confidences) / len(confidences) / 100.0 if confidences else 0.0
-            
-            return {
-                "text": text,
-                "confidence": avg_confidence,
-                "language": self.languages[0],
-                "method": "tesseract"
-            }
+            return _tesseract_ocr(image, self.languages)
         
         except Exception as e:
             raise Exception(f"Erro no Tesseract: {e}")
@@ -225,37 +481,7 @@ class OCREngine:
             with open(image_path, 'rb') as image_file:
                 content = image_file.read()
             
-            image = vision.Image(content=content)
-            
-            # Detectar texto
-            response = self.vision_client.text_detection(image=image)
-            texts = response.text_annotations
-            
-            if texts:
-                # Primeiro texto é o texto completo
-                full_text = texts[0].description
-                
-                # Calcular confiança média dos detections
-                if len(texts) > 1:
-                    # Usar bounding boxes para estimar confiança
-                    # Google Vision não retorna confiança diretamente
-                    confidence = 0.95  # Google Vision geralmente tem alta confiança
-                else:
-                    confidence = 0.90
-                
-                return {
-                    "text": full_text,
-                    "confidence": confidence,
-                    "language": "por",
-                    "method": "google_vision"
-                }
-            else:
-                return {
-                    "text": "",
-                    "confidence": 0.0,
-                    "language": "por",
-                    "method": "google_vision"
-                }
+            return _google_vision_ocr(self.vision_client, content)
         
         except Exception as e:
             raise Exception(f"Erro no Google Vision: {e}")
@@ -0,0 +1,155 @@
+"""
+Pipeline de processamento de documento
+OCR uma vez; o texto e os resultados intermediários passam em memória para
+extração, classificação, análise IA e embeddings, que rodam em paralelo.
+Todas as linhas são gravadas em uma única transação e a duração de cada
+etapa fica em Document.processing_times
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy.orm import Session, selectinload
+
+from src.models.document import Document, ExtractedData
+
+
+# Etapas independentes, na ordem em que começam: as que esperam rede (IA,
+# embeddings) primeiro, para sobrepor a extração e a classificação (CPU)
+PARALLEL_STAGES = ("analysis", "indexing", "extraction", "classification")
+
+
+class DocumentPipeline:
+    """Processa um documento completo (OCR -> dados -> classificação -> análise -> índice)"""
+
+    def __init__(self, ocr_engine, data_extractor, classifier, ai_analyzer, search_engine):
+        self.ocr_engine = ocr_engine
+        self.data_extractor = data_extractor
+        self.classifier = classifier
+        self.ai_analyzer = ai_analyzer
+        self.search_engine = search_engine
+
+    @staticmethod
+    async def _timed(times: Dict[str, float], stage: str, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            times[stage] = round(time.perf_counter() - start, 3)
+
+    def _load_document(self, document_id: int, db: Session) -> Document:
+        """Documento com OCR, classificação, análise e índice já carregados (sem lazy load)"""
+        return db.query(Document).options(
+            selectinload(Document.ocr_results),
+            selectinload(Document.classifications),
+            selectinload(Document.analysis_results),
+            selectinload(Document.index)
+        ).filter(Document.id == document_id).first()
+
+    async def run(self, document_id: int, db: Session) -> Dict:
+        """
+        Processa o documento e grava todos os resultados em uma transação
+
+        Resultados já existentes (OCR, classificação, análise, índice) são
+        reaproveitados, como nos serviços individuais; dados extraídos são
+        sempre refeitos.
+
+        Args:
+            document_id: ID do documento
+            db: Sessão do banco de dados
+
+        Returns:
+            Dict com o resumo do processamento e os tempos por etapa
+        """
+        started = time.perf_counter()
+        times: Dict[str, float] = {}
+
+        updated = db.query(Document).filter(Document.id == document_id).update(
+            {"status": "processing"}, synchronize_session=False
+        )
+        if not updated:
+            raise ValueError(f"Documento {document_id} não encontrado")
+        db.commit()
+
+        document = self._load_document(document_id, db)
+
+        # OCR (única etapa que lê o arquivo)
+        if document.ocr_results:
+            ocr_result = document.ocr_results[0]
+            times["ocr"] = 0.0
+        else:
+            ocr_dict = await self._timed(times, "ocr", self.ocr_engine.process_file(document.file_path))
+            ocr_result = self.ocr_engine.build_result(document_id, ocr_dict)
+        text = ocr_result.text
+
+        # Etapas independentes sobre o mesmo texto em memória
+        stages = {"extraction": self.data_extractor.extract_from_text(text)}
+        if not document.classifications:
+            stages["classification"] = self.classifier.classify_text(text)
+        if not document.analysis_results:
+            stages["analysis"] = self.ai_analyzer.analyze_text(text)
+        if document.index is None:
+            stages["indexing"] = self.search_engine.embed_document_text(text)
+
+        names = [name for name in PARALLEL_STAGES if name in stages]
+        outputs = await asyncio.gather(*(self._timed(times, name, stages[name]) for name in names))
+        results = dict(zip(names, outputs))
+
+        # Gravação: tudo ou nada
+        persist_start = time.perf_counter()
+        if ocr_result.id is None:
+            db.add(ocr_result)
+
+        db.query(ExtractedData).filter(
+            ExtractedData.document_id == document_id
+        ).delete(synchronize_session=False)
+        extracted_items = self.data_extractor.build_items(document_id, results["extraction"])
+        db.add_all(extracted_items)
+
+        if "classification" in results:
+            classification = self.classifier.build_classification(document_id, results["classification"])
+            db.add(classification)
+        else:
+            classification = document.classifications[0]
+
+        if "analysis" in results:
+            analysis = self.ai_analyzer.build_analysis(document_id, results["analysis"])
+            db.add(analysis)
+        else:
+            analysis = document.analysis_results[0]
+
+        vectors = results.get("indexing")
+        if document.index is None:
+            index = self.search_engine.build_index(document_id, ocr_result, vectors)
+            db.add(index)
+        else:
+            index = document.index
+
+        db.flush()
+        times["persist"] = round(time.perf_counter() - persist_start, 3)
+        times["total"] = round(time.perf_counter() - started, 3)
+
+        document.status = "processed"
+        document.processed_at = datetime.utcnow()
+        document.processing_times = times
+        db.commit()
+
+        # Índice vetorial (arquivos) só depois do commit
+        if vectors is not None:
+            self.search_engine.vector_index.add(document_id, vectors)
+        elif "indexing" not in results:
+            self.search_engine.ensure_in_vector_index(index)
+
+        return {
+            "success": True,
+            "document_id": document_id,
+            "ocr_confidence": ocr_result.confidence,
+            "pages": len(ocr_result.pages) if ocr_result.pages else 1,
+            "extracted_fields": len(extracted_items),
+            "category": classification.category,
+            "risk_score": analysis.risk_score,
+            "indexed": True,
+            "timings": times
+        }
@@ -3,21 +3,28 @@ Microserviço 6: Search Engine
 Responsável por busca semântica em documentos
 """
 
+import asyncio
+import re
+import time
+from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
 import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+from sqlalchemy import func, or_
 
 from src.config import Config
 from src.models.document import Document, DocumentIndex, OCRResult
 from src.services.document_uploader import DocumentUploader
+from src.services.embedding_codec import decode_matrix
+from src.services.embedding_service import EmbeddingService
+from src.services import fulltext
+from src.services.fulltext import CNJ_PATTERN
+from src.services.vector_index import VectorIndex
+
+
+# Constante do reciprocal rank fusion
+RRF_K = 60
 
 
 class SearchEngine:
@@ -25,17 +32,18 @@ class SearchEngine:
     
     def __init__(self):
         self.enable_semantic = Config.ENABLE_SEMANTIC_SEARCH
-        self.embedding_model = Config.EMBEDDING_MODEL
         self.document_uploader = DocumentUploader()
         
-        if OPENAI_AVAILABLE and Config.OPENAI_API_KEY:
-            self.openai_client = OpenAI(api_key=Config.OPENAI_API_KEY)
-        else:
-            self.openai_client = None
-            self.enable_semantic = False
+        # Embeddings em lote com cache (OpenAI ou modelo local sem chave)
+        self.embedding_service = EmbeddingService()
+        self.embedding_model = self.embedding_service.model_name
         
-        # Cache de embeddings (em produção seria Redis ou DB)
-        self.embeddings_cache = {}
+        # Matriz de embeddings persistente (compartilhada entre processos),
+        # um diretório por modelo: dimensões diferentes não se misturam
+        model_dir = re.sub(r"[^\w.-]", "_", self.embedding_model)
+        self.vector_index = VectorIndex(str(Path(Config.VECTOR_INDEX_DIR) / model_dir))
+        self._vector_index_checked = float("-inf")
+        self._vector_index_state = None
     
     async def search(self, query: str, limit: int = 10, db: Session = None) -> List[Dict]:
         """
@@ -49,8 +57,12 @@ class SearchEngine:
         Returns:
             Lista de documentos encontrados
         """
-        if db and self.enable_semantic and self.openai_client:
-            return await self.semantic_search(query, limit, db)
+        if db and self.enable_semantic:
+            if Config.SEARCH_MODE == "hybrid":
+                return await self.hybrid_search(query, limit, db)
+            if Config.SEARCH_MODE == "semantic":
+                return await self.semantic_search(query, limit, db)
+            return await self.keyword_search(query, limit, db)
         elif db:
             return await self.keyword_search(query, limit, db)
         else:
@@ -80,69 +92,129 @@ class SearchEngine:
                 # Fallback para keyword search se não conseguir gerar embedding
                 return await self.keyword_search(query, limit, db)
             
-            # Buscar documentos indexados do banco
-            indexed_docs = db.query(DocumentIndex).all()
-            
-            if not indexed_docs:
+            results = self._vector_search(query, query_embedding, limit, db)
+            if not results:
                 # Se não há documentos indexados, usar keyword search
                 return await self.keyword_search(query, limit, db)
             
-            # Calcular similaridade com documentos indexados
-            results = []
-            query_vec = np.array(query_embedding)
-            
-            for doc_index in indexed_docs:
-                if doc_index.embeddings:
-                    doc_vec = np.array(doc_index.embeddings)
-                    similarity = self._cosine_similarity(query_vec, doc_vec)
-                    
-                    # Buscar documento completo
-                    document = db.query(Document).filter(
-                        Document.id == doc_index.document_id
-                    ).first()
-                    
-                    if document:
-                        # Buscar OCR para snippet
-                        ocr_result = db.query(OCRResult).filter(
-                            OCRResult.document_id == document.id
-                        ).first()
-                        
-                        snippet = ""
-                        if ocr_result:
-                            # Criar snippet com palavras-chave
-                            text_lower = ocr_result.text.lower()
-                            query_lower = query.lower()
-                            query_words = query_lower.split()
-                            
-                            # Encontrar primeira ocorrência
-                            for word in query_words:
-                                if word in text_lower:
-                                    idx = text_lower.find(word)
-                                    start = max(0, idx - 50)
-                                    end = min(len(ocr_result.text), idx + len(word) + 50)
-                                    snippet = ocr_result.text[start:end]
-                                    if snippet:
-                                        snippet = "..." + snippet + "..."
-                                    break
-                        
-                        results.append({
-                            "document_id": document.id,
-                            "filename": document.filename,
-                            "score": float(similarity),
-                            "relevance": "high" if similarity > 0.8 else "medium" if similarity > 0.6 else "low",
-                            "snippet": snippet or f"Documento {document.filename}",
-                            "status": document.status
-                        })
-            
-            # Ordenar por score
-            results.sort(key=lambda x: x["score"], reverse=True)
-            
-            return results[:limit]
+            return results
         
         except Exception as e:
             print(f"Erro na busca semântica: {e}")
             return await self.keyword_search(query, limit, db)
     
+    async def hybrid_search(self, query: str, limit: int = 10, db: Session = None) -> List[Dict]:
+        """
+        Busca híbrida: texto completo + semântica, fundidas por reciprocal rank fusion
+        
+        A busca de texto completo roda enquanto o embedding da query é gerado.
+        Consultas com número de processo dão mais peso ao casamento exato.
+        
+        Args:
+            query: Texto de busca
+            limit: Limite de resultados
+            db: Sessão do banco de dados
+            
+        Returns:
+            Lista de documentos; score é o score da fusão (0-1)
+        """
+        if not db:
+            return await self.keyword_search(query, limit)
+        
+        candidates = max(Config.HYBRID_CANDIDATES, limit * 2)
+        embedding_result, keyword_results = await asyncio.gather(
+            self._get_embedding(query),
+            self.keyword_search(query, candidates, db),
+            return_exceptions=True
+        )
+        
+        if isinstance(keyword_results, Exception):
+            print(f"Erro na busca por palavras-chave: {keyword_results}")
+            keyword_results = []
+        
+        semantic_results = []
+        if isinstance(embedding_result, Exception):
+            print(f"Erro na busca semântica: {embedding_result}")
+        elif embedding_result:
+            try:
+                semantic_results = self._vector_search(query, embedding_result, candidates, db)
+            except Exception as e:
+                print(f"Erro na busca semântica: {e}")
+        
+        keyword_weight = Config.HYBRID_KEYWORD_WEIGHT_CNJ if CNJ_PATTERN.search(query) else Config.HYBRID_KEYWORD_WEIGHT
+        lists = [(keyword_results, keyword_weight), (semantic_results, 1 - keyword_weight)]
+        
+        fused: Dict[int, float] = {}
+        by_id: Dict[int, Dict] = {}
+        for results, weight in lists:
+            for rank, result in enumerate(results, start=1):
+                doc_id = result["document_id"]
+                fused[doc_id] = fused.get(doc_id, 0.0) + weight / (RRF_K + rank)
+                # Resultado da busca de texto completo tem snippet e matched_keywords
+                by_id.setdefault(doc_id, result)
+        
+        # Normalizar pelo melhor score possível entre as listas com resultados
+        best_possible = sum(weight for results, weight in lists if results) / (RRF_K + 1)
+        results = []
+        for doc_id, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            score = min(1.0, score / best_possible)
+            result = dict(by_id[doc_id])
+            result["score"] = round(score, 4)
+            result["relevance"] = "high" if score > 0.8 else "medium" if score > 0.5 else "low"
+            results.append(result)
+        
+        return results
+    
+    def _vector_search(self, query: str, query_embedding: List[float], limit: int, db: Session) -> List[Dict]:
+        """
+        Top-k pelo índice vetorial, com documentos e snippets hidratados
+        
+        Returns:
+            Lista de documentos com score de similaridade (vazia se não há índice)
+        """
+        # Incorporar documentos indexados por outros processos (workers)
+        self._sync_vector_index(db)
+        
+        if len(self.vector_index) == 0:
+            return []
+        
+        # Um produto matriz-vetor + top-k
+        top = self.vector_index.search(query_embedding, limit)
+        if not top:
+            return []
+        
+        # Documentos e OCR dos top-k em uma única consulta
+        document_ids = [doc_id for doc_id, _ in top]
+        rows = db.query(Document, OCRResult).outerjoin(
+            OCRResult, OCRResult.document_id == Document.id
+        ).filter(
+            Document.id.in_(document_ids)
+        ).order_by(OCRResult.id).all()
+        
+        hydrated = {}
+        for document, ocr_result in rows:
+            if document.id not in hydrated:
+                hydrated[document.id] = (document, ocr_result)
+        
+        results = []
+        query_words = query.lower().split()
+        for document_id, similarity in top:
+            if document_id not in hydrated:
+                continue
+            document, ocr_result = hydrated[document_id]
+            snippet = self._build_snippet(ocr_result.text, query_words) if ocr_result else ""
+            
+            results.append({
+                "document_id": document.id,
+                "filename": document.filename,
+                "score": float(similarity),
+                "relevance": "high" if similarity > 0.8 else "medium" if similarity > 0.6 else "low",
+                "snippet": snippet or f"Documento {document.filename}",
+                "status": document.status
+            })
+        
+        return results
+    
     async def keyword_search(self, query: str, limit: int = 10, db: Session = None) -> List[Dict]:
         """
         Busca por palavras-chave no banco de dados
@@ -158,6 +230,67 @@ class SearchEngine:
         if not db:
             return []
         
+        words = fulltext.tokenize_query(query)
+        if not words:
+            return []
+        
+        try:
+            # Buscar mais para agrupar vários OCRs do mesmo documento
+            matches = fulltext.search(db, words, limit * 2)
+        except Exception as e:
+            print(f"Erro na busca de texto completo: {e}")
+            db.rollback()
+            matches = None
+        
+        if matches is None:
+            # Banco sem índice de texto completo
+            return await self._like_search(query, limit, db)
+        
+        if not matches:
+            return []
+        
+        # Documentos em uma única consulta
+        document_ids = {match["document_id"] for match in matches}
+        documents = {
+            document.id: document
+            for document in db.query(Document).filter(Document.id.in_(document_ids)).all()
+        }
+        
+        results = []
+        seen = set()
+        for match in matches:
+            document = documents.get(match["document_id"])
+            if not document or document.id in seen:
+                continue
+            seen.add(document.id)
+            
+            score = len(match["matched"]) / len(words)
+            snippet = "..." + match["snippet"] + "..." if match["snippet"] else ""
+            
+            results.append({
+                "document_id": document.id,
+                "filename": document.filename,
+                "score": score,
+                "relevance": "high" if score > 0.8 else "medium" if score > 0.5 else "low",
+                "snippet": snippet or f"Documento {document.filename}",
+                "matched_keywords": match["matched"],
+                "status": document.status
+            })
+        
+        return results[:limit]
+    
+    async def _like_search(self, query: str, limit: int, db: Session) -> List[Dict]:
+        """
+        Busca por substring (ILIKE) para bancos sem índice de texto completo
+        
+        Args:
+            query: Texto de busca
+            limit: Limite de resultados
+            db: Sessão do banco de dados
+            
+        Returns:
+            Lista de documentos encontrados
+        """
         keywords = query.lower().split()
         
         # Construir filtros de busca
@@ -169,47 +302,29 @@ class SearchEngine:
             return []
         
         # Buscar OCR results que contenham pelo menos uma palavra-chave
-        ocr_results = db.query(OCRResult).filter(
+        rows = db.query(OCRResult, Document).join(
+            Document, Document.id == OCRResult.document_id
+        ).filter(
             or_(*filters)
         ).limit(limit * 2).all()  # Buscar mais para calcular scores
         
-        if not ocr_results:
-            return []
-        
         # Calcular scores baseado em quantas palavras foram encontradas
         results = []
-        for ocr_result in ocr_results:
+        for ocr_result, document in rows:
             text_lower = ocr_result.text.lower()
-            matched_count = sum(1 for keyword in keywords if keyword in text_lower)
-            score = matched_count / len(keywords) if keywords else 0
-            
-            # Buscar documento
-            document = db.query(Document).filter(
-                Document.id == ocr_result.document_id
-            ).first()
+            matched_keywords = [kw for kw in keywords if kw in text_lower]
+            score = len(matched_keywords) / len(keywords)
+            snippet = self._build_snippet(ocr_result.text, keywords)
             
-            if document:
-                # Criar snippet
-                snippet = ""
-                for keyword in keywords:
-                    if keyword in text_lower:
-                        idx = text_lower.find(keyword)
-                        start = max(0, idx - 50)
-                        end = min(len(ocr_result.text), idx + len(keyword) + 50)
-                        snippet = ocr_result.text[start:end]
-                        if snippet:
-                            snippet = "..." + snippet + "..."
-                        break
-                
-                results.append({
-                    "document_id": document.id,
-                    "filename": document.filename,
-                    "score": score,
-                    "relevance": "high" if score > 0.8 else "medium" if score > 0.5 else "low",
-                    "snippet": snippet or f"Documento {document.filename}",
-                    "matched_keywords": [kw for kw in keywords if kw in text_lower],
-                    "status": document.status
-                })
+            results.append({
+                "document_id": document.id,
+                "filename": document.filename,
+                "score": score,
+                "relevance": "high" if score > 0.8 else "medium" if score > 0.5 else "low",
+                "snippet": snippet or f"Documento {document.filename}",
+                "matched_keywords": matched_keywords,
+                "status": document.status
+            })
         
         # Ordenar por score
         results.sort(key=lambda x: x["score"], reverse=True)
@@ -234,6 +349,7 @@ class SearchEngine:
             ).first()
             
             if existing_index:
+                self.ensure_in_vector_index(existing_index)
                 return existing_index
             
             # Buscar texto OCR do banco
@@ -244,35 +360,58 @@ class SearchEngine:
             if not ocr_result:
                 raise ValueError(f"OCR não encontrado para documento {document_id}")
             
-            # Gerar embedding do documento
-            embedding = None
-            if self.enable_semantic and self.openai_client:
-                embedding = await self._get_embedding(ocr_result.text)
+            # Gerar embeddings dos trechos do documento (texto inteiro, não só o início)
+            vectors = await self.embed_document_text(ocr_result.text)
             
             # Salvar índice no banco
-            document_index = DocumentIndex(
-                document_id=document_id,
-                embeddings=embedding.tolist() if embedding is not None else None,
-                metadata={
-                    "text_length": len(ocr_result.text),
-                    "language": ocr_result.language,
-                    "method": ocr_result.method
-                }
-            )
+            document_index = self.build_index(document_id, ocr_result, vectors)
             
             db.add(document_index)
             db.commit()
             db.refresh(document_index)
             
+            # Atualizar o índice vetorial incrementalmente
+            if vectors is not None:
+                self.vector_index.add(document_id, vectors)
+            
             return document_index
         
         except Exception as e:
             print(f"Erro ao indexar documento {document_id}: {e}")
             raise
     
+    async def embed_document_text(self, text: str) -> Optional[np.ndarray]:
+        """Embeddings dos trechos do texto (None se a busca semântica está desligada)"""
+        if not self.enable_semantic:
+            return None
+        vectors = await self.embedding_service.embed_document(text)
+        return vectors if len(vectors) else None
+    
+    def build_index(self, document_id: int, ocr_result: OCRResult, vectors: Optional[np.ndarray]) -> DocumentIndex:
+        """Cria o DocumentIndex (sem salvar) para o texto OCR e seus embeddings"""
+        document_index = DocumentIndex(
+            document_id=document_id,
+            metadata_json={
+                "text_length": len(ocr_result.text),
+                "language": ocr_result.language,
+                "method": ocr_result.method
+            }
+        )
+        document_index.set_vectors(vectors, model=self.embedding_model)
+        return document_index
+    
+    def ensure_in_vector_index(self, document_index: DocumentIndex):
+        """Publica no índice vetorial os embeddings já salvos de um documento"""
+        if (
+            document_index.embedding is not None
+            and document_index.embedding_model == self.embedding_model
+            and document_index.document_id not in self.vector_index
+        ):
+            self.vector_index.add(document_index.document_id, document_index.get_vectors())
+    
     async def _get_embedding(self, text: str) -> List[float]:
         """
-        Gera embedding do texto usando OpenAI
+        Gera embedding de uma consulta (OpenAI ou modelo local, com cache)
         
         Args:
             text: Texto para gerar embedding
@@ -280,25 +419,87 @@ class SearchEngine:
         Returns:
             Lista de valores do embedding
         """
-        if not self.openai_client:
-            raise Exception("OpenAI não disponível")
-        
         try:
-            # Limitar tamanho do texto
-            max_chars = 8000
-            if len(text) > max_chars:
-                text = text[:max_chars]
-            
-            response = self.openai_client.embeddings.create(
-                model=self.embedding_model,
-                input=text
-            )
-            
-            return response.data[0].embedding if response.data else []
+            embedding = await self.embedding_service.embed_query(text)
+            return embedding.tolist()
         
         except Exception as e:
             raise Exception(f"Erro ao gerar embedding: {e}")
     
+    def _sync_vector_index(self, db: Session, batch_size: int = 500):
+        """
+        Alinha o índice vetorial com os DocumentIndex do banco
+        
+        Workers que não compartilham VECTOR_INDEX_DIR com a API gravam os
+        embeddings só no banco e no índice deles. No máximo a cada
+        VECTOR_INDEX_SYNC_SECONDS, contagem e maior id dos DocumentIndex; se
+        mudaram, os documentos que faltam são carregados (índice vazio é
+        reconstruído). Documentos removidos do banco ficam no índice e são
+        descartados na hidratação.
+        """
+        now = time.monotonic()
+        if now - self._vector_index_checked < Config.VECTOR_INDEX_SYNC_SECONDS:
+            return
+        self._vector_index_checked = now
+        
+        filters = (
+            DocumentIndex.embedding.isnot(None),
+            DocumentIndex.embedding_model == self.embedding_model
+        )
+        state = tuple(db.query(func.count(DocumentIndex.id), func.max(DocumentIndex.id)).filter(*filters).one())
+        if state == self._vector_index_state:
+            return
+        
+        columns = (
+            DocumentIndex.document_id,
+            DocumentIndex.embedding,
+            DocumentIndex.embedding_dtype,
+            DocumentIndex.embedding_dim,
+            DocumentIndex.embedding_scale,
+            DocumentIndex.embedding_scales
+        )
+        
+        def decoded(rows):
+            for document_id, data, dtype, dim, scale, scales in rows:
+                yield document_id, decode_matrix(data, dtype or "float32", dim, scale, scales)
+        
+        if len(self.vector_index) == 0:
+            self.vector_index.rebuild(decoded(db.query(*columns).filter(*filters).yield_per(batch_size)))
+        else:
+            # Só os ids primeiro; os embeddings apenas dos documentos que faltam
+            missing = [
+                document_id
+                for (document_id,) in db.query(DocumentIndex.document_id).filter(*filters)
+                if document_id not in self.vector_index
+            ]
+            for start in range(0, len(missing), batch_size):
+                rows = db.query(*columns).filter(
+                    DocumentIndex.document_id.in_(missing[start:start + batch_size])
+                ).all()
+                self.vector_index.add_many(decoded(rows))
+        self._vector_index_state = state
+    
+    def _build_snippet(self, text: str, query_words: List[str]) -> str:
+        """
+        Cria snippet em torno da primeira palavra da query encontrada no texto
+        
+        Args:
+            text: Texto do OCR
+            query_words: Palavras da query (minúsculas)
+            
+        Returns:
+            Trecho do texto ou string vazia
+        """
+        text_lower = text.lower()
+        for word in query_words:
+            idx = text_lower.find(word)
+            if idx >= 0:
+                start = max(0, idx - 50)
+                end = min(len(text), idx + len(word) + 50)
+                snippet = text[start:end]
+                return "..." + snippet + "..." if snippet else ""
+        return ""
+    
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """
         Calcula similaridade de cosseno entre dois vetores
@@ -0,0 +1,245 @@
+"""
+Classificador treinado do Classifier
+Palavras-chave contadas em uma passada (autômato de palavras-chave) e
+TF-IDF de unigramas/bigramas alimentam uma regressão logística multinomial
+por alvo (categoria, urgência), treinada offline a partir das linhas de
+DocumentClassification (scripts/train_classifier.py) e gravada em um .npz
+"""
+
+import os
+import re
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r'\w{2,}')
+# Alvos que o modelo pode aprender (colunas de DocumentClassification)
+TARGETS = ("category", "urgency")
+# Textos vetorizados por vez na predição (limita a matriz densa em memória)
+PREDICT_BATCH_SIZE = 256
+
+
+class KeywordAutomaton:
+    """
+    Conta todas as ocorrências (inclusive sobrepostas) de um conjunto de
+    palavras-chave em uma única passada pelo texto
+
+    As palavras formam uma trie compilada em uma expressão regular dentro
+    de um lookahead: em cada posição o re casa a palavra mais longa e as
+    demais palavras que começam ali são prefixos dela (pré-calculados), o
+    mesmo resultado de um Aho-Corasick, mas percorrido pelo motor em C.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = list(dict.fromkeys(k.lower() for k in keywords if k))
+        self.index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        # Palavra casada -> índices de todas as palavras que ela contém como prefixo
+        self._prefixes = {
+            keyword: [self.index[keyword[:end]] for end in range(1, len(keyword) + 1)
+                      if keyword[:end] in self.index]
+            for keyword in self.keywords
+        }
+        # Lookahead de primeiro caractere: o re pula as posições em que nada começa
+        first_chars = "".join(sorted({re.escape(keyword[0]) for keyword in self.keywords}))
+        self.pattern = re.compile(
+            f"(?=[{first_chars}])(?=({self._trie_regex(self.keywords)}))"
+        ) if self.keywords else None
+
+    @staticmethod
+    def _trie_regex(words: Sequence[str]) -> str:
+        trie: Dict = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # Palavra termina aqui: o restante é opcional (guloso = mais longa)
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie)
+
+    def count(self, text_lower: str) -> List[int]:
+        """Ocorrências de cada palavra-chave (na ordem de self.keywords) no texto em minúsculas"""
+        hits = [0] * len(self.keywords)
+        if self.pattern is None:
+            return hits
+        for match in self.pattern.finditer(text_lower):
+            for i in self._prefixes[match.group(1)]:
+                hits[i] += 1
+        return hits
+
+
+def terms(text_lower: str) -> List[str]:
+    """Unigramas e bigramas do texto em minúsculas"""
+    tokens = TOKEN_PATTERN.findall(text_lower)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def fit_logistic(features: np.ndarray, labels: np.ndarray, n_classes: int,
+                 epochs: int = 300, learning_rate: float = 1.0, l2: float = 1e-4):
+    """
+    Regressão logística multinomial por gradiente descendente (lote inteiro)
+
+    Returns:
+        (pesos atributos x classes, bias por classe), float32
+    """
+    n_samples, n_features = features.shape
+    weights = np.zeros((n_features, n_classes), dtype=np.float32)
+    bias = np.zeros(n_classes, dtype=np.float32)
+    targets = np.eye(n_classes, dtype=np.float32)[labels]
+
+    for _ in range(epochs):
+        error = (_softmax(features @ weights + bias) - targets) / n_samples
+        weights -= learning_rate * (features.T @ error + l2 * weights)
+        bias -= learning_rate * error.sum(axis=0)
+
+    return weights, bias
+
+
+class TextClassifierModel:
+    """Vetorizador TF-IDF + palavras-chave e uma regressão logística por alvo"""
+
+    def __init__(self, vocabulary: Sequence[str], idf: np.ndarray, keywords: Sequence[str],
+                 heads: Dict[str, Dict[str, np.ndarray]]):
+        self.vocabulary = {term: i for i, term in enumerate(vocabulary)}
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.automaton = KeywordAutomaton(keywords)
+        # alvo -> {"classes", "weights", "bias"}
+        self.heads = heads
+
+    @property
+    def n_features(self) -> int:
+        return len(self.vocabulary) + len(self.automaton.keywords)
+
+    def features(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Matriz (textos x atributos) float32
+
+        TF sublinear (1 + log tf) x IDF com norma 1, seguido de log(1 + n)
+        das ocorrências de cada palavra-chave
+        """
+        n_terms = len(self.vocabulary)
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            text_lower = text.lower()
+            counts = Counter(
+                i for i in map(self.vocabulary.get, terms(text_lower)) if i is not None
+            )
+            if counts:
+                columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                values = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+                values *= self.idf[columns]
+                matrix[row, columns] = values / np.linalg.norm(values)
+            matrix[row, n_terms:] = np.log1p(self.automaton.count(text_lower))
+        return matrix
+
+    def predict(self, texts: Sequence[str]) -> List[Dict]:
+        """
+        Classe e probabilidade de cada alvo para cada texto
+
+        Returns:
+            Lista de dicts {alvo: rótulo, alvo_confidence: probabilidade}
+        """
+        results = []
+        for start in range(0, len(texts), PREDICT_BATCH_SIZE):
+            features = self.features(texts[start:start + PREDICT_BATCH_SIZE])
+            batch = [{} for _ in range(features.shape[0])]
+            for target, head in self.heads.items():
+                probabilities = _softmax(features @ head["weights"] + head["bias"])
+                best = probabilities.argmax(axis=1)
+                for result, label, probability in zip(batch, best, probabilities[np.arange(len(best)), best]):
+                    result[target] = str(head["classes"][label])
+                    result[f"{target}_confidence"] = round(float(probability), 4)
+            results.extend(batch)
+        return results
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Dict[str, Sequence[str]], keywords: Iterable[str],
+              max_features: int = 5000, min_df: int = 2, epochs: int = 300,
+              learning_rate: float = 1.0, l2: float = 1e-4) -> "TextClassifierModel":
+        """
+        Treina o vetorizador e uma regressão logística por alvo
+
+        Args:
+            texts: Textos OCR
+            labels: alvo -> rótulo de cada texto (alvos com uma só classe são ignorados)
+            keywords: Palavras-chave contadas como atributos extras
+            max_features: Termos mais frequentes mantidos no vocabulário
+            min_df: Documentos mínimos em que o termo aparece
+        """
+        document_frequency = Counter()
+        for text in texts:
+            document_frequency.update(set(terms(text.lower())))
+        vocabulary = [term for term, df in document_frequency.most_common(max_features) if df >= min_df]
+        df = np.array([document_frequency[term] for term in vocabulary], dtype=np.float32)
+        idf = np.log((1 + len(texts)) / (1 + df)) + 1
+
+        model = cls(vocabulary, idf, keywords, heads={})
+        features = model.features(texts)
+        for target, target_labels in labels.items():
+            classes, encoded = np.unique(np.asarray(target_labels), return_inverse=True)
+            if len(classes) < 2:
+                continue
+            weights, bias = fit_logistic(features, encoded, len(classes), epochs, learning_rate, l2)
+            model.heads[target] = {"classes": classes, "weights": weights, "bias": bias}
+        return model
+
+    def save(self, path: str):
+        """Grava o artefato (.npz compactado, rename atômico)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "vocabulary": np.array(list(self.vocabulary), dtype=str),
+            "idf": self.idf,
+            "keywords": np.array(self.automaton.keywords, dtype=str),
+            "targets": np.array(list(self.heads), dtype=str),
+        }
+        for target, head in self.heads.items():
+            for name, array in head.items():
+                arrays[f"{target}_{name}"] = array
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "TextClassifierModel":
+        with np.load(path, allow_pickle=False) as data:
+            heads = {
+                str(target): {name: data[f"{target}_{name}"] for name in ("classes", "weights", "bias")}
+                for target in data["targets"]
+            }
+            return cls(data["vocabulary"].tolist(), data["idf"], data["keywords"].tolist(), heads)
+
+
+def load_model(path: Optional[str]) -> Optional[TextClassifierModel]:
+    """Carrega o artefato treinado; None se não configurado ou inválido"""
+    if not path or not os.path.exists(path):
+        print(f"Modelo de classificação não encontrado: {path}")
+        return None
+    try:
+        return TextClassifierModel.load(path)
+    except Exception as e:
+        print(f"Erro ao carregar modelo de classificação {path}: {e}")
+        return None
@@ -0,0 +1,417 @@
+"""
+Índice vetorial persistente para a busca semântica
+Matriz float32 de embeddings normalizados em um .npy mapeado em memória,
+com um mapa linha -> document_id (uma linha por trecho do documento); a
+consulta vira um único produto matriz-vetor + argpartition (ou HNSW,
+opcional, para acervos grandes) e cada documento vale pelo melhor trecho
+"""
+
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+from src.config import Config
+
+
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.npy"
+LOCK_FILE = ".lock"
+# Capacidade inicial da matriz (linhas); dobra quando enche
+INITIAL_CAPACITY = 1024
+# Linha removida
+EMPTY_ID = -1
+# Linhas copiadas por vez na compactação
+COMPACT_BATCH = 65536
+
+
+def normalize(vector) -> np.ndarray:
+    """Converte para float32 com norma 1 (vetor nulo permanece nulo)"""
+    vec = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Matriz (linhas x dimensão) float32 com cada linha de norma 1"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1)
+
+
+def _best_per_document(ids: np.ndarray, rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Primeiros k documentos distintos de linhas já ordenadas por score"""
+    results = []
+    seen = set()
+    for row in rows:
+        doc_id = int(ids[row])
+        if doc_id == EMPTY_ID or doc_id in seen:
+            continue
+        seen.add(doc_id)
+        results.append((doc_id, float(scores[row])))
+        if len(results) == k:
+            break
+    return results
+
+
+class VectorIndex:
+    """
+    Índice de embeddings por documento (uma ou mais linhas por documento)
+
+    Arquivos em index_dir:
+    - vectors.npy: matriz (capacidade x dimensão) float32, linhas normalizadas
+    - ids.npy: document_id de cada linha ocupada (gravado por último, com
+      rename atômico; é ele que "publica" as linhas novas)
+
+    Vários processos (API, workers Celery) compartilham os arquivos: escritas
+    usam um lock de arquivo exclusivo e leitores recarregam, com o lock
+    compartilhado, quando ids.npy muda. Substituir ou remover documentos deixa
+    linhas vagas; passando de VECTOR_INDEX_COMPACT_RATIO, a matriz é regravada
+    só com as linhas ocupadas.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, mode: Optional[str] = None):
+        self.index_dir = Path(index_dir or Config.VECTOR_INDEX_DIR)
+        self.mode = (mode or Config.VECTOR_INDEX_MODE).lower()
+        self._vectors: Optional[np.ndarray] = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._rows: Dict[int, List[int]] = {}
+        self._valid_rows = 0
+        self._loaded_mtime = None
+        self._hnsw = None
+        self._hnsw_rows = 0
+        # ids das linhas no momento em que entraram no grafo HNSW
+        self._hnsw_ids = np.empty(0, dtype=np.int64)
+        self._writing = False
+
+    # ------------------------------------------------------------------
+    # Leitura
+
+    @property
+    def dimension(self) -> Optional[int]:
+        self._refresh()
+        return None if self._vectors is None else self._vectors.shape[1]
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._rows)
+
+    def __contains__(self, document_id: int) -> bool:
+        self._refresh()
+        return document_id in self._rows
+
+    def _ids_mtime(self):
+        try:
+            stat = (self.index_dir / IDS_FILE).stat()
+            return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """Recarrega do disco se outro processo publicou alterações"""
+        if self._ids_mtime() == self._loaded_mtime:
+            return
+        if self._writing or not self.index_dir.is_dir():
+            self._reload()
+            return
+        # A compactação troca vectors.npy e ids.npy juntos: o lock compartilhado
+        # impede ler um sem o outro
+        with open(self.index_dir / LOCK_FILE, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            try:
+                self._reload()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _reload(self):
+        mtime = self._ids_mtime()
+        if mtime != self._loaded_mtime:
+            self._load()
+            self._loaded_mtime = mtime
+
+    def _load(self):
+        if self._ids_mtime() is None:
+            self._vectors = None
+            self._ids = np.empty(0, dtype=np.int64)
+        else:
+            self._ids = np.load(self.index_dir / IDS_FILE)
+            self._vectors = np.load(self.index_dir / VECTORS_FILE, mmap_mode="r")
+        self._rows = {}
+        for row, doc_id in enumerate(self._ids):
+            if doc_id != EMPTY_ID:
+                self._rows.setdefault(int(doc_id), []).append(row)
+        self._valid_rows = sum(len(rows) for rows in self._rows.values())
+        # O grafo HNSW é mantido: _sync_hnsw aplica só a diferença
+
+    def search(self, query_vector, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Retorna os k documentos mais similares (pelo trecho mais similar)
+
+        Returns:
+            Lista de (document_id, similaridade de cosseno), da maior para a menor
+        """
+        self._refresh()
+        if not self._rows or k <= 0:
+            return []
+
+        query = normalize(query_vector)
+        if query.shape[0] != self._vectors.shape[1]:
+            raise ValueError(
+                f"Dimensão da consulta ({query.shape[0]}) difere do índice ({self._vectors.shape[1]})"
+            )
+
+        k = min(k, len(self._rows))
+        if self._use_hnsw(len(self._ids)):
+            try:
+                return self._search_hnsw(query, k)
+            except RuntimeError as e:
+                # hnswlib não encontrou vizinhos suficientes (muitas remoções): busca exata
+                print(f"⚠️ Busca HNSW falhou, usando busca exata: {e}")
+        return self._search_flat(query, k)
+
+    def _search_flat(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        count = len(self._ids)
+        scores = self._vectors[:count] @ query
+        valid = self._ids != EMPTY_ID
+        if not valid.all():
+            scores = np.where(valid, scores, -np.inf)
+
+        # Vários trechos do mesmo documento podem ocupar o topo: buscar
+        # linhas a mais e ampliar até ter k documentos distintos
+        fetch = min(self._valid_rows, k * 4)
+        while True:
+            if fetch < count:
+                top = np.argpartition(-scores, fetch - 1)[:fetch]
+            else:
+                top = np.arange(count)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            results = _best_per_document(self._ids, top, scores, k)
+            if len(results) == k or fetch >= self._valid_rows:
+                return results
+            fetch = min(self._valid_rows, fetch * 4)
+
+    # ------------------------------------------------------------------
+    # HNSW (opcional)
+
+    def _use_hnsw(self, count: int) -> bool:
+        return (
+            self.mode == "hnsw"
+            and HNSWLIB_AVAILABLE
+            and count >= Config.VECTOR_INDEX_HNSW_MIN_DOCS
+        )
+
+    def _sync_hnsw(self):
+        """
+        Aplica ao grafo as mudanças publicadas desde a última sincronização
+
+        Linhas ocupadas nunca mudam de vetor (substituir um documento grava
+        linhas novas), então basta comparar os ids: linhas que ficaram vagas
+        são marcadas como removidas, linhas novas são inseridas e linhas com
+        outro id (índice recriado por rebuild) são regravadas.
+        """
+        count = len(self._ids)
+        if self._hnsw is not None and count < self._hnsw_rows:
+            # Índice recriado com menos linhas: grafo novo
+            self._hnsw = None
+        if self._hnsw is None:
+            self._hnsw = hnswlib.Index(space="ip", dim=self._vectors.shape[1])
+            self._hnsw.init_index(max_elements=max(count * 2, INITIAL_CAPACITY), ef_construction=200, M=16)
+            self._hnsw_rows = 0
+            self._hnsw_ids = np.empty(0, dtype=np.int64)
+        if count > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(count * 2)
+
+        indexed = self._ids[:self._hnsw_rows]
+        for row in np.flatnonzero((indexed == EMPTY_ID) & (self._hnsw_ids != EMPTY_ID)):
+            self._hnsw.mark_deleted(int(row))
+        changed = np.flatnonzero((indexed != EMPTY_ID) & (indexed != self._hnsw_ids))
+        new = np.flatnonzero(self._ids[self._hnsw_rows:count] != EMPTY_ID) + self._hnsw_rows
+        rows = np.concatenate([changed, new])
+        if len(rows):
+            self._hnsw.add_items(np.asarray(self._vectors[rows]), rows)
+
+        self._hnsw_ids = self._ids[:count].copy()
+        self._hnsw_rows = count
+
+    def _search_hnsw(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        count = len(self._ids)
+        self._sync_hnsw()
+
+        # Buscar a mais para compensar trechos repetidos do mesmo documento e
+        # ampliar (k e ef) até ter k documentos distintos
+        fetch = min(self._valid_rows, k * 4)
+        while True:
+            self._hnsw.set_ef(max(fetch, Config.VECTOR_INDEX_HNSW_EF))
+            labels, distances = self._hnsw.knn_query(query, k=fetch)
+
+            # space="ip": distância = 1 - produto interno
+            scores = np.zeros(count, dtype=np.float32)
+            scores[labels[0]] = 1.0 - distances[0]
+            results = _best_per_document(self._ids, labels[0], scores, k)
+            if len(results) == k or fetch >= self._valid_rows:
+                return results
+            fetch = min(self._valid_rows, fetch * 4)
+
+    # ------------------------------------------------------------------
+    # Escrita
+
+    @contextmanager
+    def _write_lock(self):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.index_dir / LOCK_FILE, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._writing = True
+            try:
+                # Incorporar o que outros processos gravaram antes do lock
+                self._refresh()
+                yield
+            finally:
+                self._writing = False
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _open_writable(self, dim: int, needed_rows: int) -> np.ndarray:
+        """Abre vectors.npy para escrita, criando ou aumentando a capacidade"""
+        path = self.index_dir / VECTORS_FILE
+        if self._vectors is not None and self._vectors.shape[0] >= needed_rows:
+            return np.load(path, mmap_mode="r+")
+
+        capacity = max(INITIAL_CAPACITY, needed_rows)
+        if self._vectors is not None:
+            capacity = max(capacity, self._vectors.shape[0] * 2)
+
+        # Nova matriz em arquivo temporário + rename: leitores com o mapa
+        # antigo continuam válidos
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".npy")
+        os.close(fd)
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, dim))
+        if self._vectors is not None:
+            used = len(self._ids)
+            grown[:used] = self._vectors[:used]
+        grown.flush()
+        os.replace(tmp_path, path)
+        return grown
+
+    def _needs_compaction(self, ids) -> bool:
+        vacant = int(np.count_nonzero(np.asarray(ids) == EMPTY_ID))
+        return vacant > 0 and vacant >= len(ids) * Config.VECTOR_INDEX_COMPACT_RATIO
+
+    def _write_compacted(self, dim: int, ids: List[int], items: List[Tuple[int, np.ndarray]],
+                         positions: Dict[int, List[int]]) -> np.ndarray:
+        """
+        Regrava vectors.npy só com as linhas ocupadas (as existentes e as de items)
+
+        Returns:
+            ids na nova ordem, a publicar em seguida (ainda com o lock de escrita)
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        live = np.flatnonzero(ids != EMPTY_ID)
+        new_row = np.full(len(ids), EMPTY_ID, dtype=np.int64)
+        new_row[live] = np.arange(len(live))
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".npy")
+        os.close(fd)
+        compacted = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(max(INITIAL_CAPACITY, len(live) * 2), dim)
+        )
+        # Linhas já gravadas vêm antes das novas (as novas vão para o fim)
+        old = live[live < len(self._ids)]
+        for start in range(0, len(old), COMPACT_BATCH):
+            rows = old[start:start + COMPACT_BATCH]
+            compacted[start:start + len(rows)] = self._vectors[rows]
+        for doc_id, matrix in items:
+            compacted[new_row[positions[doc_id]]] = matrix
+        compacted.flush()
+        del compacted
+        os.replace(tmp_path, self.index_dir / VECTORS_FILE)
+        return ids[live]
+
+    def _publish_ids(self, ids: np.ndarray):
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, ids)
+        os.replace(tmp_path, self.index_dir / IDS_FILE)
+        self._load()
+        self._loaded_mtime = self._ids_mtime()
+
+    def add(self, document_id: int, vectors):
+        """Insere ou substitui os embeddings de um documento (vetor ou matriz de trechos)"""
+        self.add_many([(document_id, vectors)])
+
+    def add_many(self, items: Iterable[Tuple[int, object]]):
+        """Insere ou substitui os embeddings de vários documentos de uma vez"""
+        items = [(int(doc_id), normalize_rows(vecs)) for doc_id, vecs in items]
+        items = [(doc_id, matrix) for doc_id, matrix in items if matrix.size]
+        if not items:
+            return
+
+        with self._write_lock():
+            dim = items[0][1].shape[1] if self._vectors is None else self._vectors.shape[1]
+            for doc_id, matrix in items:
+                if matrix.shape[1] != dim:
+                    raise ValueError(f"Embedding do documento {doc_id} tem dimensão {matrix.shape[1]}, esperado {dim}")
+
+            ids = list(self._ids)
+            positions = {}
+            for doc_id, matrix in items:
+                # Linhas antigas do documento ficam vagas e os vetores novos vão
+                # para o fim: uma linha ocupada nunca muda de vetor, o que deixa
+                # leitores (e o grafo HNSW) atualizarem só pela diferença de ids
+                for row in positions.get(doc_id) or self._rows.get(doc_id, []):
+                    ids[row] = EMPTY_ID
+                positions[doc_id] = list(range(len(ids), len(ids) + len(matrix)))
+                ids.extend([doc_id] * len(matrix))
+
+            if self._needs_compaction(ids):
+                self._publish_ids(self._write_compacted(dim, ids, items, positions))
+                return
+
+            vectors = self._open_writable(dim, len(ids))
+            for doc_id, matrix in items:
+                vectors[positions[doc_id]] = matrix
+            vectors.flush()
+            del vectors
+
+            self._publish_ids(np.asarray(ids, dtype=np.int64))
+
+    def remove(self, document_id: int):
+        """Remove um documento do índice (as linhas ficam vagas)"""
+        with self._write_lock():
+            rows = self._rows.get(document_id)
+            if not rows:
+                return
+            ids = self._ids.copy()
+            ids[rows] = EMPTY_ID
+            if self._needs_compaction(ids):
+                ids = self._write_compacted(self._vectors.shape[1], ids, [], {})
+            self._publish_ids(ids)
+
+    def rebuild(self, items: Iterable[Tuple[int, object]], batch_size: int = 500):
+        """Recria o índice do zero (ex.: a partir dos DocumentIndex do banco); também descarta as linhas vagas"""
+        with self._write_lock():
+            for name in (IDS_FILE, VECTORS_FILE):
+                try:
+                    os.remove(self.index_dir / name)
+                except FileNotFoundError:
+                    pass
+            self._load()
+            self._loaded_mtime = None
+
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                self.add_many(batch)
+                batch = []
+        self.add_many(batch)
@@ -2,8 +2,12 @@
 Tasks Celery para processamento assíncrono
 """
 
-from typing import List
+import asyncio
+import os
+from typing import List, Optional
+from celery import chord, group
 from src.celery_app import celery_app
+from src.config import Config
 from src.database import SessionLocal
 from src.services.document_uploader import DocumentUploader
 from src.services.ocr_engine import OCREngine
@@ -11,7 +15,8 @@ from src.services.data_extractor import DataExtractor
 from src.services.ai_analyzer import AIAnalyzer
 from src.services.classifier import Classifier
 from src.services.search_engine import SearchEngine
-from datetime import datetime
+from src.services.pipeline import DocumentPipeline
+from src.services.batch_progress import BatchProgress
 
 
 # Inicializar serviços
@@ -21,6 +26,50 @@ data_extractor = DataExtractor()
 ai_analyzer = AIAnalyzer()
 classifier = Classifier()
 search_engine = SearchEngine()
+pipeline = DocumentPipeline(ocr_engine, data_extractor, classifier, ai_analyzer, search_engine)
+batch_progress = BatchProgress()
+
+# Event loop do processo worker, criado uma vez: um loop novo por chamada
+# descartaria os clientes HTTP assíncronos (presos ao loop) a cada etapa
+_worker_loop = None
+_worker_loop_pid = None
+
+
+def run_async(coro):
+    """
+    Executa uma corrotina no event loop do processo worker
+    
+    Args:
+        coro: Corrotina a executar
+        
+    Returns:
+        Resultado da corrotina
+    """
+    global _worker_loop, _worker_loop_pid
+    if _worker_loop is None or _worker_loop.is_closed() or _worker_loop_pid != os.getpid():
+        _worker_loop = asyncio.new_event_loop()
+        _worker_loop_pid = os.getpid()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop.run_until_complete(coro)
+
+
+def _mark_failed(db, document_id: int):
+    """Marca o documento como failed (descartando o que a transação deixou pendente)"""
+    try:
+        db.rollback()
+        from src.models.document import Document
+        document = db.query(Document).filter(Document.id == document_id).first()
+        if document:
+            document.status = "failed"
+            db.commit()
+    except:
+        pass
+
+
+def chunk_ids(document_ids: List[int], chunk_size: int) -> List[List[int]]:
+    """Divide os IDs em blocos de até chunk_size"""
+    chunk_size = max(1, chunk_size)
+    return [document_ids[i:i + chunk_size] for i in range(0, len(document_ids), chunk_size)]
 
 
 @celery_app.task(name="process_document_task", bind=True, max_retries=3)
@@ -36,59 +85,11 @@ def process_document_task(self, document_id: int):
     """
     db = SessionLocal()
     try:
-        # Atualizar status para processing
-        # Nota: get_document é async, mas em contexto Celery precisamos usar síncrono
-        # Por enquanto, buscar diretamente do banco
-        from src.models.document import Document
-        document = db.query(Document).filter(Document.id == document_id).first()
-        
-        if not document:
-            raise ValueError(f"Documento {document_id} não encontrado")
-        
-        document.status = "processing"
-        db.commit()
-        
-        # Processar OCR (async)
-        import asyncio
-        ocr_result = asyncio.run(ocr_engine.process_document(document_id, db))
-        
-        # Extrair dados (async)
-        extracted_data = asyncio.run(data_extractor.extract(document_id, db))
-        
-        # Classificar (async)
-        classification = asyncio.run(classifier.classify(document_id, db))
-        
-        # Análise IA (async)
-        analysis = asyncio.run(ai_analyzer.analyze(document_id, db))
-        
-        # Indexar para busca (async)
-        index = asyncio.run(search_engine.index_document(document_id, db))
-        
-        # Atualizar status para processed
-        document.status = "processed"
-        document.processed_at = datetime.utcnow()
-        db.commit()
-        
-        return {
-            "success": True,
-            "document_id": document_id,
-            "ocr_confidence": ocr_result.confidence if ocr_result else 0.0,
-            "extracted_fields": len(extracted_data) if extracted_data else 0,
-            "category": classification.category if classification else None,
-            "risk_score": analysis.risk_score if analysis else None,
-            "indexed": index is not None
-        }
+        # OCR, etapas em paralelo e gravação em uma transação (ver DocumentPipeline)
+        return run_async(pipeline.run(document_id, db))
     
     except Exception as e:
-        # Marcar como failed
-        try:
-            from src.models.document import Document
-            document = db.query(Document).filter(Document.id == document_id).first()
-            if document:
-                document.status = "failed"
-                db.commit()
-        except:
-            pass
+        _mark_failed(db, document_id)
         
         # Retry se for erro temporário
         if self.request.retries < self.max_retries:
@@ -124,13 +125,10 @@ def extract_data_task(self, document_id: int):
         ).first()
         
         if not ocr_result:
-            # Usar método síncrono para Celery
-            import asyncio
-            ocr_result = asyncio.run(ocr_engine.process_document(document_id, db))
+            ocr_result = run_async(ocr_engine.process_document(document_id, db))
         
         # Extrair dados
-        import asyncio
-        extracted_data = asyncio.run(data_extractor.extract(document_id, db))
+        extracted_data = run_async(data_extractor.extract(document_id, db))
         
         return {
             "success": True,
@@ -166,8 +164,7 @@ def analyze_document_task(self, document_id: int):
     """
     db = SessionLocal()
     try:
-        import asyncio
-        analysis = asyncio.run(ai_analyzer.analyze(document_id, db))
+        analysis = run_async(ai_analyzer.analyze(document_id, db))
         
         return {
             "success": True,
@@ -192,38 +189,98 @@ def analyze_document_task(self, document_id: int):
 
 
 @celery_app.task(name="batch_process_task", bind=True)
-def batch_process_task(self, document_ids: List[int]):
+def batch_process_task(self, document_ids: List[int], chunk_size: Optional[int] = None):
     """
     Task para processar lote de documentos
     
+    Divide o lote em blocos (group de process_document_chunk_task, na fila
+    de baixa prioridade) e fecha com finalize_batch_task (chord). O
+    progresso agregado fica em GET /api/tasks/batch/{batch_id}.
+    
     Args:
         document_ids: Lista de IDs de documentos
+        chunk_size: Documentos por task (padrão BATCH_CHUNK_SIZE)
+        
+    Returns:
+        Dict com o ID do lote e a divisão em blocos
+    """
+    batch_id = self.request.id
+    chunk_size = chunk_size or Config.BATCH_CHUNK_SIZE
+    chunks = chunk_ids(document_ids, chunk_size)
+    
+    batch_progress.start(batch_id, len(document_ids), len(chunks), chunk_size)
+    if not chunks:
+        batch_progress.finish(batch_id)
+        return {"success": True, "batch_id": batch_id, "total": 0, "chunks": 0}
+    
+    header = group(process_document_chunk_task.s(chunk, batch_id) for chunk in chunks)
+    result = chord(header)(finalize_batch_task.s(batch_id))
+    
+    return {
+        "success": True,
+        "batch_id": batch_id,
+        "total": len(document_ids),
+        "chunks": len(chunks),
+        "chunk_size": chunk_size,
+        "finalize_task_id": result.id
+    }
+
+
+@celery_app.task(name="process_document_chunk_task")
+def process_document_chunk_task(document_ids: List[int], batch_id: str):
+    """
+    Task para processar um bloco de documentos de um lote
+    
+    Falha em um documento não interrompe o bloco: o documento fica como
+    failed e entra na contagem de falhas do lote.
+    
+    Args:
+        document_ids: IDs do bloco
+        batch_id: ID do lote
         
     Returns:
-        Dict com resultados
+        Lista com o resultado de cada documento
     """
     results = []
     for doc_id in document_ids:
+        db = SessionLocal()
         try:
-            result = process_document_task.delay(doc_id)
-            results.append({
-                "document_id": doc_id,
-                "task_id": result.id,
-                "status": "queued"
-            })
+            result = run_async(pipeline.run(doc_id, db))
         except Exception as e:
-            results.append({
-                "document_id": doc_id,
-                "status": "error",
-                "error": str(e)
-            })
+            _mark_failed(db, doc_id)
+            result = {"success": False, "document_id": doc_id, "error": str(e)}
+        finally:
+            db.close()
+        
+        batch_progress.record(batch_id, result["success"], result.get("pages", 0))
+        results.append(result)
+    
+    return results
+
+
+@celery_app.task(name="finalize_batch_task")
+def finalize_batch_task(chunk_results: List[List[dict]], batch_id: str):
+    """
+    Task executada ao fim de todos os blocos do lote (callback do chord)
+    
+    Args:
+        chunk_results: Resultados de cada bloco
+        batch_id: ID do lote
+        
+    Returns:
+        Dict com o resumo do lote
+    """
+    results = [result for chunk in chunk_results for result in chunk]
+    batch_progress.finish(batch_id)
     
     return {
         "success": True,
-        "total": len(document_ids),
-        "queued": len([r for r in results if r["status"] == "queued"]),
-        "errors": len([r for r in results if r["status"] == "error"]),
-        "results": results
+        "batch_id": batch_id,
+        "total": len(results),
+        "processed": len([r for r in results if r.get("success")]),
+        "errors": len([r for r in results if not r.get("success")]),
+        "pages": sum(r.get("pages", 0) for r in results),
+        "failed_ids": [r["document_id"] for r in results if not r.get("success")]
     }
 
 
@@ -240,8 +297,7 @@ def index_document_task(document_id: int):
     """
     db = SessionLocal()
     try:
-        import asyncio
-        index = asyncio.run(search_engine.index_document(document_id, db))
+        index = run_async(search_engine.index_document(document_id, db))
         
         return {
             "success": True,
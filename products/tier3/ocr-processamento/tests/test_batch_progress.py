@@ -0,0 +1,96 @@
+"""
+Testes para o processamento em lote e o progresso agregado
+"""
+
+import pytest
+
+from src import tasks
+from src.services.batch_progress import summarize
+
+
+class TestSummarize:
+    """Testes do resumo de progresso"""
+
+    def test_taxas_e_eta(self):
+        """Testa páginas/s, documentos/s e ETA a partir dos contadores"""
+        estado = {"total": "100", "completed": "18", "failed": "2", "pages": "300",
+                  "started_at": "1000", "chunks": "10", "chunk_size": "10"}
+
+        resumo = summarize(estado, now=1100)
+
+        assert resumo["status"] == "processing"
+        assert resumo["remaining"] == 80
+        assert resumo["progress"] == 20.0
+        assert resumo["pages_per_second"] == 3.0
+        assert resumo["documents_per_second"] == 0.2
+        assert resumo["eta_seconds"] == 400.0
+
+    def test_lote_na_fila_e_finalizado(self):
+        """Testa ETA indefinido antes do primeiro documento e taxa congelada no fim"""
+        na_fila = summarize({"total": "5", "started_at": "1000"}, now=1010)
+        assert na_fila["status"] == "queued"
+        assert na_fila["eta_seconds"] is None
+
+        finalizado = summarize({"total": "5", "completed": "5", "pages": "50", "started_at": "1000",
+                                "finished_at": "1010"}, now=5000)
+        assert finalizado["status"] == "finished"
+        assert finalizado["eta_seconds"] == 0.0
+        assert finalizado["pages_per_second"] == 5.0
+
+
+class TestBatchProcessTask:
+    """Testes da divisão do lote em group/chord"""
+
+    @pytest.fixture
+    def registro(self, monkeypatch):
+        chamadas = {}
+
+        class ChordFalso:
+            def __init__(self, header):
+                chamadas["header"] = header
+
+            def __call__(self, body):
+                chamadas["body"] = body
+                return type("Resultado", (), {"id": "final-1"})()
+
+        class ProgressoFalso:
+            def start(self, batch_id, total, chunks, chunk_size):
+                chamadas["start"] = (batch_id, total, chunks, chunk_size)
+
+            def finish(self, batch_id):
+                chamadas["finish"] = batch_id
+
+        monkeypatch.setattr(tasks, "chord", ChordFalso)
+        monkeypatch.setattr(tasks, "batch_progress", ProgressoFalso())
+        return chamadas
+
+    def executar(self, task_id, *args):
+        """Executa a task no processo atual com o ID informado (sem broker/backend)"""
+        tasks.batch_process_task.push_request(id=task_id)
+        try:
+            return tasks.batch_process_task.run(*args)
+        finally:
+            tasks.batch_process_task.pop_request()
+
+    def test_blocos_e_callback(self, registro):
+        """Testa blocos de chunk_size e callback com o ID do lote"""
+        resultado = self.executar("lote-1", list(range(1, 26)), 10)
+
+        blocos = [assinatura.args for assinatura in registro["header"].tasks]
+        assert blocos == [
+            (list(range(1, 11)), "lote-1"),
+            (list(range(11, 21)), "lote-1"),
+            (list(range(21, 26)), "lote-1"),
+        ]
+        assert registro["body"].args == ("lote-1",)
+        assert registro["start"] == ("lote-1", 25, 3, 10)
+        assert resultado["chunks"] == 3
+        assert resultado["finalize_task_id"] == "final-1"
+
+    def test_lote_vazio(self, registro):
+        """Testa lote sem documentos finalizado na hora"""
+        resultado = self.executar("lote-2", [])
+
+        assert resultado["total"] == 0
+        assert registro["finish"] == "lote-2"
+        assert "header" not in registro
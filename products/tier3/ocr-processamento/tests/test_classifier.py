@@ -0,0 +1,97 @@
+"""
+Testes para Classifier e o classificador treinado
+"""
+
+import pytest
+
+from src.config import Config
+from src.services.classifier import Classifier
+from src.services.text_classifier import KeywordAutomaton, TextClassifierModel
+
+
+EXEMPLOS = {
+    "sentenças": "Ante o exposto, julgo procedente o pedido. Sentença publicada e registrada.",
+    "despachos": "Determino a citação do réu. Despacho proferido nesta data, cumpra-se.",
+    "contratos": "O contratante pagará ao contratado conforme a cláusula terceira deste contrato.",
+}
+
+
+def treinar(repeticoes=6):
+    textos, categorias, urgencias = [], [], []
+    for i in range(repeticoes):
+        for categoria, texto in EXEMPLOS.items():
+            textos.append(f"{texto} Documento {i}.")
+            categorias.append(categoria)
+            urgencias.append("urgente" if categoria == "despachos" else "baixa")
+    return TextClassifierModel.train(
+        textos, {"category": categorias, "urgency": urgencias}, Classifier().keywords, epochs=200
+    )
+
+
+class TestKeywordAutomaton:
+    """Testes do autômato de palavras-chave"""
+
+    def test_conta_ocorrencias_sobrepostas(self):
+        """Testa palavras que são prefixo de outras e ocorrências repetidas"""
+        automaton = KeywordAutomaton(["prazo", "prazo de", "requer", "requerente", "até"])
+
+        hits = automaton.count("o requerente requer prazo de 5 dias; prazo até amanhã")
+
+        assert dict(zip(automaton.keywords, hits)) == {
+            "prazo": 2, "prazo de": 1, "requer": 2, "requerente": 1, "até": 1
+        }
+
+
+class TestClassifier:
+    """Testes do Classifier"""
+
+    async def test_modo_palavras_chave(self):
+        """Testa classificação por palavras-chave sem modelo"""
+        classifier = Classifier()
+
+        result = await classifier.classify_text("Julgo procedente. Sentença. Prazo de 15 dias, R$ 100,00")
+
+        assert classifier.model is None
+        assert result["category"] == "sentenças"
+        assert "com_valor" in result["tags"] and "com_prazo" in result["tags"]
+
+    def test_modelo_treinado_salvo_e_carregado(self, tmp_path, monkeypatch):
+        """Testa artefato gravado, carregado pelo Classifier e usado em lote"""
+        path = tmp_path / "classifier.npz"
+        treinar().save(str(path))
+        monkeypatch.setattr(Config, "CLASSIFIER_MODE", "model")
+        monkeypatch.setattr(Config, "CLASSIFIER_MODEL_PATH", str(path))
+
+        classifier = Classifier()
+        results = classifier.classify_batch(list(EXEMPLOS.values()))
+
+        assert classifier.model is not None
+        assert [r["category"] for r in results] == list(EXEMPLOS)
+        assert results[1]["urgency"] == "urgente"
+        assert all(0 < r["category_confidence"] <= 1 for r in results)
+        assert all("tags" in r for r in results)
+
+    def test_modelo_sem_urgencia_usa_palavras_chave(self, monkeypatch):
+        """Testa alvo que o modelo não aprendeu (uma só classe) vindo das palavras-chave"""
+        textos = list(EXEMPLOS.values()) * 3
+        model = TextClassifierModel.train(
+            textos, {"category": list(EXEMPLOS) * 3, "urgency": ["baixa"] * len(textos)}, []
+        )
+        classifier = Classifier()
+        classifier.model = model
+
+        result = classifier.classify_batch(["Julgo procedente. Sentença urgente."])[0]
+
+        assert set(model.heads) == {"category"}
+        assert result["category"] == "sentenças"
+        assert result["urgency"] == "urgente"
+
+    def test_artefato_ausente(self, tmp_path, monkeypatch):
+        """Testa fallback para palavras-chave quando o artefato não existe"""
+        monkeypatch.setattr(Config, "CLASSIFIER_MODE", "model")
+        monkeypatch.setattr(Config, "CLASSIFIER_MODEL_PATH", str(tmp_path / "nao_existe.npz"))
+
+        classifier = Classifier()
+
+        assert classifier.model is None
+        assert classifier.classify_batch(["Contrato com cláusula"])[0]["category"] == "contratos"
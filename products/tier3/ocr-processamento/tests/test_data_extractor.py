@@ -49,3 +49,25 @@ class TestDataExtractor:
         assert processo is not None
         assert "0001234" in processo
 
+    
+    async def test_extract_from_text_uma_passada(self):
+        """Testa todos os campos extraídos da mesma varredura"""
+        extractor = DataExtractor()
+        
+        text = (
+            "Processo 0001234-56.2023.8.26.0100. Requerente: Maria Silva Requerido: Banco Alfa.\n"
+            "CNPJ 12.345.678/0001-90, CPF 123.456.789-00. Valor: R$ 1500,00.\n"
+            "Vencimento em 10/03/2024. São Paulo, 5 de março de 2024."
+        )
+        result = await extractor.extract_from_text(text)
+        
+        assert result["processo"] == "0001234-56.2023.8.26.0100"
+        assert [(p["role"], p["name"]) for p in result["partes"]] == [
+            ("requerente", "Maria Silva"), ("requerido", "Banco Alfa")
+        ]
+        # CPF não é procurado dentro do CNPJ
+        assert result["cnpjs"] == ["12.345.678/0001-90"]
+        assert result["cpfs"] == ["123.456.789-00"]
+        assert [v["value"] for v in result["valores"]] == [1500.0]
+        assert [p["value"] for p in result["prazos"]] == ["10/03/2024"]
+        assert [d["parsed"][:10] for d in result["datas"]] == ["2024-03-10", "2024-03-05"]
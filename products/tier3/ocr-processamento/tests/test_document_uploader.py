@@ -2,14 +2,47 @@
 Testes para Document Uploader
 """
 
+import hashlib
 import pytest
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile
 from io import BytesIO
 from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from src.config import Config
+from src.database import Base
 from src.services.document_uploader import DocumentUploader
 
 
+class LeituraRegistrada(BytesIO):
+    """Arquivo que registra o maior bloco pedido em read()"""
+    
+    maior_leitura = 0
+    
+    def read(self, size=-1):
+        self.maior_leitura = max(self.maior_leitura, size)
+        return super().read(size)
+
+
+@pytest.fixture
+def uploader(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "UPLOAD_CHUNK_SIZE", 64 * 1024)
+    monkeypatch.setattr(Config, "MAX_FILE_SIZE", 1024 * 1024)
+    return DocumentUploader()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
 class TestDocumentUploader:
     """Testes do Document Uploader"""
     
@@ -50,3 +83,41 @@ class TestDocumentUploader:
             )
             assert uploader.validate_file(file) == True
 
+
+class TestStreamingUpload:
+    """Testes do upload em streaming"""
+    
+    async def test_hash_e_gravacao_em_blocos(self, uploader, tmp_path):
+        """Testa leitura em blocos, hash incremental e arquivo final completo"""
+        conteudo = bytes(range(256)) * 3000  # ~750 KB
+        arquivo = LeituraRegistrada(conteudo)
+        
+        dados = await uploader.upload_file(UploadFile(filename="processo.pdf", file=arquivo))
+        
+        assert arquivo.maior_leitura == 64 * 1024
+        assert dados["file_hash"] == hashlib.sha256(conteudo).hexdigest()
+        assert dados["file_size"] == len(conteudo)
+        assert Path(dados["file_path"]).read_bytes() == conteudo
+        assert [p.name for p in tmp_path.iterdir()] == [dados["stored_filename"]]
+    
+    async def test_limite_de_tamanho_durante_leitura(self, uploader, tmp_path):
+        """Testa 413 sem tamanho declarado e nenhum arquivo restante"""
+        arquivo = UploadFile(filename="grande.pdf", file=BytesIO(b"x" * (1024 * 1024 + 1)))
+        
+        with pytest.raises(HTTPException) as erro:
+            await uploader.upload_file(arquivo)
+        
+        assert erro.value.status_code == 413
+        assert list(tmp_path.iterdir()) == []
+    
+    async def test_deduplicacao_pelo_hash(self, uploader, db, tmp_path):
+        """Testa conteúdo repetido: sem segunda cópia no disco"""
+        primeiro = await uploader.upload_file(UploadFile(filename="a.pdf", file=BytesIO(b"conteudo")), db)
+        documento = uploader.create_document(primeiro, db)
+        
+        segundo = await uploader.upload_file(UploadFile(filename="b.pdf", file=BytesIO(b"conteudo")), db)
+        
+        assert segundo["duplicate"] is True
+        assert segundo["document_id"] == documento.id
+        assert uploader.create_document(segundo, db).id == documento.id
+        assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,135 @@
+"""
+Testes para o processamento de PDF em streaming do OCR Engine
+"""
+
+import threading
+
+import pytest
+from PIL import Image
+
+from src.config import Config
+from src.services import ocr_engine as ocr_module
+from src.services.ocr_engine import OCREngine
+
+
+@pytest.fixture
+def pdf_simulado(monkeypatch):
+    """PDF de 7 páginas sem pdftoppm/tesseract: registra blocos rasterizados"""
+    chamadas = []
+    lock = threading.Lock()
+
+    def convert_from_path(pdf_path, dpi=200, first_page=None, last_page=None):
+        with lock:
+            chamadas.append((first_page, last_page))
+        return [Image.new("L", (10, 10), color=p) for p in range(first_page, last_page + 1)]
+
+    def tesseract(image, languages, config=None, digest=None):
+        return {"text": f"pagina {image.getpixel((0, 0))}", "confidence": 0.9,
+                "language": languages[0], "method": "tesseract"}
+
+    monkeypatch.setattr(ocr_module.pdf2image, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(ocr_module.pdf2image, "pdfinfo_from_path", lambda path: {"Pages": 7})
+    monkeypatch.setattr(ocr_module, "_tesseract_ocr", tesseract)
+    monkeypatch.setattr(Config, "OCR_EXECUTOR", "thread")
+    monkeypatch.setattr(Config, "OCR_WORKERS", 3)
+    monkeypatch.setattr(Config, "OCR_PAGE_CHUNK_SIZE", 2)
+    monkeypatch.setattr(Config, "OCR_PAGE_CACHE_DIR", "")
+    ocr_module.shutdown_ocr_executor()
+    yield chamadas
+    ocr_module.shutdown_ocr_executor()
+
+
+async def test_process_pdf_em_blocos(pdf_simulado):
+    """Testa rasterização por blocos e resultado ordenado por página"""
+    engine = OCREngine()
+    engine.use_google_vision = False
+
+    result = await engine.process_pdf("/tmp/autos.pdf")
+
+    assert sorted(pdf_simulado) == [(1, 2), (3, 4), (5, 6), (7, 7)]
+    assert [p["page"] for p in result["pages"]] == list(range(1, 8))
+    assert result["pages"][6]["text"] == "pagina 7"
+    assert result["text"].startswith("pagina 1\n\npagina 2")
+    assert result["method"] == "tesseract"
+
+
+async def test_iter_pdf_pages_entrega_todas(pdf_simulado):
+    """Testa que o modo streaming entrega cada página uma vez"""
+    engine = OCREngine()
+    engine.use_google_vision = False
+
+    paginas = [p["page"] async for p in engine.iter_pdf_pages("/tmp/autos.pdf")]
+    assert sorted(paginas) == list(range(1, 8))
+
+
+async def test_pdf_sem_tesseract_habilitado(pdf_simulado, monkeypatch):
+    """Testa que o PDF não cai no Tesseract quando ENABLE_TESSERACT está desligado"""
+    engine = OCREngine()
+    engine.use_google_vision = False
+    engine.use_tesseract = False
+
+    with pytest.raises(Exception, match="Nenhum método de OCR disponível"):
+        await engine.process_pdf("/tmp/autos.pdf")
+    assert pdf_simulado == []
+
+    # Google Vision abaixo do limiar de confiança também não recorre ao Tesseract
+    monkeypatch.setattr(ocr_module, "_worker_vision_client", object())
+    monkeypatch.setattr(ocr_module, "_google_vision_ocr", lambda client, content: {
+        "text": "?", "confidence": 0.1, "language": "por", "method": "google_vision"})
+    engine.use_google_vision = True
+
+    with pytest.raises(Exception, match="Nenhum método de OCR disponível"):
+        await engine.process_pdf("/tmp/autos.pdf")
+
+
+def _dados_tesseract():
+    """Saída simulada de image_to_data: 2 parágrafos, o primeiro com 2 linhas"""
+    linhas = [
+        # level, block, par, line, text, conf
+        (1, 0, 0, 0, "", "-1"),
+        (5, 1, 1, 1, "Processo", "96"),
+        (5, 1, 1, 1, "nº", "90"),
+        (5, 1, 1, 2, "Autor:", "88"),
+        (4, 1, 1, 2, "", "-1"),
+        (5, 1, 2, 1, "Réu", "94"),
+        (5, 1, 2, 1, " ", "-1"),
+    ]
+    return {
+        "level": [l[0] for l in linhas],
+        "page_num": [1] * len(linhas),
+        "block_num": [l[1] for l in linhas],
+        "par_num": [l[2] for l in linhas],
+        "line_num": [l[3] for l in linhas],
+        "text": [l[4] for l in linhas],
+        "conf": [l[5] for l in linhas],
+    }
+
+
+def test_texto_reconstruido_de_image_to_data():
+    """Testa reconstrução do texto por palavra/linha/parágrafo"""
+    texto = ocr_module._text_from_tesseract_data(_dados_tesseract())
+
+    assert texto == "Processo nº\nAutor:\n\nRéu"
+
+
+def test_tesseract_uma_chamada_e_cache(monkeypatch, tmp_path):
+    """Testa uma única passada do Tesseract e reaproveitamento pelo cache"""
+    chamadas = []
+
+    def image_to_data(image, lang=None, config=None, output_type=None):
+        chamadas.append((lang, config))
+        return _dados_tesseract()
+
+    monkeypatch.setattr(ocr_module.pytesseract, "image_to_data", image_to_data)
+    monkeypatch.setattr(Config, "OCR_PAGE_CACHE_DIR", str(tmp_path))
+    imagem = Image.new("L", (20, 20), color=128)
+
+    primeiro = ocr_module._tesseract_ocr(imagem, ["por", "eng"])
+    segundo = ocr_module._tesseract_ocr(imagem.copy(), ["por", "eng"])
+    outro_idioma = ocr_module._tesseract_ocr(imagem, ["eng"])
+
+    assert len(chamadas) == 2
+    assert chamadas[0][0] == "por+eng"
+    assert segundo == primeiro
+    assert primeiro["confidence"] == pytest.approx(0.92)
+    assert outro_idioma["language"] == "eng"
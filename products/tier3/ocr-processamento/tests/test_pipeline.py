@@ -0,0 +1,151 @@
+"""
+Testes para o pipeline de processamento de documento
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.config import Config
+from src.database import Base
+from src.models.document import (
+    AnalysisResult, Document, DocumentClassification, DocumentIndex, ExtractedData, OCRResult
+)
+from src.services.ai_analyzer import AIAnalyzer
+from src.services.classifier import Classifier
+from src.services.data_extractor import DataExtractor
+from src.services.ocr_engine import OCREngine
+from src.services.pipeline import DocumentPipeline
+from src.services.search_engine import SearchEngine
+
+
+TEXTO = (
+    "PETIÇÃO INICIAL. Processo 0001234-56.2023.8.26.0100. Autor: João da Silva, "
+    "CPF 123.456.789-00. Valor da causa R$ 1.500,00. Prazo de 15 dias."
+)
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória contando os commits"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.commits = 0
+
+    def contar(sess):
+        session.commits += 1
+
+    event.listen(session, "after_commit", contar)
+    session.add(Document(id=1, filename="a.pdf", stored_filename="a.pdf", file_path="/tmp/a.pdf",
+                         file_hash="a", file_size=1, file_type=".pdf"))
+    session.commit()
+    session.commits = 0
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "VECTOR_INDEX_DIR", str(tmp_path / "vector_index"))
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", None)
+
+    ocr_engine = OCREngine()
+    ocr_engine.leituras = 0
+
+    async def process_file(file_path):
+        ocr_engine.leituras += 1
+        return {"text": TEXTO, "confidence": 0.92, "language": "por", "method": "tesseract"}
+
+    monkeypatch.setattr(ocr_engine, "process_file", process_file)
+
+    search_engine = SearchEngine()
+    search_engine.enable_semantic = True
+    return DocumentPipeline(ocr_engine, DataExtractor(), Classifier(), AIAnalyzer(), search_engine)
+
+
+class TestDocumentPipeline:
+    """Testes do DocumentPipeline"""
+
+    async def test_processa_e_grava_em_uma_transacao(self, db, pipeline):
+        """Testa todas as linhas gravadas juntas, status e tempos por etapa"""
+        result = await pipeline.run(1, db)
+
+        # Um commit para "processing" e um para todos os resultados
+        assert db.commits == 2
+        assert result["success"] and result["indexed"]
+        assert result["ocr_confidence"] == 0.92
+
+        document = db.get(Document, 1)
+        assert document.status == "processed"
+        assert document.processed_at is not None
+        assert set(document.processing_times) == {
+            "ocr", "extraction", "classification", "analysis", "indexing", "persist", "total"
+        }
+        assert db.query(OCRResult).count() == 1
+        assert db.query(ExtractedData).count() == result["extracted_fields"] > 0
+        assert db.query(DocumentClassification).one().category == result["category"]
+        assert db.query(AnalysisResult).count() == 1
+        assert db.query(DocumentIndex).one().embedding_model == pipeline.search_engine.embedding_model
+        assert 1 in pipeline.search_engine.vector_index
+
+    async def test_etapas_independentes_em_paralelo(self, db, pipeline, monkeypatch):
+        """Testa análise IA em andamento enquanto extração e classificação rodam"""
+        eventos = []
+
+        async def analyze_text(text):
+            eventos.append("analise:inicio")
+            await asyncio.sleep(0.05)
+            eventos.append("analise:fim")
+            return {"summary": "Resumo", "risk_score": 3.0, "confidence": 0.8}
+
+        original = pipeline.data_extractor.extract_from_text
+
+        async def extract_from_text(text):
+            eventos.append("extracao")
+            return await original(text)
+
+        monkeypatch.setattr(pipeline.ai_analyzer, "analyze_text", analyze_text)
+        monkeypatch.setattr(pipeline.data_extractor, "extract_from_text", extract_from_text)
+
+        result = await pipeline.run(1, db)
+
+        assert eventos == ["analise:inicio", "extracao", "analise:fim"]
+        assert result["risk_score"] == 3.0
+
+    async def test_reaproveita_resultados_existentes(self, db, pipeline):
+        """Testa reprocessamento sem novo OCR e sem duplicar linhas"""
+        await pipeline.run(1, db)
+        await pipeline.run(1, db)
+
+        assert pipeline.ocr_engine.leituras == 1
+        assert db.query(OCRResult).count() == 1
+        assert db.query(DocumentClassification).count() == 1
+        assert db.query(AnalysisResult).count() == 1
+        assert db.query(DocumentIndex).count() == 1
+        assert db.get(Document, 1).processing_times["ocr"] == 0.0
+
+    async def test_falha_nao_grava_resultados_parciais(self, db, pipeline, monkeypatch):
+        """Testa erro em uma etapa: nenhuma linha de resultado é gravada"""
+        async def falha(text):
+            raise RuntimeError("classificador indisponível")
+
+        monkeypatch.setattr(pipeline.classifier, "classify_text", falha)
+
+        with pytest.raises(RuntimeError):
+            await pipeline.run(1, db)
+        db.rollback()
+
+        assert db.query(OCRResult).count() == 0
+        assert db.query(ExtractedData).count() == 0
+        assert db.query(AnalysisResult).count() == 0
+        assert db.get(Document, 1).status == "processing"
+
+    async def test_documento_inexistente(self, db, pipeline):
+        """Testa erro para documento que não existe"""
+        with pytest.raises(ValueError):
+            await pipeline.run(99, db)
@@ -0,0 +1,539 @@
+"""
+Testes para o Search Engine e o índice vetorial
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.config import Config
+from src.database import Base
+from src.models.document import Document, DocumentIndex, OCRResult
+from src.services.embedding_codec import decode_embedding, encode_embedding
+from src.services.embedding_service import EmbeddingCache, EmbeddingService, HashingEmbedder, chunk_text
+from src.services import fulltext, vector_index
+from src.services.search_engine import SearchEngine
+from src.services.vector_index import VectorIndex
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória contando as consultas executadas"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.consultas = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: session.consultas.append(statement))
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def search_engine(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "VECTOR_INDEX_DIR", str(tmp_path / "vector_index"))
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_PATH", "")
+    engine = SearchEngine()
+    engine.enable_semantic = True
+    return engine
+
+
+def _vetor(*valores):
+    return list(valores) + [0.0] * (4 - len(valores))
+
+
+class _GrafoFake:
+    """hnswlib.Index exato em memória, registrando as operações no grafo"""
+
+    criados = 0
+
+    def __init__(self, space, dim):
+        _GrafoFake.criados += 1
+        self.vetores = {}
+        self.removidos = set()
+        self.inseridos = []
+
+    def init_index(self, max_elements, ef_construction, M):
+        self.max_elements = max_elements
+
+    def get_max_elements(self):
+        return self.max_elements
+
+    def resize_index(self, size):
+        self.max_elements = size
+
+    def add_items(self, data, labels):
+        for vetor, label in zip(data, labels):
+            self.vetores[int(label)] = np.asarray(vetor)
+            self.removidos.discard(int(label))
+        self.inseridos.append(len(labels))
+
+    def mark_deleted(self, label):
+        assert label not in self.removidos
+        self.removidos.add(label)
+
+    def set_ef(self, ef):
+        pass
+
+    def knn_query(self, query, k):
+        labels = [label for label in self.vetores if label not in self.removidos]
+        if k > len(labels):
+            raise RuntimeError("Cannot return the results in a contiguous 2D array")
+        labels.sort(key=lambda label: -float(self.vetores[label] @ query))
+        labels = np.array(labels[:k])
+        return labels[None, :], (1.0 - np.array([self.vetores[l] @ query for l in labels]))[None, :]
+
+
+class TestEmbeddingCodec:
+    """Testes da codificação binária de embeddings"""
+
+    @pytest.mark.parametrize("dtype,bytes_por_valor,tolerancia", [
+        ("float32", 4, 0),
+        ("float16", 2, 1e-3),
+        ("int8", 1, 1e-2),
+    ])
+    def test_ida_e_volta(self, dtype, bytes_por_valor, tolerancia):
+        """Testa tamanho e precisão de cada formato"""
+        vetor = np.random.default_rng(1).normal(scale=0.05, size=1536).astype(np.float32)
+
+        data, scale = encode_embedding(vetor, dtype)
+        decodificado = decode_embedding(data, dtype, scale)
+
+        assert len(data) == 1536 * bytes_por_valor
+        assert decodificado.dtype == np.float32
+        assert np.abs(decodificado - vetor).max() <= tolerancia * max(1.0, np.abs(vetor).max())
+
+    def test_float32_sem_copia(self):
+        """Testa leitura float32 direto sobre os bytes"""
+        data, _ = encode_embedding([1.0, 2.0, 3.0])
+
+        decodificado = decode_embedding(data)
+
+        assert not decodificado.flags.owndata
+        assert decodificado.tolist() == [1.0, 2.0, 3.0]
+
+    def test_int8_escala_por_trecho(self):
+        """Testa trecho com valores altos sem derrubar a precisão dos demais"""
+        rng = np.random.default_rng(2)
+        matriz = rng.normal(scale=0.05, size=(3, 256)).astype(np.float32)
+        matriz[0] *= 100
+
+        index = DocumentIndex(document_id=1)
+        index.set_vectors(matriz, dtype="int8")
+        decodificada = index.get_vectors()
+
+        assert len(index.embedding) == 3 * 256 and len(index.embedding_scales) == 3 * 4
+        assert index.embedding_scale is None
+        for linha, original in zip(decodificada, matriz):
+            assert np.abs(linha - original).max() <= np.abs(original).max() / 127
+
+        # Gravação antiga (escala única) continua legível
+        data, scale = encode_embedding(matriz, "int8")
+        antigo = DocumentIndex(embedding=data, embedding_dtype="int8", embedding_dim=256, embedding_scale=scale)
+        assert antigo.get_vectors().shape == (3, 256)
+
+
+class TestVectorIndex:
+    """Testes do índice vetorial"""
+
+    def test_top_k_por_similaridade(self, tmp_path):
+        """Testa ordenação por cosseno com vetores não normalizados"""
+        index = VectorIndex(str(tmp_path))
+        index.add_many([
+            (1, _vetor(1, 0)),
+            (2, _vetor(10, 10)),
+            (3, _vetor(0, 5)),
+            (4, _vetor(0, 0, 1)),
+        ])
+
+        top = index.search(_vetor(1, 0.2), k=2)
+
+        assert [doc_id for doc_id, _ in top] == [1, 2]
+        assert top[0][1] == pytest.approx(1 / np.sqrt(1.04), rel=1e-5)
+
+    def test_atualizacao_incremental_e_outro_processo(self, tmp_path):
+        """Testa crescimento da matriz, atualização e leitura por outra instância"""
+        escritor = VectorIndex(str(tmp_path))
+        leitor = VectorIndex(str(tmp_path))
+        rng = np.random.default_rng(0)
+        vetores = rng.normal(size=(1500, 4)).astype(np.float32)
+
+        escritor.add_many((i, vetores[i]) for i in range(1000))
+        assert len(leitor) == 1000
+
+        escritor.add_many((i, vetores[i]) for i in range(1000, 1500))
+        escritor.add(7, _vetor(0, 0, 0, 1))
+        escritor.remove(8)
+
+        assert len(leitor) == 1499
+        assert 8 not in leitor
+        assert leitor.search(_vetor(0, 0, 0, 1), k=1)[0][0] == 7
+        assert np.load(tmp_path / "vectors.npy", mmap_mode="r").shape == (2048, 4)
+
+    def test_documento_com_varios_trechos(self, tmp_path):
+        """Testa documento valendo pelo melhor trecho e k documentos distintos"""
+        index = VectorIndex(str(tmp_path))
+        index.add_many([
+            (1, [_vetor(1, 0), _vetor(0.9, 0.1), _vetor(0.8, 0.2)]),
+            (2, [_vetor(0, 1), _vetor(0.7, 0.3)]),
+            (3, _vetor(0, 0, 1)),
+        ])
+
+        top = index.search(_vetor(1, 0), k=2)
+
+        assert [doc_id for doc_id, _ in top] == [1, 2]
+        assert top[0][1] == pytest.approx(1.0)
+
+        # Reindexar com menos trechos libera as linhas antigas
+        index.add(1, [_vetor(0, 0, 1)])
+        assert index.search(_vetor(1, 0), k=1)[0][0] == 2
+        assert len(index) == 3
+
+    def test_hnsw_incremental_entre_recargas(self, tmp_path, monkeypatch):
+        """Testa que add, substituição e remoção não reconstroem o grafo HNSW"""
+        monkeypatch.setattr(vector_index, "HNSWLIB_AVAILABLE", True)
+        monkeypatch.setattr(vector_index, "hnswlib", type("hnswlib", (), {"Index": _GrafoFake}), raising=False)
+        monkeypatch.setattr(Config, "VECTOR_INDEX_HNSW_MIN_DOCS", 1)
+        _GrafoFake.criados = 0
+        rng = np.random.default_rng(1)
+        escritor = VectorIndex(str(tmp_path), mode="hnsw")
+        leitor = VectorIndex(str(tmp_path), mode="hnsw")
+        escritor.add_many((i, rng.normal(size=4)) for i in range(100))
+
+        assert len(leitor.search(_vetor(1), k=3)) == 3
+        grafo = leitor._hnsw
+        assert grafo.inseridos == [100]
+
+        escritor.add(200, _vetor(0, 0, 0, 1))
+        escritor.add(5, _vetor(0, 0, 1))
+        escritor.remove(8)
+
+        assert leitor.search(_vetor(0, 0, 0, 1), k=1)[0][0] == 200
+        assert leitor.search(_vetor(0, 0, 1), k=1)[0][0] == 5
+        assert 8 not in [doc_id for doc_id, _ in leitor.search(_vetor(1), k=99)]
+        assert leitor._hnsw is grafo and _GrafoFake.criados == 1
+        assert grafo.inseridos == [100, 2]
+        assert grafo.removidos == {5, 8}
+
+    def test_hnsw_amplia_ate_k_documentos(self, tmp_path, monkeypatch):
+        """Testa nova busca no grafo quando um documento ocupa o topo e k acima do total"""
+        monkeypatch.setattr(vector_index, "HNSWLIB_AVAILABLE", True)
+        monkeypatch.setattr(vector_index, "hnswlib", type("hnswlib", (), {"Index": _GrafoFake}), raising=False)
+        monkeypatch.setattr(Config, "VECTOR_INDEX_HNSW_MIN_DOCS", 1)
+        index = VectorIndex(str(tmp_path), mode="hnsw")
+        index.add(1, [_vetor(1, 0.01 * i) for i in range(20)])
+        index.add_many([(2, _vetor(0.5, 1)), (3, _vetor(0, 1))])
+
+        assert [doc_id for doc_id, _ in index.search(_vetor(1), k=2)] == [1, 2]
+        assert [doc_id for doc_id, _ in index.search(_vetor(1), k=10)] == [1, 2, 3]
+
+    def test_compactacao_das_linhas_vagas(self, tmp_path, monkeypatch):
+        """Testa que substituições não fazem os arquivos crescerem sem limite"""
+        monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 8)
+        escritor = VectorIndex(str(tmp_path))
+        leitor = VectorIndex(str(tmp_path))
+        escritor.add_many((i, [_vetor(1, i), _vetor(i, 1)]) for i in range(4))
+        assert len(leitor.search(_vetor(1), k=4)) == 4
+
+        for rodada in range(50):
+            escritor.add(rodada % 4, [_vetor(0, 0, 1, rodada), _vetor(0, 0, rodada, 1)])
+        escritor.remove(3)
+
+        assert len(escritor._ids) <= 2 * 3 * 2
+        assert escritor._vectors.shape[0] <= 16
+        assert np.count_nonzero(escritor._ids == vector_index.EMPTY_ID) < len(escritor._ids) / 2
+        for resultado in (escritor, leitor):
+            assert sorted(doc_id for doc_id, _ in resultado.search(_vetor(0, 0, 1), k=10)) == [0, 1, 2]
+        assert leitor.search(_vetor(0, 0, 1, 49), k=1)[0] == (1, pytest.approx(1.0))
+
+    def test_dimensao_diferente(self, tmp_path):
+        """Testa rejeição de embedding com dimensão diferente"""
+        index = VectorIndex(str(tmp_path))
+        index.add(1, _vetor(1))
+
+        with pytest.raises(ValueError):
+            index.add(2, [1.0, 0.0])
+
+
+class TestEmbeddingService:
+    """Testes do serviço de embeddings"""
+
+    def test_trechos_com_sobreposicao(self):
+        """Testa cobertura do texto inteiro, tamanho máximo e sobreposição"""
+        texto = " ".join(f"palavra{i}" for i in range(1000))
+
+        trechos = chunk_text(texto, chunk_size=200, overlap=40)
+
+        assert all(len(t) <= 200 for t in trechos)
+        assert trechos[0].startswith("palavra0 ")
+        assert trechos[-1].endswith("palavra999")
+        assert trechos[1].split()[0] in trechos[0]
+        assert chunk_text("curto", chunk_size=200) == ["curto"]
+        assert chunk_text("   ") == []
+
+    def test_modelo_local_deterministico(self):
+        """Testa embedding local estável e sensível ao conteúdo"""
+        embedder = HashingEmbedder(dimension=256)
+
+        a, b, c = embedder.embed(["Contrato de locação", "contrato de locacao", "Sentença criminal"])
+
+        assert a.shape == (256,)
+        assert np.linalg.norm(a) == pytest.approx(1.0)
+        assert np.allclose(a, b)
+        assert float(a @ c) < 0.5
+
+    async def test_cache_e_deduplicacao(self, tmp_path, monkeypatch):
+        """Testa trechos repetidos e em cache sem nova geração"""
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", None)
+        monkeypatch.setattr(Config, "EMBEDDING_CACHE_PATH", str(tmp_path / "cache.db"))
+        service = EmbeddingService()
+
+        primeiro = await service.embed_texts(["alfa", "beta", "alfa"])
+        assert service.stats["embedded"] == 2
+        assert np.allclose(primeiro[0], primeiro[2])
+
+        # Outra instância (outro processo) lê o mesmo cache
+        outro = EmbeddingService()
+        segundo = await outro.embed_texts(["beta", "gama"])
+        assert outro.stats == {"requests": 0, "embedded": 1, "cache_hits": 1}
+        assert np.allclose(segundo[0], primeiro[1])
+        assert EmbeddingCache(str(tmp_path / "cache.db")).get_many(["inexistente"]) == {}
+
+    async def test_documento_em_trechos(self, monkeypatch):
+        """Testa matriz de trechos limitada por EMBEDDING_MAX_CHUNKS"""
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", None)
+        monkeypatch.setattr(Config, "EMBEDDING_CACHE_PATH", "")
+        monkeypatch.setattr(Config, "EMBEDDING_CHUNK_SIZE", 100)
+        monkeypatch.setattr(Config, "EMBEDDING_MAX_CHUNKS", 3)
+        service = EmbeddingService()
+
+        vetores = await service.embed_document("texto " * 200)
+
+        assert vetores.shape == (3, service.local.dimension)
+        assert (await service.embed_document("")).shape[0] == 0
+
+
+class TestSemanticSearch:
+    """Testes da busca semântica"""
+
+    async def test_busca_e_hidratacao_em_lote(self, db, search_engine, monkeypatch):
+        """Testa top-k pelo índice e documentos/snippets em uma consulta"""
+        embeddings = {
+            "contrato de locação": _vetor(1, 0),
+            "sentença criminal": _vetor(0, 1),
+            "petição trabalhista": _vetor(0, 0, 1),
+        }
+        for i, texto in enumerate(embeddings, start=1):
+            db.add(Document(id=i, filename=f"doc{i}.pdf", stored_filename=f"{i}.pdf",
+                            file_path=f"/tmp/{i}.pdf", file_hash=str(i), file_size=1, file_type=".pdf"))
+            db.add(OCRResult(document_id=i, text=f"Texto do documento: {texto}", confidence=0.9))
+        db.commit()
+
+        async def fake_embed_texts(textos):
+            resultado = []
+            for texto in textos:
+                vetor = next((v for chave, v in embeddings.items() if chave in texto), _vetor(0.9, 0.1))
+                resultado.append(np.asarray(vetor, dtype=np.float32))
+            return resultado
+
+        monkeypatch.setattr(search_engine.embedding_service, "embed_texts", fake_embed_texts)
+        for i in range(1, 4):
+            await search_engine.index_document(i, db)
+        # Primeira busca confere o índice com o banco; a próxima, dentro do intervalo, não
+        await search_engine.semantic_search("locação", limit=2, db=db)
+
+        db.consultas.clear()
+        results = await search_engine.semantic_search("locação", limit=2, db=db)
+
+        assert [r["document_id"] for r in results] == [1, 2]
+        assert "locação" in results[0]["snippet"]
+        assert results[0]["relevance"] == "high"
+        assert len(db.consultas) == 1
+
+    async def test_reconstroi_indice_do_banco(self, db, search_engine, monkeypatch):
+        """Testa reconstrução do índice a partir dos DocumentIndex existentes"""
+        db.add(Document(id=1, filename="a.pdf", stored_filename="a.pdf", file_path="/tmp/a.pdf",
+                        file_hash="a", file_size=1, file_type=".pdf"))
+        index = DocumentIndex(document_id=1)
+        index.set_vectors([_vetor(1, 1)], model=search_engine.embedding_model, dtype="int8")
+        db.add(index)
+        db.commit()
+
+        async def fake_embedding(texto):
+            return _vetor(1, 1)
+
+        monkeypatch.setattr(search_engine, "_get_embedding", fake_embedding)
+        results = await search_engine.semantic_search("qualquer", db=db)
+
+        assert [r["document_id"] for r in results] == [1]
+        assert results[0]["score"] == pytest.approx(1.0)
+        assert results[0]["snippet"] == "Documento a.pdf"
+
+
+    async def test_incorpora_documentos_de_outro_processo(self, db, search_engine, monkeypatch, tmp_path):
+        """Testa documento indexado por um worker com outro diretório de índice"""
+        monkeypatch.setattr(Config, "VECTOR_INDEX_SYNC_SECONDS", 0)
+        for i in (1, 2):
+            db.add(Document(id=i, filename=f"doc{i}.pdf", stored_filename=f"{i}.pdf", file_path=f"/tmp/{i}.pdf",
+                            file_hash=str(i), file_size=1, file_type=".pdf"))
+        index = DocumentIndex(document_id=1)
+        index.set_vectors([_vetor(1, 0)], model=search_engine.embedding_model)
+        db.add(index)
+        db.commit()
+
+        async def fake_embedding(texto):
+            return _vetor(0, 1)
+
+        monkeypatch.setattr(search_engine, "_get_embedding", fake_embedding)
+        assert [r["document_id"] for r in await search_engine.semantic_search("x", db=db)] == [1]
+
+        # Worker: grava no banco e no próprio índice, não no da API
+        monkeypatch.setattr(Config, "VECTOR_INDEX_DIR", str(tmp_path / "worker"))
+        worker = SearchEngine()
+        worker.enable_semantic = True
+        index = DocumentIndex(document_id=2)
+        index.set_vectors([_vetor(0, 1)], model=worker.embedding_model)
+        db.add(index)
+        db.commit()
+        worker.ensure_in_vector_index(index)
+        adicionados = []
+        add_many = search_engine.vector_index.add_many
+
+        def registrar(itens):
+            itens = list(itens)
+            adicionados.extend(doc_id for doc_id, _ in itens)
+            add_many(itens)
+
+        monkeypatch.setattr(search_engine.vector_index, "add_many", registrar)
+
+        results = await search_engine.semantic_search("x", db=db)
+
+        assert [r["document_id"] for r in results] == [2, 1]
+        assert adicionados == [2]
+
+
+class TestKeywordSearch:
+    """Testes da busca por palavras-chave (FTS5 no SQLite)"""
+
+    def _popular(self, db):
+        textos = {
+            1: "Contrato de locação residencial. " + "Cláusula genérica. " * 2000 + "Multa por rescisão antecipada.",
+            2: "Sentença criminal: o réu foi absolvido por falta de provas.",
+            3: "Petição inicial de ação de despejo por falta de pagamento da locação.",
+            4: "Certidão de intimação sem relação com a busca.",
+        }
+        for doc_id, texto in textos.items():
+            db.add(Document(id=doc_id, filename=f"doc{doc_id}.pdf", stored_filename=f"{doc_id}.pdf",
+                            file_path=f"/tmp/{doc_id}.pdf", file_hash=str(doc_id), file_size=1, file_type=".pdf"))
+            db.add(OCRResult(document_id=doc_id, text=texto, confidence=0.9))
+        db.commit()
+
+    async def test_ranking_e_formato(self, db, search_engine):
+        """Testa ordenação por palavras encontradas e campos do resultado"""
+        self._popular(db)
+        db.consultas.clear()
+
+        results = await search_engine.keyword_search("locação, falta de pagamento!", limit=5, db=db)
+
+        assert results[0]["document_id"] == 3
+        assert results[0]["score"] == 1.0
+        assert results[0]["relevance"] == "high"
+        assert results[0]["matched_keywords"] == ["locação", "falta", "de", "pagamento"]
+        assert "pagamento" in results[0]["snippet"]
+        assert results[0]["snippet"].startswith("...")
+        assert set(results[0]) == {"document_id", "filename", "score", "relevance", "snippet",
+                                   "matched_keywords", "status"}
+        assert {r["document_id"] for r in results} == {1, 2, 3, 4}
+        assert results[-1]["matched_keywords"] == ["de"]
+        assert len(db.consultas) == 2
+
+    async def test_prefixo_sem_acento_e_snippet_curto(self, db, search_engine):
+        """Testa casamento por prefixo/sem acento e snippet limitado em texto longo"""
+        self._popular(db)
+
+        results = await search_engine.keyword_search("rescis", db=db)
+
+        assert [r["document_id"] for r in results] == [1]
+        assert "rescisão" in results[0]["snippet"]
+        assert len(results[0]["snippet"]) < 300
+
+    async def test_atualizacao_reflete_no_indice(self, db, search_engine):
+        """Testa sincronização do índice por triggers"""
+        self._popular(db)
+        ocr = db.query(OCRResult).filter(OCRResult.document_id == 4).first()
+        ocr.text = "Agravo de instrumento"
+        db.commit()
+
+        assert await search_engine.keyword_search("certidão", db=db) == []
+        assert [r["document_id"] for r in await search_engine.keyword_search("agravo", db=db)] == [4]
+
+    async def test_numero_cnj_como_frase(self, db, search_engine):
+        """Testa número CNJ casando só em sequência, não por partes soltas como o ano"""
+        textos = {
+            1: "Processo 0001234-56.2023.8.26.0100 distribuído à 2ª Vara Cível.",
+            2: "Relatório anual de 2023: 56 processos, 8 varas, 26 comarcas.",
+            3: "Processo 0009999-56.2023.8.26.0100 em fase de execução.",
+        }
+        for doc_id, texto in textos.items():
+            db.add(Document(id=doc_id, filename=f"doc{doc_id}.pdf", stored_filename=f"{doc_id}.pdf",
+                            file_path=f"/tmp/{doc_id}.pdf", file_hash=str(doc_id), file_size=1, file_type=".pdf"))
+            db.add(OCRResult(document_id=doc_id, text=texto, confidence=0.9))
+        db.commit()
+
+        assert fulltext.tokenize_query("Processo nº 0001234-56.2023.8.26.0100!") == [
+            "processo", "nº", "0001234-56.2023.8.26.0100"]
+
+        results = await search_engine.keyword_search("0001234-56.2023.8.26.0100", db=db)
+
+        assert [r["document_id"] for r in results] == [1]
+        assert results[0]["matched_keywords"] == ["0001234-56.2023.8.26.0100"]
+
+
+class TestHybridSearch:
+    """Testes da busca híbrida"""
+
+    async def test_fusao_favorece_numero_de_processo(self, db, search_engine, monkeypatch):
+        """Testa RRF: item exato (CNJ) sobe mesmo fora do topo semântico"""
+        textos = {
+            1: "Processo 0001234-56.2023.8.26.0100: execução fiscal",
+            2: "Execução fiscal de tributos municipais",
+            3: "Embargos à execução fiscal",
+        }
+        embeddings = {1: _vetor(0, 1), 2: _vetor(1, 0), 3: _vetor(1, 0.1)}
+        for doc_id, texto in textos.items():
+            db.add(Document(id=doc_id, filename=f"doc{doc_id}.pdf", stored_filename=f"{doc_id}.pdf",
+                            file_path=f"/tmp/{doc_id}.pdf", file_hash=str(doc_id), file_size=1, file_type=".pdf"))
+            db.add(OCRResult(document_id=doc_id, text=texto, confidence=0.9))
+        db.commit()
+        search_engine.vector_index.add_many(embeddings.items())
+
+        async def fake_embedding(texto):
+            return _vetor(1, 0)
+
+        monkeypatch.setattr(search_engine, "_get_embedding", fake_embedding)
+        monkeypatch.setattr(Config, "SEARCH_MODE", "hybrid")
+
+        results = await search_engine.search("processo 0001234-56.2023.8.26.0100", limit=3, db=db)
+
+        assert results[0]["document_id"] == 1
+        assert results[0]["matched_keywords"]
+        assert 0 < results[-1]["score"] < results[0]["score"] <= 1.0
+
+    async def test_sem_embedding_usa_texto_completo(self, db, search_engine, monkeypatch):
+        """Testa falha do embedding: resultado só da busca de texto completo"""
+        db.add(Document(id=1, filename="a.pdf", stored_filename="a.pdf", file_path="/tmp/a.pdf",
+                        file_hash="a", file_size=1, file_type=".pdf"))
+        db.add(OCRResult(document_id=1, text="Mandado de segurança", confidence=0.9))
+        db.commit()
+
+        async def falha(texto):
+            raise Exception("Erro ao gerar embedding: timeout")
+
+        monkeypatch.setattr(search_engine, "_get_embedding", falha)
+
+        results = await search_engine.hybrid_search("mandado", db=db)
+
+        assert [r["document_id"] for r in results] == [1]
+        assert results[0]["score"] == 1.0
@@ -0,0 +1,115 @@
+"""
+Benchmark da recuperação: densa (somente ChromaDB) x híbrida (BM25 + densa, RRF)
+Mede recall@k e latência (p50/p95) sobre a coleção configurada
+
+Uso:
+    python benchmark_retrieval.py                      # consultas geradas da coleção
+    python benchmark_retrieval.py --queries q.jsonl    # {"query": ..., "relevant_ids": [...]}
+    python benchmark_retrieval.py --k 5 --samples 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services.query_processor import QueryProcessor
+from src.services.retriever import Retriever
+from src.services.hybrid_search import CNJ_PATTERN
+
+
+def gerar_consultas(retriever: Retriever, samples: int, seed: int = 42):
+    """
+    Consultas de item conhecido a partir da própria coleção
+
+    Para cada documento sorteado: o número CNJ citado nele ou, se não houver,
+    um trecho curto de uma frase (mistura de casamento exato e paráfrase curta).
+    """
+    rng = random.Random(seed)
+    total = retriever.collection.count()
+    offsets = sorted(rng.sample(range(total), min(samples, total)))
+    consultas = []
+    for offset in offsets:
+        page = retriever.collection.get(limit=1, offset=offset, include=["documents"])
+        if not page["ids"] or not page["documents"][0]:
+            continue
+        doc_id, texto = page["ids"][0], page["documents"][0]
+        cnj = CNJ_PATTERN.search(texto)
+        if cnj:
+            consulta = f"processo {cnj.group(0)}"
+        else:
+            frases = [f for f in re.split(r"[.!?\n]", texto) if len(f.split()) >= 6]
+            if not frases:
+                continue
+            palavras = rng.choice(frases).split()
+            inicio = rng.randrange(0, max(1, len(palavras) - 8))
+            consulta = " ".join(palavras[inicio:inicio + 8])
+        consultas.append({"query": consulta, "relevant_ids": [doc_id]})
+    return consultas
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+
+async def avaliar(retriever, processor, consultas, mode, k):
+    acertos = 0
+    latencias = []
+    for item in consultas:
+        processed = processor.process_query(item["query"])
+        inicio = time.perf_counter()
+        documentos = await retriever.retrieve(item["query"], processed, n_results=k, mode=mode)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        encontrados = {d["id"] for d in documentos}
+        relevantes = set(item["relevant_ids"])
+        acertos += len(encontrados & relevantes) / len(relevantes)
+    return {
+        "recall": acertos / len(consultas),
+        "p50_ms": percentil(latencias, 50),
+        "p95_ms": percentil(latencias, 95),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", help="Arquivo JSONL com query e relevant_ids")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=100)
+    args = parser.parse_args()
+
+    retriever = Retriever()
+    processor = QueryProcessor()
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            consultas = [json.loads(linha) for linha in f if linha.strip()]
+    else:
+        consultas = gerar_consultas(retriever, args.samples)
+
+    if not consultas:
+        print("❌ Nenhuma consulta para avaliar")
+        return 1
+
+    # Aquecer: constrói o índice BM25 fora da medição
+    await retriever.retrieve(consultas[0]["query"], processor.process_query(consultas[0]["query"]), mode="hybrid")
+
+    print(f"Consultas: {len(consultas)} | k={args.k} | documentos: {retriever.collection.count()}")
+    print(f"{'modo':<8} {'recall@k':>9} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for mode in ("dense", "hybrid"):
+        r = await avaliar(retriever, processor, consultas, mode, args.k)
+        print(f"{mode:<8} {r['recall']:>9.3f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,60 @@
+"""
+Ingestão em lote de documentos na coleção do ChromaDB
+Lê JSON (array) ou JSONL em streaming, quebra em trechos de CHUNK_SIZE com
+CHUNK_OVERLAP, descarta trechos já indexados e grava em lotes; interrompida,
+a carga retoma do checkpoint (INGEST_CHECKPOINT_DIR) na próxima execução
+
+Cada registro: {"id": ..., "content": ..., "metadata": {...}}
+(também aceita document_id, text/page_content e metadados no primeiro nível)
+
+Uso:
+    python ingest_corpus.py corpus.jsonl
+    python ingest_corpus.py corpus.json --restart           # ignora o checkpoint
+    python ingest_corpus.py corpus.jsonl --chunk-size 800 --upsert-batch 2000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services.bulk_ingestor import BulkIngestor
+from src.services.retriever import Retriever
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Arquivos .json ou .jsonl")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e relê desde o início")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--chunk-overlap", type=int, default=None)
+    parser.add_argument("--embed-batch", type=int, default=None)
+    parser.add_argument("--upsert-batch", type=int, default=None)
+    args = parser.parse_args()
+
+    retriever = Retriever()
+    failed = False
+    for path in args.files:
+        ingestor = BulkIngestor(
+            retriever.collection,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            embed_batch_size=args.embed_batch,
+            upsert_batch_size=args.upsert_batch
+        )
+        stats = ingestor.ingest(path, restart=args.restart)
+        print(
+            f"{path}: {stats['documents']} documentos em {stats['elapsed_seconds']:.1f}s "
+            f"({stats['docs_per_second']:.1f} docs/s, {stats['chunks_per_second']:.1f} trechos/s) | "
+            f"trechos gravados: {stats['chunks_added']} | duplicados: {stats['duplicates']} | "
+            f"inválidos: {stats['invalid']} | status: {stats['status']}"
+        )
+        failed = failed or stats["status"] != "completed"
+
+    print(f"Documentos na coleção: {retriever.collection.count()}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
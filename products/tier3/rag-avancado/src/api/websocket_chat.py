@@ -3,16 +3,22 @@ WebSocket para chat em tempo real
 """
 
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import json
+import time
 
+from src.config import Config
+from src.database import SessionLocal
+from src.models.query import QueryHistory, Citation
 from src.services import (
     QueryProcessor,
     Retriever,
     ContextBuilder,
-    AnswerGenerator
+    AnswerGenerator,
+    CitationManager
 )
+from src.services.citation_manager import CitationStream
 
 
 class ConnectionManager:
@@ -71,6 +77,116 @@ query_processor = QueryProcessor()
 retriever = Retriever()
 context_builder = ContextBuilder()
 answer_generator = AnswerGenerator()
+citation_manager = CitationManager()
+
+
+async def stream_answer(
+    session_id: str,
+    context: Dict,
+    documents: List[Dict],
+    start_time: float
+) -> Tuple[Dict, List[Dict], Optional[int]]:
+    """
+    Gera a resposta em streaming, enviando cada trecho ao cliente
+    
+    Mensagens enviadas:
+    - {"type": "answer_chunk", "content": trecho} a cada pedaço de texto
+    - {"type": "citation", "citation": {...}} quando um [Doc N] aparece
+      pela primeira vez
+    
+    Args:
+        session_id: ID da sessão
+        context: Contexto construído pelo Context Builder
+        documents: Documentos do contexto (na ordem dos [Doc N])
+        start_time: Início do processamento da mensagem (time.perf_counter)
+        
+    Returns:
+        (resultado da geração, citações, tempo até o primeiro token em ms)
+    """
+    citation_stream = CitationStream()
+    citations = []
+    first_token_ms = None
+    answer_result = {}
+    
+    async for event in answer_generator.stream_answer(context):
+        if event["type"] != "delta":
+            answer_result = {key: value for key, value in event.items() if key != "type"}
+            continue
+        
+        if first_token_ms is None:
+            first_token_ms = int((time.perf_counter() - start_time) * 1000)
+        
+        await manager.send_message({
+            "type": "answer_chunk",
+            "content": event["content"]
+        }, session_id)
+        
+        for doc_num in citation_stream.feed(event["content"]):
+            citation = await citation_manager.resolve_citation(doc_num, documents)
+            if citation:
+                citations.append(citation)
+                await manager.send_message({
+                    "type": "citation",
+                    "citation": citation
+                }, session_id)
+    
+    return answer_result, citations, first_token_ms
+
+
+def save_query_history(
+    session_id: str,
+    message: str,
+    processed_query: Dict,
+    documents: List[Dict],
+    answer_result: Dict,
+    citations: List[Dict],
+    processing_time_ms: int,
+    first_token_ms: Optional[int]
+) -> Optional[int]:
+    """Salva a consulta do chat e suas citações; retorna o ID da query"""
+    if not Config.ENABLE_HISTORY:
+        return None
+    
+    db = SessionLocal()
+    try:
+        query_history = QueryHistory(
+            session_id=session_id,
+            query_text=message,
+            query_type=processed_query.get("query_type"),
+            results_count=len(documents),
+            top_similarity_score=documents[0].get("similarity_score") if documents else 0,
+            answer_text=answer_result.get("answer"),
+            answer_confidence=answer_result.get("confidence"),
+            processing_time_ms=processing_time_ms,
+            time_to_first_token_ms=first_token_ms,
+            tokens_used=answer_result.get("tokens_used")
+        )
+        db.add(query_history)
+        db.flush()
+        
+        for citation in citations:
+            citation["query_id"] = query_history.id
+            db.add(Citation(
+                query_id=query_history.id,
+                document_id=citation["document_id"],
+                document_type=citation["metadata"].get("tipo"),
+                text_excerpt=citation["excerpt"],
+                relevance_score=citation["relevance_score"],
+                metadata_json=citation["metadata"],
+                citation_abnt=citation["citation_abnt"],
+                citation_url=citation.get("url")
+            ))
+        
+        db.commit()
+        return query_history.id
+    
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Erro ao salvar histórico do chat: {e}")
+        return None
+    
+    finally:
+        db.close()
 
 
 async def handle_chat_message(
@@ -87,6 +203,8 @@ async def handle_chat_message(
     Returns:
         Dict com resposta
     """
+    start_time = time.perf_counter()
+    
     try:
         # Obter histórico
         history = manager.get_history(session_id)
@@ -138,8 +256,26 @@ async def handle_chat_message(
             history
         )
         
-        # 4. Gerar resposta
-        answer_result = await answer_generator.generate_answer(context)
+        # [Doc N] segue a ordem dos documentos selecionados para o prompt
+        context_documents = context.get("documents", documents)
+        
+        # 4. Gerar resposta (trechos e citações enviados à medida que chegam)
+        if Config.ENABLE_STREAMING:
+            answer_result, citations, first_token_ms = await stream_answer(
+                session_id,
+                context,
+                context_documents,
+                start_time
+            )
+        else:
+            answer_result = await answer_generator.generate_answer(context)
+            citations = await citation_manager.process_citations(
+                answer_result.get("answer", ""),
+                context_documents
+            )
+            first_token_ms = None
+        
+        processing_time = int((time.perf_counter() - start_time) * 1000)
         
         # Adicionar ao histórico
         manager.add_to_history(
@@ -148,15 +284,30 @@ async def handle_chat_message(
             answer_result.get("answer", "")
         )
         
+        query_id = save_query_history(
+            session_id,
+            message,
+            processed_query,
+            documents,
+            answer_result,
+            citations,
+            processing_time,
+            first_token_ms
+        )
+        
         # Preparar resposta
         response = {
             "type": "answer",
+            "query_id": query_id,
             "query": message,
             "answer": answer_result.get("answer"),
             "confidence": answer_result.get("confidence"),
+            "citations": citations,
             "documents_found": len(documents),
             "query_type": processed_query.get("query_type"),
             "entities": processed_query.get("entities", {}),
+            "processing_time_ms": processing_time,
+            "time_to_first_token_ms": first_token_ms,
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -9,7 +9,9 @@ from pydantic import BaseModel
 from typing import List, Optional
 import uvicorn
 import time
+import uuid
 from datetime import datetime
+from pathlib import Path
 
 from src.config import Config
 from src.database import get_db, init_db, SessionLocal
@@ -22,6 +24,8 @@ from src.services import (
     CitationManager,
     FeedbackCollector
 )
+from src.services.answer_cache import AnswerCache
+from src.services.bulk_ingestor import BulkIngestor
 from sqlalchemy.orm import Session
 
 # Setup
@@ -47,6 +51,10 @@ context_builder = ContextBuilder()
 answer_generator = AnswerGenerator()
 citation_manager = CitationManager()
 feedback_collector = FeedbackCollector()
+answer_cache = AnswerCache()
+
+# Ingestões em lote iniciadas por /api/rag/ingest (job_id -> BulkIngestor)
+ingest_jobs = {}
 
 
 # Initialize database on startup
@@ -76,6 +84,11 @@ class IndexDocumentRequest(BaseModel):
     metadata: dict
 
 
+class IngestRequest(BaseModel):
+    path: str  # Relativo a INGEST_DATA_DIR (.json ou .jsonl)
+    restart: bool = False
+
+
 # Endpoints
 
 @app.get("/")
@@ -91,6 +104,7 @@ async def root():
             "citations": "/api/rag/citations/{query_id}",
             "feedback": "/api/rag/feedback/{query_id}",
             "index": "/api/rag/index",
+            "ingest": "/api/rag/ingest",
             "stats": "/api/rag/stats"
         }
     }
@@ -106,6 +120,52 @@ async def health():
     }
 
 
+def save_query_history(
+    db: Session,
+    request: QueryRequest,
+    processed_query: dict,
+    metadata: dict,
+    answer: dict,
+    citations: List[dict]
+) -> QueryHistory:
+    """Salva a consulta e suas citações (citation["query_id"] recebe o ID)"""
+    query_history = QueryHistory(
+        user_id=request.session_id,
+        session_id=request.session_id or "anonymous",
+        query_text=request.query,
+        query_type=processed_query.get("query_type"),
+        results_count=metadata.get("documents_found"),
+        top_similarity_score=metadata.get("top_similarity_score"),
+        answer_text=answer.get("answer"),
+        answer_confidence=answer.get("confidence"),
+        processing_time_ms=metadata.get("processing_time_ms"),
+        tokens_used=metadata.get("tokens_used")
+    )
+    
+    db.add(query_history)
+    db.commit()
+    db.refresh(query_history)
+    
+    # Salvar citações
+    for citation in citations:
+        citation["query_id"] = query_history.id
+        citation_obj = Citation(
+            query_id=query_history.id,
+            document_id=citation["document_id"],
+            document_type=citation["metadata"].get("tipo"),
+            text_excerpt=citation["excerpt"],
+            relevance_score=citation["relevance_score"],
+            metadata_json=citation["metadata"],
+            citation_abnt=citation["citation_abnt"],
+            citation_url=citation.get("url")
+        )
+        db.add(citation_obj)
+    
+    db.commit()
+    
+    return query_history
+
+
 @app.post("/api/rag/query")
 async def query_rag(
     request: QueryRequest,
@@ -117,11 +177,12 @@ async def query_rag(
     
     Processo:
     1. Processar query
-    2. Buscar documentos
-    3. Construir contexto
-    4. Gerar resposta
-    5. Processar citações
-    6. Salvar histórico
+    2. Consultar cache semântico de respostas
+    3. Buscar documentos
+    4. Construir contexto
+    5. Gerar resposta
+    6. Processar citações
+    7. Salvar histórico (e a resposta no cache)
     """
     start_time = time.time()
     
@@ -132,7 +193,48 @@ async def query_rag(
             request.context
         )
         
-        # 2. Buscar documentos relevantes
+        # 2. Cache semântico: sem histórico de conversa, a resposta depende
+        # só da pergunta, das entidades e dos documentos da coleção
+        query_embedding = None
+        collection_version = None
+        use_cache = Config.ANSWER_CACHE_ENABLED and not (request.context or {}).get("conversation_history")
+        
+        if use_cache:
+            query_embedding = await answer_generator.embed_query(processed_query["processed_query"])
+            collection_version = retriever.collection_version()
+            
+            if query_embedding is not None and collection_version is not None:
+                cached = answer_cache.lookup(
+                    db,
+                    query_embedding,
+                    processed_query.get("entities"),
+                    collection_version,
+                    retriever.fetch_documents
+                )
+                
+                if cached:
+                    metadata = {
+                        **cached["metadata"],
+                        "processing_time_ms": int((time.time() - start_time) * 1000),
+                        "tokens_used": 0
+                    }
+                    citations = [dict(citation) for citation in cached["citations"]]
+                    query_history = save_query_history(
+                        db, request, processed_query, metadata, cached, citations
+                    )
+                    
+                    return {
+                        "success": True,
+                        "query_id": query_history.id,
+                        "query": request.query,
+                        "answer": cached["answer"],
+                        "confidence": cached["confidence"],
+                        "citations": citations,
+                        "metadata": metadata,
+                        "cache": cached["cache"]
+                    }
+        
+        # 3. Buscar documentos relevantes
         documents = await retriever.retrieve(
             request.query,
             processed_query
@@ -145,58 +247,54 @@ async def query_rag(
                 "query": request.query
             }
         
-        # 3. Construir contexto
+        # 4. Construir contexto
         context = await context_builder.build_context(
             processed_query,
             documents,
             request.context.get("conversation_history") if request.context else None
         )
         
-        # 4. Gerar resposta
+        # 5. Gerar resposta
         answer_result = await answer_generator.generate_answer(context)
         
-        # 5. Processar citações
+        # 6. Processar citações
         citations = await citation_manager.process_citations(
             answer_result.get("answer", ""),
-            documents
+            context.get("documents", documents)
         )
         
-        # 6. Salvar no histórico
+        # 7. Salvar no histórico
         processing_time = int((time.time() - start_time) * 1000)
         
-        query_history = QueryHistory(
-            user_id=request.session_id,
-            session_id=request.session_id or "anonymous",
-            query_text=request.query,
-            query_type=processed_query.get("query_type"),
-            results_count=len(documents),
-            top_similarity_score=documents[0].get("similarity_score") if documents else 0,
-            answer_text=answer_result.get("answer"),
-            answer_confidence=answer_result.get("confidence"),
-            processing_time_ms=processing_time,
-            tokens_used=answer_result.get("tokens_used")
+        metadata = {
+            "documents_found": len(documents),
+            "top_similarity_score": documents[0].get("similarity_score") if documents else 0,
+            "query_type": processed_query.get("query_type"),
+            "processing_time_ms": processing_time,
+            "tokens_used": answer_result.get("tokens_used")
+        }
+        query_history = save_query_history(
+            db, request, processed_query, metadata, answer_result, citations
         )
         
-        db.add(query_history)
-        db.commit()
-        db.refresh(query_history)
-        
-        # Salvar citações
-        for citation in citations:
-            citation["query_id"] = query_history.id
-            citation_obj = Citation(
-                query_id=query_history.id,
-                document_id=citation["document_id"],
-                document_type=citation["metadata"].get("tipo"),
-                text_excerpt=citation["excerpt"],
-                relevance_score=citation["relevance_score"],
-                metadata_json=citation["metadata"],
-                citation_abnt=citation["citation_abnt"],
-                citation_url=citation.get("url")
+        if query_embedding is not None and collection_version is not None and not answer_result.get("error"):
+            answer_cache.store(
+                db,
+                processed_query["processed_query"],
+                query_embedding,
+                processed_query.get("entities"),
+                collection_version,
+                context.get("documents", documents),
+                {
+                    "answer": answer_result.get("answer"),
+                    "confidence": answer_result.get("confidence"),
+                    "citations": citations,
+                    "metadata": {
+                        key: metadata[key] for key in ("documents_found", "top_similarity_score", "query_type")
+                    }
+                },
+                answer_result.get("tokens_used")
             )
-            db.add(citation_obj)
-        
-        db.commit()
         
         return {
             "success": True,
@@ -205,12 +303,8 @@ async def query_rag(
             "answer": answer_result.get("answer"),
             "confidence": answer_result.get("confidence"),
             "citations": citations,
-            "metadata": {
-                "documents_found": len(documents),
-                "query_type": processed_query.get("query_type"),
-                "processing_time_ms": processing_time,
-                "tokens_used": answer_result.get("tokens_used")
-            }
+            "metadata": metadata,
+            "cache": {"hit": False}
         }
     
     except Exception as e:
@@ -347,6 +441,68 @@ async def index_document(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def run_ingest_job(ingestor: BulkIngestor, source: str, restart: bool):
+    """Ingestão em segundo plano sem reconstruir os índices do Retriever a cada consulta"""
+    with retriever.bulk_update():
+        ingestor.ingest(source, restart)
+
+
+@app.post("/api/rag/ingest")
+async def ingest_corpus(
+    request: IngestRequest,
+    background_tasks: BackgroundTasks
+):
+    """
+    Inicia ingestão em lote de um arquivo JSON/JSONL de INGEST_DATA_DIR
+    
+    Roda em segundo plano; o progresso fica em /api/rag/ingest/{job_id}.
+    Uma ingestão interrompida retoma do checkpoint na próxima chamada.
+    """
+    data_dir = Path(Config.INGEST_DATA_DIR).resolve()
+    source = (data_dir / request.path).resolve()
+    if not source.is_relative_to(data_dir) or not source.is_file():
+        raise HTTPException(status_code=404, detail=f"Arquivo não encontrado em {Config.INGEST_DATA_DIR}: {request.path}")
+    
+    if any(
+        job.stats.get("source") == str(source) and job.stats.get("status") in ("pending", "running")
+        for job in ingest_jobs.values()
+    ):
+        raise HTTPException(status_code=409, detail="Ingestão deste arquivo já está em andamento")
+    
+    job_id = uuid.uuid4().hex
+    # Cada lote gravado atualiza o BM25 e o índice de metadados deste processo
+    ingestor = BulkIngestor(
+        retriever.collection,
+        on_upsert=retriever.index_documents,
+        on_delete=retriever.remove_documents
+    )
+    ingestor.stats["source"] = str(source)
+    ingest_jobs[job_id] = ingestor
+    background_tasks.add_task(run_ingest_job, ingestor, str(source), request.restart)
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status_url": f"/api/rag/ingest/{job_id}"
+    }
+
+
+@app.get("/api/rag/ingest/{job_id}")
+async def get_ingest_status(job_id: str):
+    """
+    Progresso de uma ingestão em lote (documentos, trechos, docs/s)
+    """
+    ingestor = ingest_jobs.get(job_id)
+    if ingestor is None:
+        raise HTTPException(status_code=404, detail="Ingestão não encontrada")
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "stats": ingestor.stats
+    }
+
+
 @app.get("/api/rag/stats")
 async def get_stats(db: Session = Depends(get_db)):
     """
@@ -366,6 +522,9 @@ async def get_stats(db: Session = Depends(get_db)):
         # Stats de feedback
         feedback_stats = await feedback_collector.get_feedback_stats(db)
         
+        # Cache semântico de respostas
+        cache_stats = answer_cache.get_stats(db)
+        
         return {
             "success": True,
             "stats": {
@@ -375,7 +534,8 @@ async def get_stats(db: Session = Depends(get_db)):
                     "avg_processing_time_ms": round(avg_processing_time, 2) if avg_processing_time else 0
                 },
                 "chromadb": chroma_stats,
-                "feedback": feedback_stats
+                "feedback": feedback_stats,
+                "answer_cache": cache_stats
             }
         }
     
@@ -43,6 +43,49 @@ class Config:
     TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", 5))
     MAX_CONTEXT_LENGTH = int(os.getenv("MAX_CONTEXT_LENGTH", 4000))
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.7))
+    # Empacotamento do contexto (MAX_CONTEXT_LENGTH em tokens do tokenizer do modelo)
+    CONTEXT_PASSAGE_TOKENS = int(os.getenv("CONTEXT_PASSAGE_TOKENS", 200))  # Tamanho dos trechos disputados
+    CONTEXT_DEDUP_DISTANCE = int(os.getenv("CONTEXT_DEDUP_DISTANCE", 3))  # Bits de SimHash p/ quase duplicata
+    
+    # Busca densa: over-fetch adaptativo e planejamento do filtro de metadados
+    RETRIEVAL_OVERFETCH_FACTOR = int(os.getenv("RETRIEVAL_OVERFETCH_FACTOR", 2))  # Candidatos iniciais = k x fator
+    RETRIEVAL_MAX_CANDIDATES = int(os.getenv("RETRIEVAL_MAX_CANDIDATES", 200))  # Teto do over-fetch
+    PREFILTER_MAX_SELECTIVITY = float(os.getenv("PREFILTER_MAX_SELECTIVITY", 0.2))  # Até essa fração: where no ChromaDB
+    METADATA_INDEX_FIELDS = [
+        field.strip() for field in os.getenv("METADATA_INDEX_FIELDS", "tribunal,magistrado,assunto").split(",") if field.strip()
+    ]
+    
+    # Ingestão em lote (ingest_corpus.py e /api/rag/ingest)
+    INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", 64))  # Trechos por chamada de embedding
+    INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", 1000))  # Trechos por upsert no ChromaDB
+    INGEST_CHECKPOINT_DIR = os.getenv("INGEST_CHECKPOINT_DIR", "./ingest_checkpoints")
+    INGEST_DATA_DIR = os.getenv("INGEST_DATA_DIR", "./data")  # Arquivos aceitos pelo endpoint
+    
+    # Busca híbrida (BM25 + vetorial, fundidas por reciprocal rank fusion)
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()  # hybrid ou dense
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))  # Candidatos por lista antes da fusão
+    # Peso da lista lexical (BM25) por tipo de consulta; a densa recebe 1 - peso
+    HYBRID_LEXICAL_WEIGHTS = {
+        "processo_especifico": 0.8,
+        "legislacao": 0.6,
+        "perfil_magistrado": 0.5,
+        "jurisprudencia": 0.4,
+        "analise_tendencia": 0.3,
+        "semantica_geral": 0.3,
+        # Sobrescrever via env: HYBRID_LEXICAL_WEIGHTS=legislacao:0.7,semantica_geral:0.2
+        **{
+            tipo.strip(): float(peso)
+            for tipo, peso in (item.split(":") for item in os.getenv("HYBRID_LEXICAL_WEIGHTS", "").split(",") if item)
+        }
+    }
+    
+    # Cache semântico de respostas (/api/rag/query)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true"
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # Cosseno mínimo entre perguntas
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 7 * 24 * 3600))  # Segundos
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 2000))  # LRU
+    ANSWER_CACHE_EMBEDDING_DIM = int(os.getenv("ANSWER_CACHE_EMBEDDING_DIM", 256))  # Dimensão do embedding da pergunta
+    OPENAI_COST_PER_1K_TOKENS = float(os.getenv("OPENAI_COST_PER_1K_TOKENS", "0.045"))  # USD, para custo economizado
     
     # LangChain
     LANGCHAIN_TRACING_V2 = os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true"
@@ -57,6 +100,7 @@ class Config:
     ENABLE_CITATIONS = os.getenv("ENABLE_CITATIONS", "True").lower() == "true"
     ENABLE_FEEDBACK = os.getenv("ENABLE_FEEDBACK", "True").lower() == "true"
     ENABLE_HISTORY = os.getenv("ENABLE_HISTORY", "True").lower() == "true"
+    ENABLE_STREAMING = os.getenv("ENABLE_STREAMING", "True").lower() == "true"  # Chat: resposta em trechos
     
     # Security
     SECRET_KEY = os.getenv(
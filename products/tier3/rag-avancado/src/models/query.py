@@ -35,6 +35,7 @@ class QueryHistory(Base):
     
     # Performance
     processing_time_ms = Column(Integer, nullable=True)
+    time_to_first_token_ms = Column(Integer, nullable=True)  # Chat em streaming
     tokens_used = Column(Integer, nullable=True)
     
     # Feedback
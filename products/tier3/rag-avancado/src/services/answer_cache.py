@@ -0,0 +1,304 @@
+"""
+Cache semântico de respostas do RAG
+Perguntas parecidas (embedding da query acima do limiar) com as mesmas
+entidades (tribunal, processo, magistrado, temas) reaproveitam a resposta
+e as citações já geradas, desde que a coleção do ChromaDB não tenha mudado.
+Entradas ficam em memória (LRU + TTL) e persistem em DocumentCache
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.config import Config
+from src.models.query import DocumentCache
+
+
+# DocumentCache.document_type das respostas em cache
+CACHE_DOCUMENT_TYPE = "answer_cache"
+
+
+def filter_key(entities: Optional[Dict]) -> str:
+    """Chave canônica das entidades que filtram a busca"""
+    return json.dumps(entities or {}, sort_keys=True, ensure_ascii=False)
+
+
+def content_hash(content: Optional[str]) -> str:
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def _normalize(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class AnswerCache:
+    """
+    Cache de respostas por similaridade da pergunta
+
+    Uma entrada vale enquanto:
+    - a versão da coleção (número de documentos) é a mesma de quando foi
+      gerada; documentos novos podem mudar a busca
+    - os documentos citados ainda existem com o mesmo conteúdo (hash
+      conferido a cada acerto)
+    - não passou do TTL
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = None,
+        ttl_seconds: int = None,
+        max_entries: int = None
+    ):
+        self.similarity_threshold = similarity_threshold or Config.ANSWER_CACHE_SIMILARITY
+        self.ttl_seconds = ttl_seconds or Config.ANSWER_CACHE_TTL
+        self.max_entries = max_entries or Config.ANSWER_CACHE_MAX_ENTRIES
+        # chave -> entrada, do menos para o mais recentemente usado
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.cost_saved_usd = 0.0
+
+    # ------------------------------------------------------------------
+    # Persistência (DocumentCache)
+
+    def _load(self, db: Session):
+        """Carrega as entradas gravadas (uma vez por processo)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            rows = db.query(DocumentCache).filter(
+                DocumentCache.document_type == CACHE_DOCUMENT_TYPE
+            ).order_by(DocumentCache.last_accessed).all()
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar cache de respostas: {e}")
+            return
+
+        for row in rows:
+            data = row.metadata_json or {}
+            if "embedding" not in data:
+                continue
+            self.entries[row.document_id] = {
+                "key": row.document_id,
+                "embedding": _normalize(data["embedding"]),
+                "filter_key": data.get("filter_key"),
+                "collection_version": data.get("collection_version"),
+                "sources": data.get("sources", {}),
+                "response": {**data.get("response", {}), "answer": row.content},
+                "tokens_used": data.get("tokens_used") or 0,
+                "cached_at": data.get("cached_at", 0),
+                "hits": row.query_count or 0
+            }
+
+    def _delete(self, db: Session, keys: List[str]):
+        for key in keys:
+            self.entries.pop(key, None)
+        if not keys:
+            return
+        try:
+            db.query(DocumentCache).filter(
+                DocumentCache.document_id.in_(keys)
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Erro ao remover entradas do cache de respostas: {e}")
+
+    # ------------------------------------------------------------------
+    # Consulta
+
+    def lookup(
+        self,
+        db: Session,
+        embedding,
+        entities: Optional[Dict],
+        collection_version,
+        fetch_documents: Callable[[List[str]], Dict[str, str]]
+    ) -> Optional[Dict]:
+        """
+        Procura resposta para uma pergunta parecida
+
+        Args:
+            db: Sessão do banco
+            embedding: Embedding da query processada
+            entities: Entidades extraídas da query
+            collection_version: Versão atual da coleção
+            fetch_documents: ids -> conteúdo atual (documentos ausentes ficam de fora)
+
+        Returns:
+            Resposta em cache com "cache" (similaridade, custo economizado) ou None
+        """
+        self._load(db)
+        now = time.time()
+
+        # Entradas vencidas ou de outra versão da coleção não voltam a valer
+        stale = [
+            key for key, entry in self.entries.items()
+            if now - entry["cached_at"] > self.ttl_seconds
+            or entry["collection_version"] != collection_version
+        ]
+        self._delete(db, stale)
+
+        key_filter = filter_key(entities)
+        candidates = [entry for entry in self.entries.values() if entry["filter_key"] == key_filter]
+        if not candidates:
+            self.misses += 1
+            return None
+
+        query = _normalize(embedding)
+        similarities = np.stack([entry["embedding"] for entry in candidates]) @ query
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        entry = candidates[best]
+
+        if similarity < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        # Documentos citados alterados ou removidos invalidam a resposta
+        current = fetch_documents(list(entry["sources"]))
+        if any(doc_id not in current or content_hash(current[doc_id]) != digest
+               for doc_id, digest in entry["sources"].items()):
+            self._delete(db, [entry["key"]])
+            self.misses += 1
+            return None
+
+        entry["hits"] += 1
+        self.entries.move_to_end(entry["key"])
+        cost_saved = self.cost(entry["tokens_used"])
+        self.hits += 1
+        self.tokens_saved += entry["tokens_used"]
+        self.cost_saved_usd += cost_saved
+
+        try:
+            db.query(DocumentCache).filter(DocumentCache.document_id == entry["key"]).update({
+                "query_count": entry["hits"],
+                "last_accessed": datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Erro ao atualizar cache de respostas: {e}")
+
+        return {
+            **entry["response"],
+            "cache": {
+                "hit": True,
+                "similarity": round(similarity, 4),
+                "tokens_saved": entry["tokens_used"],
+                "cost_saved_usd": round(cost_saved, 6),
+                "cached_at": datetime.utcfromtimestamp(entry["cached_at"]).isoformat()
+            }
+        }
+
+    def store(
+        self,
+        db: Session,
+        query_text: str,
+        embedding,
+        entities: Optional[Dict],
+        collection_version,
+        documents: List[Dict],
+        response: Dict,
+        tokens_used: Optional[int]
+    ):
+        """
+        Guarda a resposta gerada
+
+        Args:
+            query_text: Query processada (identifica a entrada)
+            documents: Documentos do contexto (conteúdo conferido nos acertos;
+                source_hash é o hash do documento inteiro quando o contexto traz só trechos)
+            response: answer, confidence, citations e metadata devolvidos ao cliente
+            tokens_used: Tokens da geração (custo economizado em cada acerto)
+        """
+        self._load(db)
+        key_filter = filter_key(entities)
+        key = "answer:" + hashlib.sha256(f"{key_filter}\n{query_text}".encode("utf-8")).hexdigest()
+        vector = _normalize(embedding)
+        entry = {
+            "key": key,
+            "embedding": vector,
+            "filter_key": key_filter,
+            "collection_version": collection_version,
+            "sources": {
+                doc["id"]: doc.get("source_hash") or content_hash(doc.get("content"))
+                for doc in documents if doc.get("id")
+            },
+            "response": response,
+            "tokens_used": tokens_used or 0,
+            "cached_at": time.time(),
+            "hits": 0
+        }
+
+        try:
+            db.query(DocumentCache).filter(DocumentCache.document_id == key).delete(synchronize_session=False)
+            db.add(DocumentCache(
+                document_id=key,
+                content=response.get("answer") or "",
+                embeddings_computed=True,
+                document_type=CACHE_DOCUMENT_TYPE,
+                metadata_json={
+                    "query": query_text,
+                    "embedding": [round(float(x), 6) for x in vector],
+                    "filter_key": key_filter,
+                    "collection_version": collection_version,
+                    "sources": entry["sources"],
+                    "response": {k: v for k, v in response.items() if k != "answer"},
+                    "tokens_used": entry["tokens_used"],
+                    "cached_at": entry["cached_at"]
+                },
+                query_count=0,
+                last_accessed=datetime.utcnow()
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Erro ao gravar cache de respostas: {e}")
+            return
+
+        self.entries.pop(key, None)
+        self.entries[key] = entry
+
+        # LRU: remove as menos usadas recentemente além do limite
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            self._delete(db, list(self.entries)[:overflow])
+
+    # ------------------------------------------------------------------
+    # Estatísticas
+
+    @staticmethod
+    def cost(tokens: int) -> float:
+        """Custo (USD) de uma geração com esse número de tokens"""
+        return tokens / 1000 * Config.OPENAI_COST_PER_1K_TOKENS
+
+    def get_stats(self, db: Session) -> Dict:
+        """
+        Acertos/erros deste processo e economia acumulada das entradas
+        gravadas (todos os processos, desde que cada entrada foi criada)
+        """
+        self._load(db)
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "cost_saved_usd": round(self.cost_saved_usd, 4),
+            "stored_hits": sum(entry["hits"] for entry in self.entries.values()),
+            "stored_cost_saved_usd": round(
+                sum(self.cost(entry["tokens_used"]) * entry["hits"] for entry in self.entries.values()), 4
+            )
+        }
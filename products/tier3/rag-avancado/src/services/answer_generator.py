@@ -3,8 +3,8 @@ Microserviço 4: Answer Generator
 Responsável por gerar respostas usando GPT-4
 """
 
-from typing import Dict, Optional
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Optional
+from openai import AsyncOpenAI
 
 from src.config import Config
 
@@ -13,10 +13,26 @@ class AnswerGenerator:
     """Gera respostas inteligentes usando GPT-4"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY) if Config.OPENAI_API_KEY else None
+        # Cliente assíncrono: a espera pela API não bloqueia o event loop
+        self.client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY) if Config.OPENAI_API_KEY else None
         self.model = Config.OPENAI_MODEL
         self.max_tokens = 2000
     
+    def _completion_params(self, prompt: str, temperature: float) -> Dict:
+        """Parâmetros da chamada de chat completion para o prompt"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "Você é um assistente jurídico especializado."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": self.max_tokens,
+            "top_p": 0.95,
+            "frequency_penalty": 0.0,
+            "presence_penalty": 0.0
+        }
+    
     async def generate_answer(
         self,
         context: Dict,
@@ -47,40 +63,19 @@ class AnswerGenerator:
                 raise ValueError("Prompt vazio")
             
             # Chamar GPT-4
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Você é um assistente jurídico especializado."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=self.max_tokens,
-                top_p=0.95,
-                frequency_penalty=0.0,
-                presence_penalty=0.0
+            response = await self.client.chat.completions.create(
+                **self._completion_params(prompt, temperature)
             )
             
             # Extrair resposta
             answer_text = response.choices[0].message.content
             
-            # Calcular confiança baseado em fatores
-            confidence = self._calculate_confidence(
-                response,
+            return self._build_result(
+                answer_text,
                 context,
-                answer_text
+                response.choices[0].finish_reason,
+                response.usage.total_tokens
             )
-            
-            # Extrair citações da resposta
-            citations = self._extract_citations(answer_text)
-            
-            return {
-                "answer": answer_text,
-                "confidence": confidence,
-                "citations_in_answer": citations,
-                "tokens_used": response.usage.total_tokens,
-                "model": self.model,
-                "finish_reason": response.choices[0].finish_reason
-            }
         
         except Exception as e:
             print(f"❌ Erro ao gerar resposta: {e}")
@@ -90,9 +85,95 @@ class AnswerGenerator:
                 "error": str(e)
             }
     
+    async def stream_answer(
+        self,
+        context: Dict,
+        temperature: float = 0.3
+    ) -> AsyncIterator[Dict]:
+        """
+        Gera resposta em streaming (stream=True)
+        
+        Args:
+            context: Contexto construído pelo Context Builder
+            temperature: Criatividade da resposta (0-1)
+            
+        Yields:
+            {"type": "delta", "content": trecho} para cada pedaço de texto e,
+            por último, {"type": "done", ...} com o mesmo resultado de
+            generate_answer
+        """
+        if not self.client:
+            yield {
+                "type": "done",
+                "answer": "OpenAI não configurada. Configure OPENAI_API_KEY.",
+                "confidence": 0.0,
+                "error": "missing_api_key"
+            }
+            return
+        
+        parts: List[str] = []
+        finish_reason = None
+        tokens_used = None
+        
+        try:
+            prompt = context.get("formatted_prompt", "")
+            
+            if not prompt:
+                raise ValueError("Prompt vazio")
+            
+            stream = await self.client.chat.completions.create(
+                **self._completion_params(prompt, temperature),
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            async for chunk in stream:
+                # Último chunk (include_usage) traz só o uso de tokens
+                if chunk.usage is not None:
+                    tokens_used = chunk.usage.total_tokens
+                if not chunk.choices:
+                    continue
+                
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                
+                delta = choice.delta.content if choice.delta else None
+                if delta:
+                    parts.append(delta)
+                    yield {"type": "delta", "content": delta}
+            
+            yield {"type": "done", **self._build_result("".join(parts), context, finish_reason, tokens_used)}
+        
+        except Exception as e:
+            print(f"❌ Erro ao gerar resposta: {e}")
+            yield {
+                "type": "done",
+                "answer": "".join(parts) or f"Erro ao gerar resposta: {str(e)}",
+                "confidence": 0.0,
+                "error": str(e)
+            }
+    
+    def _build_result(
+        self,
+        answer_text: str,
+        context: Dict,
+        finish_reason: Optional[str],
+        tokens_used: Optional[int]
+    ) -> Dict:
+        """Resultado da geração: resposta, confiança e citações"""
+        return {
+            "answer": answer_text,
+            "confidence": self._calculate_confidence(finish_reason, context, answer_text),
+            "citations_in_answer": self._extract_citations(answer_text),
+            "tokens_used": tokens_used,
+            "model": self.model,
+            "finish_reason": finish_reason
+        }
+    
     def _calculate_confidence(
         self,
-        response,
+        finish_reason: Optional[str],
         context: Dict,
         answer: str
     ) -> float:
@@ -126,7 +207,6 @@ class AnswerGenerator:
             confidence_factors.append(0.4)
         
         # Fator 5: Finish reason (se completou normalmente)
-        finish_reason = response.choices[0].finish_reason
         if finish_reason == "stop":
             confidence_factors.append(1.0)
         else:
@@ -143,6 +223,31 @@ class AnswerGenerator:
         citations = re.findall(r'\[Doc\s+(\d+)\]', answer)
         return [int(c) for c in citations] if citations else []
     
+    async def embed_query(self, text: str) -> Optional[List[float]]:
+        """
+        Embedding da pergunta (cache semântico de respostas)
+        
+        Args:
+            text: Query processada
+            
+        Returns:
+            Vetor com ANSWER_CACHE_EMBEDDING_DIM dimensões ou None
+        """
+        if not self.client:
+            return None
+        
+        try:
+            response = await self.client.embeddings.create(
+                model=Config.EMBEDDING_MODEL,
+                input=text,
+                dimensions=Config.ANSWER_CACHE_EMBEDDING_DIM
+            )
+            return response.data[0].embedding
+        
+        except Exception as e:
+            print(f"❌ Erro ao gerar embedding da pergunta: {e}")
+            return None
+    
     async def summarize_document(self, content: str) -> str:
         """
         Gera resumo de um documento
@@ -164,7 +269,7 @@ destacando os pontos mais importantes:
 
 RESUMO:"""
             
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "Você é um assistente especializado em resumir documentos jurídicos."},
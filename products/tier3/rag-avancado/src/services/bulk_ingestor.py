@@ -0,0 +1,487 @@
+"""
+Ingestão em lote da coleção do ChromaDB
+Lê documentos de JSON (array) ou JSONL sem carregar o arquivo inteiro,
+quebra cada documento em trechos de CHUNK_SIZE caracteres com CHUNK_OVERLAP
+de sobreposição, descarta documentos cujos trechos já estão na coleção
+(mesmos IDs e hashes do conteúdo), remove trechos antigos de documentos
+alterados e grava com embeddings calculados em lote e upserts grandes. Um
+checkpoint por arquivo permite retomar a carga de onde parou
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config import Config
+
+
+# Campos aceitos para o ID e o texto de cada registro
+ID_FIELDS = ("id", "document_id")
+CONTENT_FIELDS = ("content", "text", "page_content")
+# Separadores preferidos para o fim de um trecho, do melhor para o pior
+CHUNK_SEPARATORS = ("\n\n", "\n", ". ", " ")
+# Leitura do JSON em array (caracteres por bloco)
+READ_SIZE = 1 << 20
+# Intervalo mínimo entre relatórios de progresso (segundos)
+REPORT_INTERVAL = 10
+_DEFAULT = object()
+
+
+def chunk_text(text: str, chunk_size: int = None, chunk_overlap: int = None) -> List[str]:
+    """
+    Trechos de até chunk_size caracteres com chunk_overlap de sobreposição
+
+    O corte fica no melhor separador (parágrafo, linha, frase, palavra) da
+    segunda metade da janela; a sobreposição recomeça no início de uma palavra.
+    """
+    chunk_size = chunk_size or Config.CHUNK_SIZE
+    chunk_overlap = min(Config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap, chunk_size // 2)
+    text = text.strip()
+    if len(text) <= chunk_size:
+        return [text] if text else []
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            for separator in CHUNK_SEPARATORS:
+                cut = text.rfind(separator, start + chunk_size // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        next_start = max(end - chunk_overlap, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if chunk_overlap and space != -1 else next_start
+    return chunks
+
+
+def chunk_hash(chunk: str) -> str:
+    """Hash do trecho com espaços normalizados (mesmo texto = mesmo hash)"""
+    return hashlib.sha256(" ".join(chunk.split()).encode("utf-8")).hexdigest()
+
+
+def _iter_json_array(f, read_size: int = READ_SIZE) -> Iterator:
+    """Elementos de um array JSON, decodificados um a um conforme o arquivo é lido"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    opened = False
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (opened and buffer[pos] == ",")):
+            pos += 1
+        if pos < len(buffer):
+            if not opened:
+                if buffer[pos] != "[":
+                    raise ValueError("JSON deve ser um array de documentos")
+                opened = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+                yield item
+                continue
+            except json.JSONDecodeError:
+                # Elemento cortado no fim do bloco: ler mais
+                if eof:
+                    raise
+        elif eof:
+            return
+        chunk = f.read(read_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+
+def iter_records(path: str, read_size: int = READ_SIZE) -> Iterator[Dict]:
+    """
+    Registros de um arquivo .jsonl/.ndjson (um por linha) ou .json (array;
+    objeto com "documents" ou um único documento)
+    """
+    with open(path, encoding="utf-8") as f:
+        if Path(path).suffix.lower() in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first == "[":
+            f.seek(0)
+            yield from _iter_json_array(f, read_size)
+            return
+
+        f.seek(0)
+        data = json.load(f)
+        yield from (data.get("documents", [data]) if isinstance(data, dict) else [])
+
+
+def _scalar(value):
+    """Metadados do ChromaDB aceitam só str, int, float e bool"""
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def normalize_record(record) -> Optional[Dict]:
+    """
+    Registro -> {"id", "content", "metadata"}; None se não houver texto
+
+    Campos de primeiro nível que não são ID nem texto entram nos metadados.
+    """
+    if not isinstance(record, dict):
+        return None
+    content = next((record[field] for field in CONTENT_FIELDS if isinstance(record.get(field), str)), "")
+    if not content.strip():
+        return None
+
+    doc_id = next((str(record[field]) for field in ID_FIELDS if record.get(field)), None)
+    metadata = {
+        key: value for key, value in record.items()
+        if key not in ID_FIELDS and key not in CONTENT_FIELDS and key != "metadata"
+    }
+    if isinstance(record.get("metadata"), dict):
+        metadata.update(record["metadata"])
+
+    return {
+        "id": doc_id or chunk_hash(content)[:32],
+        "content": content,
+        "metadata": {key: _scalar(value) for key, value in metadata.items() if value is not None}
+    }
+
+
+class BulkIngestor:
+    """
+    Carga em lote de um arquivo de documentos na coleção
+
+    Os registros entram no buffer inteiros; com upsert_batch_size trechos o
+    buffer é gravado e o checkpoint avança até o último registro gravado.
+    O embedding de um lote é calculado enquanto o upsert do anterior roda.
+    Upserts são idempotentes, então retomar repete no máximo um lote.
+    on_upsert recebe (id, conteúdo, metadados) de cada lote gravado e
+    on_delete os IDs de trechos removidos, para manter índices em memória
+    (BM25, metadados) em dia sem reconstruí-los.
+    """
+
+    def __init__(
+        self,
+        collection,
+        chunk_size: int = None,
+        chunk_overlap: int = None,
+        embed_batch_size: int = None,
+        upsert_batch_size: int = None,
+        checkpoint_dir: str = None,
+        embedding_function=_DEFAULT,
+        on_upsert: Optional[Callable[[List[Tuple[str, str, Dict]]], None]] = None,
+        on_delete: Optional[Callable[[List[str]], None]] = None
+    ):
+        self.collection = collection
+        self.chunk_size = chunk_size or Config.CHUNK_SIZE
+        self.chunk_overlap = Config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+        self.embed_batch_size = embed_batch_size or Config.INGEST_EMBED_BATCH_SIZE
+        self.upsert_batch_size = upsert_batch_size or Config.INGEST_UPSERT_BATCH_SIZE
+        self.checkpoint_dir = Path(checkpoint_dir or Config.INGEST_CHECKPOINT_DIR)
+        # Mesma função de embedding da coleção; None deixa o ChromaDB calcular no upsert
+        self.embedding_function = (
+            getattr(collection, "_embedding_function", None)
+            if embedding_function is _DEFAULT else embedding_function
+        )
+        self.on_upsert = on_upsert
+        self.on_delete = on_delete
+        # Documentos gravados nesta execução: source_id -> (assinatura dos trechos, nº de trechos)
+        self._written: Dict[str, Tuple[bytes, int]] = {}
+        self.stats: Dict = {"status": "pending"}
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+
+    def checkpoint_path(self, source: str) -> Path:
+        key = hashlib.sha1(str(Path(source).resolve()).encode("utf-8")).hexdigest()[:16]
+        return self.checkpoint_dir / f"{key}.json"
+
+    def _load_checkpoint(self, source: str) -> Dict:
+        path = self.checkpoint_path(source)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️ Checkpoint inválido em {path}, recomeçando: {e}")
+            return {}
+
+    def _save_checkpoint(self, source: str, records_done: int, completed: bool = False):
+        """Grava o checkpoint (rename atômico)"""
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.stats["records_done"] = records_done
+        path = self.checkpoint_path(source)
+        data = {
+            "source": str(Path(source).resolve()),
+            "records_done": records_done,
+            "completed": completed,
+            "updated_at": datetime.utcnow().isoformat(),
+            **{key: self.stats[key] for key in ("chunks_added", "duplicates", "invalid")}
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.checkpoint_dir, suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    # ------------------------------------------------------------------
+    # Gravação
+
+    @staticmethod
+    def _chunk_ids(source_id: str, count: int) -> List[str]:
+        # Documento de um trecho só mantém o próprio ID
+        return [source_id] if count == 1 else [f"{source_id}#{index}" for index in range(count)]
+
+    @staticmethod
+    def _signature(chunks: Dict[str, str]) -> bytes:
+        """Resumo dos trechos de um documento (IDs e hashes)"""
+        text = "\n".join(f"{chunk_id} {digest}" for chunk_id, digest in sorted(chunks.items()))
+        return hashlib.sha256(text.encode("utf-8")).digest()[:16]
+
+    def _chunks(self, document: Dict) -> List[Dict]:
+        pieces = chunk_text(document["content"], self.chunk_size, self.chunk_overlap)
+        ids = self._chunk_ids(document["id"], len(pieces))
+        chunks = []
+        for index, piece in enumerate(pieces):
+            digest = chunk_hash(piece)
+            chunks.append({
+                "id": ids[index],
+                "content": piece,
+                "hash": digest,
+                "metadata": {
+                    **document["metadata"],
+                    "source_id": document["id"],
+                    "chunk_index": index,
+                    "chunk_count": len(pieces),
+                    "content_hash": digest
+                }
+            })
+        return chunks
+
+    def _stored_chunks(self, source_ids: List[str]) -> Dict[str, Dict[str, str]]:
+        """Trechos já na coleção de cada documento: source_id -> {id do trecho: hash}"""
+        stored: Dict[str, Dict[str, str]] = {}
+        if not source_ids:
+            return stored
+        by_source = self.collection.get(where={"source_id": {"$in": source_ids}}, include=["metadatas"])
+        # Documento gravado sem source_id (ex.: /api/rag/index) ocupa o próprio ID
+        by_id = self.collection.get(ids=source_ids, include=["metadatas"])
+        for result, from_id in ((by_source, False), (by_id, True)):
+            for chunk_id, metadata in zip(result.get("ids") or [], result.get("metadatas") or []):
+                metadata = metadata or {}
+                source_id = chunk_id if from_id else metadata.get("source_id")
+                stored.setdefault(source_id, {})[chunk_id] = metadata.get("content_hash")
+        return stored
+
+    def _changed_chunks(self, chunks: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        Trechos a gravar e IDs de trechos antigos a remover
+
+        Documento com os mesmos trechos (IDs e hashes) já gravados é
+        descartado; um documento alterado é regravado inteiro (chunk_count
+        muda) e os trechos que ele não tem mais são removidos. Conteúdo
+        repetido só é comparado dentro do mesmo documento (source_id).
+        """
+        documents: Dict[str, List[Dict]] = {}
+        for chunk in chunks:
+            source_id = chunk["metadata"]["source_id"]
+            if chunk["metadata"]["chunk_index"] == 0:
+                # Documento repetido no lote: vale a última ocorrência
+                documents[source_id] = []
+            documents[source_id].append(chunk)
+
+        stored = self._stored_chunks([source_id for source_id in documents if source_id not in self._written])
+        changed, stale = [], []
+        for source_id, document_chunks in documents.items():
+            current = {chunk["id"]: chunk["hash"] for chunk in document_chunks}
+            signature = self._signature(current)
+            if source_id in self._written:
+                previous_signature, previous_count = self._written[source_id]
+                if signature == previous_signature:
+                    continue
+                previous_ids = self._chunk_ids(source_id, previous_count)
+            else:
+                previous = stored.get(source_id, {})
+                if previous == current:
+                    self._written[source_id] = (signature, len(current))
+                    continue
+                previous_ids = list(previous)
+            stale.extend(chunk_id for chunk_id in previous_ids if chunk_id not in current)
+            changed.extend(document_chunks)
+            self._written[source_id] = (signature, len(current))
+        return changed, stale
+
+    def _embed(self, chunks: List[Dict]) -> Optional[List]:
+        if self.embedding_function is None:
+            return None
+        embeddings = []
+        for start in range(0, len(chunks), self.embed_batch_size):
+            batch = chunks[start:start + self.embed_batch_size]
+            embeddings.extend(self.embedding_function([chunk["content"] for chunk in batch]))
+        return embeddings
+
+    def _upsert(self, chunks: List[Dict], embeddings: Optional[List], stale: List[str]) -> int:
+        if not chunks:
+            self._delete(stale)
+            return 0
+        params = {
+            "ids": [chunk["id"] for chunk in chunks],
+            "documents": [chunk["content"] for chunk in chunks],
+            "metadatas": [chunk["metadata"] for chunk in chunks]
+        }
+        if embeddings is not None:
+            params["embeddings"] = [list(map(float, embedding)) for embedding in embeddings]
+        self.collection.upsert(**params)
+        if self.on_upsert is not None:
+            try:
+                self.on_upsert([(chunk["id"], chunk["content"], chunk["metadata"]) for chunk in chunks])
+            except Exception as e:
+                print(f"⚠️ Erro ao atualizar índices após o upsert: {e}")
+        # Trechos antigos só saem depois que os novos estão gravados
+        self._delete(stale)
+        return len(chunks)
+
+    def _delete(self, ids: List[str]):
+        if not ids:
+            return
+        self.collection.delete(ids=ids)
+        self.stats["chunks_removed"] = self.stats.get("chunks_removed", 0) + len(ids)
+        if self.on_delete is not None:
+            try:
+                self.on_delete(ids)
+            except Exception as e:
+                print(f"⚠️ Erro ao atualizar índices após remover trechos: {e}")
+
+    # ------------------------------------------------------------------
+    # Carga
+
+    def ingest(self, source: str, restart: bool = False) -> Dict:
+        """
+        Carrega o arquivo na coleção
+
+        Args:
+            source: Arquivo .json (array) ou .jsonl
+            restart: Ignora o checkpoint e relê o arquivo desde o início
+
+        Returns:
+            Estatísticas (documentos, trechos gravados, duplicados, docs/s)
+        """
+        checkpoint = {} if restart else self._load_checkpoint(source)
+        skip = checkpoint.get("records_done", 0)
+        self.stats = {
+            "status": "running",
+            "source": str(source),
+            "resumed_from": skip,
+            "records_done": skip,
+            "documents": 0,
+            "chunks": 0,
+            "chunks_added": checkpoint.get("chunks_added", 0),
+            "chunks_removed": 0,
+            "duplicates": checkpoint.get("duplicates", 0),
+            "invalid": checkpoint.get("invalid", 0),
+            "elapsed_seconds": 0.0,
+            "docs_per_second": 0.0,
+            "chunks_per_second": 0.0
+        }
+        if skip:
+            print(f"📥 Retomando {source} a partir do registro {skip}")
+
+        start_time = time.time()
+        last_report = start_time
+        executor = ThreadPoolExecutor(max_workers=1)
+        pending: Optional[Future] = None
+        pending_records = skip
+        buffer: List[Dict] = []
+        position = 0
+
+        def wait_pending():
+            nonlocal pending
+            if pending is not None:
+                added = pending.result()
+                pending = None
+                self.stats["chunks_added"] += added
+                self._save_checkpoint(source, pending_records)
+
+        def flush(records_done: int):
+            nonlocal pending, pending_records
+            chunks, stale = self._changed_chunks(buffer)
+            self.stats["duplicates"] += len(buffer) - len(chunks)
+            embeddings = self._embed(chunks) if chunks else None
+            wait_pending()
+            if chunks or stale:
+                pending = executor.submit(self._upsert, chunks, embeddings, stale)
+            pending_records = records_done
+            if pending is None:
+                self._save_checkpoint(source, records_done)
+            buffer.clear()
+
+        try:
+            for position, record in enumerate(iter_records(source), 1):
+                if position <= skip:
+                    continue
+                document = normalize_record(record)
+                if document is None:
+                    self.stats["invalid"] += 1
+                else:
+                    chunks = self._chunks(document)
+                    buffer.extend(chunks)
+                    self.stats["documents"] += 1
+                    self.stats["chunks"] += len(chunks)
+
+                if len(buffer) >= self.upsert_batch_size:
+                    flush(position)
+                    self._update_rates(start_time)
+                    if time.time() - last_report >= REPORT_INTERVAL:
+                        last_report = time.time()
+                        self._report()
+
+            flush(max(position, skip))
+            wait_pending()
+            self._save_checkpoint(source, max(position, skip), completed=True)
+            self._update_rates(start_time)
+            self.stats["status"] = "completed"
+            self._report()
+        except Exception as e:
+            self._update_rates(start_time)
+            self.stats["status"] = "error"
+            self.stats["error"] = str(e)
+            print(f"❌ Erro na ingestão de {source}: {e}")
+        finally:
+            executor.shutdown(wait=True)
+
+        return self.stats
+
+    def _update_rates(self, start_time: float):
+        elapsed = max(time.time() - start_time, 1e-9)
+        self.stats["elapsed_seconds"] = round(elapsed, 2)
+        self.stats["docs_per_second"] = round(self.stats["documents"] / elapsed, 2)
+        self.stats["chunks_per_second"] = round(self.stats["chunks"] / elapsed, 2)
+
+    def _report(self):
+        print(
+            f"📥 {self.stats['documents']} documentos, {self.stats['chunks_added']} trechos gravados, "
+            f"{self.stats['duplicates']} duplicados ({self.stats['docs_per_second']:.1f} docs/s)"
+        )
@@ -3,11 +3,57 @@ Microserviço 5: Citation Manager
 Responsável por gerenciar citações e referências
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 import re
 
 
+# Marcador de citação na resposta: [Doc N]
+CITATION_PATTERN = re.compile(r'\[Doc\s+(\d+)\]')
+# Maior trecho mantido à espera do fim de um marcador ("[Doc 123" + espaços)
+MAX_PENDING_MARKER = 16
+
+
+class CitationStream:
+    """
+    Encontra os marcadores [Doc N] à medida que a resposta chega em pedaços
+    
+    Um marcador pode vir partido entre dois pedaços ("[Do" + "c 2]"); o
+    trecho a partir do último "[" sem fechamento fica guardado até o
+    próximo pedaço.
+    """
+    
+    def __init__(self):
+        self._pending = ""
+        self.cited: List[int] = []
+    
+    def feed(self, delta: str) -> List[int]:
+        """
+        Processa um pedaço da resposta
+        
+        Returns:
+            Números de documento citados pela primeira vez neste pedaço
+        """
+        text = self._pending + delta
+        new_citations = []
+        last_end = 0
+        
+        for match in CITATION_PATTERN.finditer(text):
+            last_end = match.end()
+            doc_num = int(match.group(1))
+            if doc_num not in self.cited:
+                self.cited.append(doc_num)
+                new_citations.append(doc_num)
+        
+        pending_start = text.rfind("[", last_end)
+        if pending_start != -1 and len(text) - pending_start <= MAX_PENDING_MARKER:
+            self._pending = text[pending_start:]
+        else:
+            self._pending = ""
+        
+        return new_citations
+
+
 class CitationManager:
     """Gerencia citações e referências jurídicas"""
     
@@ -36,19 +82,37 @@ class CitationManager:
         
         citations = []
         for doc_num in cited_docs:
-            # doc_num começa em 1, lista em 0
-            doc_index = doc_num - 1
-            
-            if doc_index < len(documents):
-                doc = documents[doc_index]
-                citation = await self._format_citation(doc, doc_num, query_id)
+            citation = await self.resolve_citation(doc_num, documents, query_id)
+            if citation:
                 citations.append(citation)
         
         return citations
     
+    async def resolve_citation(
+        self,
+        doc_num: int,
+        documents: List[Dict],
+        query_id: int = None
+    ) -> Optional[Dict]:
+        """
+        Citação completa do documento [Doc N] (None se N não existe)
+        
+        Args:
+            doc_num: Número do documento na resposta (começa em 1)
+            documents: Lista de documentos usados
+            query_id: ID da query (opcional)
+        """
+        # doc_num começa em 1, lista em 0
+        doc_index = doc_num - 1
+        
+        if 0 <= doc_index < len(documents):
+            return await self._format_citation(documents[doc_index], doc_num, query_id)
+        
+        return None
+    
     def _extract_cited_documents(self, answer: str) -> List[int]:
         """Extrai números de documentos citados [Doc N]"""
-        citations = re.findall(r'\[Doc\s+(\d+)\]', answer)
+        citations = CITATION_PATTERN.findall(answer)
         return [int(c) for c in set(citations)]  # Remover duplicatas
     
     async def _format_citation(
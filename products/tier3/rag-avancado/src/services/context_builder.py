@@ -3,8 +3,9 @@ Microserviço 3: Context Builder
 Responsável por construir contexto ótimo para o LLM
 """
 
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from src.config import Config
+from src.services.context_packer import ContextPacker
 
 
 class ContextBuilder:
@@ -13,6 +14,7 @@ class ContextBuilder:
     def __init__(self):
         self.max_context_length = Config.MAX_CONTEXT_LENGTH
         self.chunk_size = Config.CHUNK_SIZE
+        self.packer = ContextPacker(token_budget=self.max_context_length)
     
     async def build_context(
         self,
@@ -38,8 +40,11 @@ class ContextBuilder:
             reverse=True
         )
         
-        # Selecionar documentos até limite de tokens
-        selected_docs = self._select_documents(sorted_docs)
+        # Selecionar trechos até limite de tokens
+        selected_docs, packing = self._select_documents(
+            sorted_docs,
+            query.get("original_query") or query.get("processed_query")
+        )
         
         # Criar contexto estruturado
         context = {
@@ -55,7 +60,8 @@ class ContextBuilder:
             "metadata": {
                 "total_retrieved": len(documents),
                 "selected": len(selected_docs),
-                "avg_relevance": self._calculate_avg_relevance(selected_docs)
+                "avg_relevance": self._calculate_avg_relevance(selected_docs),
+                "packing": packing
             }
         }
         
@@ -64,30 +70,28 @@ class ContextBuilder:
         
         return context
     
-    def _select_documents(self, documents: List[Dict]) -> List[Dict]:
-        """Seleciona documentos até limite de contexto"""
+    def _select_documents(self, documents: List[Dict], query_text: str = None) -> Tuple[List[Dict], Dict]:
+        """
+        Seleciona trechos dos documentos até limite de contexto
+        
+        Tokens contados com o tokenizer do modelo; trechos quase duplicados
+        descartados e seleção por mochila de relevância (ContextPacker)
+        """
+        try:
+            return self.packer.pack(documents, query_text)
+        except Exception as e:
+            print(f"⚠️ Erro ao empacotar contexto, usando documentos inteiros: {e}")
+        
         selected = []
         total_length = 0
-        
         for doc in documents:
-            content = doc.get("content", "")
-            # Estimativa de tokens (1 token ≈ 4 caracteres)
-            doc_tokens = len(content) // 4
-            
+            doc_tokens = self.packer.count_tokens(doc.get("content", ""))
             if total_length + doc_tokens > self.max_context_length:
-                # Verificar se ainda cabe um resumo
-                if total_length + 200 <= self.max_context_length:
-                    # Adicionar versão resumida
-                    doc_copy = doc.copy()
-                    doc_copy["content"] = content[:800] + "..."
-                    doc_copy["truncated"] = True
-                    selected.append(doc_copy)
                 break
-            
             selected.append(doc)
             total_length += doc_tokens
         
-        return selected
+        return selected, {"context_tokens": total_length, "token_budget": self.max_context_length}
     
     def _format_history(
         self,
@@ -0,0 +1,290 @@
+"""
+Empacotamento do contexto do LLM
+Os documentos recuperados viram trechos de ~CONTEXT_PASSAGE_TOKENS tokens
+(contados com o tokenizer do modelo), trechos quase duplicados são
+descartados por SimHash e a seleção é uma mochila 0/1: maximiza a
+relevância total dos trechos dentro do orçamento de tokens do contexto
+"""
+
+import hashlib
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+from src.config import Config
+
+
+# Sem tiktoken: texto jurídico em português fica perto de 3 caracteres por token
+FALLBACK_CHARS_PER_TOKEN = 3
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?;:])\s+|\n\s*\n')
+WORD_PATTERN = re.compile(r'\w+')
+QUERY_TERM_PATTERN = re.compile(r'\w{3,}')
+# Palavras por shingle do SimHash
+SHINGLE_SIZE = 3
+SIMHASH_BITS = 64
+# Colunas da tabela da mochila (o orçamento é discretizado nesse número de faixas)
+KNAPSACK_RESOLUTION = 512
+# Cabeçalho típico de um documento no prompt (custo reservado por trecho)
+HEADER_SAMPLE = "\n[Doc 10] (Tipo: jurisprudencia, Tribunal: TJSP, Data: 2024-01-01, Relevância: 87.50%)\n\n"
+PASSAGE_SEPARATOR = " [...] "
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str):
+    """Encoder do tiktoken para o modelo (cl100k_base se desconhecido); None sem tiktoken"""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"⚠️ Tokenizer indisponível para {model}, usando estimativa: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    """Tokens do texto no tokenizer do modelo (estimativa por caracteres sem tiktoken)"""
+    encoder = get_encoder(model or Config.OPENAI_MODEL)
+    if encoder is None:
+        return math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def simhash(text: str) -> int:
+    """SimHash de 64 bits dos shingles de palavras do texto"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) >= SHINGLE_SIZE:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    else:
+        shingles = set(words)
+    if not shingles:
+        return 0
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64
+    )
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    # Bit ligado na impressão quando ligado na maioria dos shingles
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return sum(1 << i for i in np.flatnonzero(majority).tolist())
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def knapsack(weights: List[int], values: List[float], capacity: int) -> List[int]:
+    """
+    Mochila 0/1 por programação dinâmica (vetorizada por item)
+
+    Returns:
+        Índices dos itens escolhidos, em ordem crescente
+    """
+    if capacity <= 0 or not weights:
+        return []
+    best = np.zeros(capacity + 1)
+    take = np.zeros((len(weights), capacity + 1), dtype=bool)
+    for i, (weight, value) in enumerate(zip(weights, values)):
+        if weight > capacity:
+            continue
+        with_item = best[:-weight] + value
+        improves = with_item > best[weight:]
+        take[i, weight:] = improves
+        best[weight:] = np.where(improves, with_item, best[weight:])
+
+    chosen = []
+    remaining = capacity
+    for i in range(len(weights) - 1, -1, -1):
+        if take[i, remaining]:
+            chosen.append(i)
+            remaining -= weights[i]
+    return sorted(chosen)
+
+
+class ContextPacker:
+    """Seleciona os trechos dos documentos que cabem no orçamento de tokens"""
+
+    def __init__(
+        self,
+        token_budget: int = None,
+        passage_tokens: int = None,
+        dedup_distance: int = None,
+        model: str = None
+    ):
+        self.token_budget = token_budget or Config.MAX_CONTEXT_LENGTH
+        self.passage_tokens = passage_tokens or Config.CONTEXT_PASSAGE_TOKENS
+        self.dedup_distance = Config.CONTEXT_DEDUP_DISTANCE if dedup_distance is None else dedup_distance
+        self.model = model or Config.OPENAI_MODEL
+
+    @property
+    def tokenizer(self) -> str:
+        encoder = get_encoder(self.model)
+        return encoder.name if encoder is not None else "estimate"
+
+    def count_tokens(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def split_passages(self, content: str) -> List[str]:
+        """Quebra o conteúdo em trechos de até passage_tokens, em fronteiras de frase"""
+        passages = []
+        current: List[str] = []
+        current_tokens = 0
+        for sentence in SENTENCE_BOUNDARY.split(content):
+            sentence = (sentence or "").strip()
+            if not sentence:
+                continue
+            tokens = self.count_tokens(sentence)
+            if current and current_tokens + tokens > self.passage_tokens:
+                passages.append(" ".join(current))
+                current, current_tokens = [], 0
+            if tokens > self.passage_tokens:
+                passages.extend(self._split_long(sentence))
+                continue
+            current.append(sentence)
+            current_tokens += tokens
+        if current:
+            passages.append(" ".join(current))
+        return passages
+
+    def _split_long(self, sentence: str) -> List[str]:
+        """Frase maior que um trecho: blocos de palavras de até passage_tokens tokens"""
+        pieces = []
+        current: List[str] = []
+        current_tokens = 0
+        for word in sentence.split():
+            tokens = self.count_tokens(" " + word)
+            if current and current_tokens + tokens > self.passage_tokens:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += tokens
+        if current:
+            pieces.append(" ".join(current))
+        return pieces
+
+    @staticmethod
+    def _coverage(passage: str, query_terms: Set[str]) -> float:
+        """Fração dos termos da pergunta presentes no trecho"""
+        if not query_terms:
+            return 0.0
+        words = set(QUERY_TERM_PATTERN.findall(passage.lower()))
+        return len(query_terms & words) / len(query_terms)
+
+    def pack(self, documents: List[Dict], query_text: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+        """
+        Empacota os documentos no orçamento de tokens
+
+        Valor de um trecho = similaridade do documento x (0.5 + 0.5 x fração
+        dos termos da pergunta no trecho); cada trecho custa seus tokens mais
+        um cabeçalho de documento. Quase duplicatas (distância de Hamming do
+        SimHash <= dedup_distance) ficam só com o trecho de maior valor.
+
+        Args:
+            documents: Documentos ordenados por relevância
+            query_text: Pergunta (pondera os trechos de um mesmo documento)
+
+        Returns:
+            (documentos com os trechos escolhidos, na ordem recebida;
+             estatísticas do empacotamento)
+        """
+        query_terms = set(QUERY_TERM_PATTERN.findall((query_text or "").lower()))
+        header_tokens = self.count_tokens(HEADER_SAMPLE)
+        separator_tokens = self.count_tokens(PASSAGE_SEPARATOR)
+
+        passages = []
+        for doc_index, doc in enumerate(documents):
+            relevance = max(float(doc.get("similarity_score") or 0), 0.0)
+            for position, text in enumerate(self.split_passages(doc.get("content") or "")):
+                passages.append({
+                    "doc": doc_index,
+                    "position": position,
+                    "text": text,
+                    "tokens": self.count_tokens(text),
+                    "value": relevance * (0.5 + 0.5 * self._coverage(text, query_terms)) + 1e-6
+                })
+        passage_counts = [0] * len(documents)
+        for passage in passages:
+            passage_counts[passage["doc"]] += 1
+
+        # Quase duplicatas: fica o trecho de maior valor
+        unique = []
+        fingerprints = []
+        for passage in sorted(passages, key=lambda p: p["value"], reverse=True):
+            fingerprint = simhash(passage["text"])
+            if any(hamming(fingerprint, other) <= self.dedup_distance for other in fingerprints):
+                continue
+            fingerprints.append(fingerprint)
+            unique.append(passage)
+        duplicates_removed = len(passages) - len(unique)
+
+        # Mochila com pesos arredondados para cima (a seleção nunca passa do orçamento)
+        unit = max(1, math.ceil(self.token_budget / KNAPSACK_RESOLUTION))
+        costs = [passage["tokens"] + header_tokens for passage in unique]
+        chosen = set(knapsack(
+            [math.ceil(cost / unit) for cost in costs],
+            [passage["value"] for passage in unique],
+            self.token_budget // unit
+        ))
+        used = sum(costs[i] for i in chosen)
+
+        # Sobra do arredondamento e dos cabeçalhos repetidos: trechos de
+        # documentos já escolhidos custam só o separador
+        selected_docs = {unique[i]["doc"] for i in chosen}
+        for i in sorted(set(range(len(unique))) - chosen, key=lambda i: unique[i]["value"], reverse=True):
+            passage = unique[i]
+            cost = passage["tokens"] + (separator_tokens if passage["doc"] in selected_docs else header_tokens)
+            if used + cost <= self.token_budget:
+                chosen.add(i)
+                selected_docs.add(passage["doc"])
+                used += cost
+
+        by_doc: Dict[int, List[Dict]] = {}
+        for i in chosen:
+            by_doc.setdefault(unique[i]["doc"], []).append(unique[i])
+
+        packed = []
+        for doc_index in sorted(by_doc):
+            doc_passages = sorted(by_doc[doc_index], key=lambda p: p["position"])
+            doc = documents[doc_index]
+            doc_copy = doc.copy()
+            doc_copy["token_count"] = sum(p["tokens"] for p in doc_passages)
+            doc_copy["source_hash"] = hashlib.sha256((doc.get("content") or "").encode("utf-8")).hexdigest()
+            # Documento inteiro mantém o texto original (quebras de linha inclusive)
+            if len(doc_passages) < passage_counts[doc_index]:
+                doc_copy["content"] = self._join(doc_passages, passage_counts[doc_index])
+                doc_copy["truncated"] = True
+            packed.append(doc_copy)
+
+        stats = {
+            "tokenizer": self.tokenizer,
+            "token_budget": self.token_budget,
+            "context_tokens": used,
+            "passages": len(passages),
+            "passages_selected": len(chosen),
+            "duplicates_removed": duplicates_removed
+        }
+        return packed, stats
+
+    @staticmethod
+    def _join(passages: List[Dict], total: int) -> str:
+        """Junta os trechos marcando as lacunas com [...]"""
+        content = PASSAGE_SEPARATOR.lstrip() if passages[0]["position"] > 0 else ""
+        for previous, passage in zip([None] + passages, passages):
+            if previous is not None:
+                content += " " if passage["position"] == previous["position"] + 1 else PASSAGE_SEPARATOR
+            content += passage["text"]
+        if passages[-1]["position"] < total - 1:
+            content += PASSAGE_SEPARATOR.rstrip()
+        return content
@@ -0,0 +1,249 @@
+"""
+Busca híbrida: índice BM25 em memória + fusão por reciprocal rank fusion
+Consultas com número CNJ, artigos e nomes de leis dependem de casamento
+exato de termos, que a busca densa (embeddings) sozinha perde
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# Número CNJ inteiro vira um único token (as partes soltas só gerariam ruído)
+CNJ_PATTERN = re.compile(r"\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}")
+WORD_PATTERN = re.compile(r"\w+")
+
+# Constante do RRF (valor do artigo original; reduz o peso das primeiras posições)
+RRF_K = 60
+
+# Palavras sem valor para o casamento lexical
+STOP_WORDS = {
+    "a", "o", "de", "da", "do", "e", "em", "para", "com", "por",
+    "um", "uma", "os", "as", "dos", "das", "ao", "no", "na",
+    "que", "se", "foi", "sao", "tem", "mais", "como", "qual", "quais", "sobre"
+}
+
+
+def _strip_accents(text: str) -> str:
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens em minúsculas e sem acento; números CNJ preservados inteiros"""
+    text = text.lower()
+    tokens = CNJ_PATTERN.findall(text)
+    if tokens:
+        text = CNJ_PATTERN.sub(" ", text)
+    for word in WORD_PATTERN.findall(_strip_accents(text)):
+        if word not in STOP_WORDS:
+            tokens.append(word)
+    return tokens
+
+
+def matches_where(metadata: Dict, where: Optional[Dict]) -> bool:
+    """
+    Avalia um filtro no formato do ChromaDB sobre os metadados
+
+    Suporta o que Retriever._build_filter gera: $and, $or e operadores
+    $eq, $ne, $in e $nin por campo.
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+        else:
+            value = metadata.get(key)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, expected in condition.items():
+                if op == "$eq" and value != expected:
+                    return False
+                if op == "$ne" and value == expected:
+                    return False
+                if op == "$in" and value not in expected:
+                    return False
+                if op == "$nin" and value in expected:
+                    return False
+    return True
+
+
+class BM25Index:
+    """
+    Índice invertido BM25 (Okapi) em memória
+
+    Postings por termo com arrays numpy; a pontuação de uma consulta soma
+    apenas as listas dos termos da consulta.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        self._total_length = 0
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._norm: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    def add(self, doc_id: str, content: str, metadata: Optional[Dict] = None):
+        """Adiciona (ou substitui) um documento"""
+        with self._lock:
+            if doc_id in self._positions:
+                self._remove(doc_id)
+
+            position = len(self.ids)
+            counts = Counter(tokenize(content or ""))
+            self.ids.append(doc_id)
+            self.documents.append(content or "")
+            self.metadatas.append(metadata or {})
+            self._positions[doc_id] = position
+            length = sum(counts.values())
+            self._lengths.append(length)
+            self._total_length += length
+            self._norm = None
+
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[position] = tf
+                self._arrays.pop(term, None)
+
+    def add_many(self, items: Iterable[Tuple[str, str, Optional[Dict]]]):
+        for doc_id, content, metadata in items:
+            self.add(doc_id, content, metadata)
+
+    def remove(self, doc_id: str):
+        """Remove um documento (ID ausente é ignorado)"""
+        with self._lock:
+            if doc_id in self._positions:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        # Posição fica vaga (comprimento 0, sem postings)
+        position = self._positions.pop(doc_id)
+        for term in set(tokenize(self.documents[position])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(position, None)
+                self._arrays.pop(term, None)
+        self._total_length -= self._lengths[position]
+        self._lengths[position] = 0
+        self.documents[position] = ""
+        self._norm = None
+
+    def _posting_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+            )
+            self._arrays[term] = arrays
+        return arrays
+
+    def search(self, query: str, n_results: int = 10, where: Optional[Dict] = None) -> List[Dict]:
+        """
+        Busca BM25
+
+        Returns:
+            Lista de {id, content, metadata, bm25_score}, do maior score para o menor
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._positions)
+            if not terms or not n_docs:
+                return []
+
+            if self._norm is None:
+                # Normalização por comprimento (recalculada só após inserções)
+                lengths = np.asarray(self._lengths, dtype=np.float32)
+                avg_length = self._total_length / n_docs or 1.0
+                self._norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+            norm = self._norm
+            scores = np.zeros(len(self.ids), dtype=np.float32)
+
+            for term in terms:
+                arrays = self._posting_arrays(term)
+                if arrays is None:
+                    continue
+                positions, tfs = arrays
+                df = len(positions)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                scores[positions] += idf * tfs * (self.k1 + 1) / (tfs + norm[positions])
+
+            candidates = np.flatnonzero(scores > 0)
+            if where:
+                candidates = np.array(
+                    [p for p in candidates if matches_where(self.metadatas[p], where)],
+                    dtype=np.int64
+                )
+            if not len(candidates):
+                return []
+
+            if len(candidates) > n_results:
+                top = candidates[np.argpartition(-scores[candidates], n_results - 1)[:n_results]]
+            else:
+                top = candidates
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            return [
+                {
+                    "id": self.ids[p],
+                    "content": self.documents[p],
+                    "metadata": self.metadatas[p],
+                    "bm25_score": round(float(scores[p]), 4),
+                }
+                for p in top
+            ]
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: List[Tuple[List[str], float]],
+    k: int = RRF_K
+) -> List[Tuple[str, float]]:
+    """
+    Funde rankings por reciprocal rank fusion
+
+    Args:
+        ranked_lists: Pares (ids em ordem de relevância, peso da lista)
+        k: Constante do RRF
+
+    Returns:
+        (id, score) em ordem decrescente; score normalizado para 0-1
+        (1 = primeiro lugar em todas as listas com peso)
+    """
+    scores: Dict[str, float] = {}
+    for ids, weight in ranked_lists:
+        for rank, doc_id in enumerate(ids, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+
+    best_possible = sum(weight for _, weight in ranked_lists) / (k + 1)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    if best_possible <= 0:
+        return fused
+    return [(doc_id, score / best_possible) for doc_id, score in fused]
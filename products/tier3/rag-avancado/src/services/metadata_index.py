@@ -0,0 +1,142 @@
+"""
+Índice invertido dos metadados de filtro
+valor de cada campo filtrável (tribunal, magistrado, assunto) -> posições
+dos documentos com esse valor; permite contar quantos documentos um filtro
+do ChromaDB casa antes de consultar e escolher entre pré e pós-filtro
+"""
+
+import threading
+from array import array
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+class MetadataIndex:
+    """
+    Cardinalidade dos filtros sobre os campos indexados
+
+    Conta exatamente $eq e $in combinados por $and e $or; operadores não
+    suportados ($ne, $nin) e campos não indexados são ignorados dentro de um
+    $and, o que deixa a contagem como limite superior.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = tuple(fields)
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._positions: Dict[str, int] = {}
+        # Valores dos campos indexados por posição (tuplas compartilhadas entre documentos)
+        self._values: List[Optional[tuple]] = []
+        self._combinations: Dict[tuple, tuple] = {}
+        # campo -> valor -> posições (array compacto, crescente)
+        self._postings: Dict[str, Dict[object, array]] = {field: {} for field in self.fields}
+        self._arrays: Dict[Tuple[str, object], np.ndarray] = {}
+        # Posições de documentos substituídos com outros valores (excluídas das contagens)
+        self._removed = array("q")
+        self._removed_array: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, doc_id: str, metadata: Optional[Dict]):
+        """Adiciona ou substitui um documento (upsert)"""
+        values = tuple((metadata or {}).get(field) for field in self.fields)
+        values = self._combinations.setdefault(values, values)
+        with self._lock:
+            old = self._positions.get(doc_id)
+            if old is not None:
+                if self._values[old] == values:
+                    return
+                # Posição antiga vira lápide; o documento ganha uma nova
+                self._discard(old)
+
+            position = len(self._values)
+            self._positions[doc_id] = position
+            self._values.append(values)
+            for field, value in zip(self.fields, values):
+                if value is None:
+                    continue
+                self._postings[field].setdefault(value, array("q")).append(position)
+                self._arrays.pop((field, value), None)
+
+    def add_many(self, items: Iterable[Tuple[str, Optional[Dict]]]):
+        for doc_id, metadata in items:
+            self.add(doc_id, metadata)
+
+    def remove(self, doc_id: str):
+        """Remove um documento (ID ausente é ignorado)"""
+        with self._lock:
+            position = self._positions.pop(doc_id, None)
+            if position is not None:
+                self._discard(position)
+
+    def _discard(self, position: int):
+        """Marca a posição como lápide (chamar com lock)"""
+        self._values[position] = None
+        self._removed.append(position)
+        self._removed_array = None
+
+    def _array(self, field: str, value) -> np.ndarray:
+        key = (field, value)
+        positions = self._arrays.get(key)
+        if positions is None:
+            postings = self._postings[field].get(value)
+            positions = np.array(postings, dtype=np.int64) if postings else _EMPTY
+            self._arrays[key] = positions
+        return positions
+
+    def _match_field(self, field: str, condition) -> Optional[np.ndarray]:
+        if field not in self._postings:
+            return None
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        parts = []
+        for op, expected in condition.items():
+            if op == "$eq":
+                parts.append(self._array(field, expected))
+            elif op == "$in":
+                parts.append(reduce(np.union1d, (self._array(field, value) for value in expected), _EMPTY))
+        return reduce(np.intersect1d, parts) if parts else None
+
+    def _match(self, where: Dict) -> Optional[np.ndarray]:
+        """Posições que casam (None = não dá para limitar)"""
+        parts = []
+        for key, condition in where.items():
+            if key == "$and":
+                part = [self._match(sub) for sub in condition]
+                known = [p for p in part if p is not None]
+                parts.append(reduce(np.intersect1d, known) if known else None)
+            elif key == "$or":
+                part = [self._match(sub) for sub in condition]
+                parts.append(None if not part or any(p is None for p in part) else reduce(np.union1d, part))
+            else:
+                parts.append(self._match_field(key, condition))
+        known = [p for p in parts if p is not None]
+        return reduce(np.intersect1d, known) if known else None
+
+    def count(self, where: Optional[Dict]) -> Optional[int]:
+        """Documentos que casam o filtro (limite superior); None se desconhecido"""
+        if not where:
+            return len(self._positions)
+        with self._lock:
+            matched = self._match(where)
+            if matched is not None and len(self._removed):
+                if self._removed_array is None:
+                    self._removed_array = np.array(self._removed, dtype=np.int64)
+                matched = np.setdiff1d(matched, self._removed_array, assume_unique=True)
+        return None if matched is None else int(len(matched))
+
+    def selectivity(self, where: Optional[Dict]) -> Optional[float]:
+        """Fração da coleção que casa o filtro; None se desconhecida"""
+        total = len(self._positions)
+        matching = self.count(where)
+        if matching is None or not total:
+            return None
+        return matching / total
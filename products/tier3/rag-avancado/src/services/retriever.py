@@ -3,12 +3,18 @@ Microserviço 2: Retriever
 Responsável por buscar documentos relevantes no ChromaDB
 """
 
-from typing import Dict, List, Optional
+import asyncio
+import math
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
 import chromadb
 from chromadb.config import Settings
 from pathlib import Path
 
 from src.config import Config
+from src.services.hybrid_search import BM25Index, matches_where, reciprocal_rank_fusion
+from src.services.metadata_index import MetadataIndex
 
 
 class Retriever:
@@ -19,6 +25,20 @@ class Retriever:
         self.client = None
         self.collection = None
         self._initialize_chromadb()
+        
+        # Índice BM25 da coleção (construído na primeira busca híbrida)
+        self.lexical_index = BM25Index()
+        self._lexical_count = None
+        self._lexical_lock = threading.Lock()
+        
+        # Cardinalidade dos filtros de metadados (planejamento da busca densa)
+        self.metadata_index = MetadataIndex(Config.METADATA_INDEX_FIELDS)
+        self._metadata_count = None
+        self._metadata_lock = threading.Lock()
+        
+        # Ingestões em lote em andamento (índices atualizados por lote, sem reconstrução)
+        self._bulk_updates = 0
+        self._bulk_lock = threading.Lock()
     
     def _initialize_chromadb(self):
         """Inicializa conexão com ChromaDB"""
@@ -58,7 +78,8 @@ class Retriever:
         self,
         query: str,
         processed_query: Dict,
-        n_results: int = None
+        n_results: int = None,
+        mode: str = None
     ) -> List[Dict]:
         """
         Busca documentos relevantes
@@ -67,6 +88,7 @@ class Retriever:
             query: Query original
             processed_query: Query processada com metadata
             n_results: Número de resultados (default: TOP_K_RESULTS)
+            mode: "hybrid" ou "dense" (default: RETRIEVAL_MODE)
             
         Returns:
             Lista de documentos com scores de relevância
@@ -74,6 +96,8 @@ class Retriever:
         if n_results is None:
             n_results = Config.TOP_K_RESULTS
         
+        mode = mode or Config.RETRIEVAL_MODE
+        
         try:
             # Usar query expandida para melhor recall
             search_query = processed_query.get("expanded_query", query)
@@ -81,23 +105,120 @@ class Retriever:
             # Construir filtro baseado em entidades
             where_filter = self._build_filter(processed_query.get("entities", {}))
             
-            # Buscar no ChromaDB
-            results = self.collection.query(
-                query_texts=[search_query],
-                n_results=n_results * 2,  # Buscar mais para filtrar depois
-                where=where_filter if where_filter else None,
-                include=["documents", "metadatas", "distances"]
-            )
+            if mode == "hybrid":
+                return await self._hybrid_retrieve(
+                    search_query,
+                    processed_query.get("query_type"),
+                    where_filter,
+                    n_results
+                )
             
-            # Processar resultados
-            documents = self._process_results(results, n_results)
+            # Buscar no ChromaDB (candidatos crescem até n_results passarem do threshold)
+            hits = self._dense_search(
+                search_query,
+                where_filter,
+                n_results,
+                Config.SIMILARITY_THRESHOLD
+            )
             
-            return documents
+            return [
+                {
+                    "id": hit["id"],
+                    "content": hit["content"],
+                    "metadata": hit["metadata"],
+                    "similarity_score": round(hit["similarity"], 4),
+                    "rank": rank
+                }
+                for rank, hit in enumerate(hits, start=1)
+            ]
         
         except Exception as e:
             print(f"❌ Erro ao buscar documentos: {e}")
             return []
     
+    async def _hybrid_retrieve(
+        self,
+        search_query: str,
+        query_type: Optional[str],
+        where_filter: Optional[Dict],
+        n_results: int
+    ) -> List[Dict]:
+        """
+        Busca BM25 e vetorial em paralelo, fundidas por reciprocal rank fusion
+        
+        O peso de cada lista depende do tipo da consulta (HYBRID_LEXICAL_WEIGHTS):
+        número de processo e legislação favorecem o casamento exato de termos.
+        O similarity_score devolvido é o score da fusão (0-1).
+        """
+        candidates = max(Config.HYBRID_CANDIDATES, n_results * 2)
+        
+        dense_hits, lexical_results = await asyncio.gather(
+            asyncio.to_thread(self._dense_search, search_query, where_filter, candidates),
+            asyncio.to_thread(self._lexical_search, search_query, candidates, where_filter)
+        )
+        
+        dense_docs = {hit["id"]: hit for hit in dense_hits}
+        lexical_docs = {doc["id"]: doc for doc in lexical_results}
+        
+        lexical_weight = Config.HYBRID_LEXICAL_WEIGHTS.get(query_type, 0.5)
+        fused = reciprocal_rank_fusion([
+            (list(lexical_docs), lexical_weight),
+            (list(dense_docs), 1 - lexical_weight)
+        ])
+        
+        documents = []
+        for doc_id, score in fused:
+            dense = dense_docs.get(doc_id)
+            lexical = lexical_docs.get(doc_id)
+            
+            # Sem casamento lexical vale o threshold da busca vetorial
+            if lexical is None and dense["similarity"] < Config.SIMILARITY_THRESHOLD:
+                continue
+            
+            source = dense or lexical
+            documents.append({
+                "id": doc_id,
+                "content": source["content"],
+                "metadata": source["metadata"],
+                "similarity_score": round(score, 4),
+                "dense_similarity": round(dense["similarity"], 4) if dense else None,
+                "bm25_score": lexical["bm25_score"] if lexical else None,
+                "rank": len(documents) + 1
+            })
+            if len(documents) == n_results:
+                break
+        
+        return documents
+    
+    def _lexical_search(self, query: str, n_results: int, where_filter: Optional[Dict]) -> List[Dict]:
+        """Busca BM25 (com o índice atualizado); falha vira lista vazia"""
+        try:
+            self._ensure_lexical_index()
+            return self.lexical_index.search(query, n_results, where_filter)
+        except Exception as e:
+            print(f"❌ Erro na busca lexical: {e}")
+            return []
+    
+    def _ensure_lexical_index(self, page_size: int = 1000):
+        """(Re)constrói o índice BM25 quando a coleção mudou por fora deste processo"""
+        with self._lexical_lock:
+            if self._bulk_updates and self._lexical_count is not None:
+                return
+            count = self.collection.count()
+            if count == self._lexical_count:
+                return
+            
+            self.lexical_index.clear()
+            for offset in range(0, count, page_size):
+                page = self.collection.get(
+                    limit=page_size,
+                    offset=offset,
+                    include=["documents", "metadatas"]
+                )
+                self.lexical_index.add_many(zip(page["ids"], page["documents"], page["metadatas"]))
+            self._lexical_count = count
+            print(f"✅ Índice BM25 construído: {len(self.lexical_index)} documentos")
+    
     def _build_filter(self, entities: Dict) -> Optional[Dict]:
         """Constrói filtro ChromaDB baseado em entidades"""
         filters = []
@@ -128,38 +249,136 @@ class Retriever:
         
         return None
     
-    def _process_results(self, results: Dict, n_results: int) -> List[Dict]:
+    def _ensure_metadata_index(self, page_size: int = 1000):
+        """(Re)constrói o índice de metadados quando a coleção mudou por fora deste processo"""
+        with self._metadata_lock:
+            if self._bulk_updates and self._metadata_count is not None:
+                return
+            count = self.collection.count()
+            if count == self._metadata_count:
+                return
+            
+            self.metadata_index.clear()
+            for offset in range(0, count, page_size):
+                page = self.collection.get(limit=page_size, offset=offset, include=["metadatas"])
+                self.metadata_index.add_many(zip(page["ids"], page["metadatas"]))
+            self._metadata_count = count
+    
+    def plan_query(self, where_filter: Optional[Dict], n_results: int) -> Dict:
+        """
+        Escolhe como aplicar o filtro na busca densa
+        
+        - none: sem filtro
+        - prefilter: filtro seletivo (até PREFILTER_MAX_SELECTIVITY da coleção)
+          vai como where; candidatos limitados aos documentos que casam
+        - postfilter: filtro amplo; busca sem where (HNSW sem restrição) com
+          k / seletividade candidatos e filtra os resultados aqui
+        
+        Returns:
+            Dict com strategy, matching, selectivity, fetch (candidatos
+            iniciais) e limit (teto do over-fetch)
+        """
+        try:
+            self._ensure_metadata_index()
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar índice de metadados: {e}")
+        
+        total = self._metadata_count
+        initial = n_results * Config.RETRIEVAL_OVERFETCH_FACTOR
+        cap = max(Config.RETRIEVAL_MAX_CANDIDATES, n_results)
+        plan = {"strategy": "none", "matching": total, "selectivity": None, "fetch": initial, "limit": cap}
+        if total is not None:
+            plan["limit"] = max(min(cap, total), 1)
+        
+        if where_filter:
+            matching = self.metadata_index.count(where_filter) if total is not None else None
+            selectivity = matching / total if matching is not None and total else None
+            plan.update(matching=matching, selectivity=selectivity)
+            if selectivity is None or selectivity <= Config.PREFILTER_MAX_SELECTIVITY:
+                plan["strategy"] = "prefilter"
+                # Índice desatualizado (upsert que só mudou metadados) não zera a busca
+                if matching is not None:
+                    plan["limit"] = max(min(cap, matching), n_results)
+            else:
+                plan["strategy"] = "postfilter"
+                plan["fetch"] = math.ceil(initial / selectivity)
+        
+        plan["fetch"] = max(min(plan["fetch"], plan["limit"]), 1)
+        return plan
+    
+    def _dense_search(
+        self,
+        search_query: str,
+        where_filter: Optional[Dict],
+        n_results: int,
+        threshold: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Busca vetorial com over-fetch adaptativo
+        
+        Os candidatos dobram até n_results passarem do threshold e do filtro,
+        parando no teto, quando a coleção se esgota ou quando o candidato
+        mais distante já ficou abaixo do threshold (os seguintes também
+        ficariam). Pós-filtro que não chega a n_results no teto (filtro
+        correlacionado com a consulta) é refeito como pré-filtro.
+        
+        Returns:
+            Lista de {id, content, metadata, similarity}, do mais similar ao menos
+        """
+        plan = self.plan_query(where_filter, n_results)
+        prefilter = plan["strategy"] == "prefilter"
+        n_candidates = plan["fetch"]
+        while True:
+            results = self.collection.query(
+                query_texts=[search_query],
+                n_results=n_candidates,
+                where=where_filter if prefilter else None,
+                include=["documents", "metadatas", "distances"]
+            )
+            hits = self._parse_results(results)
+            passed = [
+                hit for hit in hits
+                if (threshold is None or hit["similarity"] >= threshold)
+                and (prefilter or matches_where(hit["metadata"], where_filter))
+            ]
+            below_threshold = threshold is not None and hits and hits[-1]["similarity"] < threshold
+            exhausted = len(hits) < n_candidates or n_candidates >= plan["limit"]
+            
+            if len(passed) >= n_results or below_threshold:
+                break
+            if exhausted:
+                # Pós-filtro parou no teto (não na coleção inteira): refazer com where
+                if plan["strategy"] == "postfilter" and not prefilter and len(hits) == n_candidates:
+                    prefilter = True
+                    n_candidates = max(min(n_results * Config.RETRIEVAL_OVERFETCH_FACTOR, plan["matching"]), n_results)
+                    plan["limit"] = n_candidates
+                    continue
+                break
+            n_candidates = min(n_candidates * 2, plan["limit"])
+        
+        return passed[:n_results]
+    
+    def _parse_results(self, results: Dict) -> List[Dict]:
         """Processa resultados do ChromaDB"""
-        documents = []
+        hits = []
         
         # ChromaDB retorna listas paralelas
-        ids = results.get("ids", [[]])[0]
-        docs = results.get("documents", [[]])[0]
-        metadatas = results.get("metadatas", [[]])[0]
-        distances = results.get("distances", [[]])[0]
-        
-        for i, (doc_id, doc, metadata, distance) in enumerate(zip(
-            ids, docs, metadatas, distances
-        )):
-            # Converter distance para similarity score (cosine)
-            # Distance no ChromaDB: menor = mais similar
+        for doc_id, doc, metadata, distance in zip(
+            results.get("ids", [[]])[0],
+            results.get("documents", [[]])[0],
+            results.get("metadatas", [[]])[0],
+            results.get("distances", [[]])[0]
+        ):
+            # Distance no ChromaDB (cosine): menor = mais similar
             # Similarity: 0 a 1, maior = mais similar
-            similarity = 1 - distance
-            
-            # Filtrar por threshold
-            if similarity < Config.SIMILARITY_THRESHOLD:
-                continue
-            
-            documents.append({
+            hits.append({
                 "id": doc_id,
                 "content": doc,
                 "metadata": metadata or {},
-                "similarity_score": round(similarity, 4),
-                "rank": i + 1
+                "similarity": 1 - distance
             })
         
-        # Limitar ao número solicitado
-        return documents[:n_results]
+        return hits
     
     async def add_document(
         self,
@@ -184,12 +403,103 @@ class Retriever:
                 documents=[content],
                 metadatas=[metadata]
             )
+            
+            # Manter o índice BM25 em dia sem reconstruir
+            with self._lexical_lock:
+                if self._lexical_count is not None:
+                    self.lexical_index.add(document_id, content, metadata)
+                    self._lexical_count += 1
+            with self._metadata_lock:
+                if self._metadata_count is not None:
+                    self.metadata_index.add(document_id, metadata)
+                    self._metadata_count += 1
             return True
         
         except Exception as e:
             print(f"❌ Erro ao adicionar documento: {e}")
             return False
     
+    def index_documents(self, items: List[Tuple[str, str, Dict]]):
+        """
+        Atualiza os índices em memória com documentos gravados por upsert
+        
+        Documentos já indexados são substituídos (conteúdo e metadados novos).
+        Índices ainda não construídos ficam para a primeira busca.
+        """
+        with self._lexical_lock:
+            if self._lexical_count is not None:
+                self.lexical_index.add_many(items)
+        with self._metadata_lock:
+            if self._metadata_count is not None:
+                self.metadata_index.add_many((doc_id, metadata) for doc_id, _, metadata in items)
+    
+    def remove_documents(self, ids: List[str]):
+        """Remove dos índices em memória documentos apagados da coleção"""
+        with self._lexical_lock:
+            if self._lexical_count is not None:
+                for doc_id in ids:
+                    self.lexical_index.remove(doc_id)
+        with self._metadata_lock:
+            if self._metadata_count is not None:
+                for doc_id in ids:
+                    self.metadata_index.remove(doc_id)
+    
+    @contextmanager
+    def bulk_update(self):
+        """
+        Suspende a reconstrução dos índices por mudança na contagem enquanto
+        uma ingestão em lote atualiza-os via index_documents; ao final a
+        contagem atual passa a valer para os índices já construídos
+        """
+        with self._bulk_lock:
+            self._bulk_updates += 1
+        try:
+            yield
+        finally:
+            with self._bulk_lock:
+                self._bulk_updates -= 1
+                finished = self._bulk_updates == 0
+            if finished:
+                self._sync_index_counts()
+    
+    def _sync_index_counts(self):
+        """Marca os índices já construídos como atualizados com a contagem atual"""
+        try:
+            count = self.collection.count()
+        except Exception as e:
+            print(f"⚠️ Erro ao contar documentos da coleção: {e}")
+            return
+        with self._lexical_lock:
+            if self._lexical_count is not None:
+                self._lexical_count = count
+        with self._metadata_lock:
+            if self._metadata_count is not None:
+                self._metadata_count = count
+    
+    def collection_version(self) -> Optional[int]:
+        """
+        Versão da coleção para o cache de respostas (número de documentos)
+        
+        Inserções e remoções mudam a versão; alterações de conteúdo são
+        conferidas pelo cache nos documentos citados.
+        """
+        try:
+            return self.collection.count()
+        except Exception as e:
+            print(f"❌ Erro ao obter versão da coleção: {e}")
+            return None
+    
+    def fetch_documents(self, ids: List[str]) -> Dict[str, str]:
+        """Conteúdo atual dos documentos (ids ausentes ficam de fora)"""
+        if not ids:
+            return {}
+        try:
+            results = self.collection.get(ids=ids, include=["documents"])
+            return dict(zip(results.get("ids", []), results.get("documents", [])))
+        except Exception as e:
+            print(f"❌ Erro ao buscar documentos por ID: {e}")
+            return {}
+    
     async def get_collection_stats(self) -> Dict:
         """Retorna estatísticas da coleção"""
         try:
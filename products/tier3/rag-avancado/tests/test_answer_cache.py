@@ -0,0 +1,116 @@
+"""
+Testes do cache semântico de respostas
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.config import Config
+from src.database import Base
+from src.models.query import DocumentCache
+from src.services.answer_cache import AnswerCache, CACHE_DOCUMENT_TYPE
+
+
+DOCUMENTOS = [{"id": "d1", "content": "Dano moral in re ipsa."}, {"id": "d2", "content": "Súmula 385 do STJ."}]
+RESPOSTA = {
+    "answer": "O dano moral é presumido [Doc 1].",
+    "confidence": 0.8,
+    "citations": [{"document_id": "d1", "document_number": 1}],
+    "metadata": {"documents_found": 2, "top_similarity_score": 0.9, "query_type": "jurisprudencia"}
+}
+ENTIDADES = {"tribunal": "STJ", "temas": ["dano moral"]}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def acervo():
+    """Conteúdo atual da coleção (fetch_documents)"""
+    conteudo = {doc["id"]: doc["content"] for doc in DOCUMENTOS}
+
+    def fetch_documents(ids):
+        return {doc_id: conteudo[doc_id] for doc_id in ids if doc_id in conteudo}
+
+    fetch_documents.conteudo = conteudo
+    return fetch_documents
+
+
+def guardar(cache, db, embedding=(1.0, 0.0, 0.0), entidades=ENTIDADES, versao=10, query="o que é dano moral"):
+    cache.store(db, query, list(embedding), entidades, versao, DOCUMENTOS, RESPOSTA, tokens_used=2000)
+
+
+class TestAnswerCache:
+    """Testes do AnswerCache"""
+
+    def test_pergunta_parecida_reaproveita_resposta(self, db, acervo, monkeypatch):
+        """Testa acerto acima do limiar com custo economizado e contador persistido"""
+        monkeypatch.setattr(Config, "OPENAI_COST_PER_1K_TOKENS", 0.05)
+        cache = AnswerCache(similarity_threshold=0.95)
+        guardar(cache, db)
+
+        hit = cache.lookup(db, [0.99, 0.05, 0.0], ENTIDADES, 10, acervo)
+
+        assert hit["answer"] == RESPOSTA["answer"]
+        assert hit["citations"] == RESPOSTA["citations"]
+        assert hit["cache"]["hit"] is True
+        assert hit["cache"]["cost_saved_usd"] == pytest.approx(0.1)
+        assert cache.get_stats(db)["tokens_saved"] == 2000
+        assert db.query(DocumentCache).one().query_count == 1
+
+    def test_pergunta_diferente_ou_outras_entidades(self, db, acervo):
+        """Testa erro abaixo do limiar e com entidades diferentes"""
+        cache = AnswerCache(similarity_threshold=0.95)
+        guardar(cache, db)
+
+        assert cache.lookup(db, [0.5, 0.5, 0.7], ENTIDADES, 10, acervo) is None
+        assert cache.lookup(db, [1.0, 0.0, 0.0], {"tribunal": "TJSP"}, 10, acervo) is None
+        assert cache.get_stats(db)["misses"] == 2
+
+    def test_invalidacao_por_versao_e_conteudo(self, db, acervo):
+        """Testa coleção alterada e documento citado modificado"""
+        cache = AnswerCache(similarity_threshold=0.95)
+        guardar(cache, db)
+
+        assert cache.lookup(db, [1.0, 0.0, 0.0], ENTIDADES, 11, acervo) is None
+        assert db.query(DocumentCache).count() == 0
+
+        guardar(cache, db, versao=11)
+        acervo.conteudo["d2"] = "Súmula 385 do STJ (redação alterada)."
+        assert cache.lookup(db, [1.0, 0.0, 0.0], ENTIDADES, 11, acervo) is None
+        assert len(cache.entries) == 0
+
+    def test_lru_ttl_e_persistencia(self, db, acervo):
+        """Testa descarte da menos usada, TTL e recarga a partir do DocumentCache"""
+        cache = AnswerCache(similarity_threshold=0.95, max_entries=2)
+        guardar(cache, db, embedding=(1, 0, 0), query="a")
+        guardar(cache, db, embedding=(0, 1, 0), query="b")
+        assert cache.lookup(db, [1, 0, 0], ENTIDADES, 10, acervo) is not None
+        guardar(cache, db, embedding=(0, 0, 1), query="c")
+
+        # "b" era a menos usada recentemente
+        assert cache.lookup(db, [0, 1, 0], ENTIDADES, 10, acervo) is None
+        assert db.query(DocumentCache).filter(DocumentCache.document_type == CACHE_DOCUMENT_TYPE).count() == 2
+
+        outro_processo = AnswerCache(similarity_threshold=0.95)
+        assert outro_processo.lookup(db, [0, 0, 1], ENTIDADES, 10, acervo)["answer"] == RESPOSTA["answer"]
+
+        expirado = AnswerCache(similarity_threshold=0.95, ttl_seconds=1)
+        expirado._load(db)
+        for entry in expirado.entries.values():
+            entry["cached_at"] -= 10
+        assert expirado.lookup(db, [1, 0, 0], ENTIDADES, 10, acervo) is None
+        assert db.query(DocumentCache).count() == 0
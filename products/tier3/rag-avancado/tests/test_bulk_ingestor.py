@@ -0,0 +1,203 @@
+"""
+Testes da ingestão em lote (BulkIngestor)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import io
+import json
+
+import pytest
+
+from src.services.bulk_ingestor import BulkIngestor, _iter_json_array, chunk_text, iter_records, normalize_record
+
+
+class ColecaoFake:
+    """Coleção em memória com upsert, delete e get por IDs ou source_id"""
+
+    def __init__(self, falhar_no_upsert=None):
+        self.itens = {}
+        self.upserts = 0
+        self.gets = 0
+        self.falhar_no_upsert = falhar_no_upsert
+
+    def upsert(self, ids, documents, metadatas, embeddings=None):
+        self.upserts += 1
+        if self.upserts == self.falhar_no_upsert:
+            raise RuntimeError("ChromaDB indisponível")
+        for i, doc_id in enumerate(ids):
+            self.itens[doc_id] = {
+                "content": documents[i],
+                "metadata": metadatas[i],
+                "embedding": embeddings[i] if embeddings is not None else None
+            }
+
+    def get(self, ids=None, where=None, include=None):
+        self.gets += 1
+        if ids is not None:
+            encontrados = [doc_id for doc_id in ids if doc_id in self.itens]
+        else:
+            fontes = set(where["source_id"]["$in"])
+            encontrados = [doc_id for doc_id, item in self.itens.items()
+                           if item["metadata"].get("source_id") in fontes]
+        return {"ids": encontrados, "metadatas": [self.itens[doc_id]["metadata"] for doc_id in encontrados]}
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.itens.pop(doc_id, None)
+
+    def count(self):
+        return len(self.itens)
+
+
+def embeddings_fake(textos):
+    embeddings_fake.chamadas.append(len(textos))
+    return [[float(len(texto)), 1.0] for texto in textos]
+
+
+def escrever_jsonl(path, registros):
+    path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in registros), encoding="utf-8")
+
+
+def registros(n):
+    return [
+        {"id": f"doc{i}", "content": f"Acórdão {i}. Dano moral por negativação indevida, número {i}.",
+         "tribunal": "TJSP", "metadata": {"assuntos": ["dano moral"]}}
+        for i in range(n)
+    ]
+
+
+class TestLeitura:
+    """Testes do chunking e da leitura em streaming"""
+
+    def test_chunk_com_sobreposicao(self):
+        """Testa tamanho máximo, corte em palavra e sobreposição entre trechos"""
+        texto = " ".join(f"palavra{i}" for i in range(200))
+
+        chunks = chunk_text(texto, chunk_size=100, chunk_overlap=20)
+
+        assert all(len(c) <= 100 for c in chunks)
+        assert all(c.split()[0].startswith("palavra") for c in chunks)
+        for anterior, atual in zip(chunks, chunks[1:]):
+            assert atual.split()[0] in anterior.split()
+        assert chunks[-1].endswith("palavra199")
+        assert chunk_text("curto", chunk_size=100) == ["curto"]
+
+    def test_array_json_lido_em_blocos(self):
+        """Testa objetos cortados entre blocos de leitura"""
+        dados = registros(5)
+
+        lidos = list(_iter_json_array(io.StringIO(json.dumps(dados, ensure_ascii=False)), read_size=7))
+
+        assert lidos == dados
+
+    def test_formatos_e_normalizacao(self, tmp_path):
+        """Testa JSONL, objeto com documents e metadados achatados para o ChromaDB"""
+        escrever_jsonl(tmp_path / "a.jsonl", registros(2))
+        (tmp_path / "b.json").write_text(json.dumps({"documents": registros(3)}), encoding="utf-8")
+
+        assert len(list(iter_records(str(tmp_path / "a.jsonl")))) == 2
+        assert len(list(iter_records(str(tmp_path / "b.json")))) == 3
+
+        documento = normalize_record(registros(1)[0])
+        assert documento["metadata"] == {"tribunal": "TJSP", "assuntos": '["dano moral"]'}
+        assert normalize_record({"id": "x", "content": "  "}) is None
+
+
+class TestBulkIngestor:
+    """Testes da carga em lote"""
+
+    def test_lotes_deduplicacao_e_estatisticas(self, tmp_path):
+        """Testa embedding em lotes, upserts grandes e documentos inalterados descartados"""
+        embeddings_fake.chamadas = []
+        # Mesmo texto com outro ID é outro documento: gravado
+        dados = registros(10) + [{"id": "copia", "content": registros(1)[0]["content"]}]
+        escrever_jsonl(tmp_path / "corpus.jsonl", dados)
+        colecao = ColecaoFake()
+        ingestor = BulkIngestor(colecao, chunk_size=1000, embed_batch_size=3, upsert_batch_size=4,
+                                checkpoint_dir=str(tmp_path / "ckpt"), embedding_function=embeddings_fake)
+
+        stats = ingestor.ingest(str(tmp_path / "corpus.jsonl"))
+
+        assert stats["status"] == "completed"
+        assert colecao.count() == 11 and "copia" in colecao.itens
+        assert stats["duplicates"] == 0 and stats["chunks_added"] == 11
+        assert max(embeddings_fake.chamadas) == 3
+        assert colecao.upserts == 3
+        assert stats["docs_per_second"] > 0
+        assert colecao.itens["doc0"]["metadata"]["source_id"] == "doc0"
+        assert colecao.itens["doc0"]["embedding"] is not None
+
+        # Segunda carga do mesmo arquivo: nada a fazer; com restart tudo já existe
+        assert BulkIngestor(colecao, checkpoint_dir=str(tmp_path / "ckpt")).ingest(
+            str(tmp_path / "corpus.jsonl"))["documents"] == 0
+        de_novo = BulkIngestor(colecao, upsert_batch_size=4, checkpoint_dir=str(tmp_path / "ckpt"),
+                               embedding_function=None).ingest(str(tmp_path / "corpus.jsonl"), restart=True)
+        assert de_novo["chunks_added"] == 0 and de_novo["duplicates"] == 11
+
+    def test_documento_alterado_substitui_trechos(self, tmp_path):
+        """Testa reingestão com menos/mais trechos e trecho igual ao de outro documento"""
+        texto = " ".join(f"palavra{i}" for i in range(60))
+        escrever_jsonl(tmp_path / "v1.jsonl", [
+            {"id": "a", "content": texto},
+            {"id": "b", "content": "Texto curto do documento b."},
+            {"id": "c", "content": "Trecho compartilhado."},
+        ])
+        colecao = ColecaoFake()
+        removidos = []
+        opcoes = dict(chunk_size=200, chunk_overlap=0, checkpoint_dir=str(tmp_path / "ckpt"),
+                      embedding_function=None, on_delete=removidos.extend)
+        BulkIngestor(colecao, **opcoes).ingest(str(tmp_path / "v1.jsonl"))
+        assert sorted(colecao.itens) == ["a#0", "a#1", "a#2", "b", "c"]
+
+        # a encolhe para um trecho; b cresce; c ganha o texto de b (existente em outro documento)
+        escrever_jsonl(tmp_path / "v2.jsonl", [
+            {"id": "a", "content": "Agora um trecho só."},
+            {"id": "b", "content": texto},
+            {"id": "c", "content": "Texto curto do documento b."},
+        ])
+        stats = BulkIngestor(colecao, **opcoes).ingest(str(tmp_path / "v2.jsonl"))
+
+        assert sorted(colecao.itens) == ["a", "b#0", "b#1", "b#2", "c"]
+        assert sorted(removidos) == ["a#0", "a#1", "a#2", "b"]
+        assert colecao.itens["c"]["content"] == "Texto curto do documento b."
+        assert colecao.itens["b#0"]["metadata"]["chunk_count"] == 3
+        assert stats["chunks_added"] == 5 and stats["chunks_removed"] == 4
+
+        # Mesmo arquivo de novo (outro checkpoint): nada muda
+        gets = colecao.gets
+        de_novo = BulkIngestor(colecao, **opcoes).ingest(str(tmp_path / "v2.jsonl"), restart=True)
+        assert de_novo["chunks_added"] == 0 and de_novo["duplicates"] == 5
+        assert colecao.gets == gets + 2
+
+    def test_retoma_do_checkpoint(self, tmp_path):
+        """Testa falha no segundo upsert e retomada sem reler os registros gravados"""
+        escrever_jsonl(tmp_path / "corpus.jsonl", registros(12))
+        colecao = ColecaoFake(falhar_no_upsert=2)
+        opcoes = dict(upsert_batch_size=4, checkpoint_dir=str(tmp_path / "ckpt"), embedding_function=None)
+
+        falha = BulkIngestor(colecao, **opcoes).ingest(str(tmp_path / "corpus.jsonl"))
+        assert falha["status"] == "error"
+        assert falha["records_done"] == 4
+
+        retomada = BulkIngestor(colecao, **opcoes).ingest(str(tmp_path / "corpus.jsonl"))
+        assert retomada["status"] == "completed"
+        assert retomada["resumed_from"] == 4
+        assert retomada["documents"] == 8
+        assert colecao.count() == 12
+
+    def test_on_upsert_por_lote(self, tmp_path):
+        """Testa o callback chamado a cada lote gravado com id, conteúdo e metadados"""
+        escrever_jsonl(tmp_path / "corpus.jsonl", registros(10))
+        lotes = []
+        ingestor = BulkIngestor(ColecaoFake(), upsert_batch_size=4, checkpoint_dir=str(tmp_path / "ckpt"),
+                                embedding_function=None, on_upsert=lotes.append)
+
+        ingestor.ingest(str(tmp_path / "corpus.jsonl"))
+
+        assert [len(lote) for lote in lotes] == [4, 4, 2]
+        doc_id, content, metadata = lotes[0][0]
+        assert doc_id == "doc0" and content.startswith("Acórdão 0.") and metadata["tribunal"] == "TJSP"
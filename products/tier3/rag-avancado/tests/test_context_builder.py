@@ -0,0 +1,96 @@
+"""
+Testes do empacotamento do contexto (ContextBuilder / ContextPacker)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.services.context_builder import ContextBuilder
+from src.services.context_packer import ContextPacker, HEADER_SAMPLE, hamming, knapsack, simhash
+
+
+EMENTA = (
+    "A inscrição indevida do nome do consumidor em cadastro de inadimplentes gera dano moral "
+    "presumido, independentemente de prova do prejuízo. Precedentes da Segunda Seção. "
+    "O valor da indenização deve observar a razoabilidade e a proporcionalidade, evitando "
+    "o enriquecimento sem causa. Recurso especial conhecido e parcialmente provido."
+)
+LEI = (
+    "Art. 186. Aquele que, por ação ou omissão voluntária, negligência ou imprudência, violar "
+    "direito e causar dano a outrem, ainda que exclusivamente moral, comete ato ilícito."
+)
+
+
+def documento(doc_id, content, score):
+    return {"id": doc_id, "content": content, "similarity_score": score, "metadata": {"tipo": "jurisprudencia"}}
+
+
+class TestContextPacker:
+    """Testes do ContextPacker"""
+
+    def test_mochila_supera_guloso(self):
+        """Testa escolha ótima quando o item mais valioso não é o melhor pacote"""
+        assert knapsack([6, 5, 5], [10, 7, 7], 10) == [1, 2]
+        assert knapsack([11], [5], 10) == []
+
+    def test_simhash_quase_duplicata(self):
+        """Testa distância pequena para cópia reformatada e grande para texto diferente"""
+        copia = EMENTA.upper().replace(". ", ".\n  ")
+
+        assert hamming(simhash(EMENTA), simhash(copia)) == 0
+        assert hamming(simhash(EMENTA), simhash(LEI)) > 3
+
+    def test_duplicatas_removidas_e_orcamento(self):
+        """Testa ementa repetida em dois documentos, orçamento respeitado e trechos marcados"""
+        packer = ContextPacker(token_budget=150, passage_tokens=40, dedup_distance=3)
+        documentos = [
+            documento("d1", EMENTA, 0.9),
+            documento("d2", EMENTA.replace("  ", " ") + " ", 0.85),
+            documento("d3", LEI, 0.8),
+        ]
+
+        packed, stats = packer.pack(documentos, "inscrição indevida gera dano moral?")
+
+        ids = [doc["id"] for doc in packed]
+        assert "d2" not in ids
+        assert ids == sorted(ids)
+        assert stats["duplicates_removed"] >= 1
+        assert stats["context_tokens"] <= 150
+
+        prompt_tokens = sum(
+            packer.count_tokens(HEADER_SAMPLE) + packer.count_tokens(doc["content"]) for doc in packed
+        )
+        assert prompt_tokens <= 150 + len(packed) * 5
+        assert any(doc.get("truncated") for doc in packed)
+        assert all("[...]" in doc["content"] for doc in packed if doc.get("truncated"))
+        assert all(len(doc["source_hash"]) == 64 for doc in packed)
+
+    def test_tudo_cabe(self):
+        """Testa documentos inteiros (sem marcação) quando o orçamento sobra"""
+        packer = ContextPacker(token_budget=4000, passage_tokens=40)
+
+        packed, stats = packer.pack([documento("d1", EMENTA, 0.9), documento("d3", LEI, 0.8)])
+
+        assert [doc["content"] for doc in packed] == [EMENTA, LEI]
+        assert not any(doc.get("truncated") for doc in packed)
+        assert stats["passages_selected"] == stats["passages"]
+
+
+class TestContextBuilder:
+    """Testes do ContextBuilder com empacotamento"""
+
+    @pytest.mark.asyncio
+    async def test_contexto_com_estatisticas(self):
+        """Testa prompt numerado e estatísticas do empacotamento no metadata"""
+        builder = ContextBuilder()
+        query = {"original_query": "O que é dano moral?", "processed_query": "dano moral", "entities": {}}
+
+        context = await builder.build_context(query, [documento("d3", LEI, 0.7), documento("d1", EMENTA, 0.9)])
+
+        assert [doc["id"] for doc in context["documents"]] == ["d1", "d3"]
+        assert context["metadata"]["packing"]["context_tokens"] <= builder.max_context_length
+        assert "[Doc 1]" in context["formatted_prompt"] and "[Doc 2]" in context["formatted_prompt"]
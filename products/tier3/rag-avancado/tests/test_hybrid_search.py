@@ -0,0 +1,65 @@
+"""
+Testes do índice BM25 e da fusão por reciprocal rank fusion
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.hybrid_search import BM25Index, matches_where, reciprocal_rank_fusion, tokenize
+
+
+class TestBM25Index:
+    """Testes do índice BM25"""
+
+    def setup_method(self):
+        self.index = BM25Index()
+        self.index.add_many([
+            ("d1", "Apelação no processo 0001234-56.2023.8.26.0100 sobre dano moral", {"tribunal": "TJSP"}),
+            ("d2", "Dano moral por negativação indevida. Indenização fixada.", {"tribunal": "TJRJ"}),
+            ("d3", "Artigo 186 do Código Civil: ato ilícito gera indenização", {"tribunal": "STJ"}),
+            ("d4", "Habeas corpus concedido por excesso de prazo", {"tribunal": "STJ"}),
+        ])
+
+    def test_tokenize_preserva_cnj_e_remove_acentos(self):
+        """Testa número CNJ como token único e normalização"""
+        tokens = tokenize("Processo 0001234-56.2023.8.26.0100: Indenização")
+
+        assert "0001234-56.2023.8.26.0100" in tokens
+        assert "indenizacao" in tokens
+        assert "de" not in tokenize("dano de moral")
+
+    def test_numero_cnj_primeiro(self):
+        """Testa casamento exato do número do processo"""
+        results = self.index.search("processo 0001234-56.2023.8.26.0100", n_results=2)
+
+        assert results[0]["id"] == "d1"
+        assert results[0]["metadata"] == {"tribunal": "TJSP"}
+
+    def test_filtro_e_atualizacao(self):
+        """Testa filtro de metadados e substituição de documento"""
+        filtro = {"$or": [{"tribunal": {"$eq": "TJRJ"}}, {"tribunal": {"$eq": "STJ"}}]}
+        assert [r["id"] for r in self.index.search("indenização", where=filtro)] == ["d2", "d3"]
+
+        self.index.add("d2", "Texto sem relação", {"tribunal": "TJRJ"})
+        assert [r["id"] for r in self.index.search("indenização", where=filtro)] == ["d3"]
+        assert len(self.index) == 4
+
+
+def test_matches_where():
+    """Testa operadores usados pelo Retriever"""
+    metadata = {"tribunal": "STJ", "assunto": "dano moral"}
+
+    assert matches_where(metadata, None)
+    assert matches_where(metadata, {"$and": [{"tribunal": {"$eq": "STJ"}}, {"assunto": {"$in": ["dano moral"]}}]})
+    assert not matches_where(metadata, {"tribunal": {"$ne": "STJ"}})
+
+
+def test_reciprocal_rank_fusion_com_pesos():
+    """Testa fusão ponderada e normalização do score"""
+    fused = reciprocal_rank_fusion([(["a", "b", "c"], 0.8), (["c", "a"], 0.2)])
+
+    assert [doc_id for doc_id, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] < 1.0
+    assert reciprocal_rank_fusion([(["x"], 0.5), (["x"], 0.5)])[0] == ("x", 1.0)
@@ -0,0 +1,182 @@
+"""
+Testes do índice de metadados e do over-fetch adaptativo do Retriever
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.config import Config
+from src.services.hybrid_search import matches_where
+from src.services.metadata_index import MetadataIndex
+from src.services.retriever import Retriever
+
+
+class ColecaoFake:
+    """Coleção com similaridade fixa por documento (independe do texto da consulta)"""
+
+    def __init__(self, documentos):
+        # (id, metadata, similaridade), do mais para o menos similar
+        self.documentos = sorted(documentos, key=lambda d: d[2], reverse=True)
+        self.consultas = []
+        self.paginas = 0
+
+    def count(self):
+        return len(self.documentos)
+
+    def get(self, limit=None, offset=0, include=None):
+        self.paginas += 1
+        page = self.documentos[offset:offset + limit]
+        return {
+            "ids": [d[0] for d in page],
+            "documents": [f"conteúdo {d[0]}" for d in page],
+            "metadatas": [d[1] for d in page],
+        }
+
+    def query(self, query_texts, n_results, where=None, include=None):
+        self.consultas.append((n_results, where))
+        hits = [d for d in self.documentos if matches_where(d[1], where)][:n_results]
+        return {
+            "ids": [[d[0] for d in hits]],
+            "documents": [[f"conteúdo {d[0]}" for d in hits]],
+            "metadatas": [[d[1] for d in hits]],
+            "distances": [[1 - d[2] for d in hits]],
+        }
+
+
+def acervo(n=100, stj_a_cada=10):
+    """STJ em 1 de cada stj_a_cada documentos, TJSP nos demais; similaridade decrescente"""
+    return [
+        (f"d{i}", {"tribunal": "STJ" if i % stj_a_cada == 0 else "TJSP", "assunto": f"tema{i % 3}"}, 0.99 - i * 0.002)
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def retriever(monkeypatch):
+    monkeypatch.setattr(Retriever, "_initialize_chromadb", lambda self: None)
+    monkeypatch.setattr(Config, "RETRIEVAL_OVERFETCH_FACTOR", 2)
+    monkeypatch.setattr(Config, "RETRIEVAL_MAX_CANDIDATES", 200)
+    monkeypatch.setattr(Config, "PREFILTER_MAX_SELECTIVITY", 0.2)
+    monkeypatch.setattr(Config, "SIMILARITY_THRESHOLD", 0.7)
+    monkeypatch.setattr(Config, "RETRIEVAL_MODE", "dense")
+    return Retriever()
+
+
+class TestMetadataIndex:
+    """Testes da contagem de documentos por filtro"""
+
+    def test_contagem_dos_filtros(self):
+        """Testa $eq, $in, $or, $and, campo não indexado e operador não suportado"""
+        index = MetadataIndex(["tribunal", "assunto"])
+        index.add_many((doc_id, metadata) for doc_id, metadata, _ in acervo(30))
+
+        assert len(index) == 30
+        assert index.count({"tribunal": {"$eq": "STJ"}}) == 3
+        assert index.count({"tribunal": {"$in": ["STJ", "TJSP"]}}) == 30
+        assert index.count({"$or": [{"assunto": {"$eq": "tema0"}}, {"assunto": {"$eq": "tema1"}}]}) == 20
+        assert index.count({"$and": [{"tribunal": {"$eq": "STJ"}}, {"assunto": {"$eq": "tema0"}}]}) == 1
+        assert index.count({"magistrado": {"$eq": "Fulano"}}) is None
+        assert index.count({"$and": [{"tribunal": {"$eq": "STJ"}}, {"assunto": {"$ne": "tema0"}}]}) == 3
+        assert index.selectivity({"tribunal": "STJ"}) == pytest.approx(0.1)
+
+    def test_upsert_substitui_metadados(self):
+        """Testa documento regravado com outro tribunal contado só no valor novo"""
+        index = MetadataIndex(["tribunal", "assunto"])
+        index.add_many((doc_id, metadata) for doc_id, metadata, _ in acervo(30))
+
+        index.add("d0", {"tribunal": "TJRJ", "assunto": "tema0"})
+        index.add("d10", {"tribunal": "STJ", "assunto": "tema1"})
+        index.add("d0", {"tribunal": "TJMG", "assunto": "tema0"})
+
+        assert len(index) == 30
+        assert index.count({"tribunal": {"$eq": "STJ"}}) == 2
+        assert index.count({"tribunal": {"$in": ["TJRJ", "TJMG"]}}) == 1
+        assert index.count({"$and": [{"tribunal": {"$eq": "STJ"}}, {"assunto": {"$eq": "tema1"}}]}) == 1
+
+
+class TestPlanejamento:
+    """Testes do plano e do over-fetch adaptativo"""
+
+    def test_plano_pelo_tamanho_do_filtro(self, retriever):
+        """Testa pré-filtro para filtro seletivo e pós-filtro para filtro amplo"""
+        retriever.collection = ColecaoFake(acervo())
+
+        seletivo = retriever.plan_query({"tribunal": {"$eq": "STJ"}}, 5)
+        amplo = retriever.plan_query({"tribunal": {"$eq": "TJSP"}}, 5)
+
+        assert seletivo["strategy"] == "prefilter" and seletivo["matching"] == 10 and seletivo["fetch"] == 10
+        assert amplo["strategy"] == "postfilter" and amplo["fetch"] == 12
+        assert retriever.plan_query(None, 5)["strategy"] == "none"
+
+    @pytest.mark.asyncio
+    async def test_pos_filtro_cresce_ate_k(self, retriever):
+        """Testa candidatos dobrando até k documentos passarem do filtro"""
+        # TJSP é amplo (60%), mas os 40 mais similares são STJ
+        documentos = [(f"s{i}", {"tribunal": "STJ"}, 0.99 - i * 0.001) for i in range(40)]
+        documentos += [(f"t{i}", {"tribunal": "TJSP"}, 0.9 - i * 0.001) for i in range(60)]
+        retriever.collection = ColecaoFake(documentos)
+
+        docs = await retriever.retrieve("dano moral", {"entities": {"tribunal": "TJSP"}}, n_results=5)
+
+        assert [d["id"] for d in docs] == [f"t{i}" for i in range(5)]
+        assert [n for n, _ in retriever.collection.consultas] == [17, 34, 68]
+        assert all(where is None for _, where in retriever.collection.consultas)
+
+    @pytest.mark.asyncio
+    async def test_para_abaixo_do_threshold(self, retriever):
+        """Testa uma única consulta quando o candidato mais distante já não passa"""
+        documentos = [(f"d{i}", {"tribunal": "STJ"}, 0.9 - i * 0.1) for i in range(20)]
+        retriever.collection = ColecaoFake(documentos)
+
+        docs = await retriever.retrieve("dano moral", {"entities": {}}, n_results=5)
+
+        assert [d["id"] for d in docs] == ["d0", "d1", "d2"]
+        assert [d["rank"] for d in docs] == [1, 2, 3]
+        assert len(retriever.collection.consultas) == 1
+
+    @pytest.mark.asyncio
+    async def test_pos_filtro_no_teto_vira_pre_filtro(self, retriever, monkeypatch):
+        """Testa filtro correlacionado com a consulta: teto atingido e nova consulta com where"""
+        monkeypatch.setattr(Config, "RETRIEVAL_MAX_CANDIDATES", 30)
+        documentos = [(f"s{i}", {"tribunal": "STJ"}, 0.99 - i * 0.001) for i in range(40)]
+        documentos += [(f"t{i}", {"tribunal": "TJSP"}, 0.9 - i * 0.001) for i in range(60)]
+        retriever.collection = ColecaoFake(documentos)
+
+        docs = await retriever.retrieve("dano moral", {"entities": {"tribunal": "TJSP"}}, n_results=5)
+
+        assert [d["id"] for d in docs] == [f"t{i}" for i in range(5)]
+        assert retriever.collection.consultas[-1] == (10, {"tribunal": {"$eq": "TJSP"}})
+
+
+class TestIngestaoEmLote:
+    """Testes dos índices em memória durante a ingestão em lote"""
+
+    def test_lotes_atualizam_indices_sem_reconstruir(self, retriever):
+        """Testa upsert com a mesma contagem e documentos novos sem repaginar a coleção"""
+        retriever.collection = ColecaoFake(acervo(20))
+        retriever._ensure_lexical_index()
+        retriever.plan_query({"tribunal": {"$eq": "STJ"}}, 5)
+        paginas = retriever.collection.paginas
+
+        with retriever.bulk_update():
+            # d0 regravado (contagem igual) e n1 novo, como num lote do BulkIngestor
+            retriever.collection.documentos.append(("n1", {"tribunal": "STJ"}, 0.1))
+            retriever.index_documents([
+                ("d0", "usucapião extraordinária", {"tribunal": "TJRJ"}),
+                ("n1", "conteúdo n1", {"tribunal": "STJ"}),
+            ])
+            durante = retriever.plan_query({"tribunal": {"$eq": "STJ"}}, 5)
+            retriever._ensure_lexical_index()
+
+        assert retriever.collection.paginas == paginas
+        assert durante["matching"] == 2
+        assert [d["id"] for d in retriever.lexical_index.search("usucapião", 5)] == ["d0"]
+        assert retriever._lexical_count == retriever._metadata_count == 21
+
+        # Fora da ingestão, contagem igual: nada a reconstruir
+        assert retriever.plan_query({"tribunal": {"$eq": "TJRJ"}}, 5)["matching"] == 1
+        assert retriever.collection.paginas == paginas
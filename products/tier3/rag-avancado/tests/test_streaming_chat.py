@@ -0,0 +1,104 @@
+"""
+Testes da resposta em streaming do chat (WebSocket)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.api import websocket_chat
+from src.config import Config
+from src.database import Base
+from src.models.query import Citation, QueryHistory
+from src.services.citation_manager import CitationStream
+
+
+DOCUMENTOS = [
+    {"id": "d1", "content": "Dano moral por negativação indevida.", "similarity_score": 0.9,
+     "metadata": {"tipo": "jurisprudencia", "tribunal": "TJSP"}},
+    {"id": "d2", "content": "Art. 186 do Código Civil.", "similarity_score": 0.8,
+     "metadata": {"tipo": "legislacao"}},
+]
+
+
+class TestCitationStream:
+    """Testes da leitura incremental de [Doc N]"""
+
+    def test_marcador_partido_entre_trechos(self):
+        """Testa marcador que chega em dois pedaços e citação repetida"""
+        stream = CitationStream()
+
+        assert stream.feed("Conforme [Do") == []
+        assert stream.feed("c 2], e também [Doc 1]") == [2, 1]
+        assert stream.feed(" e [Doc 2] de novo") == []
+        assert stream.cited == [2, 1]
+
+    def test_colchete_sem_marcador(self):
+        """Testa texto com colchetes que não são citações"""
+        stream = CitationStream()
+
+        assert stream.feed("art. 5º [inciso X] e [") == []
+        assert stream.feed("Doc 1]") == [1]
+
+
+class TestHandleChatMessage:
+    """Testes do handle_chat_message com streaming"""
+
+    @pytest.fixture
+    def chat(self, monkeypatch):
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        monkeypatch.setattr(websocket_chat, "SessionLocal", session_factory)
+        monkeypatch.setattr(Config, "ENABLE_STREAMING", True)
+        monkeypatch.setattr(Config, "ENABLE_HISTORY", True)
+
+        enviadas = []
+
+        async def send_message(message, session_id):
+            enviadas.append(message)
+
+        async def retrieve(query, processed_query):
+            return DOCUMENTOS
+
+        async def stream_answer(context, temperature=0.3):
+            for trecho in ["O dano moral [Do", "c 1] decorre do ", "art. 186 [Doc 2]."]:
+                await asyncio.sleep(0)
+                yield {"type": "delta", "content": trecho}
+            yield {"type": "done", "answer": "O dano moral [Doc 1] decorre do art. 186 [Doc 2].",
+                   "confidence": 0.8, "tokens_used": 42}
+
+        monkeypatch.setattr(websocket_chat.manager, "send_message", send_message)
+        monkeypatch.setattr(websocket_chat.retriever, "retrieve", retrieve)
+        monkeypatch.setattr(websocket_chat.answer_generator, "stream_answer", stream_answer)
+        return enviadas, session_factory
+
+    @pytest.mark.asyncio
+    async def test_trechos_citacoes_e_historico(self, chat):
+        """Testa answer_chunk por trecho, citações ao aparecer e TTFT salvo"""
+        enviadas, session_factory = chat
+
+        response = await websocket_chat.handle_chat_message("s1", "O que é dano moral?")
+
+        tipos = [m["type"] for m in enviadas]
+        assert tipos == ["status", "status", "status", "answer_chunk", "answer_chunk",
+                         "citation", "answer_chunk", "citation", "answer"]
+        assert "".join(m["content"] for m in enviadas if m["type"] == "answer_chunk") == response["answer"]
+        assert [c["document_id"] for c in response["citations"]] == ["d1", "d2"]
+        assert response["time_to_first_token_ms"] is not None
+
+        db = session_factory()
+        historico = db.query(QueryHistory).one()
+        assert historico.id == response["query_id"]
+        assert historico.time_to_first_token_ms == response["time_to_first_token_ms"]
+        assert historico.tokens_used == 42
+        assert db.query(Citation).count() == 2
+        db.close()